@@ -6,6 +6,7 @@ module "transit" {
   tags             = var.tags
   transits         = var.transits
   tgws             = var.tgws
+  tgw_connect_ips  = var.tgw_connect_ips
   external_devices = var.external_devices
   spokes           = var.spokes
 }
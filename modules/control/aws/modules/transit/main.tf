@@ -34,25 +34,20 @@ locals {
 
   transit_tgw_map = { for pair in local.transit_tgw_pairs : pair.pair_key => pair }
 
+  connect_peer_names = flatten([for n in range(1, 9) : ["connect_peer_${n}", "ha_connect_peer_${n}"]])
+  transit_index      = { for i, k in local.transit_keys : k => i }
+  tgw_connect_cidr   = { for k, v in var.tgws : k => try(v.transit_gateway_cidr_blocks[0], null) }
+
+  # TGW-side Connect peer addresses: hosts 1-16 of the TGW's first CIDR block,
+  # offset by 4 per transit. Consecutive transits on the same TGW overlap with
+  # this stride; var.tgw_connect_ips (see tools.tgw_ipam) overrides it per pair.
   tgw_connect_ip = {
-    for pair in local.transit_tgw_pairs : pair.pair_key => {
-      connect_peer_1    = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 1 + index(local.transit_keys, pair.transit_key) * 4)
-      ha_connect_peer_1 = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 2 + index(local.transit_keys, pair.transit_key) * 4)
-      connect_peer_2    = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 3 + index(local.transit_keys, pair.transit_key) * 4)
-      ha_connect_peer_2 = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 4 + index(local.transit_keys, pair.transit_key) * 4)
-      connect_peer_3    = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 5 + index(local.transit_keys, pair.transit_key) * 4)
-      ha_connect_peer_3 = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 6 + index(local.transit_keys, pair.transit_key) * 4)
-      connect_peer_4    = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 7 + index(local.transit_keys, pair.transit_key) * 4)
-      ha_connect_peer_4 = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 8 + index(local.transit_keys, pair.transit_key) * 4)
-      connect_peer_5    = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 9 + index(local.transit_keys, pair.transit_key) * 4)
-      ha_connect_peer_5 = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 10 + index(local.transit_keys, pair.transit_key) * 4)
-      connect_peer_6    = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 11 + index(local.transit_keys, pair.transit_key) * 4)
-      ha_connect_peer_6 = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 12 + index(local.transit_keys, pair.transit_key) * 4)
-      connect_peer_7    = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 13 + index(local.transit_keys, pair.transit_key) * 4)
-      ha_connect_peer_7 = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 14 + index(local.transit_keys, pair.transit_key) * 4)
-      connect_peer_8    = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 15 + index(local.transit_keys, pair.transit_key) * 4)
-      ha_connect_peer_8 = cidrhost(element(local.tgw_name_to_info[pair.tgw_name].transit_gateway_cidr_blocks, 0), 16 + index(local.transit_keys, pair.transit_key) * 4)
-    }
+    for pair in local.transit_tgw_pairs : pair.pair_key => try(var.tgw_connect_ips[pair.pair_key], {
+      for i, name in local.connect_peer_names : name => cidrhost(
+        local.tgw_connect_cidr[pair.tgw_name],
+        i + 1 + local.transit_index[pair.transit_key] * 4
+      )
+    })
   }
 
   all_tgw_names = toset([for pair in local.transit_tgw_pairs : pair.tgw_name])
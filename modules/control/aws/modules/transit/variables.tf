@@ -78,6 +78,29 @@ variable "tgws" {
   default = {}
 }
 
+variable "tgw_connect_ips" {
+  description = "TGW-side Connect peer addresses keyed by \"<transit key>.<tgw name>\", as written by tools.tgw_ipam. Pairs not listed use addresses computed from the TGW CIDR block."
+  type = map(object({
+    connect_peer_1    = string
+    ha_connect_peer_1 = string
+    connect_peer_2    = string
+    ha_connect_peer_2 = string
+    connect_peer_3    = string
+    ha_connect_peer_3 = string
+    connect_peer_4    = string
+    ha_connect_peer_4 = string
+    connect_peer_5    = string
+    ha_connect_peer_5 = string
+    connect_peer_6    = string
+    ha_connect_peer_6 = string
+    connect_peer_7    = string
+    ha_connect_peer_7 = string
+    connect_peer_8    = string
+    ha_connect_peer_8 = string
+  }))
+  default = {}
+}
+
 variable "external_devices" {
   description = "Map of external devices to connect to Aviatrix Transit Gateways."
   type = map(object({
@@ -1,18 +1,38 @@
 """Shared test fixtures for terraform-based tests."""
 
+import csv
+import hashlib
+import io
 import json
 import os
+import random
+import re
+import shlex
 import subprocess
+import tempfile
+import threading
 import time
-from dataclasses import dataclass
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
 from pathlib import Path
-from typing import Generator
-from urllib.parse import urljoin
+from typing import Callable, Generator, Iterator
+from urllib.parse import quote, urljoin
 
 import hcl2
 import paramiko
 import pytest
 import requests
+from requests.adapters import HTTPAdapter
+
+from tools.critical_path import parse_timestamp
+
+try:
+    import fcntl
+except ImportError:  # Not POSIX: the plugin cache lock is per process only.
+    fcntl = None
 
 # -----------------------------------------------------------------------------
 # Terraform Exceptions
@@ -40,389 +60,3172 @@ class TerraformDestroyError(TerraformError):
     """Raised when terraform destroy fails."""
 
 
+class TerraformPlanError(TerraformError):
+    """Raised when terraform plan fails."""
+
+
+# -----------------------------------------------------------------------------
+# Terraform Streaming Runner
+# -----------------------------------------------------------------------------
+
+
+@dataclass(slots=True)
+class TerraformEvent:
+    """One line of terraform output.
+
+    Lines of ``-json`` output carry the machine-readable message type; any
+    other line (plain-text commands, crash output) has type "log".
+
+    Attributes:
+        type: Message type, e.g. "apply_start", "apply_complete", "diagnostic".
+        timestamp: Epoch seconds of the event (local time for "log" lines).
+        level: Log level ("info", "error", ...).
+        message: Human-readable message.
+        resource: Resource instance address for hook events.
+        action: Hook action ("create", "update", "delete", ...).
+        elapsed: Seconds reported by "apply_complete"/"apply_errored" hooks.
+        data: The decoded JSON message ({} for "log" lines).
+    """
+
+    type: str
+    timestamp: float
+    level: str
+    message: str
+    resource: str | None = None
+    action: str | None = None
+    elapsed: float | None = None
+    data: dict = field(default_factory=dict)
+
+
+def parse_terraform_event(line: str) -> TerraformEvent:
+    """Parse one line of terraform output into a TerraformEvent."""
+    line = line.rstrip("\n")
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict) or "type" not in data:
+        return TerraformEvent("log", time.time(), "info", line)
+
+    hook = data.get("hook") or {}
+    resource = hook.get("resource") or {}
+    return TerraformEvent(
+        type=data["type"],
+        timestamp=(
+            parse_timestamp(data["@timestamp"])
+            if "@timestamp" in data
+            else time.time()
+        ),
+        level=data.get("@level", "info"),
+        message=data.get("@message", ""),
+        resource=resource.get("addr"),
+        action=hook.get("action"),
+        elapsed=hook.get("elapsed_seconds"),
+        data=data,
+    )
+
+
+@dataclass(slots=True)
+class ResourceTiming:
+    """Start/complete/error timestamps of one resource operation."""
+
+    address: str
+    action: str | None = None
+    started_at: float | None = None
+    completed_at: float | None = None
+    errored_at: float | None = None
+
+    @property
+    def duration(self) -> float | None:
+        end = self.completed_at or self.errored_at
+        if self.started_at is None or end is None:
+            return None
+        return end - self.started_at
+
+
+class TerraformRun:
+    """A terraform command whose output is parsed while it runs.
+
+    Output is spooled line by line to ``log_path`` instead of being buffered in
+    memory; only per-resource timings, error diagnostics and a short tail of
+    plain-text output are retained.
+
+    Usage:
+        run = TerraformRun(["terraform", "apply", "-json", ...], tf_dir, log_path)
+        for event in run:
+            if event.type == "apply_complete":
+                print(event.resource, event.elapsed)
+        assert run.returncode == 0, run.error_summary()
+    """
+
+    def __init__(
+        self,
+        cmd: list[str],
+        tf_dir: Path,
+        log_path: Path,
+        timeout: int = 1800,
+        on_event: Callable[[TerraformEvent], None] | None = None,
+        env: dict[str, str] | None = None,
+    ) -> None:
+        """Initialize a run (not started).
+
+        Args:
+            cmd: Terraform command line.
+            tf_dir: Working directory.
+            log_path: File the raw output is written to.
+            timeout: Seconds before the process is killed.
+            on_event: Callback for every parsed event.
+            env: Extra environment variables for the process.
+        """
+        self.cmd = cmd
+        self.tf_dir = tf_dir
+        self.log_path = log_path
+        self.timeout = timeout
+        self.on_event = on_event
+        self.env = env
+        self.returncode: int | None = None
+        self.timings: dict[str, ResourceTiming] = {}
+        self.diagnostics: list[TerraformEvent] = []
+        self.tail: deque[str] = deque(maxlen=50)
+        self.timed_out = False
+
+    def __repr__(self) -> str:
+        return f"TerraformRun({' '.join(self.cmd[:2])}, returncode={self.returncode})"
+
+    def __iter__(self) -> Iterator[TerraformEvent]:
+        """Run the command, yielding events as terraform prints them.
+
+        Raises:
+            subprocess.TimeoutExpired: If the command exceeds ``timeout``.
+        """
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        process = subprocess.Popen(
+            self.cmd,
+            cwd=self.tf_dir,
+            env={**os.environ, **self.env} if self.env else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        )
+
+        def kill() -> None:
+            self.timed_out = True
+            process.kill()
+
+        watchdog = threading.Timer(self.timeout, kill)
+        watchdog.start()
+        try:
+            with open(self.log_path, "w") as log:
+                assert process.stdout is not None
+                for line in process.stdout:
+                    log.write(line)
+                    event = parse_terraform_event(line)
+                    self._record(event)
+                    if self.on_event:
+                        self.on_event(event)
+                    yield event
+            self.returncode = process.wait()
+        finally:
+            watchdog.cancel()
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+        if self.timed_out:
+            raise subprocess.TimeoutExpired(self.cmd, self.timeout)
+
+    def run(self) -> int:
+        """Run the command to completion and return its exit code."""
+        for _ in self:
+            pass
+        assert self.returncode is not None
+        return self.returncode
+
+    def error_summary(self) -> str:
+        """Describe why the command failed, from diagnostics or trailing output."""
+        errors = []
+        for diagnostic in self.diagnostics:
+            if diagnostic.level == "error":
+                detail = diagnostic.data.get("diagnostic", {}).get("detail", "")
+                message = diagnostic.message
+                errors.append(f"{message}: {detail}" if detail else message)
+        return "\n".join(errors or self.tail)
+
+    def _record(self, event: TerraformEvent) -> None:
+        if event.type == "log":
+            self.tail.append(event.message)
+        elif event.type == "diagnostic":
+            self.diagnostics.append(event)
+        if event.resource is None:
+            return
+
+        timing = self.timings.setdefault(event.resource, ResourceTiming(event.resource))
+        timing.action = event.action or timing.action
+        if event.type == "apply_start":
+            timing.started_at = event.timestamp
+        elif event.type == "apply_complete":
+            timing.completed_at = event.timestamp
+        elif event.type == "apply_errored":
+            timing.errored_at = event.timestamp
+
+
+def _print_progress(event: TerraformEvent) -> None:
+    """Default on_event callback: report resource progress as it happens."""
+    if event.type in ("apply_start", "apply_complete", "apply_errored"):
+        print(f"  [{datetime.now():%H:%M:%S}] {event.message}")
+
+
+def terraform_log_path(tf_dir: Path, command: str) -> Path:
+    """Return where to spool the output of a terraform command.
+
+    Logs go under AVX_TF_LOG_DIR/<stage>/ if set, else <tf_dir>/.terraform/logs/.
+    """
+    log_dir = os.environ.get("AVX_TF_LOG_DIR")
+    if log_dir:
+        base = Path(log_dir) / tf_dir.resolve().name
+    else:
+        base = tf_dir / ".terraform" / "logs"
+    return base / f"{command}-{datetime.now():%Y%m%dT%H%M%S}.log"
+
+
+# -----------------------------------------------------------------------------
+# Terraform State Reader
+# -----------------------------------------------------------------------------
+
+
+_STATE_CHUNK_SIZE = 1 << 16
+_JSON_DECODER = json.JSONDecoder()
+_WHITESPACE_RE = re.compile(r"[ \t\n\r]*")
+_STRUCTURE_RE = re.compile(r'["{}\[\]]')
+_STRING_TAIL_RE = re.compile(r'(?:[^"\\]|\\.)*"')
+
+# In-process memo of state outputs, keyed by (path, mtime_ns, size).
+_STATE_OUTPUTS: dict[tuple[str, int, int], dict] = {}
+_STATE_OUTPUTS_LOCK = threading.Lock()
+
+
+class _ChunkedJSON:
+    """Incremental reader over a JSON document, loaded in chunks on demand.
+
+    Only the text between the current position and the end of the value being
+    decoded is held in memory; skipped values are scanned, not decoded.
+    """
+
+    def __init__(self, f: io.TextIOBase) -> None:
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Drop consumed text and read another chunk; False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.f.read(max(_STATE_CHUNK_SIZE, len(self.buf) - self.pos))
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return bool(chunk)
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ("" at end of file)."""
+        while True:
+            self.pos = _WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self._fill():
+                return self.buf[self.pos : self.pos + 1]
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos} of state")
+        self.pos += 1
+
+    def decode(self):
+        """Decode the next value, reading more of the file until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = _JSON_DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            if end == len(self.buf) and self._fill():
+                # A number may continue in the next chunk.
+                continue
+            self.pos = end
+            return value
+
+    def skip(self) -> None:
+        """Advance past the next value without building it."""
+        if self.peek() not in "{[":
+            self.decode()
+            return
+        depth = 0
+        while True:
+            match = _STRUCTURE_RE.search(self.buf, self.pos)
+            if match and match.group() == '"':
+                end = _STRING_TAIL_RE.match(self.buf, match.end())
+                if end:
+                    self.pos = end.end()
+                    continue
+                # The string continues in the next chunk.
+                self.pos = match.start()
+            elif match:
+                self.pos = match.end()
+                depth += 1 if match.group() in "{[" else -1
+                if depth == 0:
+                    return
+                continue
+            else:
+                self.pos = len(self.buf)
+            if not self._fill():
+                raise ValueError("Unexpected end of state file")
+
+
+def _read_outputs_section(state_file: Path) -> dict:
+    """Decode only the top-level "outputs" object of a state file.
+
+    Terraform writes "outputs" before "resources", so the resources are
+    normally never read at all.
+    """
+    with open(state_file) as f:
+        reader = _ChunkedJSON(f)
+        reader.expect("{")
+        while reader.peek() != "}":
+            key = reader.decode()
+            reader.expect(":")
+            if key == "outputs":
+                return reader.decode()
+            reader.skip()
+            if reader.peek() == ",":
+                reader.pos += 1
+    return {}
+
+
+def _outputs_cache_file(state_file: Path) -> Path:
+    return state_file.parent / ".terraform" / f"{state_file.name}.outputs.json"
+
+
+def read_state_outputs(state_file: Path) -> dict:
+    """Return the outputs section of a terraform state file, memoized.
+
+    Results are cached per (path, mtime, size): in memory for this process and
+    in ``.terraform/<state>.outputs.json`` so other pytest workers and later
+    sessions skip parsing an unchanged state. The returned dict is shared;
+    treat it as read-only.
+
+    Args:
+        state_file: Path to terraform.tfstate.
+
+    Returns:
+        The raw "outputs" object ({} if the file does not exist).
+    """
+    try:
+        stat = state_file.stat()
+    except FileNotFoundError:
+        return {}
+    key = (str(state_file.resolve()), stat.st_mtime_ns, stat.st_size)
+
+    with _STATE_OUTPUTS_LOCK:
+        if key in _STATE_OUTPUTS:
+            return _STATE_OUTPUTS[key]
+
+    cache_file = _outputs_cache_file(state_file)
+    outputs = None
+    try:
+        with open(cache_file) as f:
+            cached = json.load(f)
+        if (cached["mtime_ns"], cached["size"]) == key[1:]:
+            outputs = cached["outputs"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    if outputs is None:
+        outputs = _read_outputs_section(state_file)
+        if cache_file.parent.is_dir():
+            # Write atomically: other workers may be reading the same file.
+            with tempfile.NamedTemporaryFile(
+                "w", dir=cache_file.parent, suffix=".tmp", delete=False
+            ) as f:
+                json.dump({"mtime_ns": key[1], "size": key[2], "outputs": outputs}, f)
+            os.replace(f.name, cache_file)
+
+    with _STATE_OUTPUTS_LOCK:
+        _STATE_OUTPUTS[key] = outputs
+    return outputs
+
+
+# -----------------------------------------------------------------------------
+# Terraform Parallelism Tuning
+# -----------------------------------------------------------------------------
+
+
+TUNING_FILE = "parallelism.json"
+
+# Concurrent operations each provider sustains before its API throttles. The
+# Aviatrix controller serializes most operations, so beyond a few concurrent
+# calls requests only queue up and fail with busy or lock errors.
+PROVIDER_PARALLELISM = {
+    "aviatrix": 4,
+    "azurerm": 16,
+    "google": 24,
+    "aws": 32,
+    "http": 32,
+    "local": 64,
+    "null": 64,
+    "random": 64,
+    "terraform": 64,
+    "time": 64,
+    "tls": 64,
+}
+DEFAULT_PARALLELISM = 10
+
+# Resource types taking less than this share of a stage's work do not limit
+# its parallelism.
+_WORK_SHARE_THRESHOLD = 0.1
+
+# Delays between attempts of a throttled apply or destroy (see backoff_delay).
+RETRY_BASE_DELAY = 30.0
+RETRY_MAX_DELAY = 300.0
+
+_THROTTLE_RE = re.compile(
+    r"rate ?exceeded|throttl|too many requests|\b429\b|request limit|"
+    r"quota exceeded|slow down|try again later",
+    re.IGNORECASE,
+)
+_LOCK_RE = re.compile(
+    r"state lock|another operation is in progress|operation in progress|"
+    r"controller is busy|is currently locked|concurrent (?:update|modification)",
+    re.IGNORECASE,
+)
+_INSTANCE_KEY_RE = re.compile(r"\[[^\]]*\]")
+
+
+def resource_type(address: str) -> str | None:
+    """Return the type of a resource instance address (None for data sources).
+
+    ``module.transit.aws_route.route["a.x"]`` -> ``aws_route``.
+    """
+    parts = _INSTANCE_KEY_RE.sub("", address).split(".")
+    while parts[:1] == ["module"]:
+        parts = parts[2:]
+    if not parts or parts[0] == "data":
+        return None
+    return parts[0]
+
+
+def provider_parallelism(type_: str) -> int:
+    """Concurrency a resource type's provider sustains.
+
+    AVX_CONTROLLER_PARALLELISM overrides the limit for the Aviatrix provider.
+    """
+    provider = type_.split("_", 1)[0]
+    if provider == "aviatrix" and os.environ.get("AVX_CONTROLLER_PARALLELISM"):
+        return int(os.environ["AVX_CONTROLLER_PARALLELISM"])
+    return PROVIDER_PARALLELISM.get(provider, DEFAULT_PARALLELISM)
+
+
+def stage_resource_types(tf_dir: Path) -> dict[str, int]:
+    """Count resource blocks per type in a stage and every module it calls.
+
+    Modules come from .terraform/modules/modules.json when the stage is
+    initialized, else only local modules are followed.
+    """
+    module_dirs = local_module_dirs(tf_dir)
+    try:
+        with open(tf_dir / ".terraform" / "modules" / "modules.json") as f:
+            manifest = json.load(f)["Modules"]
+        module_dirs = [tf_dir.resolve()] + [
+            (tf_dir / entry["Dir"]).resolve() for entry in manifest if entry["Key"]
+        ]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    counts: dict[str, int] = {}
+    for module_dir in dict.fromkeys(module_dirs):
+        for parsed in _load_tf_files(module_dir):
+            for resource_block in parsed.get("resource", []):
+                for type_, blocks in resource_block.items():
+                    counts[type_] = counts.get(type_, 0) + len(blocks)
+    return counts
+
+
+def classify_diagnostic(event: TerraformEvent) -> str | None:
+    """Classify an error diagnostic as "throttle", "lock" or fatal (None)."""
+    diagnostic = event.data.get("diagnostic", {})
+    text = " ".join(
+        [event.message, diagnostic.get("summary", ""), diagnostic.get("detail", "")]
+    )
+    if _THROTTLE_RE.search(text):
+        return "throttle"
+    if _LOCK_RE.search(text):
+        return "lock"
+    return None
+
+
+@dataclass(slots=True)
+class RetryPlan:
+    """What a failed run needs to be retried, from its error diagnostics.
+
+    Attributes:
+        retryable: Every error was a rate-limit or lock error.
+        targets: Resource addresses to retry with ``-target``; empty when an
+            error (such as a state lock) was not tied to a resource.
+        errors: Number of error diagnostics.
+    """
+
+    retryable: bool
+    targets: list[str]
+    errors: int
+
+    @classmethod
+    def from_run(cls, run: TerraformRun) -> "RetryPlan":
+        errors = [d for d in run.diagnostics if d.level == "error"]
+        kinds = [classify_diagnostic(d) for d in errors]
+        addresses = [d.data.get("diagnostic", {}).get("address") for d in errors]
+        if not all(addresses):
+            addresses = []
+        return cls(
+            retryable=bool(errors) and all(kinds),
+            targets=sorted(set(addresses)),
+            errors=len(errors),
+        )
+
+
+@dataclass(slots=True)
+class StageTuning:
+    """Parallelism history of one terraform command in a stage.
+
+    Stored in ``.terraform/parallelism.json``. The ceiling follows additive
+    increase, multiplicative decrease: a throttled run halves it, a clean run
+    at the ceiling raises it by one.
+
+    Attributes:
+        ceiling: Highest parallelism known to run without throttling, or None
+            before the first run.
+        work: Resource type -> seconds of operations in the last run.
+    """
+
+    ceiling: int | None = None
+    work: dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, tf_dir: Path, command: str) -> "StageTuning":
+        try:
+            with open(tf_dir / ".terraform" / TUNING_FILE) as f:
+                return cls(**json.load(f)[command])
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls()
+
+    def save(self, tf_dir: Path, command: str) -> None:
+        path = tf_dir / ".terraform" / TUNING_FILE
+        if not path.parent.is_dir():
+            return
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data[command] = asdict(self)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=path.parent, suffix=".tmp", delete=False
+        ) as f:
+            json.dump(data, f, indent=2)
+        os.replace(f.name, path)
+
+    def record(self, runs: list[TerraformRun], parallelism: int, outcome: str) -> None:
+        """Update the history after a command, across all of its attempts.
+
+        Args:
+            runs: Every attempt of the command.
+            parallelism: Parallelism of the last attempt.
+            outcome: "clean" (no throttling), "recovered" (throttled, then
+                succeeded), "throttled" (still throttled) or "failed" (fatal
+                error; the ceiling is kept).
+        """
+        work: dict[str, float] = {}
+        for run in runs:
+            for address, timing in run.timings.items():
+                type_ = resource_type(address)
+                if type_ and timing.duration is not None:
+                    work[type_] = work.get(type_, 0.0) + timing.duration
+        if work:
+            self.work = work
+        if outcome == "throttled":
+            self.ceiling = max(1, parallelism // 2)
+        elif outcome == "recovered":
+            self.ceiling = parallelism
+        elif outcome == "clean" and parallelism >= (self.ceiling or 0):
+            self.ceiling = parallelism + 1
+
+
+def choose_parallelism(tf_dir: Path, command: str = "apply") -> int:
+    """Pick the ``-parallelism`` of a stage from its resource mix and history.
+
+    Each resource type taking a real share of the stage's work (seconds from
+    the last run, else resource block counts) limits the stage to what its
+    provider sustains, and the stage runs at the lowest such limit: a stage of
+    cloud resources only runs wide, one driving the controller runs narrow.
+    The result never exceeds the ceiling learned from earlier throttling.
+    AVX_TF_PARALLELISM fixes the value for every stage.
+
+    Args:
+        tf_dir: Stage directory.
+        command: "apply" or "destroy".
+
+    Returns:
+        Parallelism to pass to terraform.
+    """
+    if os.environ.get("AVX_TF_PARALLELISM"):
+        return int(os.environ["AVX_TF_PARALLELISM"])
+
+    tuning = StageTuning.load(tf_dir, command)
+    work = tuning.work or stage_resource_types(tf_dir)
+    total = sum(work.values())
+    limits = [
+        provider_parallelism(type_)
+        for type_, amount in work.items()
+        if total and amount / total >= _WORK_SHARE_THRESHOLD
+    ]
+    parallelism = min(limits, default=DEFAULT_PARALLELISM)
+    if tuning.ceiling is not None:
+        parallelism = min(parallelism, tuning.ceiling)
+    return max(1, parallelism)
+
+
+def run_adaptive(
+    cmd: list[str],
+    tf_dir: Path,
+    command: str,
+    timeout: int,
+    on_event: Callable[[TerraformEvent], None] | None,
+    error_class: type[TerraformError],
+    parallelism: int | None = None,
+    max_retries: int = 3,
+) -> TerraformRun:
+    """Run apply or destroy at a tuned parallelism, retrying throttled resources.
+
+    When every error of a run is a rate-limit or lock error, the command is
+    retried after a backoff at half the parallelism, with ``-target`` for each
+    failed resource. Resources depending on them were skipped, so once the
+    targeted run succeeds the untargeted command runs again to converge.
+
+    Args:
+        cmd: Terraform command line without ``-parallelism``.
+        tf_dir: Stage directory.
+        command: "apply" or "destroy" (log and history name).
+        timeout: Seconds for all attempts together.
+        on_event: Callback for each event as it arrives.
+        error_class: Exception raised on failure.
+        parallelism: Fixed parallelism; None picks one with choose_parallelism().
+        max_retries: Maximum retries after throttling.
+
+    Returns:
+        The last TerraformRun.
+
+    Raises:
+        TerraformError: ``error_class`` if a run fails with a fatal error or
+            still fails after ``max_retries`` retries.
+        subprocess.TimeoutExpired: If the attempts exceed ``timeout``; no
+            attempt starts once it has passed.
+    """
+    tuned = parallelism is None
+    tuning = StageTuning.load(tf_dir, command)
+    if parallelism is None:
+        parallelism = choose_parallelism(tf_dir, command)
+    deadline = time.monotonic() + timeout
+    runs: list[TerraformRun] = []
+    targets: list[str] = []
+    retries = 0
+    outcome = "failed"
+    try:
+        while True:
+            attempt_cmd = [*cmd, f"-parallelism={parallelism}"]
+            attempt_cmd += [f"-target={address}" for address in targets]
+            name = command if not runs else f"{command}-retry{len(runs)}"
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise subprocess.TimeoutExpired(attempt_cmd, timeout)
+            run = TerraformRun(
+                attempt_cmd,
+                tf_dir,
+                terraform_log_path(tf_dir, name),
+                max(1, int(remaining)),
+                on_event,
+            )
+            runs.append(run)
+            if run.run() == 0:
+                if not targets:
+                    outcome = "recovered" if retries else "clean"
+                    return run
+                targets = []
+                continue
+
+            retry = RetryPlan.from_run(run)
+            if not retry.retryable or retries >= max_retries:
+                outcome = "throttled" if retry.retryable else "failed"
+                raise error_class(
+                    f"terraform {command} failed: {run.error_summary()}",
+                    run.returncode,
+                    attempt_cmd,
+                )
+            delay = backoff_delay(retries, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+            parallelism = max(1, parallelism // 2)
+            targets = retry.targets
+            retries += 1
+            print(
+                f"  {tf_dir.name}: {retry.errors} throttled operation(s), retrying"
+                f" {len(targets) or 'all'} resource(s) at -parallelism={parallelism}"
+                f" in {delay:.0f}s"
+            )
+            time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+    finally:
+        if tuned:
+            tuning.record(runs, parallelism, outcome)
+            tuning.save(tf_dir, command)
+
+
 # -----------------------------------------------------------------------------
 # Terraform Helper Functions
 # -----------------------------------------------------------------------------
 
 
-def terraform_init(tf_dir: Path, upgrade: bool = True, timeout: int = 300) -> None:
+def plugin_cache_dir() -> Path:
+    """Return the provider plugin cache shared by every stage, creating it.
+
+    Uses TF_PLUGIN_CACHE_DIR if set, else terraform's conventional
+    ~/.terraform.d/plugin-cache.
+    """
+    cache = Path(
+        os.environ.get("TF_PLUGIN_CACHE_DIR")
+        or Path.home() / ".terraform.d" / "plugin-cache"
+    )
+    cache.mkdir(parents=True, exist_ok=True)
+    return cache
+
+
+def terraform_init(
+    tf_dir: Path,
+    upgrade: bool = True,
+    timeout: int = 300,
+    on_event: Callable[[TerraformEvent], None] | None = None,
+) -> TerraformRun:
     """Run terraform init in specified directory.
 
+    Providers are installed through the shared plugin cache. With
+    AVX_TF_OFFLINE set, providers come only from AVX_TF_PROVIDER_MIRROR (or
+    the plugin cache, which has the same layout) and nothing is upgraded.
+
     Args:
         tf_dir: Directory containing terraform files.
         upgrade: Whether to upgrade providers/modules.
         timeout: Command timeout in seconds.
+        on_event: Callback for each output line as it arrives.
+
+    Returns:
+        The completed TerraformRun (its log_path holds the full output).
 
     Raises:
         TerraformInitError: If init fails.
     """
-    cmd = ["terraform", "init"]
-    if upgrade:
+    cache = plugin_cache_dir()
+    cmd = ["terraform", "init", "-input=false"]
+    if os.environ.get("AVX_TF_OFFLINE"):
+        mirror = os.environ.get("AVX_TF_PROVIDER_MIRROR") or str(cache)
+        cmd.append(f"-plugin-dir={mirror}")
+    elif upgrade:
         cmd.append("-upgrade")
 
-    result = subprocess.run(
-        cmd,
-        cwd=tf_dir,
-        capture_output=True,
-        text=True,
-        timeout=timeout,
-    )
-    if result.returncode != 0:
-        raise TerraformInitError(f"terraform init failed: {result.stderr}", result.returncode, cmd)
-
-
-def terraform_apply(tf_dir: Path, var_file: str, timeout: int = 1800) -> None:
+    log_path = terraform_log_path(tf_dir, "init")
+    env = {"TF_PLUGIN_CACHE_DIR": str(cache)}
+    run = TerraformRun(cmd, tf_dir, log_path, timeout, on_event, env)
+    if run.run() != 0:
+        raise TerraformInitError(
+            f"terraform init failed: {run.error_summary()}", run.returncode, cmd
+        )
+    return run
+
+
+def terraform_apply(
+    tf_dir: Path,
+    var_file: str,
+    timeout: int = 1800,
+    variables: dict[str, str] | None = None,
+    on_event: Callable[[TerraformEvent], None] | None = _print_progress,
+    parallelism: int | None = None,
+    max_retries: int = 3,
+) -> TerraformRun:
     """Run terraform apply in specified directory.
 
+    Output is streamed with ``-json``: per-resource timings are available on
+    the returned run and the raw event log is spooled to disk. Parallelism is
+    tuned per stage and throttled resources are retried (see run_adaptive).
+
     Args:
         tf_dir: Directory containing terraform files.
         var_file: Path to terraform var file.
         timeout: Command timeout in seconds (default 30 minutes).
+        variables: Extra -var overrides applied on top of the var file.
+        on_event: Callback for each event as it arrives (default: print
+            resource progress).
+        parallelism: Fixed -parallelism (default: choose_parallelism()).
+        max_retries: Maximum retries after rate-limit or lock errors.
+
+    Returns:
+        The completed TerraformRun.
 
     Raises:
         TerraformApplyError: If apply fails.
     """
-    cmd = ["terraform", "apply", "-auto-approve", "-var-file", var_file]
+    cmd = ["terraform", "apply", "-auto-approve", "-json", "-var-file", var_file]
+    for name, value in (variables or {}).items():
+        cmd += ["-var", f"{name}={value}"]
 
-    result = subprocess.run(
+    clear_fingerprint(tf_dir)
+    return run_adaptive(
         cmd,
-        cwd=tf_dir,
-        capture_output=True,
-        text=True,
-        timeout=timeout,
+        tf_dir,
+        "apply",
+        timeout,
+        on_event,
+        TerraformApplyError,
+        parallelism,
+        max_retries,
     )
-    if result.returncode != 0:
-        raise TerraformApplyError(f"terraform apply failed: {result.stderr}", result.returncode, cmd)
 
 
-def terraform_destroy(tf_dir: Path, var_file: str, timeout: int = 1800) -> None:
+def terraform_destroy(
+    tf_dir: Path,
+    var_file: str,
+    timeout: int = 1800,
+    on_event: Callable[[TerraformEvent], None] | None = _print_progress,
+    parallelism: int | None = None,
+    max_retries: int = 3,
+) -> TerraformRun:
     """Run terraform destroy in specified directory.
 
+    Parallelism is tuned per stage and throttled resources are retried (see
+    run_adaptive).
+
     Args:
         tf_dir: Directory containing terraform files.
         var_file: Path to terraform var file.
         timeout: Command timeout in seconds (default 30 minutes).
+        on_event: Callback for each event as it arrives (default: print
+            resource progress).
+        parallelism: Fixed -parallelism (default: choose_parallelism()).
+        max_retries: Maximum retries after rate-limit or lock errors.
+
+    Returns:
+        The completed TerraformRun.
 
     Raises:
         TerraformDestroyError: If destroy fails.
     """
-    cmd = ["terraform", "destroy", "-auto-approve", "-var-file", var_file]
+    cmd = ["terraform", "destroy", "-auto-approve", "-json", "-var-file", var_file]
 
-    result = subprocess.run(
+    clear_fingerprint(tf_dir)
+    return run_adaptive(
         cmd,
-        cwd=tf_dir,
-        capture_output=True,
-        text=True,
-        timeout=timeout,
+        tf_dir,
+        "destroy",
+        timeout,
+        on_event,
+        TerraformDestroyError,
+        parallelism,
+        max_retries,
     )
-    if result.returncode != 0:
-        raise TerraformDestroyError(f"terraform destroy failed: {result.stderr}", result.returncode, cmd)
+
+
+def terraform_plan_has_changes(
+    tf_dir: Path,
+    var_file: str,
+    timeout: int = 600,
+    variables: dict[str, str] | None = None,
+) -> bool:
+    """Check for pending changes or drift with ``plan -detailed-exitcode``.
+
+    The plan is not saved and the state is not locked.
+
+    Args:
+        tf_dir: Directory containing terraform files (already initialized).
+        var_file: Path to terraform var file.
+        timeout: Command timeout in seconds.
+        variables: Extra -var overrides applied on top of the var file.
+
+    Returns:
+        True if applying would change anything, False if the stage is current.
+
+    Raises:
+        TerraformPlanError: If plan fails.
+    """
+    cmd = [
+        "terraform",
+        "plan",
+        "-detailed-exitcode",
+        "-input=false",
+        "-lock=false",
+        "-json",
+        "-var-file",
+        var_file,
+    ]
+    for name, value in (variables or {}).items():
+        cmd += ["-var", f"{name}={value}"]
+
+    log_path = terraform_log_path(tf_dir, "plan")
+    run = TerraformRun(cmd, tf_dir, log_path, timeout)
+    returncode = run.run()
+    if returncode not in (0, 2):
+        raise TerraformPlanError(
+            f"terraform plan failed: {run.error_summary()}", returncode, cmd
+        )
+    return returncode == 2
 
 
 def terraform_output(tf_dir: Path) -> dict:
     """Load terraform outputs from state file.
 
+    Only the outputs section of the state is parsed, and unchanged states are
+    served from cache (see read_state_outputs).
+
     Args:
         tf_dir: Directory containing terraform state.
 
     Returns:
         Dictionary of outputs with format {"key": {"value": value}}.
     """
-    state_file = tf_dir / "terraform.tfstate"
-    if not state_file.exists():
-        return {}
-
-    with open(state_file) as f:
-        state = json.load(f)
-
-    outputs = {}
-    for key, value in state.get("outputs", {}).items():
-        outputs[key] = {"value": value.get("value")}
-    return outputs
+    outputs = read_state_outputs(tf_dir / "terraform.tfstate")
+    return {key: {"value": value.get("value")} for key, value in outputs.items()}
 
 
 # -----------------------------------------------------------------------------
-# Terraform Fixtures
+# Terraform Deploy Cache
 # -----------------------------------------------------------------------------
 
 
-@dataclass
-class ProviderCred:
-    aws_region: str
-    aws_access_key: str
-    aws_secret_key: str
-    aviatrix_controller_ip: str
-    aviatrix_controller_username: str
-    aviatrix_controller_password: str
-    aviatrix_aws_access_account: str
-
+FINGERPRINT_FILE = ".deploy-fingerprint.json"
 
-def _parse_provider_creds(creds_path: Path) -> ProviderCred:
-    with open(creds_path) as f:
-        data = hcl2.load(f)
-    return ProviderCred(**data)
+# Files that make up a stage's configuration. Generated files written by the
+# stages themselves (ssh keys, rendered configs) must stay out of the hash, and
+# so must the pytest files that share a stage directory: editing an assertion
+# must not force a redeploy.
+_SOURCE_SUFFIXES = (".tf", ".tf.json", ".tftpl", ".tpl", ".sh")
 
 
-@pytest.fixture(scope="session")
-def var_file() -> str:
-    """Get the terraform var file path from AVX_TFVARS environment variable."""
-    tf_var_file = os.environ.get("AVX_TFVARS")
-    if not tf_var_file:
-        pytest.skip("AVX_TFVARS environment variable not set")
-    if not Path(tf_var_file).exists():
-        pytest.skip(f"Var file not found: {tf_var_file}")
-    return tf_var_file
+def local_module_dirs(tf_dir: Path) -> list[Path]:
+    """Find a stage directory and every local module it (transitively) calls.
 
+    Modules with a ``./`` or ``../`` source are followed; registry and git
+    modules are pinned by version and covered by the lock/modules.json instead.
 
-@pytest.fixture(scope="module")
-def change_test_dir(request: pytest.FixtureRequest) -> Generator[None, None, None]:
-    """Change to test file directory for terraform operations."""
-    original_dir = os.getcwd()
-    os.chdir(request.fspath.dirname)
-    yield
-    os.chdir(original_dir)
+    Args:
+        tf_dir: Root module directory.
 
+    Returns:
+        Resolved directories, the root first.
+    """
+    found = [tf_dir.resolve()]
+    queue = list(found)
+    while queue:
+        module_dir = queue.pop(0)
+        for tf_file in sorted(module_dir.glob("*.tf")):
+            with open(tf_file) as f:
+                parsed = hcl2.load(f)
+            for module_block in parsed.get("module", []):
+                for config in module_block.values():
+                    source = config.get("source", "")
+                    if not source.startswith(("./", "../")):
+                        continue
+                    source_dir = (module_dir / source).resolve()
+                    if source_dir not in found:
+                        found.append(source_dir)
+                        queue.append(source_dir)
+    return found
+
+
+def stage_fingerprint(
+    tf_dir: Path,
+    var_file: str,
+    upstream_dirs: list[Path] | None = None,
+    variables: dict[str, str] | None = None,
+) -> str:
+    """Hash everything a stage's apply depends on.
+
+    Covers the configuration of the stage and its local modules (including
+    vendored ones under tests/vendor/), the var file contents, -var overrides
+    and TF_VAR_* environment variables, the provider lock file, and the
+    outputs of upstream stages.
 
-@pytest.fixture(scope="module")
-def tf(change_test_dir: None, var_file: str) -> Generator[dict, None, None]:  # noqa: ARG001
-    """Terraform fixture: init, apply, yield outputs, destroy.
+    Args:
+        tf_dir: Stage directory.
+        var_file: Path to terraform var file.
+        upstream_dirs: Stage directories whose state this stage reads.
+        variables: Extra -var overrides passed to apply.
 
-    Uses the current working directory (set by change_test_dir fixture).
+    Returns:
+        Hex SHA-256 digest.
     """
-    tf_dir = Path.cwd()
-    tf_error: TerraformError | None = None
+    digest = hashlib.sha256()
 
+    def add(label: str, content: bytes) -> None:
+        digest.update(f"{label}\0{len(content)}\0".encode())
+        digest.update(content)
+
+    root = tf_dir.resolve()
+    for module_dir in local_module_dirs(tf_dir):
+        for path in sorted(module_dir.iterdir()):
+            if path.is_file() and path.name.endswith(_SOURCE_SUFFIXES):
+                add(os.path.relpath(path, root), path.read_bytes())
+
+    add("var_file", Path(var_file).read_bytes())
+    lock_file = tf_dir / ".terraform.lock.hcl"
+    if lock_file.exists():
+        add("lock", lock_file.read_bytes())
+
+    env = {k: v for k, v in os.environ.items() if k.startswith("TF_VAR_")}
+    add("variables", json.dumps([variables or {}, env], sort_keys=True).encode())
+    for upstream in sorted(upstream_dirs or []):
+        outputs = terraform_output(upstream)
+        add(f"outputs:{upstream.name}", json.dumps(outputs, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def load_fingerprint(tf_dir: Path) -> str | None:
+    """Return the fingerprint recorded by the last successful cached apply."""
     try:
-        terraform_init(tf_dir)
-        terraform_apply(tf_dir, var_file)
-        outputs = terraform_output(tf_dir)
-        yield {"outputs": outputs}
+        with open(tf_dir / FINGERPRINT_FILE) as f:
+            return json.load(f)["fingerprint"]
+    except (OSError, ValueError, KeyError):
+        return None
 
-    except TerraformError as e:
-        tf_error = e
-        yield {"outputs": {}}
 
-    finally:
-        if not os.environ.get("AVX_NODESTROY"):
-            try:
-                terraform_destroy(tf_dir, var_file)
-            except TerraformDestroyError as e:
-                if tf_error is None:
-                    tf_error = e
+def save_fingerprint(tf_dir: Path, fingerprint: str) -> None:
+    """Record a stage fingerprint next to its state."""
+    with open(tf_dir / FINGERPRINT_FILE, "w") as f:
+        json.dump({"fingerprint": fingerprint, "applied_at": time.time()}, f)
 
-        if tf_error:
-            raise tf_error
+
+def clear_fingerprint(tf_dir: Path) -> None:
+    """Forget a stage's fingerprint (its state is about to change)."""
+    (tf_dir / FINGERPRINT_FILE).unlink(missing_ok=True)
+
+
+def stage_is_current(
+    tf_dir: Path,
+    var_file: str,
+    fingerprint: str,
+    variables: dict[str, str] | None = None,
+) -> bool:
+    """Decide whether a stage can be reused without init and apply.
+
+    The recorded fingerprint must match and a ``plan -detailed-exitcode`` must
+    report no changes, so resources changed or deleted outside terraform are
+    still redeployed.
+
+    Args:
+        tf_dir: Stage directory.
+        var_file: Path to terraform var file.
+        fingerprint: Current fingerprint from stage_fingerprint().
+        variables: Extra -var overrides passed to apply.
+
+    Returns:
+        True if the deployed stage matches its configuration.
+    """
+    if load_fingerprint(tf_dir) != fingerprint:
+        return False
+    if not (tf_dir / ".terraform").is_dir():
+        return False
+    try:
+        return not terraform_plan_has_changes(tf_dir, var_file, variables=variables)
+    except (TerraformPlanError, subprocess.TimeoutExpired) as e:
+        print(f"Warning: drift check failed in {tf_dir.name}, redeploying: {e}")
+        return False
+
+
+def deploy_stage(
+    tf_dir: Path,
+    var_file: str,
+    upstream_dirs: list[Path] | None = None,
+    use_cache: bool = False,
+) -> bool:
+    """Init and apply a stage, or reuse it if its fingerprint is unchanged.
+
+    Args:
+        tf_dir: Stage directory.
+        var_file: Path to terraform var file.
+        upstream_dirs: Stage directories whose state this stage reads.
+        use_cache: Skip init and apply when stage_is_current() holds, and
+            record the fingerprint after a successful apply.
+
+    Returns:
+        True if the stage was applied, False if the deployment was reused.
+
+    Raises:
+        TerraformError: If init or apply fails.
+    """
+    if use_cache:
+        fingerprint = stage_fingerprint(tf_dir, var_file, upstream_dirs)
+        if stage_is_current(tf_dir, var_file, fingerprint):
+            print(f"{tf_dir.name} unchanged since last apply, reusing deployment")
+            return False
+
+    ensure_initialized(tf_dir)
+    terraform_apply(tf_dir, var_file)
+    if use_cache:
+        # init may have rewritten the lock file; record what was applied.
+        save_fingerprint(tf_dir, stage_fingerprint(tf_dir, var_file, upstream_dirs))
+    return True
 
 
 # -----------------------------------------------------------------------------
-# VM Class for SSH and Ping Operations
+# Terraform Init Short-Circuit
 # -----------------------------------------------------------------------------
 
 
-class VM:
-    """Represents a cloud VM with SSH and ping capabilities.
+_REGISTRY_SOURCE_RE = re.compile(r"^[\w-]+/[\w-]+/[\w-]+$")
+_CONSTRAINT_RE = re.compile(r"^\s*(=|!=|>=|<=|>|<|~>)?\s*v?([\d.]+)\s*$")
+
+
+def _version_tuple(version: str) -> tuple[int, ...]:
+    return tuple(int(part) for part in version.split("-")[0].split(".") if part)
+
+
+def version_satisfies(version: str, constraints: str) -> bool:
+    """Check a version against terraform constraints like ``">= 5.0, < 6.0"``.
+
+    Args:
+        version: Exact version, e.g. "5.100.0".
+        constraints: Comma-separated constraints (=, !=, >, >=, <, <=, ~>).
+
+    Returns:
+        True if every constraint holds. Unparseable constraints do not match.
+    """
+    for constraint in constraints.split(","):
+        match = _CONSTRAINT_RE.match(constraint)
+        if not match:
+            return False
+        op, wanted = match.group(1) or "=", match.group(2)
+        target = _version_tuple(wanted)
+        width = max(len(target), len(_version_tuple(version)), 3)
+        actual = (_version_tuple(version) + (0,) * width)[:width]
+        padded_target = (target + (0,) * width)[:width]
+        if op == "~>":
+            # ~> 1.2 allows 1.x >= 1.2; ~> 1.2.3 allows 1.2.x >= 1.2.3.
+            prefix = max(len(target) - 1, 1)
+            ok = actual >= padded_target and actual[:prefix] == target[:prefix]
+        else:
+            ok = {
+                "=": actual == padded_target,
+                "!=": actual != padded_target,
+                ">": actual > padded_target,
+                ">=": actual >= padded_target,
+                "<": actual < padded_target,
+                "<=": actual <= padded_target,
+            }[op]
+        if not ok:
+            return False
+    return True
+
+
+def _load_tf_files(module_dir: Path) -> list[dict]:
+    parsed = []
+    for tf_file in sorted(module_dir.glob("*.tf")):
+        with open(tf_file) as f:
+            parsed.append(hcl2.load(f))
+    return parsed
+
+
+def _module_calls(module_dir: Path) -> Iterator[tuple[str, dict]]:
+    """Yield (name, config) for every ``module`` block in a directory."""
+    for parsed in _load_tf_files(module_dir):
+        for module_block in parsed.get("module", []):
+            yield from module_block.items()
+
+
+def _required_providers(module_dir: Path) -> Iterator[tuple[str, dict]]:
+    """Yield (local name, config) for every entry of ``required_providers``."""
+    for parsed in _load_tf_files(module_dir):
+        for terraform_block in parsed.get("terraform", []):
+            for providers in terraform_block.get("required_providers", []):
+                for name, config in providers.items():
+                    if not isinstance(config, dict):
+                        config = {"version": config}
+                    yield name, config
+
+
+def _normalize_source(source: str) -> str:
+    """Expand a short registry address to the form terraform records."""
+    if _REGISTRY_SOURCE_RE.match(source):
+        return f"registry.terraform.io/{source}"
+    return source
+
+
+def _read_lock_file(tf_dir: Path) -> dict[str, dict] | None:
+    """Return locked providers by address, or None without a lock file."""
+    try:
+        with open(tf_dir / ".terraform.lock.hcl") as f:
+            parsed = hcl2.load(f)
+    except OSError:
+        return None
+    return {
+        address: config
+        for block in parsed.get("provider", [])
+        for address, config in block.items()
+    }
+
+
+def _modules_current(tf_dir: Path) -> bool:
+    """Compare module calls against .terraform/modules/modules.json."""
+    manifest_file = tf_dir / ".terraform" / "modules" / "modules.json"
+    try:
+        with open(manifest_file) as f:
+            manifest = {m["Key"]: m for m in json.load(f)["Modules"]}
+    except (OSError, ValueError, KeyError):
+        return False
+
+    queue = [("", tf_dir)]
+    while queue:
+        key_prefix, module_dir = queue.pop()
+        for name, config in _module_calls(module_dir):
+            key = f"{key_prefix}.{name}" if key_prefix else name
+            source = config.get("source", "")
+            constraint = config.get("version")
+            entry = manifest.get(key)
+            if (
+                entry is None
+                or entry.get("Source") != _normalize_source(source)
+                or (constraint and not version_satisfies(entry["Version"], constraint))
+                or not (tf_dir / entry["Dir"]).is_dir()
+            ):
+                return False
+            if source.startswith(("./", "../")):
+                queue.append((key, module_dir / source))
+    return True
+
+
+def _providers_current(tf_dir: Path) -> bool:
+    """Compare required providers against the lock file and installed plugins."""
+    locked = _read_lock_file(tf_dir)
+    if locked is None:
+        return False
+
+    for module_dir in local_module_dirs(tf_dir):
+        for name, config in _required_providers(module_dir):
+            address = config.get("source", f"hashicorp/{name}").lower()
+            if address.count("/") == 1:
+                address = f"registry.terraform.io/{address}"
+            lock = locked.get(address)
+            constraint = config.get("version")
+            if (
+                lock is None
+                or (constraint and not version_satisfies(lock["version"], constraint))
+                or not (
+                    tf_dir / ".terraform" / "providers" / address / lock["version"]
+                ).is_dir()
+            ):
+                return False
+    return True
+
+
+def init_is_current(tf_dir: Path) -> bool:
+    """Check whether ``terraform init`` would change nothing in a stage.
+
+    True when every required provider is in .terraform.lock.hcl at a version
+    satisfying its constraints and installed under .terraform/providers, and
+    every module call (following local modules) matches
+    .terraform/modules/modules.json in source and version.
+
+    Args:
+        tf_dir: Stage directory.
+
+    Returns:
+        True if init can be skipped.
+    """
+    return _providers_current(tf_dir) and _modules_current(tf_dir)
+
+
+_PLUGIN_CACHE_THREAD_LOCK = threading.Lock()
+
+
+@contextmanager
+def _plugin_cache_lock(cache: Path) -> Generator[None, None, None]:
+    """Hold an exclusive lock on the plugin cache (across processes).
+
+    Without fcntl (non-POSIX hosts) the lock only serializes inits within this
+    process, so parallel pytest workers must not share TF_PLUGIN_CACHE_DIR.
+    """
+    if fcntl is None:
+        with _PLUGIN_CACHE_THREAD_LOCK:
+            yield
+        return
+    with open(cache / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _providers_cached(tf_dir: Path, cache: Path) -> bool:
+    """Check whether every locked provider is already in the plugin cache."""
+    locked = _read_lock_file(tf_dir)
+    if locked is None:
+        return False
+    return all(
+        (cache / address / config["version"]).is_dir()
+        for address, config in locked.items()
+    )
+
+
+def ensure_initialized(tf_dir: Path, timeout: int = 300) -> TerraformRun | None:
+    """Run terraform init only if the stage is not already initialized.
+
+    The plugin cache is not safe for concurrent writes, so an init that may
+    download providers holds a lock on it; inits served entirely from the
+    cache run in parallel.
+
+    Args:
+        tf_dir: Stage directory.
+        timeout: Command timeout in seconds.
+
+    Returns:
+        The init run, or None if init was skipped.
+
+    Raises:
+        TerraformInitError: If init fails.
+    """
+    if init_is_current(tf_dir):
+        return None
+
+    cache = plugin_cache_dir()
+    if _providers_cached(tf_dir, cache):
+        return terraform_init(tf_dir, upgrade=False, timeout=timeout)
+    with _plugin_cache_lock(cache):
+        return terraform_init(tf_dir, timeout=timeout)
+
+
+def init_stages(
+    tf_dirs: list[Path], max_workers: int = 4, timeout: int = 300
+) -> dict[Path, TerraformRun | None]:
+    """Initialize independent stages concurrently.
+
+    init does not read upstream state, so every stage can be initialized
+    before the first apply.
+
+    Args:
+        tf_dirs: Stage directories.
+        max_workers: Maximum inits running at once.
+        timeout: Per-init timeout in seconds.
+
+    Returns:
+        Mapping of directory -> init run (None where init was skipped).
+
+    Raises:
+        TerraformInitError: The first failure, after all inits finish.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            tf_dir: pool.submit(ensure_initialized, tf_dir, timeout)
+            for tf_dir in tf_dirs
+        }
+        wait(futures.values())
+    for future in futures.values():
+        if future.exception() is not None:
+            raise future.exception()
+    return {tf_dir: future.result() for tf_dir, future in futures.items()}
+
+
+# -----------------------------------------------------------------------------
+# Terraform Stage Orchestration
+# -----------------------------------------------------------------------------
+
+
+@dataclass
+class TerraformStage:
+    """A terraform root directory deployed as one unit.
+
+    Attributes:
+        name: Stage name (the directory name by default).
+        tf_dir: Directory containing the stage's terraform files.
+        depends_on: Names of stages whose state this stage reads.
+    """
+
+    name: str
+    tf_dir: Path
+    depends_on: set[str] = field(default_factory=set)
+
+
+def remote_state_dependencies(tf_dir: Path) -> set[Path]:
+    """Find stage directories whose local state a stage reads.
+
+    Looks for ``data "terraform_remote_state"`` blocks using the local backend
+    and resolves their ``config.path`` (with ``${path.module}`` expanded).
+
+    Args:
+        tf_dir: Stage directory to scan (top-level .tf files only).
+
+    Returns:
+        Resolved directories holding the referenced state files.
+    """
+    dependencies = set()
+    for tf_file in sorted(tf_dir.glob("*.tf")):
+        with open(tf_file) as f:
+            parsed = hcl2.load(f)
+        for data_block in parsed.get("data", []):
+            for config in data_block.get("terraform_remote_state", {}).values():
+                if config.get("backend", "local") != "local":
+                    continue
+                state_path = config.get("config", {}).get("path", "terraform.tfstate")
+                state_file = Path(state_path.replace("${path.module}", str(tf_dir)))
+                if not state_file.is_absolute():
+                    state_file = tf_dir / state_file
+                dependencies.add(state_file.resolve().parent)
+    return dependencies
+
+
+class StageOrchestrator:
+    """Applies and destroys terraform stages along their dependency graph.
+
+    A stage starts as soon as every stage it depends on has been applied, so
+    independent stages run concurrently. Destroy walks the graph in reverse:
+    a stage is destroyed once every stage that depends on it is gone.
+
+    Usage:
+        orchestrator = StageOrchestrator.from_dirs([site, backbone, monitoring])
+        orchestrator.apply(var_file)
+        ...
+        errors = orchestrator.destroy(var_file)
+    """
+
+    def __init__(self, stages: list[TerraformStage], max_workers: int = 4) -> None:
+        """Initialize an orchestrator.
+
+        Args:
+            stages: Stages to manage. Dependencies on stages not in the list are
+                treated as already satisfied.
+            max_workers: Maximum stages running at once.
+
+        Raises:
+            ValueError: If the stages contain a dependency cycle.
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        self.max_workers = max_workers
+        self.levels()
+
+    @classmethod
+    def from_dirs(
+        cls, tf_dirs: list[Path], max_workers: int = 4
+    ) -> "StageOrchestrator":
+        """Build stages from directories, wiring dependencies via remote state."""
+        names = {tf_dir.resolve(): tf_dir.name for tf_dir in tf_dirs}
+        stages = []
+        for tf_dir in tf_dirs:
+            deps = remote_state_dependencies(tf_dir)
+            stages.append(
+                TerraformStage(
+                    name=tf_dir.name,
+                    tf_dir=tf_dir,
+                    depends_on={names[dep] for dep in deps if dep in names},
+                )
+            )
+        return cls(stages, max_workers)
+
+    def __repr__(self) -> str:
+        levels = [[stage.name for stage in level] for level in self.levels()]
+        return f"StageOrchestrator({levels})"
+
+    def levels(self) -> list[list[TerraformStage]]:
+        """Group stages into topological levels; each level needs only earlier ones.
+
+        Raises:
+            ValueError: If the stages contain a dependency cycle.
+        """
+        remaining = {
+            name: stage.depends_on & self.stages.keys()
+            for name, stage in self.stages.items()
+        }
+        levels = []
+        while remaining:
+            ready = sorted(name for name, deps in remaining.items() if not deps)
+            if not ready:
+                raise ValueError(f"Dependency cycle among stages: {sorted(remaining)}")
+            levels.append([self.stages[name] for name in ready])
+            remaining = {
+                name: deps - set(ready)
+                for name, deps in remaining.items()
+                if name not in ready
+            }
+        return levels
+
+    def apply(
+        self,
+        var_file: str,
+        on_applied: Callable[[TerraformStage], None] | None = None,
+        use_cache: bool = False,
+    ) -> None:
+        """Init and apply every stage, running independent stages concurrently.
+
+        Args:
+            var_file: Path to terraform var file.
+            on_applied: Called from the worker thread right after a stage applies,
+                before its dependents start. Not called for cached stages.
+            use_cache: Skip init and apply for stages whose fingerprint matches
+                the last apply and whose plan shows no changes.
+
+        Raises:
+            TerraformError: The first stage failure, after running stages finish.
+                Stages depending on a failed stage are not started.
+        """
+
+        def run(stage: TerraformStage) -> None:
+            print(f"\n=== Deploying {stage.name} ===")
+            upstream = [
+                self.stages[name].tf_dir
+                for name in stage.depends_on & self.stages.keys()
+            ]
+            if not deploy_stage(stage.tf_dir, var_file, upstream, use_cache):
+                return
+            if on_applied:
+                on_applied(stage)
+
+        init_stages([stage.tf_dir for stage in self.stages.values()], self.max_workers)
+        blockers = {
+            name: stage.depends_on & self.stages.keys()
+            for name, stage in self.stages.items()
+        }
+        self._run_graph(run, blockers, stop_on_error=True)
+
+    def destroy(self, var_file: str) -> dict[str, Exception]:
+        """Destroy stages in reverse dependency order, concurrently where safe.
+
+        A failed destroy does not stop the stages it depends on from being
+        destroyed, matching the best-effort cleanup of the test fixtures.
+
+        Args:
+            var_file: Path to terraform var file.
+
+        Returns:
+            Mapping of stage name -> exception for stages that failed to destroy.
+        """
+
+        def run(stage: TerraformStage) -> None:
+            print(f"\n=== Destroying {stage.name} ===")
+            terraform_destroy(stage.tf_dir, var_file)
+
+        blockers: dict[str, set[str]] = {name: set() for name in self.stages}
+        for name, stage in self.stages.items():
+            for dep in stage.depends_on & self.stages.keys():
+                blockers[dep].add(name)
+        return self._run_graph(run, blockers, stop_on_error=False)
+
+    def _run_graph(
+        self,
+        run: Callable[[TerraformStage], None],
+        blockers: dict[str, set[str]],
+        stop_on_error: bool,
+    ) -> dict[str, Exception]:
+        """Run each stage once all of its blockers have finished."""
+        pending = {name: set(deps) for name, deps in blockers.items()}
+        errors: dict[str, Exception] = {}
+        running: dict[Future, str] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                if not (stop_on_error and errors):
+                    for name in sorted(n for n, deps in pending.items() if not deps):
+                        running[pool.submit(run, self.stages[name])] = name
+                        del pending[name]
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        errors[name] = future.exception()
+                    if not (stop_on_error and name in errors):
+                        for deps in pending.values():
+                            deps.discard(name)
+
+        if stop_on_error and errors:
+            raise next(iter(errors.values()))
+        return errors
+
+
+# -----------------------------------------------------------------------------
+# Terraform Fixtures
+# -----------------------------------------------------------------------------
+
+
+@dataclass
+class ProviderCred:
+    aws_region: str
+    aws_access_key: str
+    aws_secret_key: str
+    aviatrix_controller_ip: str
+    aviatrix_controller_username: str
+    aviatrix_controller_password: str
+    aviatrix_aws_access_account: str
+
+
+def _parse_provider_creds(creds_path: Path) -> ProviderCred:
+    with open(creds_path) as f:
+        data = hcl2.load(f)
+    return ProviderCred(**data)
+
+
+@pytest.fixture(scope="session")
+def var_file() -> str:
+    """Get the terraform var file path from AVX_TFVARS environment variable."""
+    tf_var_file = os.environ.get("AVX_TFVARS")
+    if not tf_var_file:
+        pytest.skip("AVX_TFVARS environment variable not set")
+    if not Path(tf_var_file).exists():
+        pytest.skip(f"Var file not found: {tf_var_file}")
+    return tf_var_file
+
+
+@pytest.fixture(scope="module")
+def change_test_dir(request: pytest.FixtureRequest) -> Generator[None, None, None]:
+    """Change to test file directory for terraform operations."""
+    original_dir = os.getcwd()
+    os.chdir(request.fspath.dirname)
+    yield
+    os.chdir(original_dir)
+
+
+@pytest.fixture(scope="module")
+def tf(change_test_dir: None, var_file: str) -> Generator[dict, None, None]:  # noqa: ARG001
+    """Terraform fixture: init, apply, yield outputs, destroy.
+
+    Uses the current working directory (set by change_test_dir fixture).
+    """
+    tf_dir = Path.cwd()
+    tf_error: TerraformError | None = None
+
+    try:
+        deploy_stage(tf_dir, var_file, use_cache=not os.environ.get("AVX_NOCACHE"))
+        outputs = terraform_output(tf_dir)
+        yield {"outputs": outputs}
+
+    except TerraformError as e:
+        tf_error = e
+        yield {"outputs": {}}
+
+    finally:
+        if not os.environ.get("AVX_NODESTROY"):
+            try:
+                terraform_destroy(tf_dir, var_file)
+            except TerraformDestroyError as e:
+                if tf_error is None:
+                    tf_error = e
+
+        if tf_error:
+            raise tf_error
+
+
+# -----------------------------------------------------------------------------
+# SSH Connection Pool
+# -----------------------------------------------------------------------------
+
+
+class SSHConnectionPool:
+    """Pool of authenticated SSH connections reused across commands.
+
+    Connections are keyed by (host, username, key path). A private VM's
+    connection is tunnelled through a ``direct-tcpip`` channel on its bastion's
+    pooled connection, so one bastion handshake serves every VM behind it.
+    Dead transports are detected and re-established transparently, and parsed
+    private keys are cached by path.
+
+    Usage:
+        pool = SSHConnectionPool()
+        exit_status, stdout, stderr = pool.exec(vm, "uname -a")
+        pool.close()
+    """
+
+    def __init__(self, keepalive: int = 30) -> None:
+        """Initialize an empty pool.
+
+        Args:
+            keepalive: Seconds between SSH keepalive packets on pooled transports.
+        """
+        self.keepalive = keepalive
+        self._clients: dict[tuple[str, str, str], paramiko.SSHClient] = {}
+        self._keys: dict[str, paramiko.PKey] = {}
+        self._locks: dict[tuple[str, str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"SSHConnectionPool({len(self._clients)} connections)"
+
+    @staticmethod
+    def pool_key(vm: "VM") -> tuple[str, str, str]:
+        """Return the (host, username, key path) key for a VM's connection.
+
+        Private VMs are keyed by their private IP qualified with the bastion's
+        public IP, since private ranges may repeat across sites.
+
+        Raises:
+            ValueError: If VM has no public IP and no usable bastion.
+        """
+        if vm.public_ip:
+            host = vm.public_ip
+        elif vm.bastion:
+            if not vm.bastion.public_ip:
+                raise ValueError("Bastion must have a public IP")
+            host = f"{vm.bastion.public_ip}/{vm.private_ip}"
+        else:
+            raise ValueError(f"VM {vm.name} has no public IP and no bastion configured")
+        return host, vm.username, vm.ssh_key_path
+
+    def load_key(self, key_path: str) -> paramiko.PKey:
+        """Load and cache an RSA private key."""
+        with self._lock:
+            pkey = self._keys.get(key_path)
+            if pkey is None:
+                pkey = paramiko.RSAKey.from_private_key_file(key_path)
+                self._keys[key_path] = pkey
+            return pkey
+
+    def client(self, vm: "VM", timeout: int = 60) -> paramiko.SSHClient:
+        """Return a live SSH client for a VM, connecting if needed.
+
+        Args:
+            vm: VM to connect to.
+            timeout: SSH connection timeout in seconds.
+
+        Returns:
+            Connected paramiko.SSHClient owned by the pool.
+        """
+        key = self.pool_key(vm)
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+
+        with lock:
+            client = self._clients.get(key)
+            if client is not None and _is_active(client):
+                return client
+            if client is not None:
+                client.close()
+            client = self._connect(vm, timeout)
+            with self._lock:
+                self._clients[key] = client
+            return client
+
+    def exec(self, vm: "VM", command: str, timeout: int = 60) -> tuple[int, str, str]:
+        """Run a command on a VM over its pooled connection.
+
+        A command that fails because the transport died is retried once on a
+        fresh connection.
+
+        Args:
+            vm: VM to run the command on.
+            command: Shell command line.
+            timeout: Connection and command timeout in seconds.
+
+        Returns:
+            Tuple of (exit_status, stdout, stderr).
+        """
+        for attempt in range(2):
+            client = self.client(vm, timeout)
+            try:
+                _, stdout, stderr = client.exec_command(command, timeout=timeout)
+                output = stdout.read().decode("utf-8")
+                error = stderr.read().decode("utf-8")
+                return stdout.channel.recv_exit_status(), output, error
+            except (paramiko.SSHException, EOFError, OSError):
+                if attempt == 1 or _is_active(client):
+                    raise
+                self.discard(vm)
+        raise AssertionError("unreachable")
+
+    def open_stream(
+        self, vm: "VM", command: str, timeout: int = 60
+    ) -> paramiko.Channel:
+        """Start a long-running command on a VM and return its channel.
+
+        The command runs under a pseudo-terminal so that closing the channel
+        hangs it up on the VM. Read output with ``channel.makefile("r")``.
+        """
+        transport = self.client(vm, timeout).get_transport()
+        if transport is None:
+            raise paramiko.SSHException(f"No transport for {vm.name}")
+        channel = transport.open_session(timeout=timeout)
+        channel.get_pty()
+        channel.exec_command(command)
+        return channel
+
+    def sftp(self, vm: "VM", timeout: int = 60) -> paramiko.SFTPClient:
+        """Open an SFTP session on a VM's pooled connection (caller closes it)."""
+        return self.client(vm, timeout).open_sftp()
+
+    def discard(self, vm: "VM") -> None:
+        """Close and forget a VM's pooled connection."""
+        with self._lock:
+            client = self._clients.pop(self.pool_key(vm), None)
+        if client is not None:
+            client.close()
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        # Close tunnelled connections before the bastions carrying them
+        for client in reversed(clients):
+            client.close()
+
+    def _connect(self, vm: "VM", timeout: int) -> paramiko.SSHClient:
+        sock = None
+        if not vm.public_ip and vm.bastion:
+            bastion_transport = self.client(vm.bastion, timeout).get_transport()
+            if bastion_transport is None:
+                raise paramiko.SSHException("Failed to get transport from bastion")
+            sock = bastion_transport.open_channel(
+                "direct-tcpip",
+                (vm.private_ip, 22),
+                (vm.bastion.public_ip, 22),
+                timeout=timeout,
+            )
+
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        try:
+            client.connect(
+                hostname=vm.public_ip or vm.private_ip,
+                username=vm.username,
+                pkey=self.load_key(vm.ssh_key_path),
+                timeout=timeout,
+                look_for_keys=False,
+                allow_agent=False,
+                sock=sock,
+            )
+        except Exception:
+            client.close()
+            raise
+
+        transport = client.get_transport()
+        if transport is not None:
+            transport.set_keepalive(self.keepalive)
+        return client
+
+
+def _is_active(client: paramiko.SSHClient) -> bool:
+    transport = client.get_transport()
+    return transport is not None and transport.is_active()
+
+
+# Shared by every VM that is not given its own pool; closed by the ssh_pool fixture.
+SSH_POOL = SSHConnectionPool()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def ssh_pool() -> Generator[SSHConnectionPool, None, None]:
+    """Session-wide SSH connection pool, closed when the session ends."""
+    yield SSH_POOL
+    SSH_POOL.close()
+
+
+# -----------------------------------------------------------------------------
+# Batched On-VM Probes
+# -----------------------------------------------------------------------------
+
+
+PROBE_KINDS = ("icmp", "tcp", "http")
+
+# Debian packages staged onto private VMs that cannot reach an apt mirror
+IPERF3_PACKAGES = ("iperf3", "libiperf0", "libsctp1")
+
+
+@dataclass(slots=True)
+class Probe:
+    """A reachability check to run from a VM.
+
+    Attributes:
+        target: IP address or hostname to probe.
+        kind: One of "icmp", "tcp" (connect to ``port``) or "http" (GET
+            ``http://target:port/path``, success on 2xx/3xx).
+        port: TCP/HTTP port (HTTP defaults to 80).
+        path: HTTP request path.
+    """
+
+    target: str
+    kind: str = "icmp"
+    port: int | None = None
+    path: str = "/"
+
+    def __post_init__(self) -> None:
+        if self.kind not in PROBE_KINDS:
+            raise ValueError(
+                f"Unknown probe kind {self.kind!r}, expected {PROBE_KINDS}"
+            )
+        if self.kind == "tcp" and self.port is None:
+            raise ValueError("TCP probes require a port")
+
+
+@dataclass(slots=True)
+class ProbeResult:
+    """Outcome of a Probe as reported by the VM that ran it."""
+
+    probe: Probe
+    success: bool
+    elapsed: float
+    output: str
+    status: int | None = None
+
+
+# Executed on the VM with `python3 -c`; argv[1] is the JSON batch spec. Probes run
+# concurrently and the results come back as a single JSON document on stdout.
+_REMOTE_PROBE_SCRIPT = """
+import json, socket, subprocess, sys, time, urllib.error, urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+spec = json.loads(sys.argv[1])
+wait = spec["timeout"]
+
+def run(p):
+    start = time.monotonic()
+    out, ok, status = "", False, None
+    try:
+        if p["kind"] == "icmp":
+            cmd = ["ping", "-c", str(spec["ping_count"]), "-W", str(wait), p["target"]]
+            r = subprocess.run(cmd, capture_output=True, text=True)
+            ok, out = r.returncode == 0, r.stdout + r.stderr
+        elif p["kind"] == "tcp":
+            socket.create_connection((p["target"], p["port"]), timeout=wait).close()
+            ok, out = True, "connected"
+        else:
+            url = "http://%s:%s%s" % (p["target"], p["port"] or 80, p["path"])
+            try:
+                with urllib.request.urlopen(url, timeout=wait) as resp:
+                    status = resp.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            ok, out = 200 <= status < 400, "HTTP %s" % status
+    except Exception as e:
+        out = "%s: %s" % (type(e).__name__, e)
+    return {"success": ok, "elapsed": time.monotonic() - start,
+            "output": out, "status": status}
+
+with ThreadPoolExecutor(max_workers=min(32, len(spec["probes"]) or 1)) as pool:
+    results = list(pool.map(run, spec["probes"]))
+print(json.dumps({"results": results}))
+"""
+
+
+# -----------------------------------------------------------------------------
+# Ping Results and Statistics
+# -----------------------------------------------------------------------------
+
+
+_PING_PACKETS_RE = re.compile(
+    r"(\d+) packets transmitted, (\d+) (?:packets )?received.*?([\d.]+)% packet loss"
+)
+_PING_RTT_RE = re.compile(
+    r"(?:rtt|round-trip) min/avg/max/(?:mdev|stddev) = "
+    r"([\d.]+)/([\d.]+)/([\d.]+)/([\d.]+) ms"
+)
+
+
+@dataclass(slots=True, frozen=True)
+class PingStats:
+    """Packet and round-trip statistics from a ping summary.
+
+    RTT fields are in milliseconds and are None when no reply was received.
+    """
+
+    transmitted: int
+    received: int
+    loss_pct: float
+    rtt_min: float | None = None
+    rtt_avg: float | None = None
+    rtt_max: float | None = None
+    rtt_mdev: float | None = None
+
+
+def parse_ping_stats(output: str) -> PingStats | None:
+    """Parse the summary lines printed by iputils/BSD/busybox ping.
+
+    Args:
+        output: Raw ping output.
+
+    Returns:
+        PingStats, or None if the output has no packet summary.
+    """
+    packets = _PING_PACKETS_RE.search(output)
+    if packets is None:
+        return None
+    rtt = _PING_RTT_RE.search(output)
+    rtt_values = [float(v) for v in rtt.groups()] if rtt else [None] * 4
+    return PingStats(
+        int(packets.group(1)),
+        int(packets.group(2)),
+        float(packets.group(3)),
+        *rtt_values,
+    )
+
+
+@dataclass(slots=True)
+class PingResult:
+    """Outcome of pinging a target from a VM.
+
+    Attributes:
+        source: Name of the VM the ping ran on.
+        target: Name of the target VM (or its IP for ad-hoc pings).
+        target_ip: IP address pinged.
+        success: Whether the final attempt received replies.
+        output: Raw ping output (or error) of the final attempt.
+        started_at: Epoch seconds when the first attempt started.
+        finished_at: Epoch seconds when the final attempt returned.
+        attempts: Number of attempts made.
+        stats: Parsed statistics of the final attempt, if available.
+    """
+
+    source: str
+    target: str
+    target_ip: str
+    success: bool
+    output: str
+    started_at: float
+    finished_at: float
+    attempts: int = 1
+    stats: PingStats | None = None
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds from the first attempt to the final result."""
+        return self.finished_at - self.started_at
+
+
+# -----------------------------------------------------------------------------
+# VM Class for SSH and Ping Operations
+# -----------------------------------------------------------------------------
+
+
+class VM:
+    """Represents a cloud VM with SSH and ping capabilities.
+
+    SSH connections are borrowed from an SSHConnectionPool (the shared
+    ``SSH_POOL`` by default), so repeated commands reuse one authenticated
+    session per VM and one bastion transport per site.
+
+    Usage:
+        # Create a bastion (public VM)
+        bastion = VM("aws-bastion", private_ip="10.0.1.5", public_ip="54.1.2.3",
+                     ssh_key_path="/path/to/key.pem")
+
+        # Create a private VM that uses the bastion
+        private_vm = VM("aws-private", private_ip="10.0.2.10", bastion=bastion,
+                        ssh_key_path="/path/to/key.pem")
+
+        # Ping from private VM to another IP
+        success, output = private_vm.ping("10.20.2.15")
+    """
+
+    def __init__(
+        self,
+        name: str,
+        private_ip: str,
+        ssh_key_path: str,
+        public_ip: str | None = None,
+        bastion: "VM | None" = None,
+        username: str = "ubuntu",
+        ssh_pool: SSHConnectionPool | None = None,
+    ) -> None:
+        """Initialize a VM instance.
+
+        Args:
+            name: Human-readable name for the VM.
+            private_ip: Private IP address of the VM.
+            ssh_key_path: Path to the SSH private key file.
+            public_ip: Public IP address (if VM has one).
+            bastion: Bastion VM to use for SSH access (for private VMs).
+            username: SSH username (default: ubuntu).
+            ssh_pool: Connection pool to use (default: shared SSH_POOL).
+        """
+        self.name = name
+        self.private_ip = private_ip
+        self.public_ip = public_ip
+        self.bastion = bastion
+        self.ssh_key_path = ssh_key_path
+        self.username = username
+        self.ssh_pool = ssh_pool or SSH_POOL
+
+    def __repr__(self) -> str:
+        return f"VM({self.name}, private_ip={self.private_ip}, public_ip={self.public_ip})"
+
+    def run(self, command: str, timeout: int = 60) -> tuple[int, str, str]:
+        """Run a shell command on this VM.
+
+        If the VM has a public IP, SSH directly into it.
+        If the VM has a bastion, tunnel through the bastion's connection.
+
+        Args:
+            command: Shell command line.
+            timeout: SSH connection and command timeout in seconds.
+
+        Returns:
+            Tuple of (exit_status, stdout, stderr).
+
+        Raises:
+            ValueError: If VM has no public IP and no bastion configured.
+        """
+        return self.ssh_pool.exec(self, command, timeout=timeout)
+
+    def ping(
+        self,
+        target_ip: str,
+        max_retries: int = 5,
+        retry_delay: int = 10,
+        timeout: int = 60,
+        ping_count: int = 3,
+    ) -> tuple[bool, str]:
+        """Ping a target IP from this VM.
+
+        Args:
+            target_ip: IP address to ping.
+            max_retries: Maximum retry attempts for eventual consistency.
+            retry_delay: Delay between retries in seconds.
+            timeout: SSH connection timeout in seconds.
+            ping_count: Number of ICMP ping packets to send.
+
+        Returns:
+            Tuple of (success: bool, output: str).
+
+        Raises:
+            ValueError: If VM has no public IP and no bastion configured.
+        """
+        result = self.ping_result(
+            target_ip, max_retries, retry_delay, timeout, ping_count
+        )
+        return result.success, result.output
+
+    def ping_result(
+        self,
+        target_ip: str,
+        max_retries: int = 5,
+        retry_delay: int = 10,
+        timeout: int = 60,
+        ping_count: int = 3,
+    ) -> PingResult:
+        """Ping a target IP from this VM and keep the parsed statistics.
+
+        Takes the same arguments as ping().
+
+        Returns:
+            PingResult for the final attempt.
+
+        Raises:
+            ValueError: If VM has no public IP and no bastion configured.
+        """
+        # Surface misconfiguration immediately rather than retrying it
+        SSHConnectionPool.pool_key(self)
+        started_at = time.time()
+        last_output = ""
+
+        for attempt in range(max_retries):
+            try:
+                exit_status, output, error = self.run(
+                    f"ping -c {ping_count} -W 5 {target_ip}", timeout=timeout
+                )
+
+                if exit_status == 0:
+                    return PingResult(
+                        self.name,
+                        target_ip,
+                        target_ip,
+                        success=True,
+                        output=output,
+                        started_at=started_at,
+                        finished_at=time.time(),
+                        attempts=attempt + 1,
+                        stats=parse_ping_stats(output),
+                    )
+
+                last_output = f"{output}\n{error}"
+
+            except Exception as e:
+                last_output = str(e)
+
+            if attempt < max_retries - 1:
+                time.sleep(retry_delay)
+
+        return PingResult(
+            self.name,
+            target_ip,
+            target_ip,
+            success=False,
+            output=f"Failed after {max_retries} attempts. Last output: {last_output}",
+            started_at=started_at,
+            finished_at=time.time(),
+            attempts=max_retries,
+            stats=parse_ping_stats(last_output),
+        )
+
+    def probe(
+        self,
+        probes: list[Probe],
+        timeout: int = 60,
+        probe_timeout: int = 5,
+        ping_count: int = 3,
+    ) -> list[ProbeResult]:
+        """Run a batch of probes from this VM in one remote invocation.
+
+        The probes execute concurrently on the VM (which needs ``python3``) and
+        report back as one JSON document, so a batch costs a single SSH exec
+        regardless of its size. If the batch itself cannot run (SSH failure,
+        missing interpreter) or does not report one result per probe, every
+        probe is reported as failed with the error.
+
+        Args:
+            probes: Probes to run.
+            timeout: SSH connection and command timeout in seconds.
+            probe_timeout: Per-probe timeout in seconds on the VM.
+            ping_count: Number of ICMP packets for "icmp" probes.
+
+        Returns:
+            One ProbeResult per probe, in the same order.
+
+        Raises:
+            ValueError: If VM has no public IP and no bastion configured.
+        """
+        if not probes:
+            return []
+        SSHConnectionPool.pool_key(self)
+
+        spec = {
+            "timeout": probe_timeout,
+            "ping_count": ping_count,
+            "probes": [
+                {"kind": p.kind, "target": p.target, "port": p.port, "path": p.path}
+                for p in probes
+            ],
+        }
+        command = shlex.join(["python3", "-c", _REMOTE_PROBE_SCRIPT, json.dumps(spec)])
+
+        try:
+            exit_status, output, error = self.run(command, timeout=timeout)
+            if exit_status != 0:
+                raise RuntimeError(f"probe batch exited {exit_status}: {error.strip()}")
+            results = json.loads(output)["results"]
+            if len(results) != len(probes):
+                raise RuntimeError(
+                    f"probe batch returned {len(results)} results "
+                    f"for {len(probes)} probes"
+                )
+        except Exception as e:
+            return [ProbeResult(p, False, elapsed=0.0, output=str(e)) for p in probes]
+
+        return [
+            ProbeResult(
+                probe,
+                success=r["success"],
+                elapsed=r["elapsed"],
+                output=r["output"],
+                status=r["status"],
+            )
+            for probe, r in zip(probes, results)
+        ]
+
+    def ensure_iperf3(self, timeout: int = 300) -> None:
+        """Install iperf3 on this VM if it is missing.
+
+        Public VMs install it with apt. Private VMs have no internet egress, so
+        the packages are downloaded on the bastion and copied over SFTP.
+
+        Args:
+            timeout: Per-command timeout in seconds.
+
+        Raises:
+            RuntimeError: If installation fails.
+        """
+        if self.run("command -v iperf3", timeout=timeout)[0] == 0:
+            return
+
+        if self.public_ip or not self.bastion:
+            status, _, error = self.run(
+                "sudo apt-get update -qq && "
+                "sudo DEBIAN_FRONTEND=noninteractive apt-get install -y -qq iperf3",
+                timeout=timeout,
+            )
+            if status != 0:
+                raise RuntimeError(f"iperf3 install failed on {self.name}: {error}")
+            return
+
+        stage_dir = "/tmp/iperf3-debs"
+        status, _, error = self.bastion.run(
+            f"sudo apt-get update -qq && rm -rf {stage_dir} && mkdir -p {stage_dir} && "
+            f"cd {stage_dir} && apt-get download {' '.join(IPERF3_PACKAGES)}",
+            timeout=timeout,
+        )
+        if status != 0:
+            raise RuntimeError(
+                f"iperf3 download failed on {self.bastion.name}: {error}"
+            )
+
+        self.run(f"rm -rf {stage_dir} && mkdir -p {stage_dir}", timeout=timeout)
+        source = self.ssh_pool.sftp(self.bastion, timeout)
+        target = self.ssh_pool.sftp(self, timeout)
+        try:
+            with tempfile.TemporaryDirectory() as local_dir:
+                for filename in source.listdir(stage_dir):
+                    local_path = os.path.join(local_dir, filename)
+                    source.get(f"{stage_dir}/{filename}", local_path)
+                    target.put(local_path, f"{stage_dir}/{filename}")
+        finally:
+            source.close()
+            target.close()
+
+        status, _, error = self.run(f"sudo dpkg -i {stage_dir}/*.deb", timeout=timeout)
+        if status != 0:
+            raise RuntimeError(f"iperf3 install failed on {self.name}: {error}")
+
+
+# -----------------------------------------------------------------------------
+# Ping Matrix for Concurrent All-Pairs Reachability
+# -----------------------------------------------------------------------------
+
+
+class PingMatrix:
+    """All-pairs ping results keyed by (source VM name, target VM name).
+
+    Usage:
+        matrix = ping_matrix([vm_a, vm_b, vm_c])
+        result = matrix["vm-a", "vm-b"]
+        assert result.success, result.output
+    """
+
+    def __init__(self, results: list[PingResult]) -> None:
+        self._results: dict[tuple[str, str], PingResult] = {
+            (r.source, r.target): r for r in results
+        }
+
+    def __getitem__(self, key: tuple[str, str]) -> PingResult:
+        return self._results[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._results
+
+    def __iter__(self):
+        return iter(self._results.values())
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def __repr__(self) -> str:
+        return f"PingMatrix({len(self)} pairs, {len(self.failures())} failed)"
+
+    def failures(self) -> list[PingResult]:
+        """Return all pairs that did not reach their target."""
+        return [r for r in self._results.values() if not r.success]
+
+
+def _ssh_entry_host(vm: VM) -> str:
+    """Return the public host an SSH session to this VM is opened through."""
+    if vm.public_ip:
+        return vm.public_ip
+    if vm.bastion and vm.bastion.public_ip:
+        return vm.bastion.public_ip
+    raise ValueError(f"VM {vm.name} has no public IP and no bastion configured")
+
+
+def ping_matrix(
+    sources: list[VM],
+    targets: list[VM] | None = None,
+    max_retries: int = 5,
+    retry_delay: int = 10,
+    timeout: int = 60,
+    ping_count: int = 3,
+    max_per_bastion: int = 8,
+    max_workers: int = 32,
+) -> PingMatrix:
+    """Ping every source -> target pair concurrently.
+
+    Each source VM pings all of its targets in one batched ``VM.probe`` call
+    from its own worker thread, and only targets that failed are retried, so
+    total wall time is bound by the slowest pair rather than the number of
+    pairs. Concurrent sessions through the same bastion (or the same public VM)
+    are capped at ``max_per_bastion`` to stay under sshd's session limits.
+
+    Args:
+        sources: VMs to ping from.
+        targets: VMs to ping (default: same as sources). Self-pairs are skipped.
+        max_retries: Maximum attempts per pair (at least 1).
+        retry_delay: Delay between retries in seconds.
+        timeout: SSH connection timeout in seconds.
+        ping_count: Number of ICMP ping packets to send per attempt.
+        max_per_bastion: Maximum concurrent probes through one SSH entry host.
+        max_workers: Maximum total worker threads (one per source VM).
+
+    Returns:
+        PingMatrix with one PingResult per pair.
+
+    Raises:
+        ValueError: If max_retries is less than 1, or a source VM has no public
+            IP and no bastion configured.
+    """
+    if max_retries < 1:
+        raise ValueError(f"max_retries must be at least 1, got {max_retries}")
+    if targets is None:
+        targets = sources
+    pairs = [(s, t) for s in sources for t in targets if s is not t]
+    if not pairs:
+        return PingMatrix([])
+
+    limits = {
+        host: threading.BoundedSemaphore(max_per_bastion)
+        for host in {_ssh_entry_host(s) for s, _ in pairs}
+    }
+    by_source: dict[int, tuple[VM, list[VM]]] = {}
+    for source, target in pairs:
+        by_source.setdefault(id(source), (source, []))[1].append(target)
+
+    def probe_source(source: VM, source_targets: list[VM]) -> list[PingResult]:
+        started_at = time.time()
+        results: dict[int, PingResult] = {}
+        pending = list(source_targets)
+
+        for attempt in range(max_retries):
+            with limits[_ssh_entry_host(source)]:
+                outcomes = source.probe(
+                    [Probe(t.private_ip) for t in pending],
+                    timeout=timeout,
+                    ping_count=ping_count,
+                )
+            finished_at = time.time()
+            for target, outcome in zip(pending, outcomes):
+                output = outcome.output
+                if not outcome.success and attempt == max_retries - 1:
+                    output = (
+                        f"Failed after {max_retries} attempts. Last output: {output}"
+                    )
+                results[id(target)] = PingResult(
+                    source=source.name,
+                    target=target.name,
+                    target_ip=target.private_ip,
+                    success=outcome.success,
+                    output=output,
+                    started_at=started_at,
+                    finished_at=finished_at,
+                    attempts=attempt + 1,
+                    stats=parse_ping_stats(outcome.output),
+                )
+            pending = [t for t in pending if not results[id(t)].success]
+            if not pending:
+                break
+            if attempt < max_retries - 1:
+                time.sleep(retry_delay)
+
+        return [results[id(t)] for t in source_targets]
+
+    workers = min(max_workers, len(by_source))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(probe_source, s, ts) for s, ts in by_source.values()]
+        return PingMatrix([r for f in futures for r in f.result()])
+
+
+# -----------------------------------------------------------------------------
+# Latency/Loss Collection
+# -----------------------------------------------------------------------------
+
+
+def metrics_path(filename: str) -> Path | None:
+    """Return where to write a metrics file, or None if metrics export is off.
+
+    Metrics are written under the directory named by the AVX_METRICS_DIR
+    environment variable, which is created on first use.
+    """
+    metrics_dir = os.environ.get("AVX_METRICS_DIR")
+    if not metrics_dir:
+        return None
+    path = Path(metrics_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    return path / filename
+
+
+class LatencyCollector:
+    """Aggregates PingResults across a topology into a latency/loss matrix.
+
+    Later results for the same (source, target) pair replace earlier ones.
+
+    Usage:
+        collector = LatencyCollector(metadata={"cross_cloud_tunnel_count": 15})
+        collector.add(ping_matrix(private_vms))
+        slow = collector.over_budget(max_rtt_avg_ms=80)
+        Path("latency.csv").write_text(collector.to_csv())
+    """
+
+    CSV_FIELDS = (
+        "source",
+        "target",
+        "target_ip",
+        "success",
+        "attempts",
+        "started_at",
+        "finished_at",
+        "transmitted",
+        "received",
+        "loss_pct",
+        "rtt_min",
+        "rtt_avg",
+        "rtt_max",
+        "rtt_mdev",
+    )
+
+    def __init__(self, metadata: dict | None = None) -> None:
+        """Initialize an empty collector.
+
+        Args:
+            metadata: Run labels (e.g. peering settings) included in JSON exports.
+        """
+        self.metadata = dict(metadata or {})
+        self._results: dict[tuple[str, str], PingResult] = {}
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def add(self, results: "PingResult | PingMatrix | list[PingResult]") -> None:
+        """Record one result, a list of results or a whole PingMatrix."""
+        if isinstance(results, PingResult):
+            results = [results]
+        for result in results:
+            self._results[result.source, result.target] = result
+
+    def rows(self) -> list[dict]:
+        """Return one flat row per pair, with CSV_FIELDS as keys."""
+        rows = []
+        for _, result in sorted(self._results.items()):
+            stats = asdict(result.stats) if result.stats else {}
+            rows.append(
+                {
+                    field: stats.get(field, getattr(result, field, None))
+                    for field in self.CSV_FIELDS
+                }
+            )
+        return rows
+
+    def matrix(self) -> dict[str, dict[str, PingStats | None]]:
+        """Return statistics as a nested {source: {target: PingStats}} mapping."""
+        matrix: dict[str, dict[str, PingStats | None]] = {}
+        for (source, target), result in sorted(self._results.items()):
+            matrix.setdefault(source, {})[target] = result.stats
+        return matrix
+
+    def over_budget(
+        self,
+        max_rtt_avg_ms: float | None = None,
+        max_loss_pct: float | None = None,
+    ) -> list[PingResult]:
+        """Return pairs that failed, lack statistics or exceed a budget."""
+        violations = []
+        for result in self._results.values():
+            stats = result.stats
+            if not result.success or stats is None:
+                violations.append(result)
+            elif max_loss_pct is not None and stats.loss_pct > max_loss_pct:
+                violations.append(result)
+            elif max_rtt_avg_ms is not None and (
+                stats.rtt_avg is None or stats.rtt_avg > max_rtt_avg_ms
+            ):
+                violations.append(result)
+        return violations
+
+    def to_json(self) -> str:
+        """Export metadata and per-pair rows as a JSON document."""
+        return json.dumps({"metadata": self.metadata, "pairs": self.rows()}, indent=2)
+
+    def to_csv(self) -> str:
+        """Export per-pair rows as CSV with a header line."""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(self.rows())
+        return buffer.getvalue()
+
+
+# -----------------------------------------------------------------------------
+# Continuous Ping Streams and Route Convergence
+# -----------------------------------------------------------------------------
+
+
+_PING_REPLY_RE = re.compile(
+    r"^\[(?P<ts>[\d.]+)\] \d+ bytes from .*icmp_seq=(?P<seq>\d+).* time=(?P<rtt>[\d.]+)"
+)
+_PING_MISS_RE = re.compile(
+    r"^\[(?P<ts>[\d.]+)\] (?:no answer yet for icmp_seq=|From .*icmp_seq=)(?P<seq>\d+)"
+)
+
+
+@dataclass(slots=True)
+class PingEvent:
+    """One probe from a continuous ping stream.
+
+    Attributes:
+        seq: ICMP sequence number.
+        timestamp: Epoch seconds on the source VM clock (``ping -D``).
+        received_at: Local epoch seconds when the line was read.
+        success: Whether an echo reply arrived.
+        rtt_ms: Round-trip time of the reply.
+    """
+
+    seq: int
+    timestamp: float
+    received_at: float
+    success: bool
+    rtt_ms: float | None = None
+
+
+def parse_ping_event(line: str, received_at: float = 0.0) -> PingEvent | None:
+    """Parse one line of ``ping -D -O`` output, or return None if irrelevant."""
+    match = _PING_REPLY_RE.match(line)
+    if match:
+        return PingEvent(
+            int(match["seq"]),
+            float(match["ts"]),
+            received_at,
+            success=True,
+            rtt_ms=float(match["rtt"]),
+        )
+    match = _PING_MISS_RE.match(line)
+    if match:
+        return PingEvent(int(match["seq"]), float(match["ts"]), received_at, False)
+    return None
 
-    Usage:
-        # Create a bastion (public VM)
-        bastion = VM("aws-bastion", private_ip="10.0.1.5", public_ip="54.1.2.3",
-                     ssh_key_path="/path/to/key.pem")
 
-        # Create a private VM that uses the bastion
-        private_vm = VM("aws-private", private_ip="10.0.2.10", bastion=bastion,
-                        ssh_key_path="/path/to/key.pem")
+class PingStream:
+    """Continuous ping from a VM to a target VM, parsed in a background thread.
 
-        # Ping from private VM to another IP
-        success, output = private_vm.ping("10.20.2.15")
+    Runs ``ping -D -O`` on the source VM over a pooled SSH channel, so every
+    sent probe is reported as either a reply or a miss with its timestamp.
+
+    Usage:
+        stream = PingStream(src_vm, dst_vm, interval=0.2)
+        stream.start()
+        ...
+        stream.stop()
+        lost = [e for e in stream.events if not e.success]
     """
 
     def __init__(
         self,
-        name: str,
-        private_ip: str,
-        ssh_key_path: str,
-        public_ip: str | None = None,
-        bastion: "VM | None" = None,
-        username: str = "ubuntu",
+        source: VM,
+        target: VM,
+        interval: float = 0.2,
+        max_duration: int = 3600,
+        on_event: "Callable[[PingEvent], None] | None" = None,
     ) -> None:
-        """Initialize a VM instance.
+        """Initialize a stream (not started).
 
         Args:
-            name: Human-readable name for the VM.
-            private_ip: Private IP address of the VM.
-            ssh_key_path: Path to the SSH private key file.
-            public_ip: Public IP address (if VM has one).
-            bastion: Bastion VM to use for SSH access (for private VMs).
-            username: SSH username (default: ubuntu).
+            source: VM to ping from.
+            target: VM to ping.
+            interval: Seconds between probes (iputils allows >= 0.2 unprivileged).
+            max_duration: Seconds after which ping exits on its own.
+            on_event: Callback invoked from the reader thread for each event.
         """
-        self.name = name
-        self.private_ip = private_ip
-        self.public_ip = public_ip
-        self.bastion = bastion
-        self.ssh_key_path = ssh_key_path
-        self.username = username
+        self.source = source
+        self.target = target
+        self.interval = interval
+        self.max_duration = max_duration
+        self.on_event = on_event
+        self.events: list[PingEvent] = []
+        self.error: str = ""
+        self._channel: paramiko.Channel | None = None
+        self._thread: threading.Thread | None = None
 
     def __repr__(self) -> str:
-        return f"VM({self.name}, private_ip={self.private_ip}, public_ip={self.public_ip})"
+        return f"PingStream({self.source.name} -> {self.target.name})"
 
-    def ping(
-        self,
-        target_ip: str,
-        max_retries: int = 5,
-        retry_delay: int = 10,
-        timeout: int = 60,
-        ping_count: int = 3,
-    ) -> tuple[bool, str]:
-        """Ping a target IP from this VM.
+    def start(self, timeout: int = 60) -> None:
+        """Start pinging; returns once the remote command is running."""
+        command = (
+            f"ping -D -O -n -W 1 -i {self.interval} -w {self.max_duration} "
+            f"{self.target.private_ip}"
+        )
+        self._channel = self.source.ssh_pool.open_stream(
+            self.source, command, timeout=timeout
+        )
+        self._thread = threading.Thread(target=self._read, name=repr(self), daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self) -> bool:
+        """Whether the reader thread is still consuming output."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self) -> None:
+        """Stop pinging and wait for the reader thread to drain."""
+        if self._channel is not None:
+            self._channel.close()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def _read(self) -> None:
+        assert self._channel is not None
+        try:
+            for line in self._channel.makefile("r"):
+                event = parse_ping_event(line.strip(), time.time())
+                if event is None:
+                    continue
+                self.events.append(event)
+                if self.on_event:
+                    self.on_event(event)
+        except Exception as e:
+            if not self._channel.closed:
+                self.error = str(e)
+
+
+@dataclass(slots=True)
+class ConvergenceResult:
+    """Time for one path to become reachable after a change.
+
+    Times are seconds relative to ``started_at`` (local epoch seconds).
+
+    Attributes:
+        source: Name of the VM pinging.
+        target: Name of the VM pinged.
+        started_at: When measurement started (e.g. backbone apply finished).
+        first_success: Time of the first echo reply.
+        stable_success: Start of the first run of ``stable_count`` consecutive
+            replies, i.e. when the path stopped flapping.
+        probes: Number of probes sent until the path was stable or timed out.
+        error: Stream error, if the probe could not run.
+    """
 
-        If the VM has a public IP, SSH directly into it.
-        If the VM has a bastion, SSH through the bastion first.
+    source: str
+    target: str
+    started_at: float
+    first_success: float | None = None
+    stable_success: float | None = None
+    probes: int = 0
+    error: str = ""
 
-        Args:
-            target_ip: IP address to ping.
-            max_retries: Maximum retry attempts for eventual consistency.
-            retry_delay: Delay between retries in seconds.
-            timeout: SSH connection timeout in seconds.
-            ping_count: Number of ICMP ping packets to send.
+    @property
+    def converged(self) -> bool:
+        return self.stable_success is not None
 
-        Returns:
-            Tuple of (success: bool, output: str).
 
-        Raises:
-            ValueError: If VM has no public IP and no bastion configured.
-        """
-        if self.public_ip:
-            return self._ping_direct(target_ip, max_retries, retry_delay, timeout, ping_count)
-        elif self.bastion:
-            return self._ping_via_bastion(target_ip, max_retries, retry_delay, timeout, ping_count)
-        else:
-            raise ValueError(f"VM {self.name} has no public IP and no bastion configured")
+def measure_convergence(
+    vms: list[VM],
+    interval: float = 0.5,
+    stable_count: int = 10,
+    deadline: int = 900,
+    started_at: float | None = None,
+) -> dict[tuple[str, str], ConvergenceResult]:
+    """Measure route convergence between every pair of VMs.
 
-    def _ping_direct(
-        self,
-        target_ip: str,
-        max_retries: int,
-        retry_delay: int,
-        timeout: int,
-        ping_count: int,
-    ) -> tuple[bool, str]:
-        """Ping target by SSH-ing directly into this VM (has public IP)."""
-        last_output = ""
-        pkey = paramiko.RSAKey.from_private_key_file(self.ssh_key_path)
+    Every pair is pinged concurrently at ``interval`` until it has answered
+    ``stable_count`` probes in a row or ``deadline`` seconds have passed.
+    Call this right after the change under test (e.g. a backbone apply).
 
-        for attempt in range(max_retries):
-            client = paramiko.SSHClient()
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    Args:
+        vms: VMs to probe all-pairs between.
+        interval: Seconds between probes per pair.
+        stable_count: Consecutive replies that count as stable.
+        deadline: Maximum seconds to wait for all pairs.
+        started_at: Reference epoch time (default: now).
 
-            try:
-                client.connect(
-                    hostname=self.public_ip,
-                    username=self.username,
-                    pkey=pkey,
-                    timeout=timeout,
-                    look_for_keys=False,
-                    allow_agent=False,
-                )
+    Returns:
+        Mapping of (source name, target name) -> ConvergenceResult.
+    """
+    started_at = time.time() if started_at is None else started_at
+    results: dict[tuple[str, str], ConvergenceResult] = {}
+    streams: list[PingStream] = []
+    done: list[threading.Event] = []
+
+    for source in vms:
+        for target in vms:
+            if source is target:
+                continue
+            result = ConvergenceResult(source.name, target.name, started_at)
+            results[source.name, target.name] = result
+            stable = threading.Event()
+            run: list[PingEvent] = []
+
+            def record(
+                event: PingEvent,
+                result: ConvergenceResult = result,
+                run: list[PingEvent] = run,
+                stable: threading.Event = stable,
+            ) -> None:
+                if stable.is_set():
+                    return
+                result.probes += 1
+                if not event.success:
+                    run.clear()
+                    return
+                if result.first_success is None:
+                    result.first_success = event.received_at - started_at
+                run.append(event)
+                if len(run) >= stable_count:
+                    result.stable_success = run[0].received_at - started_at
+                    stable.set()
+
+            streams.append(
+                PingStream(source, target, interval, deadline + 60, on_event=record)
+            )
+            done.append(stable)
 
-                ping_cmd = f"ping -c {ping_count} -W 5 {target_ip}"
-                stdin, stdout, stderr = client.exec_command(ping_cmd, timeout=timeout)
+    def start(stream: PingStream) -> None:
+        try:
+            stream.start()
+        except Exception as e:
+            results[stream.source.name, stream.target.name].error = str(e)
 
-                exit_status = stdout.channel.recv_exit_status()
-                output = stdout.read().decode("utf-8")
-                error = stderr.read().decode("utf-8")
+    with ThreadPoolExecutor(max_workers=max(1, len(streams))) as pool:
+        list(pool.map(start, streams))
 
-                if exit_status == 0:
-                    return True, output
+    end = started_at + deadline
+    for stream, stable in zip(streams, done):
+        while stream.running and not stable.wait(timeout=0.5) and time.time() < end:
+            pass
+    for stream in streams:
+        stream.stop()
+        if stream.error:
+            results[stream.source.name, stream.target.name].error = stream.error
+    return results
 
-                last_output = f"{output}\n{error}"
 
-            except Exception as e:
-                last_output = str(e)
+# -----------------------------------------------------------------------------
+# Data-Plane Soak Monitoring
+# -----------------------------------------------------------------------------
 
-            finally:
-                client.close()
 
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
+@dataclass(slots=True)
+class Blackout:
+    """A window in which a path dropped every probe.
 
-        return False, f"Failed after {max_retries} attempts. Last output: {last_output}"
+    ``start`` and ``end`` are the source-VM timestamps of the replies that
+    bracket the outage, so the window is accurate to one probe interval. An
+    open blackout never recovered: it ends at the last probe of the stream.
+    """
 
-    def _ping_via_bastion(
-        self,
-        target_ip: str,
-        max_retries: int,
-        retry_delay: int,
-        timeout: int,
-        ping_count: int,
-    ) -> tuple[bool, str]:
-        """Ping target by SSH-ing through bastion, then to this VM."""
-        if not self.bastion or not self.bastion.public_ip:
-            raise ValueError("Bastion must have a public IP")
+    start: float
+    end: float
+    lost: int
+    open: bool = False
 
-        last_output = ""
-        pkey = paramiko.RSAKey.from_private_key_file(self.ssh_key_path)
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
 
-        for attempt in range(max_retries):
-            bastion_client = paramiko.SSHClient()
-            bastion_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            private_client = paramiko.SSHClient()
-            private_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
-            try:
-                # Connect to bastion
-                bastion_client.connect(
-                    hostname=self.bastion.public_ip,
-                    username=self.username,
-                    pkey=pkey,
-                    timeout=timeout,
-                    look_for_keys=False,
-                    allow_agent=False,
-                )
+@dataclass(slots=True)
+class SoakReport:
+    """Loss and blackout windows of one path over a soak run."""
 
-                # Create channel through bastion to this VM
-                bastion_transport = bastion_client.get_transport()
-                if bastion_transport is None:
-                    last_output = "Failed to get transport from bastion"
-                    continue
+    source: str
+    target: str
+    sent: int
+    lost: int
+    blackouts: list[Blackout]
+    error: str = ""
 
-                dest_addr = (self.private_ip, 22)
-                local_addr = (self.bastion.public_ip, 22)
-                channel = bastion_transport.open_channel("direct-tcpip", dest_addr, local_addr)
+    @property
+    def loss_pct(self) -> float:
+        return 100.0 * self.lost / self.sent if self.sent else 100.0
 
-                # Connect to this VM through the channel
-                private_client.connect(
-                    hostname=self.private_ip,
-                    username=self.username,
-                    pkey=pkey,
-                    timeout=timeout,
-                    look_for_keys=False,
-                    allow_agent=False,
-                    sock=channel,
-                )
+    @property
+    def max_blackout(self) -> float:
+        return max((b.duration for b in self.blackouts), default=0.0)
 
-                # Execute ping
-                ping_cmd = f"ping -c {ping_count} -W 5 {target_ip}"
-                stdin, stdout, stderr = private_client.exec_command(ping_cmd, timeout=timeout)
+    @property
+    def ends_down(self) -> bool:
+        """Whether the path was still down when the soak ended."""
+        return bool(self.blackouts) and self.blackouts[-1].open
 
-                exit_status = stdout.channel.recv_exit_status()
-                output = stdout.read().decode("utf-8")
-                error = stderr.read().decode("utf-8")
 
-                if exit_status == 0:
-                    return True, output
+def analyze_soak(events: list[PingEvent]) -> tuple[int, int, list[Blackout]]:
+    """Derive sent/lost counts and blackout windows from stream events.
 
-                last_output = f"{output}\n{error}"
+    Sequence numbers that never produced a line are counted as lost. Losses
+    before the first reply are counted but do not form a blackout, since the
+    path was never shown to be up. Losses after the last reply form an open
+    blackout that ends at the last probe.
+
+    Returns:
+        Tuple of (sent, lost, blackouts).
+    """
+    if not events:
+        return 0, 0, []
+
+    replies = {e.seq: e for e in events if e.success}
+    first_seq = min(e.seq for e in events)
+    last_seq = max(e.seq for e in events)
+    sent = last_seq - first_seq + 1
+    lost = sent - len(replies)
+
+    blackouts = []
+    previous: PingEvent | None = None
+    run = 0
+    for seq in range(first_seq, last_seq + 1):
+        reply = replies.get(seq)
+        if reply is None:
+            run += 1
+            continue
+        if run and previous is not None:
+            blackouts.append(Blackout(previous.timestamp, reply.timestamp, run))
+        previous, run = reply, 0
+    if run and previous is not None:
+        last_probe = max(e.timestamp for e in events)
+        blackouts.append(Blackout(previous.timestamp, last_probe, run, open=True))
+    return sent, lost, blackouts
+
+
+class SoakMonitor:
+    """Keeps continuous probes running between VMs while a change is made.
+
+    Usage:
+        with SoakMonitor(private_vms, interval=0.2) as soak:
+            terraform_apply(BACKBONE_DIR, var_file, variables={"ha_gw": "true"})
+        for report in soak.reports().values():
+            print(report.source, report.target, report.loss_pct, report.blackouts)
+    """
+
+    def __init__(
+        self,
+        vms: list[VM],
+        interval: float = 0.2,
+        max_duration: int = 7200,
+        settle: float = 5.0,
+    ) -> None:
+        """Initialize a monitor for all ordered pairs of ``vms``.
 
+        Args:
+            vms: VMs to probe all-pairs between.
+            interval: Seconds between probes per pair.
+            max_duration: Seconds after which the remote pings exit on their own.
+            settle: Seconds to keep probing before and after the change.
+        """
+        self.settle = settle
+        self.streams = [
+            PingStream(source, target, interval, max_duration)
+            for source in vms
+            for target in vms
+            if source is not target
+        ]
+        self._errors: dict[int, str] = {}
+
+    def __enter__(self) -> "SoakMonitor":
+        def start(stream: PingStream) -> None:
+            try:
+                stream.start()
             except Exception as e:
-                last_output = str(e)
+                self._errors[id(stream)] = str(e)
+
+        with ThreadPoolExecutor(max_workers=max(1, len(self.streams))) as pool:
+            list(pool.map(start, self.streams))
+        time.sleep(self.settle)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        time.sleep(self.settle)
+        for stream in self.streams:
+            stream.stop()
+
+    def reports(self) -> dict[tuple[str, str], SoakReport]:
+        """Return per-path loss and blackout windows."""
+        reports = {}
+        for stream in self.streams:
+            sent, lost, blackouts = analyze_soak(stream.events)
+            reports[stream.source.name, stream.target.name] = SoakReport(
+                stream.source.name,
+                stream.target.name,
+                sent,
+                lost,
+                blackouts,
+                error=self._errors.get(id(stream), stream.error),
+            )
+        return reports
 
-            finally:
-                private_client.close()
-                bastion_client.close()
 
-            if attempt < max_retries - 1:
-                time.sleep(retry_delay)
+# -----------------------------------------------------------------------------
+# Throughput Benchmarks
+# -----------------------------------------------------------------------------
+
+
+@dataclass(slots=True)
+class ThroughputResult:
+    """iperf3 measurement of one client -> server path.
+
+    Attributes:
+        path: Label for the path (e.g. "cross-cloud").
+        client: Name of the VM sending traffic.
+        server: Name of the VM receiving traffic.
+        server_ip: Address the client connected to.
+        streams: Number of parallel TCP streams.
+        duration: Test duration in seconds.
+        success: Whether iperf3 completed.
+        sent_gbps: Sender throughput in Gbit/s.
+        received_gbps: Receiver throughput in Gbit/s.
+        retransmits: TCP retransmits reported by the sender.
+        cpu_client_pct: Total CPU utilization on the client.
+        cpu_server_pct: Total CPU utilization on the server.
+        error: iperf3 or SSH error when the run failed.
+    """
+
+    path: str
+    client: str
+    server: str
+    server_ip: str
+    streams: int
+    duration: int
+    success: bool
+    sent_gbps: float = 0.0
+    received_gbps: float = 0.0
+    retransmits: int | None = None
+    cpu_client_pct: float | None = None
+    cpu_server_pct: float | None = None
+    error: str = ""
+
+
+def parse_iperf3_json(output: str) -> dict:
+    """Extract throughput figures from ``iperf3 -J`` client output.
+
+    Returns:
+        Dict of ThroughputResult fields (sent_gbps, received_gbps, retransmits,
+        cpu_client_pct, cpu_server_pct), or {"error": message} on failure.
+    """
+    try:
+        doc = json.loads(output)
+    except json.JSONDecodeError as e:
+        return {"error": f"invalid iperf3 output: {e}"}
+    if doc.get("error"):
+        return {"error": doc["error"]}
+
+    end = doc.get("end", {})
+    sent = end.get("sum_sent", {})
+    received = end.get("sum_received", {})
+    cpu = end.get("cpu_utilization_percent", {})
+    return {
+        "sent_gbps": sent.get("bits_per_second", 0.0) / 1e9,
+        "received_gbps": received.get("bits_per_second", 0.0) / 1e9,
+        "retransmits": sent.get("retransmits"),
+        "cpu_client_pct": cpu.get("host_total"),
+        "cpu_server_pct": cpu.get("remote_total"),
+    }
+
+
+def measure_throughput(
+    client: VM,
+    server: VM,
+    path: str = "",
+    streams: int = 8,
+    duration: int = 10,
+    port: int = 5201,
+    timeout: int = 60,
+) -> ThroughputResult:
+    """Run one iperf3 test from client to server over their private IPs.
+
+    A one-shot iperf3 server is started on the server VM, so each call
+    measures a fresh connection. iperf3 must already be installed (see
+    VM.ensure_iperf3) and TCP ``port`` open between the VMs.
+
+    Args:
+        client: VM that sends traffic.
+        server: VM that receives traffic.
+        path: Label recorded on the result.
+        streams: Number of parallel TCP streams (iperf3 -P).
+        duration: Test duration in seconds (iperf3 -t).
+        port: iperf3 server port.
+        timeout: SSH timeout in seconds, on top of the test duration.
+
+    Returns:
+        ThroughputResult for the path.
+    """
+    result = ThroughputResult(
+        path=path,
+        client=client.name,
+        server=server.name,
+        server_ip=server.private_ip,
+        streams=streams,
+        duration=duration,
+        success=False,
+    )
+    try:
+        status, _, error = server.run(
+            f"pkill -x iperf3; iperf3 -s -1 -D -p {port}", timeout=timeout
+        )
+        if status != 0:
+            result.error = f"iperf3 server failed to start: {error}"
+            return result
+
+        _, output, error = client.run(
+            f"iperf3 -c {server.private_ip} -p {port} -P {streams} -t {duration} -J",
+            timeout=timeout + duration,
+        )
+    except Exception as e:
+        result.error = str(e)
+        return result
+
+    parsed = parse_iperf3_json(output)
+    if "error" in parsed:
+        result.error = f"{parsed['error']} {error}".strip()
+        return result
+    for name, value in parsed.items():
+        setattr(result, name, value)
+    result.success = True
+    return result
+
+
+def throughput_benchmark(
+    paths: dict[str, tuple[VM, VM]],
+    streams: int = 8,
+    duration: int = 10,
+    port: int = 5201,
+) -> list[ThroughputResult]:
+    """Measure throughput of several labelled client -> server paths.
+
+    iperf3 is installed on every VM concurrently, then the paths are measured
+    one at a time so that tests sharing a transit do not compete for bandwidth.
+
+    Args:
+        paths: Mapping of label -> (client VM, server VM).
+        streams: Number of parallel TCP streams per test.
+        duration: Test duration in seconds.
+        port: iperf3 server port.
+
+    Returns:
+        One ThroughputResult per path, in the order given.
+    """
+    vms = {id(vm): vm for pair in paths.values() for vm in pair}
+    install_errors: dict[int, str] = {}
 
-        return False, f"Failed after {max_retries} attempts. Last output: {last_output}"
+    def install(vm: VM) -> None:
+        try:
+            vm.ensure_iperf3()
+        except Exception as e:
+            install_errors[id(vm)] = str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(vms))) as pool:
+        list(pool.map(install, vms.values()))
+
+    results = []
+    for label, (client, server) in paths.items():
+        errors = [
+            install_errors[id(vm)]
+            for vm in (client, server)
+            if id(vm) in install_errors
+        ]
+        if errors:
+            results.append(
+                ThroughputResult(
+                    path=label,
+                    client=client.name,
+                    server=server.name,
+                    server_ip=server.private_ip,
+                    streams=streams,
+                    duration=duration,
+                    success=False,
+                    error="; ".join(errors),
+                )
+            )
+            continue
+        results.append(
+            measure_throughput(client, server, label, streams, duration, port)
+        )
+    return results
 
 
 # -----------------------------------------------------------------------------
@@ -430,9 +3233,30 @@ class VM:
 # -----------------------------------------------------------------------------
 
 
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with jitter: uniform in [d/2, d], d = base * 2**attempt.
+
+    Keeping half the delay fixed preserves the backoff while the random half
+    spreads retries from many clients apart.
+
+    Args:
+        attempt: Zero-based retry number.
+        base: Delay before the first retry, in seconds.
+        cap: Upper bound on d, in seconds.
+
+    Returns:
+        Seconds to wait.
+    """
+    delay = min(cap, base * 2**attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
 class GatusHealthMonitor:
     """Gatus health monitoring client for checking endpoint status.
 
+    Requests go through one keep-alive ``requests.Session`` per monitor, so
+    retries and repeated status polls reuse the TCP connection.
+
     Usage:
         # Create a Gatus monitor
         gatus = GatusHealthMonitor("http://54.1.2.3:8080")
@@ -447,6 +3271,9 @@ class GatusHealthMonitor:
             password="secret"
         )
         success, message = gatus_auth.check_health()
+
+        # Check many dashboards at once
+        results = gatus_fleet_health({"site-1": gatus, "site-2": gatus_auth})
     """
 
     def __init__(
@@ -454,6 +3281,7 @@ class GatusHealthMonitor:
         base_url: str,
         username: str | None = None,
         password: str | None = None,
+        pool_maxsize: int = 4,
     ) -> None:
         """Initialize a GatusHealthMonitor instance.
 
@@ -461,26 +3289,46 @@ class GatusHealthMonitor:
             base_url: Base URL of the Gatus instance (e.g., http://ip:8080).
             username: Username for basic auth (optional).
             password: Password for basic auth (optional).
+            pool_maxsize: Connections kept open to the instance.
         """
         self.base_url = base_url.rstrip("/")
         self.username = username
         self.password = password
 
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.verify = False  # Skip SSL verification for test VMs
+        if self.username and self.password:
+            self.session.auth = (self.username, self.password)
+
     def __repr__(self) -> str:
         return f"GatusHealthMonitor({self.base_url})"
 
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
+
     def check_health(
         self,
         max_retries: int = 5,
-        retry_delay: int = 10,
+        retry_delay: float = 10,
         timeout: int = 30,
+        max_delay: float = 60,
+        deadline: float | None = None,
     ) -> tuple[bool, str]:
         """Check if Gatus is healthy by hitting the /health endpoint.
 
+        Retries back off exponentially with jitter, starting at retry_delay.
+
         Args:
             max_retries: Maximum retry attempts.
-            retry_delay: Delay between retries in seconds.
+            retry_delay: Delay before the first retry in seconds.
             timeout: Request timeout in seconds.
+            max_delay: Longest delay between retries in seconds.
+            deadline: time.monotonic() value after which no request is started
+                and no retry is waited for.
 
         Returns:
             Tuple of (success: bool, message: str).
@@ -488,18 +3336,14 @@ class GatusHealthMonitor:
         health_url = urljoin(self.base_url + "/", "health")
         last_error = ""
 
-        auth = None
-        if self.username and self.password:
-            auth = (self.username, self.password)
-
         for attempt in range(max_retries):
+            request_timeout: float = timeout
+            if deadline is not None:
+                request_timeout = min(timeout, deadline - time.monotonic())
+                if request_timeout <= 0:
+                    return False, f"Deadline exceeded. Last error: {last_error}"
             try:
-                response = requests.get(
-                    health_url,
-                    auth=auth,
-                    timeout=timeout,
-                    verify=False,  # Skip SSL verification for test VMs
-                )
+                response = self.session.get(health_url, timeout=request_timeout)
 
                 if response.status_code == 200:
                     return True, f"Gatus healthy: {response.text}"
@@ -510,35 +3354,68 @@ class GatusHealthMonitor:
                 last_error = str(e)
 
             if attempt < max_retries - 1:
-                time.sleep(retry_delay)
+                delay = backoff_delay(attempt, retry_delay, max_delay)
+                if deadline is not None:
+                    delay = min(delay, max(0.0, deadline - time.monotonic()))
+                time.sleep(delay)
 
         return False, f"Failed after {max_retries} attempts. Last error: {last_error}"
 
     def get_status(
         self,
         timeout: int = 30,
-    ) -> tuple[bool, dict | str]:
+        page: int | None = None,
+        page_size: int | None = None,
+    ) -> tuple[bool, list | str]:
         """Get Gatus status from the /api/v1/endpoints/statuses endpoint.
 
         Args:
             timeout: Request timeout in seconds.
+            page: Page of results per endpoint (1 holds the most recent).
+            page_size: Results per endpoint and page (Gatus default 20, max 100).
 
         Returns:
-            Tuple of (success: bool, data: dict or error message: str).
+            Tuple of (success: bool, endpoint statuses: list or error message: str).
         """
-        status_url = urljoin(self.base_url + "/", "api/v1/endpoints/statuses")
+        return self._get_json("api/v1/endpoints/statuses", timeout, page, page_size)
 
-        auth = None
-        if self.username and self.password:
-            auth = (self.username, self.password)
+    def get_endpoint_status(
+        self,
+        key: str,
+        timeout: int = 30,
+        page: int | None = None,
+        page_size: int | None = None,
+    ) -> tuple[bool, dict | str]:
+        """Get one endpoint's status from /api/v1/endpoints/{key}/statuses.
+
+        Args:
+            key: Endpoint key (``<group>_<name>`` as reported by get_status).
+            timeout: Request timeout in seconds.
+            page: Page of results (1 holds the most recent).
+            page_size: Results per page (Gatus default 20, max 100).
+
+        Returns:
+            Tuple of (success: bool, endpoint status: dict or error message: str).
+        """
+        path = f"api/v1/endpoints/{quote(key, safe='')}/statuses"
+        return self._get_json(path, timeout, page, page_size)
+
+    def _get_json(
+        self,
+        path: str,
+        timeout: int,
+        page: int | None,
+        page_size: int | None,
+    ) -> tuple[bool, dict | list | str]:
+        url = urljoin(self.base_url + "/", path)
+        params = {}
+        if page is not None:
+            params["page"] = page
+        if page_size is not None:
+            params["pageSize"] = page_size
 
         try:
-            response = requests.get(
-                status_url,
-                auth=auth,
-                timeout=timeout,
-                verify=False,
-            )
+            response = self.session.get(url, params=params, timeout=timeout)
 
             if response.status_code == 200:
                 return True, response.json()
@@ -547,3 +3424,332 @@ class GatusHealthMonitor:
 
         except requests.exceptions.RequestException as e:
             return False, str(e)
+
+
+def gatus_fleet_health(
+    monitors: dict[str, GatusHealthMonitor],
+    deadline: float = 300,
+    max_retries: int = 10,
+    retry_delay: float = 5,
+    max_delay: float = 60,
+    timeout: int = 30,
+    max_workers: int = 32,
+) -> dict[str, tuple[bool, str]]:
+    """Check many Gatus instances concurrently under one overall deadline.
+
+    Every instance is polled in its own thread with exponential backoff, so the
+    fleet costs about as long as its slowest instance, never more than the
+    deadline.
+
+    Args:
+        monitors: Monitors keyed by name (e.g. "aws_site-1").
+        deadline: Seconds from now by which every check must finish.
+        max_retries: Maximum attempts per instance.
+        retry_delay: Delay before the first retry in seconds.
+        max_delay: Longest delay between retries in seconds.
+        timeout: Per-request timeout in seconds.
+        max_workers: Maximum instances polled at once.
+
+    Returns:
+        Mapping of name -> (success, message), as from check_health().
+    """
+    if not monitors:
+        return {}
+    until = time.monotonic() + deadline
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(monitors))) as pool:
+        futures = {
+            name: pool.submit(
+                monitor.check_health,
+                max_retries=max_retries,
+                retry_delay=retry_delay,
+                timeout=timeout,
+                max_delay=max_delay,
+                deadline=until,
+            )
+            for name, monitor in monitors.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+
+# -----------------------------------------------------------------------------
+# Gatus Time-Series Collection
+# -----------------------------------------------------------------------------
+
+
+@dataclass(slots=True, frozen=True)
+class GatusSample:
+    """One Gatus check result.
+
+    Attributes:
+        timestamp: Epoch seconds of the check.
+        success: Whether every condition of the check passed.
+        response_time_ms: The check's ``[RESPONSE_TIME]`` in milliseconds.
+        status: HTTP status code (0 for ICMP/TCP checks).
+    """
+
+    timestamp: float
+    success: bool
+    response_time_ms: float
+    status: int = 0
+
+
+def parse_gatus_result(result: dict) -> GatusSample:
+    """Convert one entry of a Gatus ``results`` list (duration in ns)."""
+    return GatusSample(
+        timestamp=parse_timestamp(result["timestamp"]),
+        success=bool(result.get("success")),
+        response_time_ms=result.get("duration", 0) / 1e6,
+        status=result.get("status", 0),
+    )
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Linearly interpolated percentile of a list (None if empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+@dataclass(slots=True)
+class EndpointStats:
+    """Rolling statistics of one endpoint over its buffered samples."""
+
+    key: str
+    name: str
+    group: str
+    samples: int
+    availability: float | None
+    p50_ms: float | None
+    p95_ms: float | None
+    p99_ms: float | None
+    flaps: int
+    since: float | None
+    until: float | None
+
+
+class EndpointSeries:
+    """Bounded, time-ordered buffer of one endpoint's Gatus results."""
+
+    def __init__(self, key: str, name: str, group: str, maxlen: int = 3600) -> None:
+        self.key = key
+        self.name = name
+        self.group = group
+        self.samples: deque[GatusSample] = deque(maxlen=maxlen)
+
+    def __repr__(self) -> str:
+        return f"EndpointSeries({self.key}, samples={len(self.samples)})"
+
+    @property
+    def last_timestamp(self) -> float | None:
+        return self.samples[-1].timestamp if self.samples else None
+
+    def add(self, samples: list[GatusSample]) -> int:
+        """Append samples newer than the last one held; return how many."""
+        last = self.last_timestamp
+        fresh = sorted(
+            (s for s in samples if last is None or s.timestamp > last),
+            key=lambda s: s.timestamp,
+        )
+        self.samples.extend(fresh)
+        return len(fresh)
+
+    def stats(self, window: float | None = None) -> EndpointStats:
+        """Compute availability, response-time percentiles and flaps.
+
+        Args:
+            window: Only use samples from the last ``window`` seconds before the
+                newest sample (default: the whole buffer).
+        """
+        samples = list(self.samples)
+        if window is not None and samples:
+            start = samples[-1].timestamp - window
+            samples = [s for s in samples if s.timestamp >= start]
+        times = [s.response_time_ms for s in samples]
+        return EndpointStats(
+            key=self.key,
+            name=self.name,
+            group=self.group,
+            samples=len(samples),
+            availability=(
+                sum(s.success for s in samples) / len(samples) if samples else None
+            ),
+            p50_ms=percentile(times, 50),
+            p95_ms=percentile(times, 95),
+            p99_ms=percentile(times, 99),
+            flaps=sum(a.success != b.success for a, b in zip(samples, samples[1:])),
+            since=samples[0].timestamp if samples else None,
+            until=samples[-1].timestamp if samples else None,
+        )
+
+
+def _escape_label_value(value: str) -> str:
+    """Escape an OpenMetrics label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class GatusCollector:
+    """Incrementally polls a Gatus dashboard into per-endpoint ring buffers.
+
+    Each poll fetches only the most recent page of results per endpoint and
+    keeps those newer than the last seen timestamp. If a whole page is new
+    (results may have been missed since the last poll), older pages of that
+    endpoint are fetched until they overlap, up to ``max_pages``.
+
+    Usage:
+        collector = GatusCollector(GatusHealthMonitor(dashboard_url))
+        collector.run(duration=60, interval=5)
+        for stats in collector.snapshot().values():
+            print(stats.key, stats.availability, stats.p95_ms)
+        Path("gatus.prom").write_text(collector.to_openmetrics())
+    """
+
+    def __init__(
+        self,
+        monitor: GatusHealthMonitor,
+        page_size: int = 20,
+        max_pages: int = 5,
+        buffer_size: int = 3600,
+    ) -> None:
+        """Initialize a collector.
+
+        Args:
+            monitor: Client of the dashboard to poll.
+            page_size: Results fetched per endpoint and request.
+            max_pages: Most pages fetched per endpoint to fill a gap.
+            buffer_size: Samples kept per endpoint.
+        """
+        self.monitor = monitor
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.buffer_size = buffer_size
+        self.series: dict[str, EndpointSeries] = {}
+        self.errors: list[str] = []
+
+    def __repr__(self) -> str:
+        return f"GatusCollector({self.monitor.base_url}, endpoints={len(self.series)})"
+
+    def poll(self) -> int:
+        """Fetch new results from the dashboard.
+
+        Returns:
+            Number of new samples stored (failed requests are kept in errors).
+        """
+        ok, statuses = self.monitor.get_status(page=1, page_size=self.page_size)
+        if not ok:
+            self.errors.append(str(statuses))
+            return 0
+
+        added = 0
+        for status in statuses:
+            key = status.get("key") or f"{status.get('group', '')}_{status['name']}"
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = EndpointSeries(
+                    key, status["name"], status.get("group", ""), self.buffer_size
+                )
+            results = status.get("results") or []
+            samples = [parse_gatus_result(result) for result in results]
+            if series.last_timestamp is not None:
+                samples = self._backfill(series, samples) + samples
+            added += series.add(samples)
+        return added
+
+    def _backfill(
+        self, series: EndpointSeries, latest: list[GatusSample]
+    ) -> list[GatusSample]:
+        """Fetch older pages while the newest page has no already-seen result."""
+        last = series.last_timestamp
+        older: list[GatusSample] = []
+        page_samples = latest
+        page = 1
+        while (
+            len(page_samples) == self.page_size
+            and min(s.timestamp for s in page_samples) > last
+            and page < self.max_pages
+        ):
+            page += 1
+            ok, status = self.monitor.get_endpoint_status(
+                series.key, page=page, page_size=self.page_size
+            )
+            if not ok:
+                self.errors.append(str(status))
+                break
+            page_samples = [parse_gatus_result(r) for r in status.get("results") or []]
+            older.extend(page_samples)
+        return older
+
+    def run(self, duration: float, interval: float = 10) -> int:
+        """Poll every ``interval`` seconds for ``duration`` seconds.
+
+        Returns:
+            Total number of new samples stored.
+        """
+        added = 0
+        end = time.monotonic() + duration
+        while True:
+            added += self.poll()
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                return added
+            time.sleep(min(interval, remaining))
+
+    def snapshot(self, window: float | None = None) -> dict[str, EndpointStats]:
+        """Current statistics per endpoint key (see EndpointSeries.stats)."""
+        return {
+            key: series.stats(window) for key, series in sorted(self.series.items())
+        }
+
+    def to_json(self, window: float | None = None) -> str:
+        """Export a snapshot as a JSON document."""
+        return json.dumps(
+            {
+                "dashboard": self.monitor.base_url,
+                "endpoints": [asdict(s) for s in self.snapshot(window).values()],
+            },
+            indent=2,
+        )
+
+    def to_openmetrics(self, window: float | None = None) -> str:
+        """Export a snapshot in the OpenMetrics text format."""
+
+        def labels(stats: EndpointStats, **extra: str) -> str:
+            pairs = {"key": stats.key, "name": stats.name, "group": stats.group}
+            pairs.update(extra)
+            escaped = (f'{k}="{_escape_label_value(v)}"' for k, v in pairs.items())
+            return "{" + ",".join(escaped) + "}"
+
+        snapshot = [s for s in self.snapshot(window).values() if s.samples]
+        lines = [
+            "# TYPE gatus_endpoint_availability_ratio gauge",
+            "# UNIT gatus_endpoint_availability_ratio ratio",
+        ]
+        lines += [
+            f"gatus_endpoint_availability_ratio{labels(s)} {s.availability}"
+            for s in snapshot
+        ]
+        lines += [
+            "# TYPE gatus_endpoint_response_time_seconds summary",
+            "# UNIT gatus_endpoint_response_time_seconds seconds",
+        ]
+        for stats in snapshot:
+            for quantile, value in (
+                ("0.5", stats.p50_ms),
+                ("0.95", stats.p95_ms),
+                ("0.99", stats.p99_ms),
+            ):
+                lines.append(
+                    "gatus_endpoint_response_time_seconds"
+                    f"{labels(stats, quantile=quantile)} {value / 1000}"
+                )
+            lines.append(
+                f"gatus_endpoint_response_time_seconds_count{labels(stats)} "
+                f"{stats.samples}"
+            )
+        lines.append("# TYPE gatus_endpoint_flaps gauge")
+        lines += [f"gatus_endpoint_flaps{labels(s)} {s.flaps}" for s in snapshot]
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
@@ -32,6 +32,15 @@ locals {
   dashboard_ip        = local.dashboard_site.vm.public_vm_public_ip
   dashboard_region    = local.aws_site_config[local.dashboard_site_name].region
 
+  # Sharded dashboards generated by tools.gatus_config (empty when not sharded)
+  gatus_shards = var.gatus_shards_dir == "" ? {} : jsondecode(
+    file("${var.gatus_shards_dir}/shards.json")
+  ).shards
+  ssh_key_files = {
+    aws = local.ssh_key_file
+    gcp = data.terraform_remote_state.site.outputs.gcp_ssh_private_key_file
+  }
+
   # Build list of monitored sites (excluding dashboard site)
   other_aws_sites = {
     for name, site in local.aws_sites : name => site
@@ -112,12 +121,16 @@ YAML
 
 # Write config to local file for debugging
 resource "local_file" "gatus_config" {
+  count = length(local.gatus_shards) == 0 ? 1 : 0
+
   content  = local.gatus_config
   filename = "${path.module}/generated_gatus_config.yaml"
 }
 
 # Update Gatus config on dashboard site
 resource "null_resource" "configure_gatus" {
+  count = length(local.gatus_shards) == 0 ? 1 : 0
+
   triggers = {
     config_hash = sha256(local.gatus_config)
   }
@@ -146,3 +159,35 @@ resource "null_resource" "configure_gatus" {
     ]
   }
 }
+
+# Update Gatus config on each shard dashboard (when gatus_shards_dir is set)
+resource "null_resource" "configure_gatus_shard" {
+  for_each = local.gatus_shards
+
+  triggers = {
+    host        = each.value.host
+    config_hash = filesha256("${var.gatus_shards_dir}/${each.value.config}")
+  }
+
+  connection {
+    type        = "ssh"
+    host        = each.value.host
+    user        = var.ssh_username
+    private_key = file(local.ssh_key_files[each.value.cloud])
+    timeout     = "2m"
+  }
+
+  provisioner "file" {
+    source      = "${var.gatus_shards_dir}/${each.value.config}"
+    destination = "/tmp/gatus_config.yaml"
+  }
+
+  provisioner "remote-exec" {
+    inline = [
+      "sudo cp /tmp/gatus_config.yaml /etc/gatus/config.yaml",
+      "sudo docker restart gatus",
+      "sleep 5",
+      "echo 'Gatus shard ${each.key} config updated and container restarted'",
+    ]
+  }
+}
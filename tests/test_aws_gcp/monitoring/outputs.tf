@@ -33,3 +33,8 @@ output "gatus_config" {
   description = "Generated Gatus configuration"
   value       = local.gatus_config
 }
+
+output "shard_dashboards" {
+  description = "Dashboard URL per shard (empty when not sharded)"
+  value       = { for id, shard in local.gatus_shards : id => shard.url }
+}
@@ -19,3 +19,9 @@ variable "gatus_port" {
   type        = number
   default     = 8080
 }
+
+variable "gatus_shards_dir" {
+  description = "Output directory of tools.gatus_config; empty keeps a single dashboard"
+  type        = string
+  default     = ""
+}
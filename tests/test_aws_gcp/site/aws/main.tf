@@ -79,6 +79,9 @@ module "vpc_us_west_2" {
   enable_gatus  = var.enable_gatus
   gatus_config   = var.gatus_config
   gatus_password = var.gatus_password
+
+  # Throughput benchmarks
+  enable_iperf3 = var.enable_iperf3
 }
 
 # us-east-1 sites
@@ -100,6 +103,9 @@ module "vpc_us_east_1" {
   enable_gatus  = var.enable_gatus
   gatus_config   = var.gatus_config
   gatus_password = var.gatus_password
+
+  # Throughput benchmarks
+  enable_iperf3 = var.enable_iperf3
 }
 
 # eu-west-1 sites
@@ -121,6 +127,9 @@ module "vpc_eu_west_1" {
   enable_gatus  = var.enable_gatus
   gatus_config   = var.gatus_config
   gatus_password = var.gatus_password
+
+  # Throughput benchmarks
+  enable_iperf3 = var.enable_iperf3
 }
 
 # ap-southeast-1 sites
@@ -142,4 +151,7 @@ module "vpc_ap_southeast_1" {
   enable_gatus  = var.enable_gatus
   gatus_config   = var.gatus_config
   gatus_password = var.gatus_password
+
+  # Throughput benchmarks
+  enable_iperf3 = var.enable_iperf3
 }
@@ -48,6 +48,9 @@ module "vm" {
   gatus_config   = var.gatus_config
   gatus_password = var.gatus_password
 
+  # Throughput benchmarks
+  enable_iperf3 = var.enable_iperf3
+
   tags = {
     Environment = "e2e-test"
     Site        = var.site_name
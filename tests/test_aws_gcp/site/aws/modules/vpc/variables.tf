@@ -45,3 +45,12 @@ variable "gatus_password" {
   default     = ""
   sensitive   = true
 }
+
+# -----------------------------------------------------------------------------
+# Throughput Benchmarks
+# -----------------------------------------------------------------------------
+variable "enable_iperf3" {
+  description = "Allow iperf3 (TCP 5201) between VMs for throughput benchmarks"
+  type        = bool
+  default     = false
+}
@@ -71,6 +71,9 @@ module "vm" {
   gatus_config   = var.gatus_config
   gatus_password = var.gatus_password
 
+  # Throughput benchmarks
+  enable_iperf3 = var.enable_iperf3
+
   labels = {
     environment = "e2e-test"
   }
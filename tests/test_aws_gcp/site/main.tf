@@ -28,6 +28,9 @@ module "aws" {
   enable_gatus  = var.enable_gatus
   gatus_config   = var.gatus_config
   gatus_password = var.gatus_password
+
+  # Throughput benchmarks
+  enable_iperf3 = var.enable_iperf3
 }
 
 # -----------------------------------------------------------------------------
@@ -46,4 +49,7 @@ module "gcp" {
   enable_gatus  = var.enable_gatus
   gatus_config   = var.gatus_config
   gatus_password = var.gatus_password
+
+  # Throughput benchmarks
+  enable_iperf3 = var.enable_iperf3
 }
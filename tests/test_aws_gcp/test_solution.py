@@ -7,30 +7,54 @@ AWS-VM-1 --- AWS-VPC-1 ---\
                            /
 AWS-VM-2 --- AWS-VPC-2 ---/
 
-Deployment order (3 stages):
+Deployment order (3 stages, backbone and monitoring in parallel):
 1. site/ - All AWS + GCP VPCs + VMs (single terraform apply)
-2. backbone/ - AWS Transit + GCP Transit + Spoke Gateways + Transit Peering
-3. monitoring/ - Configure Gatus dashboard on site-1 to monitor all sites
+2. backbone/ and monitoring/, concurrently:
+   a. backbone/ - AWS Transit + GCP Transit + Spoke Gateways + Transit Peering
+   b. monitoring/ - Configure Gatus dashboard on site-1 to monitor all sites
 
 Environment variables:
 - AVX_TFVARS: Path to terraform var file (required)
 - AVX_NODESTROY: Set to any value to skip terraform destroy after tests
 - TF_VAR_enable_gatus: Set to "true" to enable Gatus health monitoring
+- AVX_RTT_BUDGET_MS: Maximum average private-to-private RTT in ms (optional)
+- AVX_METRICS_DIR: Directory to export latency/loss metrics to (optional)
+- AVX_GATUS_MIN_AVAILABILITY: Minimum per-endpoint Gatus availability, 0-1 (optional)
+- AVX_BENCHMARK: Set to run iperf3 throughput benchmarks (needs enable_iperf3=true)
+- AVX_CONVERGENCE_SLO_S: Maximum seconds for every path to converge (optional)
+- AVX_SOAK_VARS: Backbone -var overrides (e.g. "ha_gw=true") to re-apply under a
+  data-plane soak; AVX_SOAK_MAX_BLACKOUT_S bounds the tolerated outage
 """
 
+import json
 import os
+import threading
+import time
 from collections.abc import Generator
+from dataclasses import asdict
 from pathlib import Path
 
 import pytest
 
 from tests.conftest import (
     VM,
+    ConvergenceResult,
+    GatusCollector,
     GatusHealthMonitor,
+    LatencyCollector,
+    PingMatrix,
+    SoakMonitor,
+    SoakReport,
+    StageOrchestrator,
+    TerraformStage,
+    ThroughputResult,
+    gatus_fleet_health,
+    measure_convergence,
+    metrics_path,
+    ping_matrix,
     terraform_apply,
-    terraform_destroy,
-    terraform_init,
     terraform_output,
+    throughput_benchmark,
 )
 
 # Paths to terraform directories
@@ -39,23 +63,75 @@ SITE_DIR = TEST_DIR / "site"
 BACKBONE_DIR = TEST_DIR / "backbone"
 MONITORING_DIR = TEST_DIR / "monitoring"
 
+# Route convergence probing after the backbone apply
+CONVERGENCE_INTERVAL = 0.5
+CONVERGENCE_STABLE_COUNT = 10
+CONVERGENCE_DEADLINE = 900
+
+# Filled in by a background thread that deploy_infrastructure starts when it
+# applies the backbone; join it with _wait_for_convergence() before reading.
+CONVERGENCE_RESULTS: dict[tuple[str, str], ConvergenceResult] = {}
+_CONVERGENCE_THREADS: list[threading.Thread] = []
+
+
+def _measure_convergence(applied_at: float) -> None:
+    """Time how long each private path takes to converge after the peering exists.
+
+    A failure to measure (outputs, SSH) is recorded as a non-converged result,
+    so it fails test_backbone_convergence rather than the deploy.
+    """
+    print("\n=== Measuring route convergence ===")
+    try:
+        site = terraform_output(SITE_DIR)
+        vms = _create_vms(_aws_site_outputs(site), _gcp_site_outputs(site))
+        CONVERGENCE_RESULTS.update(
+            measure_convergence(
+                [vm for key, vm in vms.items() if key.endswith("_private")],
+                interval=CONVERGENCE_INTERVAL,
+                stable_count=CONVERGENCE_STABLE_COUNT,
+                deadline=CONVERGENCE_DEADLINE,
+                started_at=applied_at,
+            )
+        )
+    except Exception as e:
+        CONVERGENCE_RESULTS["measurement", "private VMs"] = ConvergenceResult(
+            "measurement", "private VMs", applied_at, error=f"{type(e).__name__}: {e}"
+        )
+
+
+def _start_convergence_measurement() -> None:
+    thread = threading.Thread(
+        target=_measure_convergence,
+        args=(time.time(),),
+        name="convergence",
+        daemon=True,
+    )
+    _CONVERGENCE_THREADS.append(thread)
+    thread.start()
+
+
+def _wait_for_convergence() -> None:
+    for thread in _CONVERGENCE_THREADS:
+        thread.join()
+
 
 @pytest.fixture(scope="session", autouse=True)
 def deploy_infrastructure(var_file: str) -> Generator[None, None, None]:
-    """Deploy infrastructure in 3 stages.
+    """Deploy infrastructure in 3 stages along their state dependencies.
 
-    Deployment order:
+    Stage graph (from terraform_remote_state references):
     1. site - All AWS + GCP VPCs + VMs (single terraform apply)
-    2. backbone - AWS Transit + GCP Transit + Spoke Gateways + Transit Peering
-    3. monitoring - Configure Gatus dashboard on site-1 (if enable_gatus=true)
+    2. backbone and monitoring, concurrently:
+       a. backbone - AWS Transit + GCP Transit + Spoke Gateways + Transit Peering
+       b. monitoring - Configure Gatus dashboard on site-1 (if enable_gatus=true)
 
-    Destroy order (reverse):
-    1. monitoring
-    2. backbone
-    3. site
+    backbone and monitoring only read the site state, so they apply
+    concurrently once site is up. Destroy runs the graph in reverse:
+    backbone and monitoring together, then site.
 
     Environment variables:
     - TF_SKIP_DEPLOY: Skip terraform deployment (use existing infrastructure)
+    - AVX_NOCACHE: Re-apply every stage even if its fingerprint is unchanged
     - AVX_NODESTROY: Skip terraform destroy after tests
     - TF_VAR_enable_gatus: Enable Gatus health monitoring
     """
@@ -65,22 +141,24 @@ def deploy_infrastructure(var_file: str) -> Generator[None, None, None]:
         yield
         return
 
-    # Deploy site (AWS + GCP combined)
-    print("\n=== Deploying site (AWS + GCP) ===")
-    terraform_init(SITE_DIR)
-    terraform_apply(SITE_DIR, var_file)
-
-    # Deploy backbone (connects sites via transits and spoke gateways)
-    print("\n=== Deploying backbone ===")
-    terraform_init(BACKBONE_DIR)
-    terraform_apply(BACKBONE_DIR, var_file)
-
+    stage_dirs = [SITE_DIR, BACKBONE_DIR]
     # Deploy monitoring (configure Gatus dashboard on site-1) if Gatus is enabled
     # Note: terraform variable names are case-sensitive (enable_gatus not ENABLE_GATUS)
     if os.environ.get("TF_VAR_enable_gatus", "").lower() == "true":  # noqa: SIM112
-        print("\n=== Deploying monitoring (Gatus dashboard) ===")
-        terraform_init(MONITORING_DIR)
-        terraform_apply(MONITORING_DIR, var_file)
+        stage_dirs.append(MONITORING_DIR)
+    orchestrator = StageOrchestrator.from_dirs(stage_dirs)
+
+    # Convergence is measured off the apply worker, so the deploy neither waits
+    # for it nor fails with it.
+    def on_applied(stage: TerraformStage) -> None:
+        if stage.tf_dir == BACKBONE_DIR:
+            _start_convergence_measurement()
+
+    orchestrator.apply(
+        var_file,
+        on_applied=on_applied,
+        use_cache=not os.environ.get("AVX_NOCACHE"),
+    )
 
     print("\n=== Infrastructure deployed successfully ===")
 
@@ -91,27 +169,10 @@ def deploy_infrastructure(var_file: str) -> Generator[None, None, None]:
         print("\n=== AVX_NODESTROY set, skipping destroy ===")
         return
 
+    _wait_for_convergence()
     print("\n=== Destroying infrastructure ===")
-
-    # Destroy monitoring first (if it was deployed)
-    if os.environ.get("TF_VAR_enable_gatus", "").lower() == "true":  # noqa: SIM112
-        print("\n=== Destroying monitoring ===")
-        try:
-            terraform_destroy(MONITORING_DIR, var_file)
-        except Exception as e:
-            print(f"Warning: monitoring destroy failed: {e}")
-
-    print("\n=== Destroying backbone ===")
-    try:
-        terraform_destroy(BACKBONE_DIR, var_file)
-    except Exception as e:
-        print(f"Warning: backbone destroy failed: {e}")
-
-    print("\n=== Destroying site ===")
-    try:
-        terraform_destroy(SITE_DIR, var_file)
-    except Exception as e:
-        print(f"Warning: site destroy failed: {e}")
+    for name, error in orchestrator.destroy(var_file).items():
+        print(f"Warning: {name} destroy failed: {error}")
 
 
 @pytest.fixture(scope="module")
@@ -123,9 +184,7 @@ def site_outputs() -> dict:
     return outputs
 
 
-@pytest.fixture(scope="module")
-def aws_site_outputs(site_outputs: dict) -> dict:
-    """Extract AWS site outputs in the expected format."""
+def _aws_site_outputs(site_outputs: dict) -> dict:
     return {
         "sites": {"value": site_outputs["aws_sites"]["value"]},
         "site_config": {"value": site_outputs["aws_site_config"]["value"]},
@@ -134,9 +193,7 @@ def aws_site_outputs(site_outputs: dict) -> dict:
     }
 
 
-@pytest.fixture(scope="module")
-def gcp_site_outputs(site_outputs: dict) -> dict:
-    """Extract GCP site outputs in the expected format."""
+def _gcp_site_outputs(site_outputs: dict) -> dict:
     return {
         "vm": {"value": site_outputs["gcp_vm"]["value"]},
         "vm_vpc_id": {"value": site_outputs["gcp_vm_vpc_id"]["value"]},
@@ -146,6 +203,18 @@ def gcp_site_outputs(site_outputs: dict) -> dict:
     }
 
 
+@pytest.fixture(scope="module")
+def aws_site_outputs(site_outputs: dict) -> dict:
+    """Extract AWS site outputs in the expected format."""
+    return _aws_site_outputs(site_outputs)
+
+
+@pytest.fixture(scope="module")
+def gcp_site_outputs(site_outputs: dict) -> dict:
+    """Extract GCP site outputs in the expected format."""
+    return _gcp_site_outputs(site_outputs)
+
+
 @pytest.fixture(scope="module")
 def backbone_outputs() -> dict:
     """Load backbone terraform outputs."""
@@ -300,69 +369,184 @@ CROSS_CLOUD_RETRIES = 8
 CROSS_CLOUD_RETRY_DELAY = 15
 
 
-def test_aws_site1_to_gcp_private_ping(aws_site_outputs: dict, gcp_site_outputs: dict) -> None:
-    """Verify AWS site-1 private VM can ping GCP private VM."""
-    vms = _create_vms(aws_site_outputs, gcp_site_outputs)
+@pytest.fixture(scope="module")
+def vms(aws_site_outputs: dict, gcp_site_outputs: dict) -> dict[str, VM]:
+    """VM objects for every site, keyed as in _create_vms."""
+    return _create_vms(aws_site_outputs, gcp_site_outputs)
+
 
-    success, output = vms["aws_site-1_private"].ping(
-        vms["gcp_private"].private_ip,
+@pytest.fixture(scope="module")
+def private_ping_matrix(vms: dict[str, VM]) -> PingMatrix:
+    """Ping every private VM from every other private VM concurrently."""
+    private_vms = [vm for key, vm in vms.items() if key.endswith("_private")]
+    return ping_matrix(
+        private_vms,
         max_retries=CROSS_CLOUD_RETRIES,
         retry_delay=CROSS_CLOUD_RETRY_DELAY,
     )
 
-    assert success, f"AWS-site-1-Private -> GCP-Private ping failed: {output}"
+
+def test_aws_site1_to_gcp_private_ping(private_ping_matrix: PingMatrix) -> None:
+    """Verify AWS site-1 private VM can ping GCP private VM."""
+    result = private_ping_matrix["aws-site-1-private", "gcp-private"]
+
+    assert result.success, f"AWS-site-1-Private -> GCP-Private ping failed: {result.output}"
 
 
-def test_aws_site2_to_gcp_private_ping(aws_site_outputs: dict, gcp_site_outputs: dict) -> None:
+def test_aws_site2_to_gcp_private_ping(private_ping_matrix: PingMatrix) -> None:
     """Verify AWS site-2 private VM can ping GCP private VM."""
-    vms = _create_vms(aws_site_outputs, gcp_site_outputs)
+    result = private_ping_matrix["aws-site-2-private", "gcp-private"]
 
-    success, output = vms["aws_site-2_private"].ping(
-        vms["gcp_private"].private_ip,
-        max_retries=CROSS_CLOUD_RETRIES,
-        retry_delay=CROSS_CLOUD_RETRY_DELAY,
+    assert result.success, f"AWS-site-2-Private -> GCP-Private ping failed: {result.output}"
+
+
+def test_gcp_to_aws_site1_private_ping(private_ping_matrix: PingMatrix) -> None:
+    """Verify GCP private VM can ping AWS site-1 private VM."""
+    result = private_ping_matrix["gcp-private", "aws-site-1-private"]
+
+    assert result.success, f"GCP-Private -> AWS-site-1-Private ping failed: {result.output}"
+
+
+def test_gcp_to_aws_site2_private_ping(private_ping_matrix: PingMatrix) -> None:
+    """Verify GCP private VM can ping AWS site-2 private VM."""
+    result = private_ping_matrix["gcp-private", "aws-site-2-private"]
+
+    assert result.success, f"GCP-Private -> AWS-site-2-Private ping failed: {result.output}"
+
+
+def test_aws_site1_to_site2_private_ping(private_ping_matrix: PingMatrix) -> None:
+    """Verify AWS site-1 private VM can ping AWS site-2 private VM (via transit)."""
+    result = private_ping_matrix["aws-site-1-private", "aws-site-2-private"]
+
+    assert result.success, (
+        f"AWS-site-1-Private -> AWS-site-2-Private ping failed: {result.output}"
     )
 
-    assert success, f"AWS-site-2-Private -> GCP-Private ping failed: {output}"
 
+@pytest.fixture(scope="module")
+def latency_collector(private_ping_matrix: PingMatrix) -> LatencyCollector:
+    """Latency/loss matrix of the private VM pings, exported if metrics are on."""
+    collector = LatencyCollector(
+        metadata={"ha_gw": os.environ.get("TF_VAR_ha_gw", "false")}
+    )
+    collector.add(private_ping_matrix)
 
-def test_gcp_to_aws_site1_private_ping(aws_site_outputs: dict, gcp_site_outputs: dict) -> None:
-    """Verify GCP private VM can ping AWS site-1 private VM."""
-    vms = _create_vms(aws_site_outputs, gcp_site_outputs)
+    json_path = metrics_path("private_latency.json")
+    if json_path:
+        json_path.write_text(collector.to_json())
+        json_path.with_suffix(".csv").write_text(collector.to_csv())
+    return collector
 
-    success, output = vms["gcp_private"].ping(
-        vms["aws_site-1_private"].private_ip,
-        max_retries=CROSS_CLOUD_RETRIES,
-        retry_delay=CROSS_CLOUD_RETRY_DELAY,
+
+def test_private_latency_budget(latency_collector: LatencyCollector) -> None:
+    """Verify private-to-private RTT stays within AVX_RTT_BUDGET_MS without loss."""
+    budget = os.environ.get("AVX_RTT_BUDGET_MS")
+    if not budget:
+        pytest.skip("AVX_RTT_BUDGET_MS not set")
+
+    violations = latency_collector.over_budget(
+        max_rtt_avg_ms=float(budget), max_loss_pct=0.0
     )
 
-    assert success, f"GCP-Private -> AWS-site-1-Private ping failed: {output}"
+    assert not violations, "Latency budget exceeded: " + ", ".join(
+        f"{r.source} -> {r.target} ({r.stats})" for r in violations
+    )
 
 
-def test_gcp_to_aws_site2_private_ping(aws_site_outputs: dict, gcp_site_outputs: dict) -> None:
-    """Verify GCP private VM can ping AWS site-2 private VM."""
-    vms = _create_vms(aws_site_outputs, gcp_site_outputs)
+# -----------------------------------------------------------------------------
+# Route Convergence (measured during deploy)
+# -----------------------------------------------------------------------------
+@pytest.fixture(scope="module")
+def convergence_results() -> dict[tuple[str, str], ConvergenceResult]:
+    """Convergence timings recorded after the backbone apply, exported if enabled."""
+    _wait_for_convergence()
+    if not CONVERGENCE_RESULTS:
+        pytest.skip("Backbone not applied in this session (TF_SKIP_DEPLOY set?)")
+
+    json_path = metrics_path("convergence.json")
+    if json_path:
+        rows = [asdict(r) for r in CONVERGENCE_RESULTS.values()]
+        json_path.write_text(json.dumps(rows, indent=2))
+    return CONVERGENCE_RESULTS
+
+
+def test_backbone_convergence(
+    convergence_results: dict[tuple[str, str], ConvergenceResult],
+) -> None:
+    """Verify every private path converged after the backbone apply."""
+    print("\nRoute convergence after backbone apply (first / stable, seconds):")
+    for r in convergence_results.values():
+        print(f"  {r.source} -> {r.target}: {r.first_success} / {r.stable_success}")
+
+    failed = [r for r in convergence_results.values() if not r.converged]
+    assert not failed, "Paths did not converge: " + ", ".join(
+        f"{r.source} -> {r.target} {r.error}".rstrip() for r in failed
+    )
 
-    success, output = vms["gcp_private"].ping(
-        vms["aws_site-2_private"].private_ip,
-        max_retries=CROSS_CLOUD_RETRIES,
-        retry_delay=CROSS_CLOUD_RETRY_DELAY,
+    slo = os.environ.get("AVX_CONVERGENCE_SLO_S")
+    if slo:
+        slow = [
+            r for r in convergence_results.values() if r.stable_success > float(slo)
+        ]
+        assert not slow, f"Paths slower than {slo}s to converge: " + ", ".join(
+            f"{r.source} -> {r.target} ({r.stable_success:.1f}s)" for r in slow
+        )
+
+
+# -----------------------------------------------------------------------------
+# Throughput Benchmarks (requires AVX_BENCHMARK and enable_iperf3=true)
+# -----------------------------------------------------------------------------
+BENCHMARK_STREAMS = 8
+BENCHMARK_DURATION = 15
+
+
+@pytest.fixture(scope="module")
+def throughput_results(vms: dict[str, VM]) -> list[ThroughputResult]:
+    """Run iperf3 between private VMs on same-cloud and cross-cloud paths."""
+    if not os.environ.get("AVX_BENCHMARK"):
+        pytest.skip("AVX_BENCHMARK not set")
+
+    aws_private = sorted(
+        key for key in vms if key.startswith("aws_") and key.endswith("_private")
+    )
+    paths = {}
+    for src, dst in zip(aws_private, aws_private[1:]):
+        paths[f"same-cloud: {vms[src].name} -> {vms[dst].name}"] = (vms[src], vms[dst])
+    for key in aws_private:
+        aws_vm, gcp_vm = vms[key], vms["gcp_private"]
+        paths[f"cross-cloud: {aws_vm.name} -> {gcp_vm.name}"] = (aws_vm, gcp_vm)
+        paths[f"cross-cloud: {gcp_vm.name} -> {aws_vm.name}"] = (gcp_vm, aws_vm)
+
+    results = throughput_benchmark(
+        paths, streams=BENCHMARK_STREAMS, duration=BENCHMARK_DURATION
     )
 
-    assert success, f"GCP-Private -> AWS-site-2-Private ping failed: {output}"
+    json_path = metrics_path("throughput.json")
+    if json_path:
+        json_path.write_text(json.dumps([asdict(r) for r in results], indent=2))
+    return results
 
 
-def test_aws_site1_to_site2_private_ping(aws_site_outputs: dict, gcp_site_outputs: dict) -> None:
-    """Verify AWS site-1 private VM can ping AWS site-2 private VM (via transit)."""
-    vms = _create_vms(aws_site_outputs, gcp_site_outputs)
+def test_throughput_benchmark(throughput_results: list[ThroughputResult]) -> None:
+    """Verify every benchmarked path moves traffic and report Gbps per path."""
+    print(f"\nThroughput ({BENCHMARK_STREAMS} streams, {BENCHMARK_DURATION}s):")
+    for r in throughput_results:
+        print(
+            f"  {r.path}: {r.received_gbps:.2f} Gbps received, "
+            f"{r.retransmits} retransmits, cpu {r.cpu_client_pct}/{r.cpu_server_pct}%"
+        )
 
-    success, output = vms["aws_site-1_private"].ping(
-        vms["aws_site-2_private"].private_ip,
-        max_retries=CROSS_CLOUD_RETRIES,
-        retry_delay=CROSS_CLOUD_RETRY_DELAY,
+    failed = [r for r in throughput_results if not r.success]
+    assert not failed, "Throughput benchmark failed: " + ", ".join(
+        f"{r.path} ({r.error})" for r in failed
     )
 
-    assert success, f"AWS-site-1-Private -> AWS-site-2-Private ping failed: {output}"
+    min_gbps = os.environ.get("AVX_MIN_GBPS")
+    if min_gbps:
+        slow = [r for r in throughput_results if r.received_gbps < float(min_gbps)]
+        assert not slow, f"Paths below {min_gbps} Gbps: " + ", ".join(
+            f"{r.path} ({r.received_gbps:.2f})" for r in slow
+        )
 
 
 # -----------------------------------------------------------------------------
@@ -370,7 +554,8 @@ def test_aws_site1_to_site2_private_ping(aws_site_outputs: dict, gcp_site_output
 # -----------------------------------------------------------------------------
 # Gatus retry settings (more generous for container startup)
 GATUS_RETRIES = 10
-GATUS_RETRY_DELAY = 15
+GATUS_RETRY_DELAY = 5
+GATUS_DEADLINE = 450
 
 
 def _get_gatus_urls(aws_site_outputs: dict, gcp_site_outputs: dict) -> dict[str, str]:
@@ -393,51 +578,51 @@ def _get_gatus_urls(aws_site_outputs: dict, gcp_site_outputs: dict) -> dict[str,
     return gatus_urls
 
 
-def test_aws_site1_gatus_health(aws_site_outputs: dict, gcp_site_outputs: dict) -> None:
-    """Verify AWS site-1 Gatus health endpoint is accessible."""
-    gatus_urls = _get_gatus_urls(aws_site_outputs, gcp_site_outputs)
+@pytest.fixture(scope="module")
+def gatus_health(
+    aws_site_outputs: dict, gcp_site_outputs: dict
+) -> Generator[dict[str, tuple[bool, str]], None, None]:
+    """Health of every site's Gatus instance, checked concurrently once."""
+    monitors = {
+        name: GatusHealthMonitor(url)
+        for name, url in _get_gatus_urls(aws_site_outputs, gcp_site_outputs).items()
+    }
+    try:
+        yield gatus_fleet_health(
+            monitors,
+            deadline=GATUS_DEADLINE,
+            max_retries=GATUS_RETRIES,
+            retry_delay=GATUS_RETRY_DELAY,
+        )
+    finally:
+        for monitor in monitors.values():
+            monitor.close()
 
-    if "aws_site-1" not in gatus_urls:
-        pytest.skip("Gatus not enabled for AWS site-1 (set enable_gatus=true in tfvars)")
 
-    gatus = GatusHealthMonitor(gatus_urls["aws_site-1"])
-    success, message = gatus.check_health(
-        max_retries=GATUS_RETRIES,
-        retry_delay=GATUS_RETRY_DELAY,
-    )
+def test_aws_site1_gatus_health(gatus_health: dict[str, tuple[bool, str]]) -> None:
+    """Verify AWS site-1 Gatus health endpoint is accessible."""
+    if "aws_site-1" not in gatus_health:
+        pytest.skip("Gatus not enabled for AWS site-1 (set enable_gatus=true in tfvars)")
 
+    success, message = gatus_health["aws_site-1"]
     assert success, f"AWS-site-1 Gatus health check failed: {message}"
 
 
-def test_aws_site2_gatus_health(aws_site_outputs: dict, gcp_site_outputs: dict) -> None:
+def test_aws_site2_gatus_health(gatus_health: dict[str, tuple[bool, str]]) -> None:
     """Verify AWS site-2 Gatus health endpoint is accessible."""
-    gatus_urls = _get_gatus_urls(aws_site_outputs, gcp_site_outputs)
-
-    if "aws_site-2" not in gatus_urls:
+    if "aws_site-2" not in gatus_health:
         pytest.skip("Gatus not enabled for AWS site-2 (set enable_gatus=true in tfvars)")
 
-    gatus = GatusHealthMonitor(gatus_urls["aws_site-2"])
-    success, message = gatus.check_health(
-        max_retries=GATUS_RETRIES,
-        retry_delay=GATUS_RETRY_DELAY,
-    )
-
+    success, message = gatus_health["aws_site-2"]
     assert success, f"AWS-site-2 Gatus health check failed: {message}"
 
 
-def test_gcp_gatus_health(aws_site_outputs: dict, gcp_site_outputs: dict) -> None:
+def test_gcp_gatus_health(gatus_health: dict[str, tuple[bool, str]]) -> None:
     """Verify GCP Gatus health endpoint is accessible."""
-    gatus_urls = _get_gatus_urls(aws_site_outputs, gcp_site_outputs)
-
-    if "gcp" not in gatus_urls:
+    if "gcp" not in gatus_health:
         pytest.skip("Gatus not enabled for GCP (set enable_gatus=true in tfvars)")
 
-    gatus = GatusHealthMonitor(gatus_urls["gcp"])
-    success, message = gatus.check_health(
-        max_retries=GATUS_RETRIES,
-        retry_delay=GATUS_RETRY_DELAY,
-    )
-
+    success, message = gatus_health["gcp"]
     assert success, f"GCP Gatus health check failed: {message}"
 
 
@@ -485,33 +670,108 @@ def test_monitoring_dashboard_health(monitoring_outputs: dict) -> None:
     success, message = gatus.check_health(
         max_retries=GATUS_RETRIES,
         retry_delay=GATUS_RETRY_DELAY,
+        deadline=time.monotonic() + GATUS_DEADLINE,
     )
+    gatus.close()
 
     assert success, f"Monitoring dashboard health check failed: {message}"
 
 
 def test_monitoring_dashboard_status(monitoring_outputs: dict) -> None:
-    """Verify monitoring dashboard shows status for all monitored endpoints."""
+    """Verify the dashboard records results for every endpoint and export them.
+
+    With AVX_GATUS_MIN_AVAILABILITY set, every endpoint's availability over the
+    recorded history must also meet that fraction (e.g. 0.99).
+    """
     dashboard_url = monitoring_outputs["dashboard_url"]["value"]
 
     gatus = GatusHealthMonitor(dashboard_url)
-    success, status = gatus.get_status()
-
-    if not success:
-        pytest.skip(f"Could not get dashboard status: {status}")
-
-    # Verify we have endpoint statuses
-    assert isinstance(status, list), "Expected list of endpoint statuses"
-    assert len(status) > 0, "Expected at least one monitored endpoint"
-
-    # Print status for debugging
-    print(f"\nMonitoring dashboard status ({len(status)} endpoints):")
-    for endpoint_group in status:
-        group_name = endpoint_group.get("name", "unknown")
-        results = endpoint_group.get("results", [])
-        print(f"  Group: {group_name}")
-        for result in results:
-            name = result.get("name", "unknown")
-            healthy = result.get("success", False)
-            status_icon = "✓" if healthy else "✗"
-            print(f"    {status_icon} {name}")
+    collector = GatusCollector(gatus)
+    try:
+        collector.poll()
+    finally:
+        gatus.close()
+
+    if collector.errors:
+        pytest.skip(f"Could not get dashboard status: {collector.errors[-1]}")
+
+    stats = collector.snapshot()
+    assert stats, "Expected at least one monitored endpoint"
+
+    print(f"\nMonitoring dashboard status ({len(stats)} endpoints):")
+    for s in stats.values():
+        if not s.samples:
+            print(f"  {s.group}/{s.name}: no results yet")
+            continue
+        print(
+            f"  {s.group}/{s.name}: {s.availability:.1%} of {s.samples} "
+            f"(p95 {s.p95_ms:.1f}ms, {s.flaps} flaps)"
+        )
+
+    json_path = metrics_path("gatus.json")
+    if json_path:
+        json_path.write_text(collector.to_json())
+        json_path.with_suffix(".prom").write_text(collector.to_openmetrics())
+
+    min_availability = os.environ.get("AVX_GATUS_MIN_AVAILABILITY")
+    if min_availability:
+        below = {
+            key: s.availability
+            for key, s in stats.items()
+            if s.availability is not None and s.availability < float(min_availability)
+        }
+        assert not below, f"Endpoints below {min_availability} availability: {below}"
+
+
+# -----------------------------------------------------------------------------
+# Data-Plane Soak (requires AVX_SOAK_VARS; runs last since it changes the backbone)
+# -----------------------------------------------------------------------------
+SOAK_INTERVAL = 0.2
+
+
+def test_backbone_change_soak(vms: dict[str, VM], var_file: str) -> None:
+    """Re-apply the backbone with AVX_SOAK_VARS under constant private traffic."""
+    soak_vars = os.environ.get("AVX_SOAK_VARS")
+    if not soak_vars:
+        pytest.skip("AVX_SOAK_VARS not set")
+    variables = dict(item.split("=", 1) for item in soak_vars.split(","))
+
+    # Changing the backbone would disturb a convergence measurement in flight.
+    _wait_for_convergence()
+    private_vms = [vm for key, vm in vms.items() if key.endswith("_private")]
+    with SoakMonitor(private_vms, interval=SOAK_INTERVAL) as soak:
+        terraform_apply(BACKBONE_DIR, var_file, variables=variables)
+    reports: dict[tuple[str, str], SoakReport] = soak.reports()
+
+    json_path = metrics_path("soak.json")
+    if json_path:
+        rows = [asdict(r) | {"loss_pct": r.loss_pct} for r in reports.values()]
+        report = {"variables": variables, "paths": rows}
+        json_path.write_text(json.dumps(report, indent=2))
+
+    print(f"\nSoak during backbone apply with {variables}:")
+    for r in reports.values():
+        windows = ", ".join(
+            f"{b.duration:.1f}s ({b.lost} lost{', open' if b.open else ''})"
+            for b in r.blackouts
+        )
+        print(f"  {r.source} -> {r.target}: {r.loss_pct:.2f}% loss [{windows}]")
+
+    broken = [r for r in reports.values() if r.error or not r.sent]
+    assert not broken, "Soak probes failed: " + ", ".join(
+        f"{r.source} -> {r.target} ({r.error})" for r in broken
+    )
+
+    down = [r for r in reports.values() if r.ends_down]
+    assert not down, "Paths still down after the apply: " + ", ".join(
+        f"{r.source} -> {r.target} ({r.max_blackout:.1f}s)" for r in down
+    )
+
+    max_blackout = os.environ.get("AVX_SOAK_MAX_BLACKOUT_S")
+    if max_blackout:
+        long_outages = [
+            r for r in reports.values() if r.max_blackout > float(max_blackout)
+        ]
+        assert not long_outages, f"Blackouts over {max_blackout}s: " + ", ".join(
+            f"{r.source} -> {r.target} ({r.max_blackout:.1f}s)" for r in long_outages
+        )
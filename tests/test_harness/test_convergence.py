@@ -0,0 +1,65 @@
+"""Unit tests for continuous ping parsing and convergence timing."""
+
+import pytest
+
+from tests.conftest import (
+    VM,
+    PingEvent,
+    PingStream,
+    measure_convergence,
+    parse_ping_event,
+)
+
+
+def test_parse_reply() -> None:
+    line = "[1760745600.25] 64 bytes from 10.20.1.5: icmp_seq=7 ttl=61 time=31.2 ms"
+    assert parse_ping_event(line, 5.0) == PingEvent(7, 1760745600.25, 5.0, True, 31.2)
+
+
+def test_parse_miss_and_unreachable() -> None:
+    miss = parse_ping_event("[1760745600.5] no answer yet for icmp_seq=8")
+    assert miss == PingEvent(8, 1760745600.5, 0.0, False)
+
+    line = "[1760745601.0] From 10.11.0.1 icmp_seq=9 Destination Host Unreachable"
+    unreachable = parse_ping_event(line)
+    assert unreachable is not None and unreachable.seq == 9 and not unreachable.success
+
+
+def test_parse_ignores_banner() -> None:
+    assert parse_ping_event("PING 10.20.1.5 (10.20.1.5) 56(84) bytes of data.") is None
+
+
+@pytest.fixture
+def scripted_streams(monkeypatch: pytest.MonkeyPatch) -> dict[str, list[bool]]:
+    """Replace PingStream I/O with scripted reply/miss sequences per target."""
+    scripts: dict[str, list[bool]] = {}
+
+    def start(self: PingStream, timeout: int = 60) -> None:
+        for seq, success in enumerate(scripts[self.target.name]):
+            event = PingEvent(seq, 0.0, 1000.0 + seq, success)
+            self.events.append(event)
+            self.on_event(event)
+
+    monkeypatch.setattr(PingStream, "start", start)
+    monkeypatch.setattr(PingStream, "stop", lambda self: None)
+    return scripts
+
+
+def test_measure_convergence(scripted_streams: dict[str, list[bool]]) -> None:
+    a = VM("a", "10.0.0.1", "key", public_ip="1.1.1.1")
+    b = VM("b", "10.0.0.2", "key", public_ip="1.1.1.2")
+    # a -> b flaps once before settling; b -> a never answers
+    scripted_streams["b"] = [False, True, True, False, True, True, True, True]
+    scripted_streams["a"] = [False] * 5
+
+    results = measure_convergence([a, b], stable_count=3, deadline=1, started_at=1000.0)
+
+    flapping = results["a", "b"]
+    assert flapping.first_success == 1.0
+    assert flapping.stable_success == 4.0
+    assert flapping.probes == 7
+    assert flapping.converged
+
+    silent = results["b", "a"]
+    assert silent.first_success is None
+    assert not silent.converged
@@ -0,0 +1,152 @@
+"""Unit tests for the content-addressed deploy cache."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+import tests.conftest as harness
+from tests.conftest import (
+    deploy_stage,
+    load_fingerprint,
+    local_module_dirs,
+    stage_fingerprint,
+)
+
+AWS_GCP_DIR = Path(__file__).parent.parent / "test_aws_gcp"
+VENDOR_DIR = Path(__file__).parent.parent / "vendor"
+
+
+@pytest.fixture
+def stage(tmp_path: Path) -> Path:
+    """A stage calling a local module, plus its var file."""
+    (tmp_path / "vendor").mkdir()
+    (tmp_path / "vendor" / "main.tf").write_text('variable "name" {}\n')
+    stage_dir = tmp_path / "stage"
+    stage_dir.mkdir()
+    (stage_dir / "main.tf").write_text(
+        'module "vm" {\n  source = "../vendor"\n  name   = var.name\n}\n'
+    )
+    (tmp_path / "test.tfvars").write_text('name = "a"\n')
+    return stage_dir
+
+
+@pytest.fixture
+def var_file(stage: Path) -> str:
+    return str(stage.parent / "test.tfvars")
+
+
+def test_local_module_dirs_of_aws_gcp_site() -> None:
+    dirs = local_module_dirs(AWS_GCP_DIR / "site")
+    assert dirs[0] == (AWS_GCP_DIR / "site").resolve()
+    assert (VENDOR_DIR / "aws_vpc").resolve() in dirs
+    assert (VENDOR_DIR / "mc-vm-csp" / "gcp").resolve() in dirs
+    assert local_module_dirs(AWS_GCP_DIR / "backbone") == [
+        (AWS_GCP_DIR / "backbone").resolve()
+    ]
+
+
+def test_fingerprint_tracks_inputs(
+    stage: Path, var_file: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.delenv("TF_VAR_enable_gatus", raising=False)
+    base = stage_fingerprint(stage, var_file)
+    assert stage_fingerprint(stage, var_file) == base
+
+    # Files terraform writes into the stage are not configuration.
+    (stage / "ssh_key.pem").write_text("key")
+    (stage / "terraform.tfstate").write_text("{}")
+    assert stage_fingerprint(stage, var_file) == base
+
+    monkeypatch.setenv("TF_VAR_enable_gatus", "true")
+    assert stage_fingerprint(stage, var_file) != base
+    monkeypatch.delenv("TF_VAR_enable_gatus")
+
+    assert stage_fingerprint(stage, var_file, variables={"name": "b"}) != base
+
+    (stage / ".terraform.lock.hcl").write_text("# lock\n")
+    locked = stage_fingerprint(stage, var_file)
+    assert locked != base
+
+    (stage.parent / "vendor" / "main.tf").write_text('variable "name" {}\n# edit\n')
+    vendored = stage_fingerprint(stage, var_file)
+    assert vendored != locked
+
+    Path(var_file).write_text('name = "b"\n')
+    assert stage_fingerprint(stage, var_file) != vendored
+
+
+def test_fingerprint_ignores_test_files(stage: Path, var_file: str) -> None:
+    (stage / "test_transit.py").write_text("def test_a():\n    assert True\n")
+    (stage / "conftest.py").write_text("")
+    base = stage_fingerprint(stage, var_file)
+
+    (stage / "test_transit.py").write_text("def test_a():\n    assert 1 == 1\n")
+    (stage / "conftest.py").write_text("import pytest\n")
+    assert stage_fingerprint(stage, var_file) == base
+
+
+def test_fingerprint_tracks_upstream_outputs(stage: Path, var_file: str) -> None:
+    upstream = stage.parent / "upstream"
+    upstream.mkdir()
+    state = {"outputs": {"vpc_id": {"value": "vpc-1", "type": "string"}}}
+    (upstream / "terraform.tfstate").write_text(json.dumps(state))
+    before = stage_fingerprint(stage, var_file, [upstream])
+
+    state["outputs"]["vpc_id"]["value"] = "vpc-2"
+    (upstream / "terraform.tfstate").write_text(json.dumps(state))
+    assert stage_fingerprint(stage, var_file, [upstream]) != before
+
+
+@pytest.fixture
+def terraform(monkeypatch: pytest.MonkeyPatch) -> dict:
+    """Fake init/apply/plan; plan reports drift when ``drift`` is set."""
+    state = {"applies": 0, "plans": 0, "drift": False}
+
+    def apply(tf_dir: Path, *args, **kwargs) -> None:
+        harness.clear_fingerprint(tf_dir)
+        state["applies"] += 1
+
+    def plan(tf_dir: Path, *args, **kwargs) -> bool:
+        state["plans"] += 1
+        return state["drift"]
+
+    monkeypatch.setattr(harness, "ensure_initialized", lambda *a, **k: None)
+    monkeypatch.setattr(harness, "terraform_apply", apply)
+    monkeypatch.setattr(harness, "terraform_plan_has_changes", plan)
+    return state
+
+
+def test_deploy_stage_reuses_unchanged_stage(
+    stage: Path, var_file: str, terraform: dict
+) -> None:
+    (stage / ".terraform").mkdir()
+    assert deploy_stage(stage, var_file, use_cache=True)
+    assert load_fingerprint(stage) == stage_fingerprint(stage, var_file)
+
+    assert not deploy_stage(stage, var_file, use_cache=True)
+    assert (terraform["applies"], terraform["plans"]) == (1, 1)
+
+    # Config change: no plan needed, the fingerprint already differs.
+    (stage / "extra.tf").write_text('output "x" { value = 1 }\n')
+    assert deploy_stage(stage, var_file, use_cache=True)
+    assert (terraform["applies"], terraform["plans"]) == (2, 1)
+
+
+def test_deploy_stage_redeploys_on_drift(
+    stage: Path, var_file: str, terraform: dict
+) -> None:
+    (stage / ".terraform").mkdir()
+    deploy_stage(stage, var_file, use_cache=True)
+    terraform["drift"] = True
+    assert deploy_stage(stage, var_file, use_cache=True)
+    assert terraform["applies"] == 2
+
+
+def test_deploy_stage_without_cache_always_applies(
+    stage: Path, var_file: str, terraform: dict
+) -> None:
+    assert deploy_stage(stage, var_file)
+    assert deploy_stage(stage, var_file)
+    assert terraform["applies"] == 2
+    assert load_fingerprint(stage) is None
@@ -0,0 +1,134 @@
+"""Unit tests for the pooled Gatus client against local HTTP servers."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Generator
+
+import pytest
+
+from tests.conftest import GatusHealthMonitor, backoff_delay, gatus_fleet_health
+
+
+class FakeGatus(ThreadingHTTPServer):
+    """Gatus stand-in: /health fails ``failures`` times, then succeeds."""
+
+    daemon_threads = True
+
+    def __init__(self, failures: int = 0, delay: float = 0.0) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.failures = failures
+        self.delay = delay
+        self.requests = 0
+        self.connections: set[int] = set()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeGatus
+
+    def do_GET(self) -> None:
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.connections.add(self.client_address[1])
+            failing = self.server.requests <= self.server.failures
+        time.sleep(self.server.delay)
+        if self.path == "/api/v1/endpoints/statuses":
+            status, body = 200, json.dumps([{"name": "site-2", "results": []}])
+        elif failing:
+            status, body = 503, "starting"
+        else:
+            status, body = 200, '{"status":"UP"}'
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def servers() -> Generator[list[FakeGatus], None, None]:
+    started: list[FakeGatus] = []
+
+    def start(**kwargs) -> FakeGatus:
+        server = FakeGatus(**kwargs)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        started.append(server)
+        return server
+
+    yield start  # type: ignore[misc]
+    for server in started:
+        server.shutdown()
+        server.server_close()
+
+
+def test_backoff_delay_grows_with_jitter() -> None:
+    for attempt in range(6):
+        delay = backoff_delay(attempt, base=1, cap=10)
+        expected = min(10, 2**attempt)
+        assert expected / 2 <= delay <= expected
+
+
+def test_retries_reuse_one_connection(servers) -> None:
+    server = servers(failures=3)
+    monitor = GatusHealthMonitor(server.url)
+    success, message = monitor.check_health(max_retries=5, retry_delay=0.01)
+    ok, statuses = monitor.get_status()
+    monitor.close()
+
+    assert success, message
+    assert ok and statuses[0]["name"] == "site-2"
+    assert server.requests == 5
+    assert len(server.connections) == 1
+
+
+def test_gives_up_at_deadline(servers) -> None:
+    server = servers(failures=1000)
+    monitor = GatusHealthMonitor(server.url)
+    started = time.monotonic()
+    success, message = monitor.check_health(
+        max_retries=100, retry_delay=0.05, deadline=started + 0.5
+    )
+    monitor.close()
+
+    assert not success
+    assert "HTTP 503" in message
+    assert time.monotonic() - started < 1.0
+
+
+def test_fleet_polls_concurrently(servers) -> None:
+    fleet = {f"site-{i}": servers(failures=1, delay=0.2) for i in range(20)}
+    monitors = {name: GatusHealthMonitor(s.url) for name, s in fleet.items()}
+    started = time.monotonic()
+    results = gatus_fleet_health(monitors, deadline=10, retry_delay=0.05)
+    elapsed = time.monotonic() - started
+    for monitor in monitors.values():
+        monitor.close()
+
+    assert all(success for success, _ in results.values()), results
+    # Two requests of 0.2 s each per instance; serially this would take 8 s.
+    assert elapsed < 2.0
+
+
+def test_fleet_reports_unreachable_instance(servers) -> None:
+    healthy = servers()
+    monitors = {
+        "up": GatusHealthMonitor(healthy.url),
+        "down": GatusHealthMonitor("http://127.0.0.1:9"),
+    }
+    results = gatus_fleet_health(monitors, deadline=1, retry_delay=0.05, timeout=1)
+    assert results["up"][0]
+    assert not results["down"][0]
+
+
+def test_fleet_of_none() -> None:
+    assert gatus_fleet_health({}) == {}
@@ -0,0 +1,149 @@
+"""Unit tests for the Gatus time-series collector."""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+from prometheus_client.openmetrics.parser import text_string_to_metric_families
+
+from tests.conftest import (
+    EndpointSeries,
+    GatusCollector,
+    GatusSample,
+    parse_gatus_result,
+    percentile,
+)
+
+T0 = 1_790_000_000
+
+
+def _result(t: int, success: bool = True, ms: float = 10.0) -> dict:
+    stamp = datetime.fromtimestamp(T0 + t, timezone.utc).isoformat()
+    return {
+        "status": 200 if success else 0,
+        "duration": int(ms * 1e6),
+        "success": success,
+        "timestamp": stamp.replace("+00:00", ".123456789Z"),
+    }
+
+
+class FakeDashboard:
+    """Serves a growing history of results per endpoint, newest page first."""
+
+    base_url = "http://dashboard:8080"
+
+    def __init__(self) -> None:
+        self.history: dict[str, list[dict]] = {"core_site-2-icmp": []}
+        self.requests: list[tuple] = []
+
+    def _page(self, results: list[dict], page: int, page_size: int) -> list[dict]:
+        end = len(results) - (page - 1) * page_size
+        return results[max(0, end - page_size) : max(0, end)]
+
+    def get_status(self, page: int = 1, page_size: int = 20) -> tuple[bool, list]:
+        self.requests.append(("all", page))
+        return True, [
+            {
+                "name": key.split("_", 1)[1],
+                "group": "core",
+                "key": key,
+                "results": self._page(results, page, page_size),
+            }
+            for key, results in self.history.items()
+        ]
+
+    def get_endpoint_status(self, key: str, page: int = 1, page_size: int = 20):
+        self.requests.append((key, page))
+        return True, {
+            "key": key,
+            "results": self._page(self.history[key], page, page_size),
+        }
+
+
+def test_parse_gatus_result() -> None:
+    sample = parse_gatus_result(_result(5, ms=23.5))
+    assert sample.timestamp == pytest.approx(T0 + 5.123457)
+    assert sample.response_time_ms == 23.5
+    assert sample.success
+
+
+def test_percentile() -> None:
+    assert percentile([], 50) is None
+    assert percentile([5.0], 99) == 5.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile(list(map(float, range(101))), 95) == 95.0
+
+
+def test_series_stats_and_ring_buffer() -> None:
+    series = EndpointSeries("core_a", "a", "core", maxlen=5)
+    pattern = [True, True, False, False, True, True, True]
+    samples = [GatusSample(T0 + i, ok, float(i)) for i, ok in enumerate(pattern)]
+    assert series.add(samples[::-1]) == 7
+    assert series.add(samples) == 0  # nothing newer than the last sample
+
+    stats = series.stats()
+    assert stats.samples == 5  # bounded
+    assert stats.availability == 3 / 5
+    assert stats.flaps == 1  # kept: F F T T T
+    assert stats.p50_ms == 4.0
+    assert series.stats(window=1).samples == 2
+
+
+def test_poll_fetches_only_new_results() -> None:
+    dashboard = FakeDashboard()
+    results = dashboard.history["core_site-2-icmp"]
+    collector = GatusCollector(dashboard, page_size=5)
+
+    results += [_result(t) for t in range(3)]
+    assert collector.poll() == 3
+    results += [_result(3, success=False, ms=50)]
+    assert collector.poll() == 1
+    assert collector.poll() == 0
+
+    stats = collector.snapshot()["core_site-2-icmp"]
+    assert (stats.samples, stats.availability, stats.flaps) == (4, 0.75, 1)
+    assert dashboard.requests == [("all", 1)] * 3
+
+
+def test_poll_backfills_gaps_from_older_pages() -> None:
+    dashboard = FakeDashboard()
+    results = dashboard.history["core_site-2-icmp"]
+    collector = GatusCollector(dashboard, page_size=5, max_pages=5)
+
+    results += [_result(0)]
+    collector.poll()
+    results += [_result(t) for t in range(1, 13)]  # 12 new: more than a page
+    assert collector.poll() == 12
+    assert ("core_site-2-icmp", 2) in dashboard.requests
+    assert ("core_site-2-icmp", 3) in dashboard.requests
+    assert collector.snapshot()["core_site-2-icmp"].samples == 13
+
+
+def test_exports() -> None:
+    dashboard = FakeDashboard()
+    dashboard.history["core_site-2-icmp"] += [_result(0, ms=10), _result(1, ms=30)]
+    collector = GatusCollector(dashboard)
+    collector.poll()
+
+    data = json.loads(collector.to_json())
+    (endpoint,) = data["endpoints"]
+    assert endpoint["availability"] == 1.0
+    assert endpoint["p50_ms"] == 20.0
+
+    families = {
+        family.name: family
+        for family in text_string_to_metric_families(collector.to_openmetrics())
+    }
+    labels = {"key": "core_site-2-icmp", "name": "site-2-icmp", "group": "core"}
+    availability = families["gatus_endpoint_availability_ratio"]
+    assert (availability.type, availability.unit) == ("gauge", "ratio")
+    assert [(s.labels, s.value) for s in availability.samples] == [(labels, 1.0)]
+    response_time = families["gatus_endpoint_response_time_seconds"]
+    assert (response_time.type, response_time.unit) == ("summary", "seconds")
+    samples = {
+        (s.name, s.labels.get("quantile")): s.value for s in response_time.samples
+    }
+    assert samples[("gatus_endpoint_response_time_seconds", "0.5")] == 0.02
+    assert samples[("gatus_endpoint_response_time_seconds_count", None)] == 2
+    (flaps,) = families["gatus_endpoint_flaps"].samples
+    assert (flaps.labels, flaps.value) == (labels, 0)
@@ -0,0 +1,284 @@
+"""Unit tests for per-stage parallelism tuning, driven by a fake terraform."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import tests.conftest as harness
+from tests.conftest import (
+    StageTuning,
+    TerraformApplyError,
+    choose_parallelism,
+    classify_diagnostic,
+    parse_terraform_event,
+    resource_type,
+    stage_resource_types,
+    terraform_apply,
+    terraform_destroy,
+)
+
+FAKE_TERRAFORM = """\
+import json, sys
+from pathlib import Path
+
+state = Path(__file__).with_name("state")
+with open(state / "calls.jsonl", "a") as f:
+    f.write(json.dumps(sys.argv[1:]) + "\\n")
+attempts = json.loads((state / "attempts.json").read_text())
+calls = len((state / "calls.jsonl").read_text().splitlines())
+lines, code = attempts[min(calls, len(attempts)) - 1]
+for line in lines:
+    print(json.dumps(line), flush=True)
+sys.exit(code)
+"""
+
+
+def _complete(address: str, seconds: float) -> dict:
+    return {
+        "@level": "info",
+        "@message": f"{address}: Creation complete",
+        "@timestamp": f"2026-10-18T10:00:{seconds:02.0f}Z",
+        "type": "apply_complete",
+        "hook": {"resource": {"addr": address}, "action": "create"},
+    }
+
+
+def _start(address: str) -> dict:
+    return {
+        "@level": "info",
+        "@message": f"{address}: Creating...",
+        "@timestamp": "2026-10-18T10:00:00Z",
+        "type": "apply_start",
+        "hook": {"resource": {"addr": address}, "action": "create"},
+    }
+
+
+def _error(summary: str, address: str | None = None) -> dict:
+    diagnostic = {"severity": "error", "summary": summary, "detail": ""}
+    if address:
+        diagnostic["address"] = address
+    return {
+        "@level": "error",
+        "@message": f"Error: {summary}",
+        "@timestamp": "2026-10-18T10:00:30Z",
+        "type": "diagnostic",
+        "diagnostic": diagnostic,
+    }
+
+
+@pytest.fixture
+def stage(tmp_path: Path) -> Path:
+    """An initialized stage with two Aviatrix resources and one AWS resource."""
+    stage_dir = tmp_path / "stage"
+    (stage_dir / ".terraform").mkdir(parents=True)
+    (stage_dir / "main.tf").write_text(
+        'resource "aviatrix_transit_gateway" "a" {}\n'
+        'resource "aviatrix_transit_gateway_peering" "p" {}\n'
+        'resource "aws_vpc" "v" {}\n'
+        'data "aviatrix_account" "acct" {}\n'
+    )
+    return stage_dir
+
+
+class FakeTerraform:
+    """A ``terraform`` on PATH that plays scripted outputs, one per call."""
+
+    def __init__(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        bin_dir = tmp_path / "bin"
+        self.state = bin_dir / "state"
+        self.state.mkdir(parents=True)
+        script = bin_dir / "terraform"
+        script.write_text(f"#!{sys.executable}\n{FAKE_TERRAFORM}")
+        script.chmod(0o755)
+        monkeypatch.setenv("PATH", f"{bin_dir}:{harness.os.environ['PATH']}")
+        monkeypatch.setenv("AVX_TF_LOG_DIR", str(tmp_path / "logs"))
+
+    def script(self, *attempts: tuple[list[dict], int]) -> None:
+        (self.state / "attempts.json").write_text(json.dumps(attempts))
+
+    def calls(self) -> list[list[str]]:
+        text = (self.state / "calls.jsonl").read_text()
+        return [json.loads(line) for line in text.splitlines()]
+
+
+@pytest.fixture
+def fake_terraform(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> FakeTerraform:
+    monkeypatch.setattr(harness, "RETRY_BASE_DELAY", 0.0)
+    monkeypatch.delenv("AVX_TF_PARALLELISM", raising=False)
+    monkeypatch.delenv("AVX_CONTROLLER_PARALLELISM", raising=False)
+    return FakeTerraform(tmp_path, monkeypatch)
+
+
+def _flags(call: list[str], prefix: str) -> list[str]:
+    return [arg.removeprefix(prefix) for arg in call if arg.startswith(prefix)]
+
+
+def test_resource_type() -> None:
+    assert resource_type('module.transit.aws_route.route["a.x"]') == "aws_route"
+    assert resource_type('module.a["k"].module.b.tls_private_key.k') == (
+        "tls_private_key"
+    )
+    assert resource_type("aviatrix_transit_gateway.this") == (
+        "aviatrix_transit_gateway"
+    )
+    assert resource_type("module.a.data.aws_region.current") is None
+
+
+@pytest.mark.parametrize(
+    ("summary", "kind"),
+    [
+        ("Rate exceeded", "throttle"),
+        ("ThrottlingException: slow down", "throttle"),
+        ("HTTP 429 Too Many Requests", "throttle"),
+        ("Error acquiring the state lock", "lock"),
+        ("[AVXERR] Another operation is in progress, please retry", "lock"),
+        ("Invalid CIDR block", None),
+    ],
+)
+def test_classify_diagnostic(summary: str, kind: str | None) -> None:
+    assert classify_diagnostic(parse_terraform_event(json.dumps(_error(summary)))) == (
+        kind
+    )
+
+
+def test_stage_resource_types_follows_module_manifest(stage: Path) -> None:
+    assert stage_resource_types(stage) == {
+        "aviatrix_transit_gateway": 1,
+        "aviatrix_transit_gateway_peering": 1,
+        "aws_vpc": 1,
+    }
+    module_dir = stage / ".terraform" / "modules" / "vpc"
+    module_dir.mkdir(parents=True)
+    (module_dir / "main.tf").write_text('resource "aws_subnet" "s" { count = 3 }\n')
+    (stage / ".terraform" / "modules" / "modules.json").write_text(
+        json.dumps(
+            {
+                "Modules": [
+                    {"Key": "", "Dir": "."},
+                    {"Key": "vpc", "Dir": ".terraform/modules/vpc"},
+                ]
+            }
+        )
+    )
+    assert stage_resource_types(stage)["aws_subnet"] == 1
+
+
+def test_choose_parallelism_from_resource_mix(
+    stage: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.delenv("AVX_TF_PARALLELISM", raising=False)
+    monkeypatch.delenv("AVX_CONTROLLER_PARALLELISM", raising=False)
+    # Controller resources are 2 of 3 blocks: the controller's limit applies.
+    assert choose_parallelism(stage) == 4
+    monkeypatch.setenv("AVX_CONTROLLER_PARALLELISM", "2")
+    assert choose_parallelism(stage) == 2
+
+    # Measured work replaces block counts: 5% controller time no longer limits.
+    StageTuning(work={"aviatrix_transit_gateway": 5.0, "aws_vpc": 95.0}).save(
+        stage, "apply"
+    )
+    assert choose_parallelism(stage) == 32
+    StageTuning(ceiling=12, work={"aws_vpc": 1.0}).save(stage, "apply")
+    assert choose_parallelism(stage) == 12
+    assert choose_parallelism(stage, "destroy") == 2
+
+    monkeypatch.setenv("AVX_TF_PARALLELISM", "7")
+    assert choose_parallelism(stage) == 7
+
+
+def test_ceiling_is_aimd() -> None:
+    tuning = StageTuning()
+    tuning.record([], 8, "clean")
+    assert tuning.ceiling == 9
+    tuning.record([], 4, "clean")
+    assert tuning.ceiling == 9
+    tuning.record([], 9, "throttled")
+    assert tuning.ceiling == 4
+    tuning.record([], 2, "recovered")
+    assert tuning.ceiling == 2
+    tuning.record([], 2, "failed")
+    assert tuning.ceiling == 2
+
+
+def test_throttled_resources_are_retried_with_target(
+    stage: Path, fake_terraform: FakeTerraform
+) -> None:
+    peering = 'aviatrix_transit_gateway_peering.p["a"]'
+    fake_terraform.script(
+        (
+            [
+                _start("aviatrix_transit_gateway.a"),
+                _complete("aviatrix_transit_gateway.a", 20),
+                _error("Rate exceeded", peering),
+                _error("Another operation is in progress", "aws_vpc.v"),
+            ],
+            1,
+        ),
+        ([_start(peering), _complete(peering, 10)], 0),
+        ([], 0),
+    )
+
+    run = terraform_apply(stage, "vars.tfvars")
+
+    assert run.returncode == 0
+    first, retry, converge = fake_terraform.calls()
+    assert _flags(first, "-parallelism=") == ["4"]
+    assert _flags(first, "-target=") == []
+    assert _flags(retry, "-parallelism=") == ["2"]
+    assert _flags(retry, "-target=") == [peering, "aws_vpc.v"]
+    assert _flags(converge, "-target=") == []
+
+    tuning = StageTuning.load(stage, "apply")
+    assert tuning.ceiling == 2
+    assert tuning.work == {
+        "aviatrix_transit_gateway": 20.0,
+        "aviatrix_transit_gateway_peering": 10.0,
+    }
+    assert choose_parallelism(stage) == 2
+
+
+def test_lock_without_address_retries_everything(
+    stage: Path, fake_terraform: FakeTerraform
+) -> None:
+    fake_terraform.script(([_error("Error acquiring the state lock")], 1), ([], 0))
+    terraform_destroy(stage, "vars.tfvars", parallelism=6)
+    first, retry = fake_terraform.calls()
+    assert first[0] == "destroy"
+    assert _flags(retry, "-parallelism=") == ["3"]
+    assert _flags(retry, "-target=") == []
+    # A fixed parallelism is not tuned.
+    assert StageTuning.load(stage, "destroy").ceiling is None
+
+
+def test_fatal_error_is_not_retried(stage: Path, fake_terraform: FakeTerraform) -> None:
+    fake_terraform.script(
+        ([_error("Rate exceeded", "aws_vpc.v"), _error("Invalid CIDR block")], 1)
+    )
+    with pytest.raises(TerraformApplyError, match="Invalid CIDR block"):
+        terraform_apply(stage, "vars.tfvars")
+    assert len(fake_terraform.calls()) == 1
+
+
+def test_retries_are_bounded(stage: Path, fake_terraform: FakeTerraform) -> None:
+    fake_terraform.script(([_error("Rate exceeded", "aws_vpc.v")], 1))
+    with pytest.raises(TerraformApplyError, match="Rate exceeded"):
+        terraform_apply(stage, "vars.tfvars", max_retries=2)
+    parallelisms = [_flags(c, "-parallelism=") for c in fake_terraform.calls()]
+    assert parallelisms == [["4"], ["2"], ["1"]]
+    assert StageTuning.load(stage, "apply").ceiling == 1
+
+
+def test_no_attempt_starts_after_the_deadline(
+    stage: Path, fake_terraform: FakeTerraform, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # The backoff outlasts the timeout, so the retry would start too late.
+    monkeypatch.setattr(harness, "RETRY_BASE_DELAY", 60.0)
+    fake_terraform.script(([_error("Rate exceeded", "aws_vpc.v")], 1))
+    started = harness.time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        terraform_apply(stage, "vars.tfvars", timeout=1)
+    assert harness.time.monotonic() - started < 5
+    assert len(fake_terraform.calls()) == 1
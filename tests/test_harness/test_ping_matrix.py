@@ -0,0 +1,171 @@
+"""Unit tests for the all-pairs ping matrix, driven by a fake VM.probe."""
+
+import threading
+import time
+
+import pytest
+
+import tests.conftest as harness
+from tests.conftest import VM, PingMatrix, Probe, ProbeResult, ping_matrix
+
+PING_OUTPUT = (
+    "3 packets transmitted, 3 received, 0% packet loss, time 2003ms\n"
+    "rtt min/avg/max/mdev = 1.000/2.000/3.000/0.500 ms\n"
+)
+
+
+class FakeProbes:
+    """Replaces VM.probe: answers ICMP probes from a script of failures.
+
+    ``failures[(source, target_ip)]`` is how many attempts fail before the
+    target starts answering; unscripted pairs answer on the first attempt.
+    """
+
+    def __init__(self, failures: dict[tuple[str, str], int] | None = None) -> None:
+        self.failures = dict(failures or {})
+        self.calls: list[tuple[str, list[str]]] = []
+        self.barrier: threading.Barrier | None = None
+        self.active: dict[str, int] = {}
+        self.peak: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __call__(
+        self, vm: VM, probes: list[Probe], timeout: int = 60, ping_count: int = 3
+    ) -> list[ProbeResult]:
+        host = vm.bastion.public_ip if vm.bastion else vm.public_ip
+        with self._lock:
+            self.calls.append((vm.name, [p.target for p in probes]))
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+        try:
+            if self.barrier is not None:
+                self.barrier.wait()
+            else:
+                time.sleep(0.01)
+            results = []
+            for probe in probes:
+                with self._lock:
+                    left = self.failures.get((vm.name, probe.target), 0)
+                    self.failures[vm.name, probe.target] = left - 1
+                if left > 0:
+                    results.append(ProbeResult(probe, False, 5.0, "100% packet loss"))
+                else:
+                    results.append(ProbeResult(probe, True, 2.0, PING_OUTPUT))
+            return results
+        finally:
+            with self._lock:
+                self.active[host] -= 1
+
+
+@pytest.fixture
+def fake_probes(monkeypatch: pytest.MonkeyPatch) -> FakeProbes:
+    fake = FakeProbes()
+    monkeypatch.setattr(
+        harness.VM, "probe", lambda vm, *args, **kw: fake(vm, *args, **kw)
+    )
+    return fake
+
+
+def _vms(count: int, bastion: VM | None = None) -> list[VM]:
+    if bastion is None:
+        bastion = VM("bastion", "10.0.0.5", "/k", public_ip="54.0.0.1")
+    return [
+        VM(f"vm-{n}", f"10.0.1.{10 + n}", "/k", bastion=bastion) for n in range(count)
+    ]
+
+
+def test_result_shape(fake_probes: FakeProbes) -> None:
+    vms = _vms(3)
+    matrix = ping_matrix(vms, retry_delay=0)
+    assert isinstance(matrix, PingMatrix)
+    assert len(matrix) == 6
+    assert ("vm-0", "vm-0") not in matrix
+    result = matrix["vm-0", "vm-2"]
+    assert (result.source, result.target, result.target_ip) == (
+        "vm-0",
+        "vm-2",
+        "10.0.1.12",
+    )
+    assert result.success and result.attempts == 1
+    assert result.stats.received == 3 and result.stats.rtt_avg == 2.0
+    assert result.finished_at >= result.started_at
+    assert matrix.failures() == []
+    assert repr(matrix) == "PingMatrix(6 pairs, 0 failed)"
+    # One batched call per source covering all of its targets.
+    assert sorted(fake_probes.calls) == [
+        ("vm-0", ["10.0.1.11", "10.0.1.12"]),
+        ("vm-1", ["10.0.1.10", "10.0.1.12"]),
+        ("vm-2", ["10.0.1.10", "10.0.1.11"]),
+    ]
+
+
+def test_explicit_targets(fake_probes: FakeProbes) -> None:
+    sources, targets = _vms(2), _vms(4)[2:]
+    matrix = ping_matrix(sources, targets, retry_delay=0)
+    assert sorted((r.source, r.target) for r in matrix) == [
+        ("vm-0", "vm-2"),
+        ("vm-0", "vm-3"),
+        ("vm-1", "vm-2"),
+        ("vm-1", "vm-3"),
+    ]
+    assert len(ping_matrix([], retry_delay=0)) == 0
+
+
+def test_sources_probe_concurrently(fake_probes: FakeProbes) -> None:
+    vms = _vms(4)
+    # Every source must be inside probe() at once for the barrier to release.
+    fake_probes.barrier = threading.Barrier(4, timeout=5)
+    matrix = ping_matrix(vms, retry_delay=0)
+    assert len(matrix) == 12 and not matrix.failures()
+    assert fake_probes.peak == {"54.0.0.1": 4}
+
+
+def test_sessions_per_bastion_are_capped(fake_probes: FakeProbes) -> None:
+    other = VM("other-bastion", "10.9.0.5", "/k", public_ip="54.0.0.2")
+    vms = _vms(4) + [
+        VM(f"far-{n}", f"10.9.1.{n}", "/k", bastion=other) for n in range(3)
+    ]
+    matrix = ping_matrix(vms, retry_delay=0, max_per_bastion=2)
+    assert len(matrix) == 42
+    assert sorted(fake_probes.peak) == ["54.0.0.1", "54.0.0.2"]
+    assert max(fake_probes.peak.values()) <= 2
+
+
+def test_only_pending_targets_are_retried(fake_probes: FakeProbes) -> None:
+    vms = _vms(3)
+    fake_probes.failures = {("vm-0", "10.0.1.11"): 2}
+    matrix = ping_matrix(vms, retry_delay=0)
+    assert [targets for name, targets in fake_probes.calls if name == "vm-0"] == [
+        ["10.0.1.11", "10.0.1.12"],
+        ["10.0.1.11"],
+        ["10.0.1.11"],
+    ]
+    retried = matrix["vm-0", "vm-1"]
+    assert retried.success and retried.attempts == 3
+    assert matrix["vm-0", "vm-2"].attempts == 1
+    # Every pair from one source shares the start of its first attempt.
+    assert retried.started_at == matrix["vm-0", "vm-2"].started_at
+    assert retried.finished_at >= matrix["vm-0", "vm-2"].finished_at
+
+
+def test_exhausted_retries_report_failure(fake_probes: FakeProbes) -> None:
+    vms = _vms(2)
+    fake_probes.failures = {("vm-1", "10.0.1.10"): 5}
+    matrix = ping_matrix(vms, max_retries=2, retry_delay=0)
+    (failure,) = matrix.failures()
+    assert (failure.source, failure.target, failure.attempts) == ("vm-1", "vm-0", 2)
+    assert failure.output == "Failed after 2 attempts. Last output: 100% packet loss"
+    assert failure.stats is None
+    assert repr(matrix) == "PingMatrix(2 pairs, 1 failed)"
+
+
+@pytest.mark.parametrize("max_retries", [0, -1])
+def test_max_retries_must_be_positive(fake_probes: FakeProbes, max_retries) -> None:
+    with pytest.raises(ValueError, match="max_retries must be at least 1"):
+        ping_matrix(_vms(2), max_retries=max_retries)
+    assert fake_probes.calls == []
+
+
+def test_vm_without_entry_host_is_rejected(fake_probes: FakeProbes) -> None:
+    with pytest.raises(ValueError, match="no public IP and no bastion"):
+        ping_matrix([VM("a", "10.0.0.1", "/k"), VM("b", "10.0.0.2", "/k")])
@@ -0,0 +1,76 @@
+"""Unit tests for ping output parsing and latency collection."""
+
+import csv
+import io
+import json
+
+from tests.conftest import LatencyCollector, PingResult, PingStats, parse_ping_stats
+
+IPUTILS_OUTPUT = """PING 10.20.1.5 (10.20.1.5) 56(84) bytes of data.
+64 bytes from 10.20.1.5: icmp_seq=1 ttl=61 time=31.2 ms
+64 bytes from 10.20.1.5: icmp_seq=2 ttl=61 time=30.9 ms
+64 bytes from 10.20.1.5: icmp_seq=3 ttl=61 time=31.0 ms
+
+--- 10.20.1.5 ping statistics ---
+3 packets transmitted, 3 received, 0% packet loss, time 2003ms
+rtt min/avg/max/mdev = 30.912/31.034/31.201/0.123 ms
+"""
+
+TOTAL_LOSS_OUTPUT = """--- 10.20.1.5 ping statistics ---
+3 packets transmitted, 0 received, 100% packet loss, time 2047ms
+"""
+
+
+def _result(source: str, target: str, output: str) -> PingResult:
+    return PingResult(
+        source,
+        target,
+        "10.20.1.5",
+        success="0 received" not in output,
+        output=output,
+        started_at=100.0,
+        finished_at=102.5,
+        stats=parse_ping_stats(output),
+    )
+
+
+def test_parse_iputils_summary() -> None:
+    stats = parse_ping_stats(IPUTILS_OUTPUT)
+    assert stats == PingStats(3, 3, 0.0, 30.912, 31.034, 31.201, 0.123)
+
+
+def test_parse_total_loss_has_no_rtt() -> None:
+    stats = parse_ping_stats(TOTAL_LOSS_OUTPUT)
+    assert stats == PingStats(3, 0, 100.0)
+
+
+def test_parse_bsd_summary() -> None:
+    output = (
+        "3 packets transmitted, 2 packets received, 33.3% packet loss\n"
+        "round-trip min/avg/max/stddev = 1.000/2.000/3.000/0.500 ms\n"
+    )
+    assert parse_ping_stats(output) == PingStats(3, 2, 33.3, 1.0, 2.0, 3.0, 0.5)
+
+
+def test_parse_without_summary() -> None:
+    assert parse_ping_stats("ssh: connect to host timed out") is None
+
+
+def test_collector_budget_and_exports() -> None:
+    collector = LatencyCollector(metadata={"cross_cloud_tunnel_count": 15})
+    collector.add(_result("aws-site-1-private", "gcp-private", IPUTILS_OUTPUT))
+    collector.add(_result("gcp-private", "aws-site-1-private", TOTAL_LOSS_OUTPUT))
+
+    assert collector.over_budget(max_rtt_avg_ms=50) == [
+        collector._results["gcp-private", "aws-site-1-private"]
+    ]
+    assert len(collector.over_budget(max_rtt_avg_ms=20)) == 2
+
+    exported = json.loads(collector.to_json())
+    assert exported["metadata"] == {"cross_cloud_tunnel_count": 15}
+    assert exported["pairs"][0]["rtt_avg"] == 31.034
+
+    rows = list(csv.DictReader(io.StringIO(collector.to_csv())))
+    assert [r["source"] for r in rows] == ["aws-site-1-private", "gcp-private"]
+    assert rows[1]["loss_pct"] == "100.0"
+    assert collector.matrix()["gcp-private"]["aws-site-1-private"].received == 0
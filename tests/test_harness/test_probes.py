@@ -0,0 +1,106 @@
+"""Unit tests for batched probes, running the remote script on this host."""
+
+import http.server
+import json
+import shlex
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+from typing import Generator
+
+import pytest
+
+from tests.conftest import VM, Probe
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        self.send_response(200 if self.path == "/health" else 404)
+        self.end_headers()
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def http_port() -> Generator[int, None, None]:
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def local_vm(monkeypatch: pytest.MonkeyPatch) -> VM:
+    """A VM whose commands run on this host instead of over SSH."""
+    vm = VM("local", "127.0.0.1", "/k", public_ip="127.0.0.1")
+
+    def run(command: str, timeout: int = 60) -> tuple[int, str, str]:
+        argv = shlex.split(command)
+        assert argv[0] == "python3"
+        result = subprocess.run(
+            [sys.executable, *argv[1:]],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+        return result.returncode, result.stdout, result.stderr
+
+    monkeypatch.setattr(vm, "run", run)
+    return vm
+
+
+def test_tcp_and_http_probes(local_vm: VM, http_port: int, closed_port: int) -> None:
+    probes = [
+        Probe("127.0.0.1", "tcp", port=http_port),
+        Probe("127.0.0.1", "tcp", port=closed_port),
+        Probe("127.0.0.1", "http", port=http_port, path="/health"),
+        Probe("127.0.0.1", "http", port=http_port, path="/missing"),
+    ]
+    results = local_vm.probe(probes, probe_timeout=2)
+    assert [r.probe for r in results] == probes
+    assert [r.success for r in results] == [True, False, True, False]
+    assert results[0].output == "connected"
+    assert results[1].output.startswith("ConnectionRefusedError")
+    assert [r.status for r in results[2:]] == [200, 404]
+    assert results[3].output == "HTTP 404"
+    assert all(r.elapsed >= 0 for r in results)
+
+
+@pytest.mark.skipif(shutil.which("ping") is None, reason="ping is not installed")
+def test_icmp_probe(local_vm: VM) -> None:
+    (result,) = local_vm.probe([Probe("127.0.0.1")], probe_timeout=2, ping_count=1)
+    assert result.success, result.output
+    assert "1 received" in result.output
+
+
+def test_batch_failure_fails_every_probe(
+    local_vm: VM, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(local_vm, "run", lambda command, timeout=60: (127, "", "nope"))
+    results = local_vm.probe([Probe("10.0.0.1"), Probe("10.0.0.2", "tcp", port=22)])
+    assert [r.success for r in results] == [False, False]
+    assert results[0].output == "probe batch exited 127: nope"
+
+
+def test_short_result_list_fails_every_probe(
+    local_vm: VM, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    result = {"success": True, "elapsed": 0.1, "output": "ok", "status": None}
+    output = json.dumps({"results": [result]})
+    monkeypatch.setattr(local_vm, "run", lambda command, timeout=60: (0, output, ""))
+    results = local_vm.probe([Probe("10.0.0.1"), Probe("10.0.0.2")])
+    assert [r.probe.target for r in results] == ["10.0.0.1", "10.0.0.2"]
+    assert [r.success for r in results] == [False, False]
+    assert results[0].output == "probe batch returned 1 results for 2 probes"
@@ -0,0 +1,54 @@
+"""Unit tests for soak blackout analysis."""
+
+from tests.conftest import Blackout, PingEvent, SoakReport, analyze_soak
+
+
+def _events(pattern: str, interval: float = 0.2) -> list[PingEvent]:
+    """Build events from a pattern: '+' reply, '-' miss, '.' no line at all."""
+    return [
+        PingEvent(seq, 100.0 + seq * interval, 0.0, mark == "+")
+        for seq, mark in enumerate(pattern)
+        if mark != "."
+    ]
+
+
+def test_no_loss() -> None:
+    assert analyze_soak(_events("++++++")) == (6, 0, [])
+
+
+def test_blackout_windows() -> None:
+    sent, lost, blackouts = analyze_soak(_events("++--+++---.++"))
+
+    assert (sent, lost) == (13, 6)
+    assert [b.lost for b in blackouts] == [2, 4]
+    assert blackouts[0].start == 100.2
+    assert round(blackouts[0].duration, 3) == 0.6
+    assert round(blackouts[1].duration, 3) == 1.0
+
+
+def test_leading_loss_is_not_a_blackout() -> None:
+    sent, lost, blackouts = analyze_soak(_events("--+++"))
+    assert (sent, lost, blackouts) == (5, 2, [])
+
+
+def test_trailing_loss_is_an_open_blackout() -> None:
+    # The path breaks and never recovers; the last two seqs produce no line.
+    sent, lost, blackouts = analyze_soak(_events("--+++----.."))
+    assert (sent, lost) == (9, 6)
+    (blackout,) = blackouts
+    assert blackout.open and blackout.lost == 4
+    assert blackout.start == 100.8
+    assert round(blackout.duration, 3) == 0.8
+
+    report = SoakReport("a", "b", sent, lost, blackouts)
+    assert report.ends_down
+    assert round(report.max_blackout, 3) == 0.8
+    assert not SoakReport("a", "b", 6, 0, []).ends_down
+
+
+def test_empty_stream() -> None:
+    assert analyze_soak([]) == (0, 0, [])
+
+
+def test_blackout_duration() -> None:
+    assert Blackout(10.0, 12.5, 12).duration == 2.5
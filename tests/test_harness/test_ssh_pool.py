@@ -0,0 +1,214 @@
+"""Unit tests for the pooled SSH connections, driven by a fake paramiko client."""
+
+import io
+import threading
+
+import paramiko
+import pytest
+
+from tests.conftest import VM, SSHConnectionPool
+
+
+class FakeChannel:
+    def __init__(self, exit_status: int) -> None:
+        self.exit_status = exit_status
+
+    def recv_exit_status(self) -> int:
+        return self.exit_status
+
+
+class FakeStream(io.BytesIO):
+    def __init__(self, data: bytes, exit_status: int = 0) -> None:
+        super().__init__(data)
+        self.channel = FakeChannel(exit_status)
+
+
+class FakeTransport:
+    def __init__(self, client: "FakeClient") -> None:
+        self.client = client
+        self.active = True
+        self.keepalive: int | None = None
+        self.tunnels: list[tuple[str, int]] = []
+
+    def is_active(self) -> bool:
+        return self.active
+
+    def set_keepalive(self, interval: int) -> None:
+        self.keepalive = interval
+
+    def open_channel(self, kind, dest_addr, src_addr, timeout=None) -> str:
+        assert kind == "direct-tcpip"
+        self.tunnels.append(dest_addr)
+        return f"tunnel:{dest_addr[0]}"
+
+
+class FakeClient:
+    """Stands in for paramiko.SSHClient, recording every instance created."""
+
+    instances: list["FakeClient"] = []
+
+    def __init__(self) -> None:
+        self.transport: FakeTransport | None = None
+        self.connected: dict | None = None
+        self.commands: list[str] = []
+        self.closed = False
+        self.drop_on_exec = False
+        self.fail_on_exec = False
+        FakeClient.instances.append(self)
+
+    def set_missing_host_key_policy(self, policy) -> None:
+        pass
+
+    def connect(self, hostname: str, sock=None, **kwargs) -> None:
+        self.connected = {"hostname": hostname, "sock": sock, **kwargs}
+        self.transport = FakeTransport(self)
+
+    def get_transport(self) -> FakeTransport | None:
+        return self.transport
+
+    def exec_command(self, command: str, timeout=None):
+        if self.drop_on_exec:
+            self.transport.active = False
+        if self.fail_on_exec or not self.transport.active:
+            raise paramiko.SSHException("SSH session not active")
+        self.commands.append(command)
+        return None, FakeStream(f"ran {command}".encode()), FakeStream(b"")
+
+    def close(self) -> None:
+        self.closed = True
+        if self.transport is not None:
+            self.transport.active = False
+
+
+@pytest.fixture
+def fake_ssh(monkeypatch: pytest.MonkeyPatch) -> list[FakeClient]:
+    FakeClient.instances = []
+    monkeypatch.setattr(paramiko, "SSHClient", FakeClient)
+    monkeypatch.setattr(
+        paramiko.RSAKey, "from_private_key_file", lambda path: f"key:{path}"
+    )
+    return FakeClient.instances
+
+
+@pytest.fixture
+def pool() -> SSHConnectionPool:
+    return SSHConnectionPool(keepalive=15)
+
+
+def _site(pool: SSHConnectionPool) -> tuple[VM, VM, VM]:
+    bastion = VM("bastion", "10.0.0.5", "/k", public_ip="54.0.0.1", ssh_pool=pool)
+    first = VM("vm-1", "10.0.1.10", "/k", bastion=bastion, ssh_pool=pool)
+    second = VM("vm-2", "10.0.1.11", "/k", bastion=bastion, ssh_pool=pool)
+    return bastion, first, second
+
+
+def test_pool_key() -> None:
+    bastion = VM("bastion", "10.0.0.5", "/k", public_ip="54.0.0.1")
+    assert SSHConnectionPool.pool_key(bastion) == ("54.0.0.1", "ubuntu", "/k")
+    vm = VM("vm", "10.0.1.10", "/k", bastion=bastion, username="ec2-user")
+    assert SSHConnectionPool.pool_key(vm) == (
+        "54.0.0.1/10.0.1.10",
+        "ec2-user",
+        "/k",
+    )
+    with pytest.raises(ValueError, match="no public IP"):
+        SSHConnectionPool.pool_key(VM("lost", "10.0.1.12", "/k"))
+
+
+def test_connection_is_reused(pool: SSHConnectionPool, fake_ssh: list) -> None:
+    bastion, _, _ = _site(pool)
+    assert pool.exec(bastion, "uname") == (0, "ran uname", "")
+    assert pool.exec(bastion, "uptime") == (0, "ran uptime", "")
+    (client,) = fake_ssh
+    assert client.commands == ["uname", "uptime"]
+    assert client.connected["hostname"] == "54.0.0.1"
+    assert client.connected["pkey"] == "key:/k"
+    assert client.transport.keepalive == 15
+
+
+def test_concurrent_callers_share_one_connection(
+    pool: SSHConnectionPool, fake_ssh: list
+) -> None:
+    bastion, _, _ = _site(pool)
+    threads = [
+        threading.Thread(target=pool.exec, args=(bastion, f"cmd-{n}")) for n in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    (client,) = fake_ssh
+    assert sorted(client.commands) == sorted(f"cmd-{n}" for n in range(8))
+
+
+def test_dead_transport_is_replaced(pool: SSHConnectionPool, fake_ssh: list) -> None:
+    bastion, _, _ = _site(pool)
+    first = pool.client(bastion)
+    first.transport.active = False
+    second = pool.client(bastion)
+    assert second is not first
+    assert first.closed and not second.closed
+
+
+def test_exec_retries_once_on_dropped_transport(
+    pool: SSHConnectionPool, fake_ssh: list
+) -> None:
+    bastion, _, _ = _site(pool)
+    stale = pool.client(bastion)
+    stale.drop_on_exec = True
+    assert pool.exec(bastion, "uname") == (0, "ran uname", "")
+    assert stale.closed and stale.commands == []
+    assert fake_ssh[-1].commands == ["uname"]
+
+
+def test_exec_does_not_retry_on_live_transport(
+    pool: SSHConnectionPool, fake_ssh: list
+) -> None:
+    bastion, _, _ = _site(pool)
+    client = pool.client(bastion)
+    client.fail_on_exec = True
+    with pytest.raises(paramiko.SSHException):
+        pool.exec(bastion, "uname")
+    assert fake_ssh == [client] and not client.closed
+
+
+def test_discard_closes_connection(pool: SSHConnectionPool, fake_ssh: list) -> None:
+    bastion, _, _ = _site(pool)
+    client = pool.client(bastion)
+    pool.discard(bastion)
+    pool.discard(bastion)
+    assert client.closed
+    assert repr(pool) == "SSHConnectionPool(0 connections)"
+    assert pool.client(bastion) is not client
+
+
+def test_private_vms_share_bastion_transport(
+    pool: SSHConnectionPool, fake_ssh: list
+) -> None:
+    bastion, first, second = _site(pool)
+    pool.exec(first, "hostname")
+    pool.exec(second, "hostname")
+    bastion_client, first_client, second_client = fake_ssh
+    assert bastion_client.connected["hostname"] == "54.0.0.1"
+    assert bastion_client.transport.tunnels == [("10.0.1.10", 22), ("10.0.1.11", 22)]
+    assert first_client.connected["sock"] == "tunnel:10.0.1.10"
+    assert second_client.connected["sock"] == "tunnel:10.0.1.11"
+    assert bastion_client.commands == []
+    assert repr(pool) == "SSHConnectionPool(3 connections)"
+
+
+def test_close_closes_tunnels_before_bastion(
+    pool: SSHConnectionPool, fake_ssh: list, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    bastion, first, _ = _site(pool)
+    pool.client(first)
+    order: list[str] = []
+    for client in fake_ssh:
+        monkeypatch.setattr(
+            client,
+            "close",
+            lambda host=client.connected["hostname"]: order.append(host),
+        )
+    pool.close()
+    assert order == ["10.0.1.10", "54.0.0.1"]
+    assert repr(pool) == "SSHConnectionPool(0 connections)"
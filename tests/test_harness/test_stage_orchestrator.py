@@ -0,0 +1,105 @@
+"""Unit tests for the terraform stage dependency graph."""
+
+import threading
+from pathlib import Path
+
+import pytest
+
+import tests.conftest as harness
+from tests.conftest import (
+    StageOrchestrator,
+    TerraformApplyError,
+    TerraformStage,
+    remote_state_dependencies,
+)
+
+AWS_GCP_DIR = Path(__file__).parent.parent / "test_aws_gcp"
+
+
+def test_remote_state_dependencies_of_aws_gcp_stages() -> None:
+    site = (AWS_GCP_DIR / "site").resolve()
+    assert remote_state_dependencies(AWS_GCP_DIR / "backbone") == {site}
+    assert remote_state_dependencies(AWS_GCP_DIR / "monitoring") == {site}
+    assert remote_state_dependencies(AWS_GCP_DIR / "site") == set()
+
+
+def test_aws_gcp_levels() -> None:
+    orchestrator = StageOrchestrator.from_dirs(
+        [AWS_GCP_DIR / name for name in ("site", "backbone", "monitoring")]
+    )
+    levels = [[stage.name for stage in level] for level in orchestrator.levels()]
+    assert levels == [["site"], ["backbone", "monitoring"]]
+
+
+def test_cycle_is_rejected() -> None:
+    with pytest.raises(ValueError, match="cycle"):
+        StageOrchestrator(
+            [
+                TerraformStage("a", Path("a"), {"b"}),
+                TerraformStage("b", Path("b"), {"a"}),
+            ]
+        )
+
+
+@pytest.fixture
+def calls(monkeypatch: pytest.MonkeyPatch) -> list[tuple[str, str]]:
+    """Record terraform calls instead of running terraform."""
+    recorded: list[tuple[str, str]] = []
+    lock = threading.Lock()
+
+    def fake(action: str):
+        def run(tf_dir: Path, *args, **kwargs) -> None:
+            with lock:
+                recorded.append((action, tf_dir.name))
+            if tf_dir.name == "broken":
+                raise TerraformApplyError(f"{action} failed", 1, [action])
+
+        return run
+
+    monkeypatch.setattr(harness, "ensure_initialized", lambda tf_dir, *a, **k: None)
+    monkeypatch.setattr(harness, "terraform_apply", fake("apply"))
+    monkeypatch.setattr(harness, "terraform_destroy", fake("destroy"))
+    return recorded
+
+
+def _diamond(*extra: TerraformStage) -> StageOrchestrator:
+    return StageOrchestrator(
+        [
+            TerraformStage("site", Path("site")),
+            TerraformStage("backbone", Path("backbone"), {"site"}),
+            TerraformStage("monitoring", Path("monitoring"), {"site"}),
+            TerraformStage("checks", Path("checks"), {"backbone", "monitoring"}),
+            *extra,
+        ]
+    )
+
+
+def test_apply_respects_dependencies(calls: list[tuple[str, str]]) -> None:
+    applied: list[str] = []
+    _diamond().apply("vars.tfvars", on_applied=lambda stage: applied.append(stage.name))
+
+    order = [name for _, name in calls]
+    assert order[0] == "site" and order[-1] == "checks"
+    assert set(order[1:3]) == {"backbone", "monitoring"}
+    assert sorted(applied) == sorted(order)
+
+
+def test_apply_skips_dependents_of_failed_stage(calls: list[tuple[str, str]]) -> None:
+    orchestrator = _diamond(TerraformStage("after", Path("after"), {"broken"}))
+    orchestrator.stages["broken"] = TerraformStage("broken", Path("broken"), {"site"})
+
+    with pytest.raises(TerraformApplyError):
+        orchestrator.apply("vars.tfvars")
+    assert ("apply", "after") not in calls
+
+
+def test_destroy_runs_in_reverse_and_continues(calls: list[tuple[str, str]]) -> None:
+    orchestrator = _diamond()
+    orchestrator.stages["broken"] = TerraformStage("broken", Path("broken"), {"site"})
+
+    errors = orchestrator.destroy("vars.tfvars")
+
+    order = [name for _, name in calls]
+    assert order.index("checks") < order.index("backbone") < order.index("site")
+    assert order[-1] == "site"
+    assert list(errors) == ["broken"]
@@ -0,0 +1,114 @@
+"""Unit tests for the outputs-only terraform state reader."""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+import tests.conftest as harness
+from tests.conftest import read_state_outputs, terraform_output
+
+OUTPUTS = {
+    "aws_sites": {
+        "value": {"site-1": {"vpc_id": "vpc-0a1", "cidr": "10.1.0.0/16"}},
+        "type": ["object", {}],
+    },
+    "gcp_vm": {"value": {"name": 'vm "a" {b}', "ip": "10.10.0.5"}, "type": "object"},
+    "count": {"value": 1234567890, "type": "number"},
+    "empty": {"value": [], "type": ["tuple", []]},
+}
+
+
+def _state(resources: int, outputs_first: bool = True) -> dict:
+    body = [
+        {
+            "mode": "managed",
+            "type": "aviatrix_spoke_gateway",
+            "name": f"gw{i}",
+            "instances": [{"attributes": {"tags": {"k": '}]\\\\"'}, "n": i}}],
+        }
+        for i in range(resources)
+    ]
+    head = {"version": 4, "terraform_version": "1.9.5", "serial": 7}
+    if outputs_first:
+        return {**head, "outputs": OUTPUTS, "resources": body}
+    return {**head, "resources": body, "check_results": None, "outputs": OUTPUTS}
+
+
+@pytest.fixture(autouse=True)
+def fresh_memo(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(harness, "_STATE_OUTPUTS", {})
+
+
+@pytest.mark.parametrize("outputs_first", [True, False])
+@pytest.mark.parametrize("chunk_size", [7, 1 << 16])
+def test_reads_only_outputs(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    outputs_first: bool,
+    chunk_size: int,
+) -> None:
+    monkeypatch.setattr(harness, "_STATE_CHUNK_SIZE", chunk_size)
+    state_file = tmp_path / "terraform.tfstate"
+    state_file.write_text(json.dumps(_state(50, outputs_first), indent=2))
+    assert read_state_outputs(state_file) == OUTPUTS
+
+
+def test_terraform_output_format(tmp_path: Path) -> None:
+    (tmp_path / "terraform.tfstate").write_text(json.dumps(_state(1)))
+    outputs = terraform_output(tmp_path)
+    assert outputs["count"] == {"value": 1234567890}
+    assert outputs["gcp_vm"]["value"]["name"] == 'vm "a" {b}'
+
+
+def test_missing_state(tmp_path: Path) -> None:
+    assert terraform_output(tmp_path) == {}
+
+
+def test_state_without_outputs(tmp_path: Path) -> None:
+    (tmp_path / "terraform.tfstate").write_text('{"version": 4, "resources": []}')
+    assert terraform_output(tmp_path) == {}
+
+
+def test_memoized_until_state_changes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    state_file = tmp_path / "terraform.tfstate"
+    state_file.write_text(json.dumps(_state(3)))
+    parses = []
+    parse = harness._read_outputs_section
+    monkeypatch.setattr(
+        harness,
+        "_read_outputs_section",
+        lambda path: parses.append(path) or parse(path),
+    )
+
+    first = read_state_outputs(state_file)
+    assert read_state_outputs(state_file) is first
+    assert len(parses) == 1
+
+    state = _state(3)
+    state["outputs"]["count"]["value"] = 1
+    state_file.write_text(json.dumps(state))
+    os.utime(state_file, ns=(0, 10**18))
+    assert read_state_outputs(state_file)["count"]["value"] == 1
+    assert len(parses) == 2
+
+
+def test_disk_cache_shared_across_processes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / ".terraform").mkdir()
+    state_file = tmp_path / "terraform.tfstate"
+    state_file.write_text(json.dumps(_state(3)))
+    read_state_outputs(state_file)
+    assert (tmp_path / ".terraform" / "terraform.tfstate.outputs.json").exists()
+
+    # A fresh process (empty memo) is served from disk without parsing.
+    def fail(path: Path) -> dict:
+        raise AssertionError("state parsed again")
+
+    monkeypatch.setattr(harness, "_STATE_OUTPUTS", {})
+    monkeypatch.setattr(harness, "_read_outputs_section", fail)
+    assert read_state_outputs(state_file) == OUTPUTS
@@ -0,0 +1,204 @@
+"""Unit tests for the plugin cache and terraform init short-circuit."""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import tests.conftest as harness
+from tests.conftest import (
+    ensure_initialized,
+    init_is_current,
+    init_stages,
+    terraform_init,
+    version_satisfies,
+)
+
+AWS = "registry.terraform.io/hashicorp/aws"
+TRANSIT = "registry.terraform.io/terraform-aviatrix-modules/mc-transit/aviatrix"
+
+
+@pytest.mark.parametrize(
+    ("version", "constraints", "expected"),
+    [
+        ("8.2.0", "8.2.0", True),
+        ("8.2.0", "8.2", True),
+        ("8.2.1", "8.2.0", False),
+        ("5.100.0", ">= 5.0, < 6.0", True),
+        ("6.0.0", ">= 5.0, < 6.0", False),
+        ("5.9.1", "~> 5.0", True),
+        ("6.0.0", "~> 5.0", False),
+        ("1.2.9", "~> 1.2.3", True),
+        ("1.3.0", "~> 1.2.3", False),
+        ("3.1.0", "!= 3.1.0", False),
+        ("3.1.0", "latest", False),
+    ],
+)
+def test_version_satisfies(version: str, constraints: str, expected: bool) -> None:
+    assert version_satisfies(version, constraints) is expected
+
+
+@pytest.fixture
+def stage(tmp_path: Path) -> Path:
+    """An initialized stage: one provider, one registry and one local module."""
+    stage_dir = tmp_path / "stage"
+    (stage_dir / "vpc").mkdir(parents=True)
+    (stage_dir / "versions.tf").write_text(
+        "terraform {\n"
+        "  required_providers {\n"
+        '    aws = { source = "hashicorp/aws", version = ">= 5.0" }\n'
+        "  }\n"
+        "}\n"
+    )
+    (stage_dir / "main.tf").write_text(
+        'module "transit" {\n'
+        '  source  = "terraform-aviatrix-modules/mc-transit/aviatrix"\n'
+        '  version = "8.2.0"\n'
+        "}\n"
+        'module "vpc" {\n  source = "./vpc"\n}\n'
+    )
+    (stage_dir / "vpc" / "main.tf").write_text('resource "aws_vpc" "this" {}\n')
+    (stage_dir / ".terraform.lock.hcl").write_text(
+        f'provider "{AWS}" {{\n  version = "5.100.0"\n}}\n'
+    )
+    (stage_dir / ".terraform" / "providers" / AWS / "5.100.0").mkdir(parents=True)
+    modules = stage_dir / ".terraform" / "modules"
+    (modules / "transit").mkdir(parents=True)
+    manifest = [
+        {"Key": "", "Source": "", "Dir": "."},
+        {"Key": "vpc", "Source": "./vpc", "Dir": "vpc"},
+        {
+            "Key": "transit",
+            "Source": TRANSIT,
+            "Version": "8.2.0",
+            "Dir": ".terraform/modules/transit",
+        },
+    ]
+    (modules / "modules.json").write_text(json.dumps({"Modules": manifest}))
+    return stage_dir
+
+
+def test_init_is_current(stage: Path) -> None:
+    assert init_is_current(stage)
+
+
+def test_init_needed_without_lock_file(stage: Path) -> None:
+    (stage / ".terraform.lock.hcl").unlink()
+    assert not init_is_current(stage)
+
+
+def test_init_needed_when_provider_constraint_changes(stage: Path) -> None:
+    versions = stage / "versions.tf"
+    versions.write_text(versions.read_text().replace(">= 5.0", ">= 6.0"))
+    assert not init_is_current(stage)
+
+
+def test_init_needed_when_module_version_changes(stage: Path) -> None:
+    main = stage / "main.tf"
+    main.write_text(main.read_text().replace("8.2.0", "8.3.0"))
+    assert not init_is_current(stage)
+
+
+def test_init_needed_for_new_local_module(stage: Path) -> None:
+    (stage / "vpc" / "main.tf").write_text('module "subnets" {\n  source = "../x"\n}\n')
+    assert not init_is_current(stage)
+
+
+def test_init_needed_when_plugin_missing(stage: Path) -> None:
+    (stage / ".terraform" / "providers" / AWS / "5.100.0").rmdir()
+    assert not init_is_current(stage)
+
+
+class FakeRun:
+    """Stands in for TerraformRun, recording the command and environment."""
+
+    calls: list["FakeRun"] = []
+
+    def __init__(self, cmd, tf_dir, log_path, timeout, on_event, env=None) -> None:
+        self.cmd, self.tf_dir, self.env = cmd, tf_dir, env
+        self.returncode = 0
+        FakeRun.calls.append(self)
+
+    def run(self) -> int:
+        return 0
+
+
+@pytest.fixture
+def fake_run(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> list[FakeRun]:
+    FakeRun.calls = []
+    monkeypatch.setattr(harness, "TerraformRun", FakeRun)
+    monkeypatch.setenv("TF_PLUGIN_CACHE_DIR", str(tmp_path / "plugin-cache"))
+    monkeypatch.delenv("AVX_TF_OFFLINE", raising=False)
+    monkeypatch.delenv("AVX_TF_PROVIDER_MIRROR", raising=False)
+    return FakeRun.calls
+
+
+def test_init_uses_shared_plugin_cache(tmp_path: Path, fake_run: list) -> None:
+    terraform_init(tmp_path)
+    (run,) = fake_run
+    assert run.cmd == ["terraform", "init", "-input=false", "-upgrade"]
+    assert run.env == {"TF_PLUGIN_CACHE_DIR": str(tmp_path / "plugin-cache")}
+    assert (tmp_path / "plugin-cache").is_dir()
+
+
+def test_offline_init_installs_from_mirror(
+    tmp_path: Path, fake_run: list, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("AVX_TF_OFFLINE", "1")
+    terraform_init(tmp_path)
+    monkeypatch.setenv("AVX_TF_PROVIDER_MIRROR", "/srv/mirror")
+    terraform_init(tmp_path)
+    cache = tmp_path / "plugin-cache"
+    assert fake_run[0].cmd[-1] == f"-plugin-dir={cache}"
+    assert fake_run[1].cmd[-1] == "-plugin-dir=/srv/mirror"
+    assert "-upgrade" not in fake_run[0].cmd + fake_run[1].cmd
+
+
+def test_ensure_initialized_skips_current_stage(stage: Path, fake_run: list) -> None:
+    assert ensure_initialized(stage) is None
+    assert fake_run == []
+
+
+def test_ensure_initialized_reuses_locked_versions_from_cache(
+    stage: Path, tmp_path: Path, fake_run: list
+) -> None:
+    (stage / ".terraform" / "providers" / AWS / "5.100.0").rmdir()
+    (tmp_path / "plugin-cache" / AWS / "5.100.0").mkdir(parents=True)
+    ensure_initialized(stage)
+    assert "-upgrade" not in fake_run[0].cmd
+
+
+def test_download_holds_plugin_cache_lock(
+    stage: Path, tmp_path: Path, fake_run: list
+) -> None:
+    (stage / ".terraform" / "providers" / AWS / "5.100.0").rmdir()
+    ensure_initialized(stage)
+    assert "-upgrade" in fake_run[0].cmd
+    assert (tmp_path / "plugin-cache" / ".lock").is_file()
+
+
+def test_plugin_cache_lock_without_fcntl(
+    stage: Path, tmp_path: Path, fake_run: list, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(harness, "fcntl", None)
+    (stage / ".terraform" / "providers" / AWS / "5.100.0").rmdir()
+    ensure_initialized(stage)
+    assert "-upgrade" in fake_run[0].cmd
+    assert not (tmp_path / "plugin-cache" / ".lock").exists()
+    assert not harness._PLUGIN_CACHE_THREAD_LOCK.locked()
+
+
+def test_init_stages_runs_concurrently(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    barrier = threading.Barrier(3, timeout=5)
+
+    def init(tf_dir: Path, timeout: int = 300) -> None:
+        barrier.wait()
+        time.sleep(0.01)
+
+    monkeypatch.setattr(harness, "ensure_initialized", init)
+    dirs = [tmp_path / name for name in ("site", "backbone", "monitoring")]
+    assert init_stages(dirs) == dict.fromkeys(dirs)
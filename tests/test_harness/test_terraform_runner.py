@@ -0,0 +1,111 @@
+"""Unit tests for the streaming terraform runner, driven by a fake terraform."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import TerraformRun, parse_terraform_event
+
+EVENTS = [
+    {
+        "@level": "info",
+        "@message": "Terraform 1.9.5",
+        "@timestamp": "2026-10-18T10:00:00.000000Z",
+        "type": "version",
+    },
+    {
+        "@level": "info",
+        "@message": "aviatrix_transit_gateway.this: Creating...",
+        "@timestamp": "2026-10-18T10:00:01.5+00:00",
+        "type": "apply_start",
+        "hook": {
+            "resource": {"addr": "aviatrix_transit_gateway.this"},
+            "action": "create",
+        },
+    },
+    {
+        "@level": "info",
+        "@message": "aviatrix_transit_gateway.this: Creation complete after 7m2s",
+        "@timestamp": "2026-10-18T10:07:03.5+00:00",
+        "type": "apply_complete",
+        "hook": {
+            "resource": {"addr": "aviatrix_transit_gateway.this"},
+            "action": "create",
+            "elapsed_seconds": 422,
+        },
+    },
+    {
+        "@level": "error",
+        "@message": "Error: failed to create peering",
+        "@timestamp": "2026-10-18T10:07:04.123+00:00",
+        "type": "diagnostic",
+        "diagnostic": {"severity": "error", "detail": "controller busy"},
+    },
+]
+
+
+def _fake_terraform(tmp_path: Path, lines: list[str], exit_code: int = 0) -> list[str]:
+    script = tmp_path / "fake_terraform.py"
+    script.write_text(
+        "import sys\n"
+        f"for line in {lines!r}:\n"
+        "    print(line, flush=True)\n"
+        f"sys.exit({exit_code})\n"
+    )
+    return [sys.executable, str(script)]
+
+
+def test_parse_hook_event() -> None:
+    event = parse_terraform_event(json.dumps(EVENTS[2]))
+    assert event.type == "apply_complete"
+    assert event.resource == "aviatrix_transit_gateway.this"
+    assert event.action == "create"
+    assert event.elapsed == 422
+    assert event.timestamp == 1792318023.5
+
+
+def test_parse_plain_text_line() -> None:
+    event = parse_terraform_event("Initializing provider plugins...\n")
+    assert (event.type, event.message) == ("log", "Initializing provider plugins...")
+
+
+def test_run_streams_events_and_records_timings(tmp_path: Path) -> None:
+    lines = [json.dumps(e) for e in EVENTS]
+    seen: list[str] = []
+    run = TerraformRun(
+        _fake_terraform(tmp_path, lines, exit_code=1),
+        tmp_path,
+        tmp_path / "logs" / "apply.log",
+        on_event=lambda e: seen.append(e.type),
+    )
+
+    assert [e.type for e in run] == seen
+    assert seen == ["version", "apply_start", "apply_complete", "diagnostic"]
+    assert run.returncode == 1
+
+    timing = run.timings["aviatrix_transit_gateway.this"]
+    assert timing.action == "create"
+    assert timing.duration == 422.0
+    assert run.error_summary() == "Error: failed to create peering: controller busy"
+    assert (tmp_path / "logs" / "apply.log").read_text().splitlines() == lines
+
+
+def test_error_summary_falls_back_to_output_tail(tmp_path: Path) -> None:
+    run = TerraformRun(
+        _fake_terraform(tmp_path, ["Error: Failed to query available provider"], 1),
+        tmp_path,
+        tmp_path / "init.log",
+    )
+    assert run.run() == 1
+    assert run.error_summary() == "Error: Failed to query available provider"
+
+
+def test_timeout_kills_process(tmp_path: Path) -> None:
+    cmd = [sys.executable, "-c", "import time; time.sleep(30)"]
+    run = TerraformRun(cmd, tmp_path, tmp_path / "slow.log", timeout=1)
+    with pytest.raises(subprocess.TimeoutExpired):
+        run.run()
+    assert run.timed_out
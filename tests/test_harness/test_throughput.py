@@ -0,0 +1,34 @@
+"""Unit tests for iperf3 result parsing."""
+
+import json
+
+from tests.conftest import parse_iperf3_json
+
+IPERF3_CLIENT_OUTPUT = {
+    "start": {"test_start": {"num_streams": 8, "duration": 10}},
+    "end": {
+        "sum_sent": {"bits_per_second": 4.82e9, "retransmits": 117},
+        "sum_received": {"bits_per_second": 4.79e9},
+        "cpu_utilization_percent": {"host_total": 41.5, "remote_total": 63.2},
+    },
+}
+
+
+def test_parse_iperf3_summary() -> None:
+    parsed = parse_iperf3_json(json.dumps(IPERF3_CLIENT_OUTPUT))
+    assert parsed == {
+        "sent_gbps": 4.82,
+        "received_gbps": 4.79,
+        "retransmits": 117,
+        "cpu_client_pct": 41.5,
+        "cpu_server_pct": 63.2,
+    }
+
+
+def test_parse_iperf3_error() -> None:
+    output = json.dumps({"start": {}, "end": {}, "error": "unable to connect"})
+    assert parse_iperf3_json(output) == {"error": "unable to connect"}
+
+
+def test_parse_iperf3_garbage() -> None:
+    assert "error" in parse_iperf3_json("iperf3: command not found")
@@ -0,0 +1,271 @@
+"""Tests for the CIDR overlap and route conflict analyzer."""
+
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from tools.cidr_audit import (
+    PrefixTree,
+    audit,
+    audit_files,
+    classify,
+    extract,
+    load_file,
+    main,
+    parse_cidr,
+)
+
+REPO = Path(__file__).resolve().parents[2]
+EXAMPLES = sorted(REPO.glob("examples/*/*.tfvars.example"))
+
+SAMPLE = """
+transits = {
+  "a" = {
+    cidr = "10.1.0.0/16"
+    manual_bgp_advertised_cidrs = ["10.0.0.0/8", "10.2.5.0/24", "10.3.0.0/16"]
+    mgmt_source_ranges = ["10.1.0.0/8"]
+    inside_cidr_blocks = {
+      "tgw" = {
+        connect_peer_1    = "169.254.100.0/29"
+        ha_connect_peer_1 = "169.254.100.4/30"
+      }
+    }
+  }
+  "b" = { cidr = "10.2.0.0/16" }
+  "c" = { cidr = "10.1.128.0/17", approved_learned_cidrs = ["10.5.0.1/16"] }
+}
+sites = {
+  "s1" = { cidr = "10.3.0.0/17" }
+  "s2" = { cidr = "10.3.128.0/17" }
+}
+external_devices = {
+  "d1" = {
+    transit_key        = "a"
+    local_tunnel_cidr  = "169.254.100.1/30"
+    remote_tunnel_cidr = "169.254.100.2/30"
+  }
+}
+"""
+
+
+def _write(tmp_path: Path, name: str, text: str) -> Path:
+    path = tmp_path / name
+    path.write_text(text)
+    return path
+
+
+def test_classify():
+    assert classify("cidr") == "space"
+    assert classify("vpc_cidr") == "space"
+    assert classify("manual_bgp_advertised_cidrs") == "advertised"
+    assert classify("local_tunnel_cidr") == "tunnel"
+    assert classify("inside_cidr_blocks") == "tunnel"
+    assert classify("approved_learned_cidrs") == "approved"
+    assert classify("smarties") == "match"
+    assert classify("mgmt_source_ranges") == "ignore"
+    assert classify("region") is None
+
+
+def test_parse_cidr():
+    assert parse_cidr("10.1.0.0/16") == ((4, 0x0A010000, 0x0A01FFFF), True)
+    assert parse_cidr("10.1.0.1/16")[1] is False
+    assert parse_cidr("10.01.0.0/16")[1] is False
+    assert parse_cidr("fd00::/64") == (
+        (6, 0xFD << 120, (0xFD << 120) + 2**64 - 1),
+        True,
+    )
+    with pytest.raises(ValueError):
+        parse_cidr("10.1.0.300/24")
+
+
+def test_sample_issues(tmp_path):
+    result = audit_files([_write(tmp_path, "sample.tfvars", SAMPLE)])
+    assert result.counts() == {
+        "invalid": 1,
+        "overlap": 1,
+        "tunnel": 2,
+        "conflict": 1,
+        "shadowed": 1,
+    }
+    by_kind = {issue.kind: issue for issue in result.issues}
+    assert "host bits set, use 10.5.0.0/16" in by_kind["invalid"].message
+    assert by_kind["overlap"].message == "c 10.1.128.0/17 is inside a 10.1.0.0/16"
+    assert by_kind["conflict"].message.startswith("a advertises 10.2.5.0/24")
+    assert by_kind["shadowed"].message.startswith("a advertises 10.3.0.0/16")
+    # Source ranges are not collected.
+    assert all("source_ranges" not in p.path for p in result.prefixes)
+
+
+def test_entities_and_scopes():
+    prefixes, issues = extract(
+        {
+            "sites": [{"name": "s1", "vpc_cidr": "10.0.0.0/24"}, {"cidr": "x/24"}],
+            "devices": {"d-1": {"transit_key": "t", "tunnel_cidr": "1.1.1.1/30"}},
+        },
+        "f",
+    )
+    assert [(p.entity, p.scope, p.path) for p in prefixes] == [
+        ("s1", "s1", "sites[0].vpc_cidr"),
+        ("d-1", "t", 'devices["d-1"].tunnel_cidr'),
+    ]
+    assert issues == []
+
+
+def test_tunnel_ends_are_one_link():
+    prefixes, _ = extract(
+        {
+            "devices": {
+                "d": {
+                    "transit_key": "t",
+                    "local_tunnel_cidr": "169.254.1.1/30",
+                    "remote_tunnel_cidr": "169.254.1.2/30",
+                    "backup_local_tunnel_cidr": "169.254.1.5/30",
+                    "backup_remote_tunnel_cidr": "169.254.1.6/30",
+                },
+                "e": {"transit_key": "u", "local_tunnel_cidr": "169.254.1.1/30"},
+            }
+        },
+        "f",
+    )
+    assert audit(prefixes).issues == []
+
+
+def test_same_entity_in_two_files_is_one_network(tmp_path):
+    tfvars = _write(tmp_path, "a.tfvars", 'vpcs = { "x" = { cidr = "10.0.0.0/16" } }')
+    outputs = _write(tmp_path, "b.json", '{"vpcs": {"x": {"cidr": "10.0.0.0/16"}}}')
+    assert audit_files([tfvars, outputs]).issues == []
+    both = _write(
+        tmp_path,
+        "c.tfvars",
+        'vpcs = {\n"x" = { cidr = "10.0.0.0/16" }\n"y" = { cidr = "10.0.0.0/16" }\n}',
+    )
+    (issue,) = audit_files([both]).issues
+    assert issue.message == "x and y both use 10.0.0.0/16"
+
+
+def test_cross_file_duplicates_of_different_entities(tmp_path):
+    aws = _write(
+        tmp_path, "aws.tfvars", 'spokes = { "app" = { cidr = "10.0.0.0/16" } }'
+    )
+    gcp = _write(
+        tmp_path, "gcp.json", '{"transits": [{"name": "t", "vpc_cidr": "10.0.0.0/16"}]}'
+    )
+    (issue,) = audit_files([aws, gcp]).issues
+    assert issue.message == "app and t both use 10.0.0.0/16"
+
+    examples = [
+        REPO / f"examples/{cloud}/{cloud}.tfvars.example" for cloud in ("aws", "gcp")
+    ]
+    messages = {i.message for i in audit_files(examples).issues}
+    assert "spoke-app-1 and transit-1 both use 10.10.0.0/16" in messages
+
+
+def test_smart_group_selectors_are_not_address_space(tmp_path):
+    examples = [
+        REPO / f"examples/{name}/{name}.tfvars.example" for name in ("aws", "dcf")
+    ]
+    result = audit_files(examples)
+    assert not [i for i in result.issues if any(p.role == "match" for p in i.prefixes)]
+    matches = [p for p in result.prefixes if p.role == "match"]
+    assert {p.entity for p in matches} == {
+        "web-tier",
+        "app-tier",
+        "db-tier",
+        "mgmt-network",
+    }
+    # Selectors are still checked for validity.
+    dcf = _write(
+        tmp_path, "dcf.tfvars", 'smarties = { "x" = { cidr = "10.1.0.5/24" } }'
+    )
+    (issue,) = audit_files([dcf]).issues
+    assert issue.kind == "invalid" and "10.1.0.5/24 has host bits set" in issue.message
+
+
+def test_shadowed_needs_full_cover():
+    def shadowed(spaces: dict[str, str]) -> int:
+        data = {
+            "transits": {"a": {"manual_bgp_advertised_cidrs": ["10.0.0.0/23"]}},
+            "vpcs": {k: {"cidr": v} for k, v in spaces.items()},
+        }
+        return audit(extract(data, "f")[0]).counts()["shadowed"]
+
+    assert shadowed({"x": "10.0.0.0/24", "y": "10.0.1.0/24"}) == 1
+    assert shadowed({"x": "10.0.0.0/24", "y": "10.0.1.0/25"}) == 0
+    # Nested covers count once, at their outermost network.
+    assert shadowed({"x": "10.0.0.0/24", "y": "10.0.1.0/24", "z": "10.0.1.0/25"}) == 1
+    assert shadowed({"x": "10.0.0.0/24", "y": "10.0.1.0/25", "z": "10.0.1.128/25"}) == 1
+
+
+def test_prefix_tree_parents():
+    prefixes, _ = extract(
+        {
+            "v": [
+                {"cidr": c}
+                for c in ("10.0.0.0/8", "10.1.0.0/16", "10.1.2.0/24", "10.2.0.0/16")
+            ]
+            + [{"cidr": "fd00::/8"}]
+        },
+        "f",
+    )
+    tree = PrefixTree(prefixes)
+    names = [str(e[0].network) for e in tree.entries]
+    parents = [None if p is None else names[p] for p in tree.parent]
+    assert dict(zip(names, parents, strict=True)) == {
+        "10.0.0.0/8": None,
+        "10.1.0.0/16": "10.0.0.0/8",
+        "10.1.2.0/24": "10.1.0.0/16",
+        "10.2.0.0/16": "10.0.0.0/8",
+        "fd00::/8": None,
+    }
+
+
+def test_state_and_output_files(tmp_path):
+    outputs = {"vpc_cidrs": {"value": {"x": "10.0.0.0/16"}, "type": "object"}}
+    state = _write(
+        tmp_path, "site.tfstate", json.dumps({"version": 4, "outputs": outputs})
+    )
+    output = _write(tmp_path, "outputs.json", json.dumps(outputs))
+    assert load_file(state) == load_file(output) == {"vpc_cidrs": {"x": "10.0.0.0/16"}}
+
+
+@pytest.mark.parametrize("path", EXAMPLES, ids=lambda p: p.parent.name)
+def test_examples_are_clean(path):
+    assert audit_files([path]).issues == []
+
+
+def test_scale():
+    # 20,000 transits with an advertised /25 each and 10,000 site subnets.
+    data = {
+        "transits": {
+            f"t{i}": {
+                "cidr": f"10.{i // 256}.{i % 256}.0/24",
+                "manual_bgp_advertised_cidrs": [f"10.{i // 256}.{i % 256}.0/25"],
+            }
+            for i in range(20000)
+        },
+        "sites": [
+            {"name": f"s{i}", "vpc_cidr": f"172.{16 + i // 4096}.{i // 16 % 256}.0/28"}
+            for i in range(10000)
+        ],
+    }
+    start = time.perf_counter()
+    prefixes, issues = extract(data, "f")
+    result = audit(prefixes, issues)
+    assert time.perf_counter() - start < 10
+    assert len(result.prefixes) == 50000
+    # Sites reuse their /28: 16 sites per network.
+    assert result.counts()["overlap"] == 10000 // 16 * (16 * 15 // 2)
+    assert result.counts()["conflict"] == 0
+
+
+def test_cli(tmp_path, capsys):
+    path = _write(tmp_path, "sample.tfvars", SAMPLE)
+    assert main([str(path)]) == 0
+    assert capsys.readouterr().out.splitlines()[-1] == (
+        "13 prefixes: 1 invalid, 1 overlap, 2 tunnel, 1 conflict, 1 shadowed"
+    )
+    assert main([str(path), "--json", "--check"]) == 1
+    assert json.loads(capsys.readouterr().out)["counts"]["tunnel"] == 2
+    assert main([str(EXAMPLES[0]), "--check"]) == 0
@@ -0,0 +1,123 @@
+"""Tests for the controller client, against the local mock controller."""
+
+import threading
+
+import pytest
+
+from tools.controller_client import ControllerClient, ControllerError
+from tools.mock_controller import Faults, MockController, generate_fixtures
+
+FIXTURES = generate_fixtures(site2cloud=500)
+
+
+@pytest.fixture
+def controller():
+    with MockController(FIXTURES) as mock:
+        yield mock
+
+
+def _client(controller: MockController, cache_dir, **kwargs) -> ControllerClient:
+    return ControllerClient(
+        controller.base_url, "admin", "password", cache_dir=cache_dir, **kwargs
+    )
+
+
+def test_cached_list_is_shared_between_clients(controller, tmp_path) -> None:
+    with _client(controller, tmp_path) as first:
+        assert len(first.list_site2cloud()) == 500
+        assert len(first.list_site2cloud()) == 500
+    with _client(controller, tmp_path) as second:
+        assert len(second.list_site2cloud()) == 500
+        assert second.stats["cache_hit"] == 1
+
+    # one login (CID reused by the second client), one download
+    assert controller.stats["login"] == 1
+    assert controller.stats["list_site2cloud"] == 1
+
+
+def test_stale_entry_is_revalidated_with_etag(controller, tmp_path) -> None:
+    with _client(controller, tmp_path, ttl=0) as client:
+        transit = client.transit_gateways()
+        assert client.transit_gateways() == transit
+        assert client.stats["cache_revalidated"] == 1
+        controller.fixtures.transit_gateways.append({"gw_name": "new-transit"})
+        assert client.transit_gateways()[-1] == {"gw_name": "new-transit"}
+        assert client.stats["cache_miss"] == 2
+    assert controller.stats["not_modified"] == 1
+
+
+def test_cache_keys_include_params(controller, tmp_path) -> None:
+    with _client(controller, tmp_path) as client:
+        transit, spoke = client.transit_gateways(), client.spoke_gateways()
+    assert {gw["gw_name"] for gw in transit}.isdisjoint(gw["gw_name"] for gw in spoke)
+
+
+def test_expired_cid_is_refreshed(tmp_path) -> None:
+    with MockController(FIXTURES, Faults(cid_ttl=0.05)) as controller:
+        with _client(controller, tmp_path, ttl=0) as client:
+            client.call("list_spoke_gateways")
+            threading.Event().wait(0.1)
+            assert client.call("list_spoke_gateways")
+            assert client.stats["cid_expired"] == 1
+        assert controller.stats["login"] == 2
+
+
+def test_retries_rate_limits_and_server_errors(tmp_path) -> None:
+    faults = Faults(error_rate=0.5, error_actions=("list_site2cloud",), seed=3)
+    with MockController(FIXTURES, faults) as controller:
+        with _client(controller, tmp_path, retry_delay=0.001, max_retries=10) as c:
+            assert len(c.list_site2cloud(refresh=True)) == 500
+            assert len(c.list_site2cloud(refresh=True)) == 500
+        assert controller.stats["errors"] == c.stats["retry_500"] > 0
+
+    with MockController(FIXTURES, Faults(error_rate=1.0)) as controller:
+        with _client(controller, tmp_path / "x", retry_delay=0.001) as client:
+            with pytest.raises(ControllerError, match="HTTP 500"):
+                client.login()
+
+
+def test_concurrent_refresh_fetches_once(tmp_path) -> None:
+    faults = Faults(action_latency={"list_site2cloud": 0.2})
+    with MockController(FIXTURES, faults) as controller:
+        with _client(controller, tmp_path) as client:
+            client.login()
+        results = []
+
+        def fetch() -> None:
+            with _client(controller, tmp_path) as client:
+                results.append(len(client.list_site2cloud()))
+
+        threads = [threading.Thread(target=fetch) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert results == [500] * 4
+    assert controller.stats["list_site2cloud"] == 1
+
+
+def test_login_failure_and_invalidate(controller, tmp_path) -> None:
+    bad = ControllerClient(controller.base_url, "admin", "wrong", cache_dir=tmp_path)
+    with pytest.raises(ControllerError, match="Invalid username"):
+        bad.login()
+
+    with _client(controller, tmp_path) as client:
+        client.list_site2cloud()
+        assert client.invalidate() == 3  # CID, cache entry, lock
+        client.list_site2cloud()
+    assert controller.stats["login"] == 3  # rejected, then before/after invalidate
+    assert controller.stats["list_site2cloud"] == 2
+
+
+def test_from_env(monkeypatch, tmp_path) -> None:
+    monkeypatch.delenv("AVIATRIX_PASSWORD", raising=False)
+    with pytest.raises(ControllerError, match="AVIATRIX_PASSWORD"):
+        ControllerClient.from_env()
+
+    monkeypatch.setenv("AVIATRIX_CONTROLLER_IP", "10.0.0.1")
+    monkeypatch.setenv("AVIATRIX_USERNAME", "admin")
+    monkeypatch.setenv("AVIATRIX_PASSWORD", "secret")
+    monkeypatch.setenv("AVX_CONTROLLER_CACHE_DIR", str(tmp_path))
+    client = ControllerClient.from_env()
+    assert client.url == "https://10.0.0.1/v2/api"
+    assert client.cache_dir == tmp_path
@@ -0,0 +1,195 @@
+"""Unit tests for the apply critical-path analyzer."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from tools.critical_path import (
+    analyze,
+    config_address,
+    format_report,
+    main,
+    parse_apply_log,
+    parse_graph,
+    parse_timestamp,
+)
+
+GRAPH_NEW = """digraph G {
+  rankdir = "RL";
+  node [shape = rect, fontname = "sans-serif"];
+  "aws_vpc.this" [label="aws_vpc.this"];
+  "aws_ec2_transit_gateway.this" [label="aws_ec2_transit_gateway.this"];
+  "aviatrix_transit_gateway.this" [label="aviatrix_transit_gateway.this"];
+  "aws_ec2_transit_gateway_connect.this" [label="aws_ec2_transit_gateway_connect.this"];
+  "aviatrix_transit_gateway.this" -> "aws_vpc.this";
+  "aws_ec2_transit_gateway_connect.this" -> "aws_ec2_transit_gateway.this";
+  "aws_ec2_transit_gateway_connect.this" -> "aviatrix_transit_gateway.this";
+}
+"""
+
+GRAPH_LEGACY = (Path(__file__).parent / "data" / "graph_legacy.dot").read_text()
+
+
+def _event(kind: str, address: str, at: float, action: str = "create") -> str:
+    minutes, seconds = divmod(at, 60)
+    return json.dumps(
+        {
+            "@level": "info",
+            "@message": f"{address}: {kind}",
+            "@timestamp": f"2026-10-18T10:{int(minutes):02d}:{seconds:06.3f}Z",
+            "type": kind,
+            "hook": {"resource": {"addr": address}, "action": action},
+        }
+    )
+
+
+EAST = 'aws_ec2_transit_gateway_connect.this["us-east-1"]'
+WEST = 'aws_ec2_transit_gateway_connect.this["us-west-2"]'
+
+
+def _apply_log() -> list[str]:
+    # vpc 0-60, tgws 0-300/0-240, avx gw 60-600, connects 600-660/600-630.
+    return [
+        "not json",
+        _event("apply_start", "aws_vpc.this", 0),
+        _event("apply_start", 'aws_ec2_transit_gateway.this["us-east-1"]', 0),
+        _event("apply_start", 'aws_ec2_transit_gateway.this["us-west-2"]', 0),
+        _event("apply_complete", "aws_vpc.this", 60),
+        _event("apply_start", "aviatrix_transit_gateway.this", 60),
+        _event("apply_complete", 'aws_ec2_transit_gateway.this["us-east-1"]', 300),
+        _event("apply_complete", 'aws_ec2_transit_gateway.this["us-west-2"]', 240),
+        _event("apply_complete", "aviatrix_transit_gateway.this", 600),
+        _event("apply_start", EAST, 600),
+        _event("apply_start", WEST, 600),
+        _event("apply_complete", EAST, 660),
+        _event("apply_errored", WEST, 630),
+    ]
+
+
+def test_config_address_strips_instance_keys() -> None:
+    address = 'module.transit["aws.east"].aws_vpc.this[0]'
+    assert config_address(address) == "module.transit.aws_vpc.this"
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "2026-10-18T10:00:01.5Z",
+        "2026-10-18T10:00:01.500000Z",
+        "2026-10-18T10:00:01.500000123Z",
+        "2026-10-18T12:00:01.5+02:00",
+    ],
+)
+def test_parse_timestamp_any_fraction(value: str) -> None:
+    assert parse_timestamp(value) == 1792317601.5
+
+
+def test_parse_apply_log_spans() -> None:
+    spans = parse_apply_log(_apply_log())
+    assert len(spans) == 6
+    assert spans["aviatrix_transit_gateway.this"].duration == 540
+    assert spans[WEST].status == "errored"
+
+
+def test_parse_apply_log_closes_incomplete_spans() -> None:
+    lines = [
+        _event("apply_start", "aws_vpc.this", 0),
+        _event("apply_start", "aviatrix_transit_gateway.this", 10),
+        _event("apply_complete", "aws_vpc.this", 100),
+    ]
+    span = parse_apply_log(lines)["aviatrix_transit_gateway.this"]
+    assert (span.status, span.duration) == ("incomplete", 90)
+
+
+def test_parse_graph_new_format() -> None:
+    graph = parse_graph(GRAPH_NEW)
+    assert graph["aws_ec2_transit_gateway_connect.this"] == {
+        "aws_ec2_transit_gateway.this",
+        "aviatrix_transit_gateway.this",
+    }
+    assert graph["aws_vpc.this"] == set()
+
+
+def test_parse_graph_old_format_collapses_non_resources() -> None:
+    graph = parse_graph(GRAPH_LEGACY)
+    assert graph == {
+        "module.transit.aviatrix_transit_gateway.this": {"module.transit.aws_vpc.this"},
+        "module.transit.aws_vpc.this": set(),
+    }
+
+
+def test_analyze_critical_path() -> None:
+    spans = parse_apply_log(_apply_log())
+    report = analyze(spans, parse_graph(GRAPH_NEW), top=3)
+
+    assert report.critical_path == [
+        "aws_vpc.this",
+        "aviatrix_transit_gateway.this",
+        EAST,
+    ]
+    assert report.critical_time == 660
+    assert report.wall_time == 660
+    assert report.serial_time == 60 + 300 + 240 + 540 + 60 + 30
+    assert report.achievable_speedup == pytest.approx(1230 / 660)
+    assert report.slowest[0].address == "aviatrix_transit_gateway.this"
+    assert report.groups[0].config_address == "aws_ec2_transit_gateway.this"
+    assert report.groups[0].instances == 2
+    assert report.chains[0].resources == report.critical_path
+
+
+def test_analyze_passes_through_unchanged_resources() -> None:
+    # aviatrix_transit_gateway has nothing to do; connect still waits for the VPC.
+    lines = [
+        _event("apply_start", "aws_vpc.this", 0, "update"),
+        _event("apply_complete", "aws_vpc.this", 30, "update"),
+        _event("apply_start", 'aws_ec2_transit_gateway_connect.this["a"]', 30),
+        _event("apply_complete", 'aws_ec2_transit_gateway_connect.this["a"]', 90),
+    ]
+    report = analyze(parse_apply_log(lines), parse_graph(GRAPH_NEW))
+    assert report.critical_path == [
+        "aws_vpc.this",
+        'aws_ec2_transit_gateway_connect.this["a"]',
+    ]
+
+
+def test_analyze_destroy_runs_in_reverse() -> None:
+    lines = [
+        _event("apply_start", "aviatrix_transit_gateway.this", 0, "delete"),
+        _event("apply_complete", "aviatrix_transit_gateway.this", 200, "delete"),
+        _event("apply_start", "aws_vpc.this", 200, "delete"),
+        _event("apply_complete", "aws_vpc.this", 220, "delete"),
+    ]
+    report = analyze(parse_apply_log(lines), parse_graph(GRAPH_NEW))
+    assert report.critical_path == ["aviatrix_transit_gateway.this", "aws_vpc.this"]
+    assert report.critical_time == 220
+
+
+def test_analyze_empty_log() -> None:
+    report = analyze({}, {})
+    assert report.resources == 0
+    assert report.achievable_speedup == 1.0
+
+
+def test_main_text_and_json(tmp_path, capsys) -> None:
+    log = tmp_path / "apply.log"
+    log.write_text("\n".join(_apply_log()))
+    dot = tmp_path / "graph.dot"
+    dot.write_text(GRAPH_NEW)
+
+    assert main([str(log), "--graph", str(dot)]) == 0
+    text = capsys.readouterr().out
+    assert "Critical path:       11m00s" in text
+    assert "[errored]" in text
+
+    assert main([str(log), "--graph", str(dot), "--json", "--top", "1"]) == 0
+    data = json.loads(capsys.readouterr().out)
+    assert data["critical_time"] == 660
+    assert len(data["slowest"]) == 1
+    assert data["slowest"][0]["duration"] == 540
+
+
+def test_format_report_lists_chains() -> None:
+    spans = parse_apply_log(_apply_log())
+    text = format_report(analyze(spans, parse_graph(GRAPH_NEW)), spans)
+    assert "aws_vpc.this -> aviatrix_transit_gateway.this -> " in text
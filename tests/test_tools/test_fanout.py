@@ -0,0 +1,222 @@
+"""Tests for the plan-time resource fan-out estimator."""
+
+import json
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from tools.critical_path import ResourceSpan
+from tools.fanout import (
+    LATENCY,
+    MODULES,
+    calibrate,
+    detect_module,
+    estimate,
+    load_tfvars,
+    main,
+    module_blocks,
+)
+
+REPO = Path(__file__).resolve().parents[2]
+EXAMPLES = {
+    cloud: REPO / f"examples/{cloud}/{cloud}.tfvars.example" for cloud in MODULES
+}
+
+
+@pytest.mark.parametrize("cloud", sorted(MODULES))
+def test_model_covers_every_block(cloud):
+    model = MODULES[cloud]
+    blocks = module_blocks(model.path)
+    assert set(model.resources) == set(blocks)
+    for address, resource in model.resources.items():
+        if not address.startswith("module."):
+            assert resource.type == blocks[address]
+    # Every resource names a collection its module computes.
+    assert {r.collection for r in model.resources.values()} <= set(
+        model.collections({})
+    )
+
+
+@pytest.mark.parametrize("cloud", sorted(MODULES))
+def test_detect_module(cloud):
+    assert detect_module(load_tfvars(EXAMPLES[cloud])) == cloud
+
+
+def test_aws_pair_fanout():
+    result = estimate(
+        {
+            "transits": {
+                "t-vpc": {
+                    "tgw_name": "a,b",
+                    "fw_amount": 4,
+                    "inspection_enabled": True,
+                    "ssh_keys": "key",
+                },
+                "u": {"tgw_name": "", "attach_firewall": False, "fw_amount": 2},
+            },
+            "tgws": {"a": {"create_tgw": True, "account_ids": ["1", "2"]}, "b": {}},
+        },
+        "aws",
+    )
+    types = Counter(i.type for i in result.instances)
+    # 2 transit/TGW pairs: 16 Connect peers and 8 external connections each.
+    assert types["aws_ec2_transit_gateway_connect_peer"] == 32
+    assert types["aviatrix_transit_external_device_conn"] == 16
+    assert types["vmseries"] == 6
+    assert types["aviatrix_firewall_instance_association"] == 4
+    assert types["aws_ram_principal_association"] == 2
+    assert types["tls_private_key"] == 1
+    # The module looks inspection_enabled up by "t", not "t-vpc".
+    assert types["aviatrix_transit_firenet_policy"] == 0
+    knobs = {row["knob"]: row for row in result.by_knob()}
+    assert knobs["transits[*].tgw_name"]["units"] == 2
+    assert knobs["transits[*].tgw_name"]["instances"] == 60
+    assert result.by_knob()[0]["knob"] == "transits[*].tgw_name"
+
+
+def test_gcp_bgp_lan_fanout():
+    variables = {
+        "project_id": "p",
+        "ncc_hubs": [{"name": "star"}, {"name": "mesh", "preset_topology": "MESH"}],
+        "transits": [
+            {
+                "gw_name": "gw",
+                "fw_amount": 2,
+                "inspection_enabled": True,
+                "bgp_lan_subnets": {
+                    "star": {"cidr": "10.0.0.0/28"},
+                    "mesh": {"cidr": ""},
+                    "other": {"cidr": "10.0.1.0/28"},
+                },
+                "external_lb_rules": [{"name": "http"}, {"name": "https"}],
+            }
+        ],
+        "spokes": [{"vpc_name": "v", "ncc_hub": "mesh"}],
+    }
+    result = estimate(variables)
+    assert result.module == "gcp"
+    types = Counter(i.type for i in result.instances)
+    assert types["google_compute_router_peer"] == 8
+    assert types["google_compute_subnetwork"] == 1
+    assert types["google_compute_address"] == 4
+    assert types["google_network_connectivity_spoke"] == 3
+    assert types["google_compute_global_forwarding_rule"] == 2
+    # Policies for BGP-LAN subnets with a CIDR, hub or not.
+    policies = [
+        i.address for i in result.instances if i.type.endswith("firenet_policy")
+    ]
+    assert policies == [
+        'aviatrix_transit_firenet_policy.inspection_policies["gw-bgp-lan-star"]',
+        'aviatrix_transit_firenet_policy.inspection_policies["gw-bgp-lan-other"]',
+    ]
+
+
+def test_azure_hub_connections():
+    variables = {
+        "vwan_hubs": {"h": {}},
+        "transits": {
+            "t-vnet": {
+                "fw_amount": 2,
+                "inspection_enabled": True,
+                "vwan_connections": [{"vwan_hub_name": "h"}, {"vwan_hub_name": "x"}],
+            }
+        },
+        "spokes": {"s": {"vwan_connections": [{"vwan_hub_name": "h"}]}},
+        "vnets": {"v": {"cidr": "10.0.0.0/24", "private_subnets": ["a", "b"]}},
+    }
+    result = estimate(variables, "azure")
+    addresses = {i.address for i in result.instances}
+    assert 'azurerm_virtual_hub_connection.transit_connection["t-vnet.h.0"]' in (
+        addresses
+    )
+    assert 'module.pan_fw["t-pri-fw1"]' in addresses
+    assert "time_sleep.wait_for_spoke_hub_connection[0]" in addresses
+    assert 'aviatrix_spoke_external_device_conn.spoke_external["s.h.0"]' not in (
+        addresses
+    )
+    types = Counter(i.type for i in result.instances)
+    assert types["azurerm_virtual_hub_bgp_connection"] == 4
+    assert types["azurerm_subnet_route_table_association"] == 2
+    assert types["aviatrix_transit_firenet_policy"] == 1
+
+
+def test_examples():
+    counts = {
+        cloud: len(estimate(load_tfvars(path)).instances)
+        for cloud, path in EXAMPLES.items()
+    }
+    assert counts == {"aws": 101, "gcp": 79, "azure": 59}
+
+
+def test_apply_seconds_runs_waves_in_order():
+    result = estimate({"transits": {"a": {"tgw_name": ""}}}, "aws")
+    # mc-transit (wave 1) then firenet (wave 2), one after the other, and the
+    # generated keys in wave 0 at the longest of their 7 instances.
+    assert result.apply_seconds() == (
+        LATENCY["aws_secretsmanager_secret"]
+        + LATENCY["mc-transit"]
+        + LATENCY["aviatrix_firenet"]
+    )
+    result.parallelism = 1
+    assert result.apply_seconds() == 14 + 900 + 120
+
+
+def test_batches_fit_window():
+    variables = {
+        "transits": {f"t{n}": {"tgw_name": "x", "fw_amount": 2} for n in range(6)},
+        "tgws": {"x": {"create_tgw": True}},
+    }
+    result = estimate(variables, "aws", parallelism=10)
+    window = 1.1 * result.apply_seconds(
+        [i for i in result.instances if i.owner == "transit:t0"]
+    )
+    batches = result.batches(window)
+    assert sorted(o for batch in batches for o in batch) == sorted(
+        {i.owner for i in result.instances}
+    )
+    for batch in batches:
+        instances = [i for i in result.instances if i.owner in batch]
+        assert result.apply_seconds(instances) <= window
+    assert result.batches(10 * result.apply_seconds()) == [
+        sorted({i.owner for i in result.instances})
+    ]
+
+
+def test_calibrate_from_spans():
+    def span(address, start, end, action="create"):
+        return address, ResourceSpan(address, action, start, end)
+
+    gateway = 'module.transit.module.mc-transit["a"]'
+    spans = dict(
+        [
+            span(f"{gateway}.aviatrix_transit_gateway.this", 0, 700),
+            span(f"{gateway}.aviatrix_vpc.default[0]", 0, 100),
+            span(f"{gateway}.aviatrix_transit_gateway.ha", 700, 1200),
+            span('module.transit.aws_route.route["a.x"]', 0, 4),
+            span('module.transit.aws_route.route["b.x"]', 0, 8),
+            span('module.transit.aws_route.route["c.x"]', 0, 6),
+            span('module.transit.aws_ec2_transit_gateway.tgw["x"]', 0, 5, "delete"),
+        ]
+    )
+    latency = calibrate(spans)
+    assert latency["mc-transit"] == 1200
+    assert latency["aws_route"] == 6
+    assert latency["aws_ec2_transit_gateway"] == LATENCY["aws_ec2_transit_gateway"]
+
+
+def test_cli(tmp_path, capsys):
+    assert main([str(EXAMPLES["aws"]), "--window", "30"]) == 0
+    out = capsys.readouterr().out
+    assert out.startswith("aws: 101 instances")
+    assert "batch(es) of at most 30m" in out
+
+    tfvars = tmp_path / "gcp.tfvars.json"
+    tfvars.write_text(json.dumps({"transits": [{"gw_name": "g"}], "ncc_hubs": []}))
+    assert main([str(tfvars), "--json", "--parallelism", "1"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["module"] == "gcp" and report["instances"] == 1
+
+    tfvars.write_text("{}")
+    assert main([str(tfvars)]) == 2
+    assert "pass --module" in capsys.readouterr().err
@@ -0,0 +1,156 @@
+"""Unit tests for the sharded Gatus config generator."""
+
+import json
+
+import pytest
+
+from tools.gatus_config import (
+    Site,
+    load_sites,
+    main,
+    plan_shards,
+    render_config,
+    scaled_interval,
+    sites_from_outputs,
+    write_shards,
+)
+
+
+def _vm(public: str, private: str) -> dict:
+    return {"public_vm_public_ip": public, "private_vm_private_ip": private}
+
+
+SITE_OUTPUTS = {
+    "aws_sites": {
+        "value": {
+            "site-1": {"vm": _vm("54.0.0.1", "10.1.2.10")},
+            "site-2": {"vm": _vm("54.0.0.2", "10.2.2.10")},
+        }
+    },
+    "aws_site_config": {
+        "value": {"site-1": {"region": "us-west-2"}, "site-2": {"region": "us-east-1"}}
+    },
+    "gcp_vm": {"value": _vm("35.0.0.1", "10.3.2.10")},
+    "gcp_vm_vpc_name": {"value": "gcp-vpc"},
+    "gcp_vpc_info": {"value": {"region": "us-central1"}},
+}
+
+
+def _fleet(count: int, regions: int = 4) -> list[Site]:
+    return [
+        Site(
+            f"site-{i:03d}",
+            "aws" if i % 2 else "gcp",
+            f"region-{i % regions}",
+            f"54.0.{i // 256}.{i % 256}",
+            f"10.{i // 256}.{i % 256}.10",
+        )
+        for i in range(count)
+    ]
+
+
+def test_sites_from_outputs() -> None:
+    sites = sites_from_outputs(SITE_OUTPUTS)
+    assert [s.label for s in sites] == [
+        "aws-site-1-us-west-2",
+        "aws-site-2-us-east-1",
+        "gcp-gcp-vpc-us-central1",
+    ]
+    assert sites[2].private_ip == "10.3.2.10"
+
+
+def test_single_shard_matches_monitoring_stage() -> None:
+    (shard,) = plan_shards(sites_from_outputs(SITE_OUTPUTS))
+    assert shard.dashboard.name == "site-1"
+    assert shard.interval == 1
+    assert [p.name for p in shard.probes] == [
+        "aws-site-1-us-west-2",
+        "aws-site-1-us-west-2-icmp",
+        "aws-site-2-us-east-1-gatus",
+        "aws-site-2-us-east-1-icmp",
+        "aws-site-2-us-east-1-ssh",
+        "gcp-gcp-vpc-us-central1-gatus",
+        "gcp-gcp-vpc-us-central1-icmp",
+        "gcp-gcp-vpc-us-central1-ssh",
+    ]
+    config = render_config(shard)
+    assert '  - name: "aws-site-2-us-east-1-ssh"\n    group: aws\n' in config
+    assert '    url: "tcp://10.2.2.10:22"\n    interval: 1s\n' in config
+    assert '      - "[RESPONSE_TIME] < 5000"\n' in config
+
+
+def test_shard_by_cloud_with_peer_dashboards() -> None:
+    shards = plan_shards(
+        sites_from_outputs(SITE_OUTPUTS), shard_by="cloud", dashboards={"aws": "site-2"}
+    )
+    assert [(s.id, s.dashboard.name) for s in shards] == [
+        ("aws", "site-2"),
+        ("gcp", "gcp-vpc"),
+    ]
+    aws, gcp = shards
+    assert "aws-site-1-us-west-2-ssh" in [p.name for p in aws.probes]
+    assert "aws-site-2-us-east-1-dashboard" in [p.name for p in gcp.probes]
+    assert not any("site-1" in p.name for p in gcp.probes)
+
+
+def test_probes_are_deduplicated() -> None:
+    twin = Site("site-2", "aws", "us-west-2", "54.0.0.2", "10.1.2.10")
+    sites = [Site("site-1", "aws", "us-west-2", "54.0.0.1", "10.1.2.10"), twin]
+    (shard,) = plan_shards(sites)
+    urls = [p.url for p in shard.probes]
+    assert urls.count("icmp://10.1.2.10") == 1
+    assert len(urls) == len(set(urls))
+
+
+def test_large_fleet_is_bounded_per_dashboard() -> None:
+    sites = _fleet(400)
+    shards = plan_shards(sites, shard_by="region", max_sites=30, max_rate=10)
+    assert sum(len(s.members) for s in shards) == 400
+    assert all(len(s.members) <= 30 for s in shards)
+    for shard in shards:
+        assert len({s.region for s in shard.members}) == 1
+        # every probe of a shard still runs at most max_rate per second
+        assert len(shard.probes) / shard.interval <= 10
+
+    (single,) = plan_shards(sites, max_rate=10)
+    assert single.interval == 120
+    assert len(single.probes) == 2 + 3 * 399
+
+
+@pytest.mark.parametrize(
+    ("endpoints", "expected"), [(8, 1), (11, 2), (50, 5), (1000, 120), (10**5, 10**4)]
+)
+def test_scaled_interval(endpoints: int, expected: int) -> None:
+    assert scaled_interval(endpoints, max_rate=10) == expected
+
+
+def test_invalid_shard_key() -> None:
+    with pytest.raises(ValueError, match="shard_by"):
+        plan_shards(_fleet(2), shard_by="az")
+
+
+def test_write_shards_and_cli(tmp_path) -> None:
+    state = tmp_path / "terraform.tfstate"
+    state.write_text(json.dumps({"outputs": SITE_OUTPUTS, "resources": []}))
+    assert len(load_sites(state)) == 3
+
+    out = tmp_path / "shards"
+    out.mkdir()
+    (out / "gatus-stale.yaml").write_text("")
+    assert main([str(state), "--shard-by", "cloud", "--out", str(out)]) == 0
+
+    manifest = json.loads((out / "shards.json").read_text())["shards"]
+    assert manifest["aws"]["host"] == "54.0.0.1"
+    assert manifest["gcp"]["url"] == "http://35.0.0.1:8080"
+    assert sorted(p.name for p in out.glob("*.yaml")) == [
+        "gatus-aws.yaml",
+        "gatus-gcp.yaml",
+    ]
+
+    site = {"name": "a", "cloud": "aws", "region": "r"}
+    sites = tmp_path / "sites.json"
+    sites.write_text(
+        json.dumps([{**site, "public_ip": "1.1.1.1", "private_ip": "10.0.0.1"}])
+    )
+    assert write_shards(plan_shards(load_sites(sites)), out).exists()
+    assert [p.name for p in out.glob("*.yaml")] == ["gatus-all.yaml"]
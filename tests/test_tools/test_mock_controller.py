@@ -0,0 +1,178 @@
+"""Tests for the local mock controller."""
+
+import asyncio
+import json
+import time
+
+import pytest
+import requests
+
+from tools.mock_controller import (
+    CID_EXPIRED,
+    Faults,
+    Fixtures,
+    MockController,
+    generate_fixtures,
+)
+
+SMALL = generate_fixtures(site2cloud=50)
+
+
+@pytest.fixture
+def session():
+    with requests.Session() as s:
+        yield s
+
+
+def _login(session: requests.Session, url: str) -> str:
+    response = session.post(
+        f"{url}/v2/api",
+        json={"action": "login", "username": "admin", "password": "password"},
+    )
+    assert response.status_code == 200
+    return response.json()["CID"]
+
+
+def test_generated_fixtures() -> None:
+    fixtures = generate_fixtures()
+    assert len(fixtures.site2cloud) == 5000
+    assert fixtures.site2cloud == generate_fixtures().site2cloud  # deterministic
+    assert len(fixtures.transit_gateways) == 12  # 3 clouds x 2 x (primary + HA)
+    assert len(fixtures.spoke_gateways) == 24
+
+    names = {c["name"] for c in fixtures.site2cloud}
+    assert len(names) == 5000
+    bgp = [c for c in fixtures.site2cloud if c["tunnel_type"] == "Transit_BGP"]
+    assert 0.9 < len(bgp) / 5000 < 1.0
+    transits = {gw["gw_name"] for gw in fixtures.transit_gateways}
+    assert all(set(c["gateway_list"]) <= transits for c in fixtures.site2cloud)
+
+
+def test_fixtures_round_trip(tmp_path) -> None:
+    path = tmp_path / "fixtures.json"
+    SMALL.dump(path)
+    assert Fixtures.load(path) == SMALL
+
+
+def test_login_and_list_site2cloud(session) -> None:
+    with MockController(generate_fixtures(site2cloud=5000)) as controller:
+        cid = _login(session, controller.base_url)
+        response = session.post(
+            f"{controller.base_url}/v2/api",
+            json={"action": "list_site2cloud", "CID": cid},
+        )
+        body = response.json()
+    assert body["return"] is True
+    assert len(body["results"]["connections"]) == 5000
+    assert controller.stats["login"] == 1
+    assert controller.stats["list_site2cloud"] == 1
+
+
+def test_gateway_lists_form_encoded(session) -> None:
+    with MockController(SMALL) as controller:
+        cid = _login(session, controller.base_url)
+        api = f"{controller.base_url}/v1/api"
+        transit = session.post(
+            api,
+            data={
+                "action": "list_primary_and_ha_gateways",
+                "CID": cid,
+                "gateway_type": "transit",
+            },
+        ).json()["results"]
+        spokes = session.get(
+            api, params={"action": "list_spoke_gateways", "CID": cid}
+        ).json()["results"]
+    assert {gw["gw_name"] for gw in transit} == {
+        gw["gw_name"] for gw in SMALL.transit_gateways
+    }
+    assert all("~" in gw["transit_gw"] for gw in spokes)
+
+
+def test_rejects_bad_credentials_and_cid(session) -> None:
+    with MockController(SMALL) as controller:
+        api = f"{controller.base_url}/v2/api"
+        login = session.post(
+            api, json={"action": "login", "username": "admin", "password": "x"}
+        ).json()
+        listing = session.post(api, json={"action": "list_site2cloud", "CID": "x"})
+        missing = session.get(f"{controller.base_url}/other")
+    assert login["return"] is False and "CID" not in login
+    assert listing.json() == {"return": False, "reason": CID_EXPIRED}
+    assert missing.status_code == 404
+
+
+def test_cid_expires(session) -> None:
+    with MockController(SMALL, Faults(cid_ttl=0.05)) as controller:
+        cid = _login(session, controller.base_url)
+        time.sleep(0.1)
+        body = session.post(
+            f"{controller.base_url}/v2/api",
+            json={"action": "list_site2cloud", "CID": cid},
+        ).json()
+    assert body["reason"] == CID_EXPIRED
+
+
+def test_injected_latency_and_errors(session) -> None:
+    faults = Faults(
+        action_latency={"list_site2cloud": 0.2},
+        error_rate=0.5,
+        error_status=503,
+        error_actions=("list_site2cloud",),
+        seed=1,
+    )
+    with MockController(SMALL, faults) as controller:
+        cid = _login(session, controller.base_url)
+        statuses = []
+        start = time.monotonic()
+        for _ in range(10):
+            statuses.append(
+                session.post(
+                    f"{controller.base_url}/v2/api",
+                    json={"action": "list_site2cloud", "CID": cid},
+                ).status_code
+            )
+        elapsed = time.monotonic() - start
+    assert elapsed >= 10 * 0.2
+    assert set(statuses) == {200, 503}
+    assert controller.stats["errors"] == statuses.count(503)
+
+
+def test_rate_limit(session) -> None:
+    with MockController(SMALL, Faults(rate_limit=1, burst=3)) as controller:
+        responses = [
+            session.post(
+                f"{controller.base_url}/v2/api",
+                json={"action": "login", "username": "admin", "password": "password"},
+            )
+            for _ in range(5)
+        ]
+    assert [r.status_code for r in responses] == [200, 200, 200, 429, 429]
+    assert responses[-1].headers["Retry-After"] == "1"
+    assert controller.stats["rate_limited"] == 2
+
+
+async def test_async_server_keep_alive() -> None:
+    controller = MockController(SMALL)
+    await controller.start()
+    try:
+        reader, writer = await asyncio.open_connection(controller.host, controller.port)
+        body = json.dumps(
+            {"action": "login", "username": "admin", "password": "password"}
+        )
+        request = (
+            f"POST /v2/api HTTP/1.1\r\nHost: x\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n{body}"
+        ).encode()
+        for _ in range(2):  # two requests on one connection
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+            payload = json.loads(await reader.readexactly(length))
+            assert head.startswith(b"HTTP/1.1 200")
+            assert payload["return"] is True
+        writer.close()
+        await writer.wait_closed()
+    finally:
+        await controller.aclose()
+    assert controller.stats["login"] == 2
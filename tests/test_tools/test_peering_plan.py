@@ -0,0 +1,266 @@
+"""Tests for the peering topology planner."""
+
+import hashlib
+import json
+import random
+import time
+from pathlib import Path
+
+import pytest
+
+from tools.critical_path import ResourceSpan
+from tools.mock_controller import generate_fixtures
+from tools.peering_plan import (
+    CostModel,
+    Gateway,
+    PeeringOptions,
+    benchmark,
+    calibrate,
+    load_gateways,
+    main,
+    plan_topology,
+    synthetic_gateways,
+)
+
+REPO = Path(__file__).resolve().parents[2]
+MAIN_TF = REPO / "modules/control/peering/main.tf"
+
+# Digest of the peering module (whitespace-normalized). If this test fails, the
+# HCL changed: update tools/peering_plan.py and _hcl_reference below to match,
+# then the digest.
+MODULE_DIGEST = "3d907eb36683120f90f7b4c9d4c36c6685f113299deecedf1dd0122a123cc58b"
+
+
+def _hcl_reference(gateway_list: list[dict], var: dict) -> dict:
+    """Literal transcription of the module's locals and resource arguments."""
+    gw_name_to_cloud_type = {}
+    for gw in gateway_list:
+        name = gw["gw_name"].replace(",", "-")
+        if name in gw_name_to_cloud_type:
+            raise ValueError("duplicate object key")
+        gw_name_to_cloud_type[name] = gw["cloud_type"]
+    # Grouped object keys are strings; maps iterate in lexical key order.
+    all_gateways_by_cloud_type: dict[str, list] = {}
+    for gw in gateway_list:
+        all_gateways_by_cloud_type.setdefault(str(gw["cloud_type"]), []).append(
+            gw["gw_name"].replace(",", "-")
+        )
+    primary = {
+        ct: [g for g in gws if not g.endswith("-hagw")]
+        for ct, gws in sorted(all_gateways_by_cloud_type.items())
+    }
+    same_cloud_peering = {ct: gws for ct, gws in primary.items() if len(gws) > 1}
+    all_primary = [g for gws in primary.values() for g in gws]
+    hpe_types = [1, 4, 8]
+
+    same = {}
+    for ct, gws in same_cloud_peering.items():
+        for i, gw1 in enumerate(gws):
+            for j, gw2 in enumerate(gws):
+                if i < j:
+                    same[f"{gw1}:{gw2}"] = {
+                        "transit_gateway_name1": gw1,
+                        "transit_gateway_name2": gw2,
+                        "enable_peering_over_private_network": var[
+                            "same_cloud_enable_peering_over_private_network"
+                        ],
+                        "enable_max_performance": var[
+                            "same_cloud_enable_max_performance"
+                        ],
+                        "enable_single_tunnel_mode": var[
+                            "same_cloud_enable_single_tunnel_mode"
+                        ],
+                    }
+    cross = {}
+    for i, gw1 in enumerate(all_primary):
+        for j, gw2 in enumerate(all_primary):
+            ct1, ct2 = gw_name_to_cloud_type[gw1], gw_name_to_cloud_type[gw2]
+            if i < j and ct1 != ct2:
+                hpe = ct1 in hpe_types and ct2 in hpe_types
+                insane = var["cross_cloud_enable_insane_mode_encryption_over_internet"]
+                count = var["cross_cloud_tunnel_count"]
+                cross[f"{gw1}:{gw2}"] = {
+                    "transit_gateway_name1": gw1,
+                    "transit_gateway_name2": gw2,
+                    "enable_peering_over_private_network": var[
+                        "cross_cloud_enable_peering_over_private_network"
+                    ],
+                    "enable_insane_mode_encryption_over_internet": (
+                        insane if insane is not None else hpe
+                    ),
+                    "tunnel_count": (
+                        count if count is not None else (15 if hpe else None)
+                    ),
+                    "enable_single_tunnel_mode": var[
+                        "cross_cloud_enable_single_tunnel_mode"
+                    ],
+                }
+    return {"same_cloud": same, "cross_cloud": cross}
+
+
+def _planned(gateway_list: list[dict], options: PeeringOptions) -> dict:
+    plan = plan_topology(load_gateways(gateway_list), options=options)
+    same = {
+        k: {
+            "transit_gateway_name1": p.gateway_1,
+            "transit_gateway_name2": p.gateway_2,
+            "enable_peering_over_private_network": (
+                p.enable_peering_over_private_network
+            ),
+            "enable_max_performance": p.enable_max_performance,
+            "enable_single_tunnel_mode": p.enable_single_tunnel_mode,
+        }
+        for k, p in plan.same_cloud.items()
+    }
+    cross = {
+        k: {
+            "transit_gateway_name1": p.gateway_1,
+            "transit_gateway_name2": p.gateway_2,
+            "enable_peering_over_private_network": (
+                p.enable_peering_over_private_network
+            ),
+            "enable_insane_mode_encryption_over_internet": (
+                p.enable_insane_mode_encryption_over_internet
+            ),
+            "tunnel_count": p.tunnel_count,
+            "enable_single_tunnel_mode": p.enable_single_tunnel_mode,
+        }
+        for k, p in plan.cross_cloud.items()
+    }
+    return {"same_cloud": same, "cross_cloud": cross}
+
+
+def _random_inventory(rng: random.Random) -> list[dict]:
+    records = []
+    for i in range(rng.randint(0, 14)):
+        cloud_type = rng.choice([1, 1, 4, 8, 16, 32])
+        name = f"gw{i},{rng.choice('abc')}" if rng.random() < 0.2 else f"gw-{i}"
+        records.append({"gw_name": name, "cloud_type": cloud_type})
+        if rng.random() < 0.6:
+            records.append({"gw_name": f"{name}-hagw", "cloud_type": cloud_type})
+    rng.shuffle(records)
+    return records
+
+
+def test_module_unchanged():
+    text = " ".join(MAIN_TF.read_text().split())
+    assert hashlib.sha256(text.encode()).hexdigest() == MODULE_DIGEST
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_full_mesh_matches_module(seed):
+    rng = random.Random(seed)
+    gateway_list = _random_inventory(rng)
+    var = {
+        "same_cloud_enable_peering_over_private_network": rng.random() < 0.5,
+        "same_cloud_enable_max_performance": rng.random() < 0.5,
+        "same_cloud_enable_single_tunnel_mode": rng.random() < 0.5,
+        "cross_cloud_enable_peering_over_private_network": rng.random() < 0.5,
+        "cross_cloud_enable_insane_mode_encryption_over_internet": rng.choice(
+            [None, True, False]
+        ),
+        "cross_cloud_enable_single_tunnel_mode": rng.random() < 0.5,
+        "cross_cloud_tunnel_count": rng.choice([None, 4, 20]),
+    }
+    expected = _hcl_reference(gateway_list, var)
+    actual = _planned(gateway_list, PeeringOptions(**var))
+    assert actual == expected
+    # Same key order as the module's flatten().
+    assert list(actual["same_cloud"]) == list(expected["same_cloud"])
+    assert list(actual["cross_cloud"]) == list(expected["cross_cloud"])
+
+
+def test_duplicate_sanitized_names_rejected():
+    with pytest.raises(ValueError, match="Duplicate"):
+        load_gateways(
+            [{"gw_name": "a,b", "cloud_type": 1}, {"gw_name": "a-b", "cloud_type": 4}]
+        )
+
+
+def test_mock_fleet_full_mesh():
+    records = generate_fixtures(site2cloud=0).transit_gateways
+    gateways = load_gateways(records)
+    assert len(gateways) == 6 and all(gw.ha for gw in gateways)
+    plan = plan_topology(gateways)
+    summary = plan.summary()
+    assert summary["same_cloud"] == 3
+    assert summary["cross_cloud"] == 12
+    assert summary["hpe_peerings"] == 12
+    # 3 max-performance and 12 HPE peerings, both ends with HA.
+    assert summary["tunnels"] == 2 * (3 * 4 + 12 * 15)
+    assert summary["max_hops"] == 1
+    assert all(p.tunnel_count == 15 for p in plan.cross_cloud.values())
+
+
+@pytest.mark.parametrize("topology", ["hub-spoke", "regional", "k-nearest"])
+def test_partial_meshes_are_connected_and_smaller(topology):
+    gateways = synthetic_gateways(60)
+    full = plan_topology(gateways)
+    plan = plan_topology(gateways, topology)
+    keys = [p.key for p in plan.peerings]
+    assert len(keys) == len(set(keys))
+    assert all(p.gateway_1 != p.gateway_2 for p in plan.peerings)
+    assert len(plan.peerings) < len(full.peerings) / 4
+    assert plan.max_hops() is not None
+
+
+def test_hub_spoke_counts():
+    gateways = synthetic_gateways(30)  # 10 per cloud
+    plan = plan_topology(gateways, "hub-spoke", hubs=2)
+    # 6 hubs meshed, 8 spokes per cloud peering with 2 hubs each.
+    assert len(plan.peerings) == 15 + 3 * 8 * 2
+    assert plan.max_hops() <= 3
+
+
+def test_k_nearest_joins_components():
+    gateways = [Gateway(f"gw-{i}", 1 if i < 4 else 8, "r") for i in range(8)]
+    plan = plan_topology(gateways, "k-nearest", k=1)
+    assert plan.max_hops() is not None
+    assert len(plan.cross_cloud) == 1
+
+
+def test_apply_estimate_uses_parallelism():
+    gateways = synthetic_gateways(9)
+    serial = plan_topology(gateways, model=CostModel(parallelism=1))
+    wide = plan_topology(gateways, model=CostModel(parallelism=100))
+    assert serial.apply_seconds() == sum(
+        p.apply_seconds(serial.model) for p in serial.peerings
+    )
+    assert wide.apply_seconds() == CostModel().hpe_seconds
+
+
+def test_calibrate_from_spans():
+    gateways = synthetic_gateways(6)
+    plan = plan_topology(gateways)
+    spans = {
+        p.address: ResourceSpan(p.address, "create", 0.0, 600.0)
+        for p in plan.cross_cloud.values()
+    }
+    model = calibrate(spans, plan, CostModel())
+    assert model.hpe_seconds == 600.0
+    assert model.same_cloud_seconds == CostModel().same_cloud_seconds
+
+
+def test_benchmark_scales():
+    start = time.perf_counter()
+    rows = benchmark(sizes=(500,))
+    assert time.perf_counter() - start < 10
+    full = next(r for r in rows if r["topology"] == "full-mesh")
+    assert full["peerings"] == 500 * 499 // 2
+
+
+def test_cli(tmp_path, capsys):
+    inventory = tmp_path / "gateways.json"
+    inventory.write_text(
+        json.dumps({"results": generate_fixtures(site2cloud=0).transit_gateways})
+    )
+    tfvars = tmp_path / "peering.tfvars"
+    tfvars.write_text("cross_cloud_tunnel_count = 8\n")
+    assert main([str(inventory), "--tfvars", str(tfvars), "--json"]) == 0
+    out = json.loads(capsys.readouterr().out)
+    (plan,) = out["plans"]
+    assert {p["tunnel_count"] for p in plan["peerings"]} == {None, 8}
+
+    assert main([str(inventory), "--compare"]) == 0
+    table = capsys.readouterr().out
+    assert all(t in table for t in ("full-mesh", "hub-spoke", "k-nearest"))
@@ -0,0 +1,400 @@
+"""Parity tests for the segmentation association planner."""
+
+import hashlib
+import json
+import random
+import time
+from pathlib import Path
+
+import pytest
+
+from tools.segmentation_plan import (
+    AhoCorasick,
+    SegmentationInputs,
+    deployed_keys,
+    diff_keys,
+    main,
+    plan_associations,
+    sorted_domain_names,
+)
+
+REPO = Path(__file__).resolve().parents[2]
+MAIN_TF = REPO / "modules/control/segmentation/main.tf"
+EXAMPLE_TFVARS = REPO / "examples/segmentation/segmentation.tfvars.example"
+
+# Digest of the association locals in main.tf (whitespace-normalized). If this
+# test fails, the HCL changed: update tools/segmentation_plan.py and
+# _hcl_reference below to match, then the digest.
+LOCALS_DIGEST = "543930d11188181d51eeaffc49b5746b330fadd456a20ae89e7ff9994624dbca"
+
+
+def _association_locals() -> str:
+    text = MAIN_TF.read_text()
+    return " ".join(text[: text.index("resource ")].split())
+
+
+# -----------------------------------------------------------------------------
+# Literal transcription of the HCL, used as the parity reference
+# -----------------------------------------------------------------------------
+class _TfError(Exception):
+    pass
+
+
+def _tf_range(start: int, limit: int) -> list[int]:
+    step = 1 if limit >= start else -1
+    return list(range(start, limit, step))
+
+
+def _tf_slice(items: list, start: int, end: int) -> list:
+    if start < 0 or end > len(items) or start > end:
+        raise _TfError("invalid slice")
+    return items[start:end]
+
+
+def _hcl_reference(connections, spokes, v: SegmentationInputs) -> dict:
+    defined = sorted(set(v.domains))
+    keyed = [f"{len(d):03d}{d}" for d in defined]
+    domains = [s[3:] for s in reversed(sorted(keyed))]
+
+    inferred = {}
+    for conn in connections:
+        name = conn["name"]
+        if name.lower().startswith("external-"):
+            hits = [d for d in domains if d.lower() in name[9:].lower()]
+            inferred[name] = hits[0] if hits else ""
+        else:
+            inferred[name] = ""
+
+    filtered = [
+        c
+        for c in connections
+        if c["tunnel_type"] == "Transit_BGP"
+        and c["bgp_status"] == "enabled"
+        and c["bgp_transit"] is True
+    ]
+    pairs = []
+    for conn in filtered:
+        for gw in conn["gw_name"].replace(" ", "").split(","):
+            d = inferred[conn["name"]]
+            if (
+                d != ""
+                and d in defined
+                and not gw.endswith("-hagw")
+                and gw in conn["gateway_list"]
+                and conn["name"] not in v.exclude_connections
+            ):
+                pair = {
+                    "key": f"{d}~{conn['name']}~{gw}",
+                    "network_domain": d,
+                    "attachment_name": conn["name"],
+                    "transit_gateway": gw,
+                }
+                if pair not in pairs:
+                    pairs.append(pair)
+    auto = {f"{p['attachment_name']}~{p['transit_gateway']}": p for p in pairs}
+    manual = {
+        k: {
+            "key": f"{d}~{k}",
+            "network_domain": d,
+            "attachment_name": k.split("~")[0],
+            "transit_gateway": k.split("~")[1],
+        }
+        for k, d in v.manual_transit_associations.items()
+        if d in defined and len(k.split("~")) == 2
+    }
+    association_map = {
+        f"{a['network_domain']}~{a['attachment_name']}~{a['transit_gateway']}": a
+        for a in {**auto, **manual}.values()
+    }
+
+    spoke_inferred = {}
+    for gw in spokes:
+        name = gw["gw_name"]
+        if not (
+            gw["cloud_type"] in v.spoke_cloud_types
+            and not name.endswith("-hagw")
+            and name not in v.exclude_spoke_gateways
+        ):
+            continue
+        try:
+            tokens = name.lower().split("-")
+            hits = []
+            for d in domains:
+                dt = d.lower().split("-")
+                windows = [
+                    "-".join(_tf_slice(tokens, s, s + len(dt)))
+                    for s in _tf_range(0, len(tokens) - len(dt) + 1)
+                ]
+                if any(w == d.lower() for w in windows):
+                    hits.append(d)
+            spoke_inferred[name] = hits[0]
+        except (_TfError, IndexError):
+            spoke_inferred[name] = ""
+
+    spoke_assocs = [
+        {"spoke_gateway": gw["gw_name"], "transit_gateway": t, "network_domain": d}
+        for gw in spokes
+        for t in (gw["transit_gw"].split("~") if gw["transit_gw"] != "" else [])
+        if (d := spoke_inferred.get(gw["gw_name"], "")) != ""
+        and not t.endswith("-hagw")
+    ]
+    auto_spoke = {
+        f"{a['spoke_gateway']}~{a['transit_gateway']}": a for a in spoke_assocs
+    }
+    manual_spoke = {
+        k: {
+            "spoke_gateway": k.split("~")[0],
+            "transit_gateway": k.split("~")[1],
+            "network_domain": d,
+        }
+        for k, d in v.manual_spoke_associations.items()
+        if d in defined and len(k.split("~")) == 2
+    }
+    spoke_map = {
+        f"{a['network_domain']}~{a['spoke_gateway']}~{a['transit_gateway']}": a
+        for a in {**auto_spoke, **manual_spoke}.values()
+    }
+    return {"association_map": association_map, "spoke_association_map": spoke_map}
+
+
+# -----------------------------------------------------------------------------
+# Fixtures
+# -----------------------------------------------------------------------------
+DOMAINS = [
+    "prod",
+    "non-prod",
+    "pro",
+    "prod-eu",
+    "eu",
+    "dmz",
+    "Infra",
+    "shared-svc-a",
+    "x-a-x-eu-dmz",
+]
+TOKENS = ["prod", "non", "pro", "eu", "dmz", "infra", "shared", "svc", "a", "x", ""]
+
+
+def _conn(name: str, gws: str = "t1,t1-hagw", **overrides) -> dict:
+    conn = {
+        "name": name,
+        "gw_name": gws,
+        "gateway_list": [g.strip() for g in gws.split(",")],
+        "tunnel_type": "Transit_BGP",
+        "bgp_status": "enabled",
+        "bgp_transit": True,
+    }
+    return {**conn, **overrides}
+
+
+def _spoke(name: str, cloud_type: int = 8, transit: str = "t1~t1-hagw") -> dict:
+    return {"gw_name": name, "cloud_type": cloud_type, "transit_gw": transit}
+
+
+def _random_case(
+    rng: random.Random, count: int
+) -> tuple[list, list, SegmentationInputs]:
+    def name() -> str:
+        return "-".join(rng.choice(TOKENS) for _ in range(rng.randint(1, 5)))
+
+    connections, spokes = [], []
+    for i in range(count):
+        prefix = rng.choice(["external-", "External-", "ext-", ""])
+        gws = rng.choice(["t1", "t1,t1-hagw", "t1, t2", "t2,t3", ""])
+        listed = rng.choice([gws.replace(" ", "").split(","), ["t1"], []])
+        connections.append(
+            _conn(
+                f"{prefix}{name()}-{i}",
+                gws,
+                gateway_list=listed,
+                tunnel_type=rng.choice(["Transit_BGP", "Transit_BGP", "policy"]),
+                bgp_status=rng.choice(["enabled", "enabled", "disabled"]),
+                bgp_transit=rng.choice([True, True, False, "true"]),
+            )
+        )
+        spoke = f"{name()}-{i}" + rng.choice(["", "", "-hagw"])
+        spokes.append(
+            _spoke(spoke, rng.choice([1, 4, 8]), rng.choice(["t1~t1-hagw", "t2", ""]))
+        )
+    inputs = SegmentationInputs(
+        domains=rng.sample(DOMAINS, rng.randint(0, len(DOMAINS))),
+        manual_transit_associations={
+            f"{connections[0]['name']}~t1": "dmz",
+            "legacy~t9": "prod",
+            "bad-key": "prod",
+        },
+        manual_spoke_associations={f"{spokes[1]['gw_name']}~t2": "eu"},
+        exclude_connections=[connections[2]["name"]],
+        exclude_spoke_gateways=[spokes[3]["gw_name"]],
+        spoke_cloud_types=rng.choice([[8], [1, 8], [1, 4, 8]]),
+    )
+    return connections, spokes, inputs
+
+
+# -----------------------------------------------------------------------------
+# Tests
+# -----------------------------------------------------------------------------
+def test_hcl_unchanged() -> None:
+    digest = hashlib.sha256(_association_locals().encode()).hexdigest()
+    assert digest == LOCALS_DIGEST, "segmentation main.tf changed; re-check parity"
+
+
+def test_aho_corasick() -> None:
+    matcher = AhoCorasick(["he", "she", "his", "hers"])
+    assert matcher.matches("ushers") == {0, 1, 3}
+    assert matcher.matches("xyz") == set()
+    tokens = AhoCorasick([["non", "prod"], ["prod"]])
+    assert tokens.matches("aws-non-prod-app".split("-")) == {0, 1}
+    assert tokens.matches("aws-nonprod".split("-")) == set()
+
+
+def test_domain_order() -> None:
+    assert sorted_domain_names(["prod", "non-prod", "dev", "uat", "prod"]) == [
+        "non-prod",
+        "prod",
+        "uat",
+        "dev",
+    ]
+
+
+def test_naming_conventions() -> None:
+    inputs = SegmentationInputs(
+        domains=["prod", "non-prod", "infra"],
+        manual_transit_associations={"legacy-vpn~t1": "infra"},
+        exclude_connections=["external-prod-test"],
+        spoke_cloud_types=[1, 8],
+    )
+    connections = [
+        _conn("external-prod-datacenter"),
+        _conn("external-non-prod-lab", "t1, t2", gateway_list=["t1", "t2"]),
+        _conn("external-prod-test"),
+        _conn("external-prod-static", tunnel_type="policy"),
+        _conn("prod-no-prefix"),
+    ]
+    spokes = [
+        _spoke("az-eastus2-prod-spoke-1"),
+        _spoke("az-eastus2-prod-spoke-1-hagw"),
+        _spoke("aws-west2-non-prod-app", cloud_type=1, transit="t1~t2-hagw~t3"),
+        _spoke("gcp-central1-infra", cloud_type=4),
+        _spoke("az-production-spoke"),
+    ]
+    plan = plan_associations(connections, spokes, inputs)
+    assert sorted(plan.association_map) == [
+        "infra~legacy-vpn~t1",
+        "non-prod~external-non-prod-lab~t1",
+        "non-prod~external-non-prod-lab~t2",
+        "prod~external-prod-datacenter~t1",
+    ]
+    assert sorted(plan.spoke_association_map) == [
+        "non-prod~aws-west2-non-prod-app~t1",
+        "non-prod~aws-west2-non-prod-app~t3",
+        "prod~az-eastus2-prod-spoke-1~t1",
+    ]
+    assert plan.association_map["infra~legacy-vpn~t1"]["key"] == "infra~legacy-vpn~t1"
+
+
+def test_manual_association_replaces_inferred() -> None:
+    inputs = SegmentationInputs(
+        domains=["prod", "dmz"],
+        manual_transit_associations={"external-prod-dc~t1": "dmz"},
+        manual_spoke_associations={"prod-spoke~t1": "dmz", "x~y": "undefined"},
+    )
+    plan = plan_associations(
+        [_conn("external-prod-dc")], [_spoke("prod-spoke")], inputs
+    )
+    assert list(plan.association_map) == ["dmz~external-prod-dc~t1"]
+    assert list(plan.spoke_association_map) == ["dmz~prod-spoke~t1"]
+
+
+def test_long_domain_disables_spoke_inference() -> None:
+    # slice() past the end of a two-token name errors inside try() in the HCL
+    inputs = SegmentationInputs(domains=["prod", "a-b-c-d"])
+    plan = plan_associations([], [_spoke("prod-x"), _spoke("prod-x-y")], inputs)
+    assert plan.spoke_inferred_domains == {"prod-x": "", "prod-x-y": "prod"}
+
+
+def test_duplicate_names_are_rejected() -> None:
+    inputs = SegmentationInputs(domains=["prod"])
+    with pytest.raises(ValueError, match="Duplicate connection"):
+        plan_associations([_conn("a"), _conn("a")], [], inputs)
+    with pytest.raises(ValueError, match="Duplicate spoke association"):
+        plan_associations([], [_spoke("prod-1", transit="t1~t1")], inputs)
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_parity_with_hcl(seed: int) -> None:
+    connections, spokes, inputs = _random_case(random.Random(seed), 300)
+    plan = plan_associations(connections, spokes, inputs)
+    assert plan.to_dict() == _hcl_reference(connections, spokes, inputs)
+    if len(inputs.domains) > 3:
+        assert plan.association_map and plan.spoke_association_map
+
+
+def test_scales_to_large_fleets() -> None:
+    connections, spokes, inputs = _random_case(random.Random(99), 10_000)
+    inputs.domains = DOMAINS + [f"domain-{i}" for i in range(200)]
+    start = time.perf_counter()
+    plan = plan_associations(connections, spokes, inputs)
+    assert time.perf_counter() - start < 2.0
+    assert plan.association_map and plan.spoke_association_map
+
+
+def test_tfvars_state_diff_and_cli(tmp_path, capsys) -> None:
+    inputs = SegmentationInputs.from_tfvars(EXAMPLE_TFVARS)
+    assert inputs.domains[:2] == ["prod", "non-prod"]
+    assert inputs.spoke_cloud_types == [1, 8, 4]
+    assert inputs.manual_transit_associations["legacy-vpn-site1~aws-us-east-1-transit"]
+
+    s2c = tmp_path / "s2c.json"
+    s2c.write_text(
+        json.dumps(
+            {
+                "return": True,
+                "results": {
+                    "connections": [
+                        _conn(
+                            "external-prod-dc",
+                            "aws-us-east-1-transit",
+                            gateway_list=["aws-us-east-1-transit"],
+                        )
+                    ]
+                },
+            }
+        )
+    )
+    spokes = tmp_path / "spokes.json"
+    spokes.write_text(
+        json.dumps([_spoke("az-dmz-spoke", transit="azure-westus2-transit")])
+    )
+    deployed = "prod~external-prod-{}~aws-us-east-1-transit"
+    state = tmp_path / "terraform.tfstate"
+    resource = {
+        "mode": "managed",
+        "type": "aviatrix_segmentation_network_domain_association",
+        "name": "transit_domain_associations",
+        "instances": [
+            {"index_key": deployed.format("dc")},
+            {"index_key": deployed.format("gone")},
+        ],
+    }
+    state.write_text(json.dumps({"resources": [resource]}))
+    current = deployed_keys(state)
+    assert len(current["association_map"]) == 2
+
+    plan = plan_associations(
+        json.loads(s2c.read_text())["results"]["connections"],
+        json.loads(spokes.read_text()),
+        inputs,
+    )
+    added, removed = diff_keys(plan.association_map, current["association_map"])
+    assert removed == [deployed.format("gone")]
+    assert "infra~datacenter-backup~azure-westus2-transit" in added
+
+    args = ["--tfvars", str(EXAMPLE_TFVARS), "--site2cloud", str(s2c)]
+    assert main([*args, "--spokes", str(spokes), "--state", str(state)]) == 0
+    out = capsys.readouterr().out
+    assert f"  - {deployed.format('gone')}" in out
+    assert "dmz: 1 transit, 1 spoke associations" in out
+
+    assert main([*args, "--json"]) == 0
+    printed = json.loads(capsys.readouterr().out)
+    assert printed["association_map"] == plan.association_map
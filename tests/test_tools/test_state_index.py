@@ -0,0 +1,289 @@
+"""Unit tests for the SQLite state index."""
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from tools.state_index import StateIndex, flatten, main
+
+VPC_MODULE = 'module.aws.module.vpc_us_west_2["site-1"].module.vm'
+
+
+def _resource(type_: str, name: str, instances: list, module: str = "") -> dict:
+    resource = {
+        "mode": "managed",
+        "type": type_,
+        "name": name,
+        "provider": "provider",
+        "instances": instances,
+    }
+    if module:
+        resource["module"] = module
+    return resource
+
+
+def _site_state() -> dict:
+    return {
+        "version": 4,
+        "serial": 3,
+        "lineage": "site",
+        "outputs": {
+            "gcp_vm": {"value": {"name": "gcp-vm"}, "type": "object"},
+            "ssh_key": {"value": "secret", "type": "string", "sensitive": True},
+        },
+        "resources": [
+            _resource(
+                "aws_instance",
+                "private",
+                [
+                    {
+                        "attributes": {
+                            "private_ip": "10.1.2.10",
+                            "public_ip": "",
+                            "tags": {"Name": "site-1-private-vm"},
+                        }
+                    }
+                ],
+                VPC_MODULE,
+            ),
+            _resource(
+                "google_compute_instance",
+                "vm",
+                [
+                    {
+                        "index_key": 0,
+                        "attributes": {
+                            "name": "gcp-public",
+                            "network_interface": [
+                                {
+                                    "network_ip": "10.10.0.5",
+                                    "access_config": [{"nat_ip": "34.1.2.3"}],
+                                }
+                            ],
+                        },
+                    }
+                ],
+                "module.gcp.module.vm",
+            ),
+            _resource(
+                "tls_private_key",
+                "ssh",
+                [
+                    {
+                        "attributes": {"private_key_pem": "PEM", "algorithm": "RSA"},
+                        "sensitive_attributes": [
+                            [{"type": "get_attr", "value": "private_key_pem"}]
+                        ],
+                    }
+                ],
+            ),
+        ],
+    }
+
+
+def _backbone_state() -> dict:
+    def gateway(key: str, cloud_type: int) -> dict:
+        return {
+            "index_key": key,
+            "attributes": {"gw_name": f"{key}-transit", "cloud_type": cloud_type},
+        }
+
+    return {
+        "version": 4,
+        "serial": 9,
+        "lineage": "backbone",
+        "outputs": {},
+        "resources": [
+            _resource(
+                "aviatrix_transit_gateway",
+                "this",
+                [gateway("aws", 1), gateway("gcp", 4), gateway("azure", 8)],
+                'module.transit["all"]',
+            ),
+            _resource(
+                "aviatrix_transit_gateway_peering",
+                "this",
+                [
+                    {
+                        "index_key": "aws:gcp",
+                        "attributes": {
+                            "transit_gateway_name1": "aws-transit",
+                            "transit_gateway_name2": "gcp-transit",
+                            "enable_peering_over_private_network": False,
+                        },
+                    }
+                ],
+            ),
+            _resource(
+                "aviatrix_spoke_transit_attachment",
+                "spoke",
+                [
+                    {
+                        "attributes": {
+                            "spoke_gw_name": "aws-spoke",
+                            "transit_gw_name": "aws-transit",
+                        }
+                    }
+                ],
+            ),
+        ],
+    }
+
+
+@pytest.fixture
+def stages(tmp_path: Path) -> list[Path]:
+    paths = []
+    for name, state in (("site", _site_state()), ("backbone", _backbone_state())):
+        (tmp_path / name).mkdir()
+        path = tmp_path / name / "terraform.tfstate"
+        path.write_text(json.dumps(state))
+        paths.append(path)
+    return paths
+
+
+@pytest.fixture
+def index(stages: list[Path]):
+    with StateIndex() as index:
+        index.refresh(stages)
+        yield index
+
+
+def test_flatten() -> None:
+    value = {"a": {"b": [1, {"c": True}]}, "d": None, "e": []}
+    assert list(flatten(value)) == [("a.b.0", 1), ("a.b.1.c", 1), ("d", None)]
+
+
+def test_transit_gateways_by_cloud_type(index: StateIndex) -> None:
+    assert index.transit_gateways_by_cloud_type() == {
+        "aws": ["aws-transit"],
+        "azure": ["azure-transit"],
+        "gcp": ["gcp-transit"],
+    }
+
+
+def test_vm_addresses_by_site(index: StateIndex) -> None:
+    vms = index.vm_addresses_by_site()
+    assert sorted(vms) == ["gcp", "site-1"]
+    (aws,) = vms["site-1"]
+    assert (aws.name, aws.private_ip, aws.public_ip) == (
+        "site-1-private-vm",
+        "10.1.2.10",
+        None,
+    )
+    assert aws.address == f"{VPC_MODULE}.aws_instance.private"
+    (gcp,) = vms["gcp"]
+    assert (gcp.name, gcp.private_ip, gcp.public_ip) == (
+        "gcp-public",
+        "10.10.0.5",
+        "34.1.2.3",
+    )
+
+
+def test_peerings_referencing(index: StateIndex) -> None:
+    refs = index.peerings_referencing("aws-transit")
+    assert [(ref.address, ref.attribute) for ref in refs] == [
+        ("aviatrix_spoke_transit_attachment.spoke", "transit_gw_name"),
+        ('aviatrix_transit_gateway_peering.this["aws:gcp"]', "transit_gateway_name1"),
+    ]
+    assert index.peerings_referencing("azure-transit") == []
+    # The gateway itself is found by an unrestricted reference search.
+    assert [ref.type for ref in index.references("azure-transit")] == [
+        "aviatrix_transit_gateway"
+    ]
+
+
+def test_outputs_and_sensitive_values(index: StateIndex) -> None:
+    assert index.outputs("site") == {
+        "gcp_vm": {"value": {"name": "gcp-vm"}},
+        "ssh_key": {"value": None},
+    }
+    address = "tls_private_key.ssh"
+    assert index.attribute(address, "algorithm") == "RSA"
+    assert index.attribute(address, "private_key_pem") is None
+
+
+def test_refresh_is_incremental(stages: list[Path]) -> None:
+    site, backbone = stages
+    with StateIndex() as index:
+        assert set(index.refresh(stages).values()) == {True}
+        assert set(index.refresh(stages).values()) == {False}
+
+        state = _backbone_state()
+        state["resources"] = state["resources"][:1]
+        backbone.write_text(json.dumps(state))
+        os.utime(backbone, ns=(0, 10**18))
+        assert index.refresh(stages) == {str(site): False, str(backbone): True}
+        assert index.peerings_referencing("aws-transit") == []
+        (count,) = index.query("SELECT count(*) FROM resources")[0]
+        assert count == 3 + 3
+
+        site.unlink()
+        assert index.refresh(stages) == {str(site): True, str(backbone): False}
+        assert index.vm_addresses_by_site() == {}
+        assert index.query(
+            "SELECT count(*) FROM attributes a LEFT JOIN"
+            " resources r ON r.id = a.resource_id"
+            " WHERE r.id IS NULL"
+        ) == [(0,)]
+
+
+def test_refresh_drops_states_left_out(stages: list[Path]) -> None:
+    site, backbone = stages
+    with StateIndex() as index:
+        index.refresh(stages)
+        assert index.refresh([backbone]) == {str(backbone): False, str(site): True}
+        assert index.query("SELECT stage FROM states") == [("backbone",)]
+        assert index.vm_addresses_by_site() == {}
+        assert index.refresh([]) == {str(backbone): True}
+        assert index.query("SELECT count(*) FROM resources") == [(0,)]
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "DELETE FROM states",
+        "UPDATE outputs SET value = NULL",
+        "INSERT INTO states (path, stage, mtime_ns, size) VALUES ('x', 'x', 0, 0)",
+        "DROP TABLE attributes",
+        "CREATE TABLE t (x)",
+        "PRAGMA foreign_keys = OFF",
+        "ATTACH DATABASE ':memory:' AS other",
+    ],
+)
+def test_query_is_read_only(index: StateIndex, sql: str) -> None:
+    with pytest.raises(sqlite3.DatabaseError, match="not authorized"):
+        index.query(sql)
+    assert index.query("SELECT count(*) FROM states") == [(2,)]
+    assert index.query(
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 3)"
+        " SELECT max(i), lower('X') FROM n"
+    ) == [(3, "x")]
+    # Refresh still writes after a rejected query.
+    assert set(index.refresh([]).values()) == {True}
+
+
+def test_index_persists_between_sessions(tmp_path: Path, stages: list[Path]) -> None:
+    db = tmp_path / "index.sqlite"
+    with StateIndex(db) as index:
+        index.refresh(stages)
+    with StateIndex(db) as index:
+        assert set(index.refresh(stages).values()) == {False}
+        assert "gcp" in index.transit_gateways_by_cloud_type()
+
+
+def test_cli(tmp_path: Path, stages: list[Path], capsys) -> None:
+    db = str(tmp_path / "index.sqlite")
+    assert main(["--db", db, "refresh", *map(str, stages)]) == 0
+    assert main(["--db", db, "transit-gateways"]) == 0
+    assert main(["--db", db, "peerings", "gcp-transit"]) == 0
+    out = capsys.readouterr().out
+    assert "aws: aws-transit" in out
+    assert "transit_gateway_name2" in out
+
+    assert main(["--db", db, "sql", "DELETE FROM states"]) == 2
+    assert "not authorized" in capsys.readouterr().err
+    assert main(["--db", db, "sql", "SELECT count(*) FROM states"]) == 0
+    assert capsys.readouterr().out == "2\n"
@@ -0,0 +1,284 @@
+"""Tests for the TGW Connect address allocator."""
+
+import ipaddress
+import json
+import re
+import time
+from pathlib import Path
+
+import pytest
+
+from tools.tgw_ipam import (
+    LEGACY_STRIDE,
+    PEER_NAMES,
+    RESERVED_INSIDE_CIDRS,
+    Interval,
+    IntervalIndex,
+    Pool,
+    TransitInputs,
+    find_collisions,
+    main,
+    plan_ipam,
+)
+
+REPO = Path(__file__).resolve().parents[2]
+TRANSIT_MAIN_TF = REPO / "modules/control/aws/modules/transit/main.tf"
+EXAMPLE_TFVARS = REPO / "examples/aws/aws.tfvars.example"
+
+
+def _inside(third_octet: int) -> dict[str, str]:
+    return {
+        name: f"169.254.{third_octet}.{8 * n}/29" for n, name in enumerate(PEER_NAMES)
+    }
+
+
+def _inputs(transits: int = 3, tgw_cidr: str = "172.16.0.0/24") -> TransitInputs:
+    return TransitInputs(
+        transits={
+            f"transit-{i}": {
+                "cidr": f"10.{i}.0.0/23",
+                "tgw_name": "tgw-a",
+                "inside_cidr_blocks": {"tgw-a": _inside(100 + i)},
+            }
+            for i in range(transits)
+        },
+        tgws={"tgw-a": {"transit_gateway_cidr_blocks": [tgw_cidr]}},
+    )
+
+
+def _hosts(addresses: dict[str, str]) -> list[int]:
+    return [int(ipaddress.ip_address(a)) & 0xFF for a in addresses.values()]
+
+
+def test_legacy_stride_matches_module():
+    text = TRANSIT_MAIN_TF.read_text()
+    assert re.search(
+        rf"i \+ 1 \+ local\.transit_index\[pair\.transit_key\] \* {LEGACY_STRIDE}\b",
+        text,
+    )
+    assert re.search(r"try\(var\.tgw_connect_ips\[pair\.pair_key\]", text)
+
+
+def test_pairs_follow_module_order():
+    inputs = TransitInputs(
+        transits={
+            "b": {"tgw_name": "t2,t1"},
+            "a": {"tgw_name": "t1"},
+            "c": {"tgw_name": ""},
+            "d": {"tgw_name": "t2"},
+        },
+        tgws={"t1": {}, "t2": {}},
+    )
+    assert [(p.pair_key, p.transit_index) for p in inputs.pairs()] == [
+        ("a.t1", 0),
+        ("b.t2", 1),
+        ("b.t1", 1),
+        ("d.t2", 2),
+    ]
+    inputs.transits["e"] = {"tgw_name": "missing"}
+    with pytest.raises(ValueError, match="unknown TGW"):
+        inputs.pairs()
+
+
+def test_computed_addresses_collide():
+    collisions = find_collisions(_inputs(2))
+    scopes = {c.scope for c in collisions}
+    assert scopes == {"tgw:tgw-a"}
+    # Hosts 5-16 of transit-0 are hosts 1-12 of transit-1.
+    assert len(collisions) == 12
+
+
+def test_keep_legacy_moves_only_colliding_pairs():
+    plan = plan_ipam(_inputs(3))
+    assert plan.errors == []
+    assert plan.moved == ["transit-1.tgw-a", "transit-2.tgw-a"]
+    assert _hosts(plan.connect_ips["transit-0.tgw-a"]) == list(range(1, 17))
+    assert _hosts(plan.connect_ips["transit-1.tgw-a"]) == list(range(17, 33))
+    assert _hosts(plan.connect_ips["transit-2.tgw-a"]) == list(range(33, 49))
+    assert list(plan.connect_ips["transit-0.tgw-a"]) == list(PEER_NAMES)
+
+
+def test_keep_legacy_keeps_free_addresses():
+    # transit-4 computes hosts 17-32 of tgw-a, after transit-0's 1-16. The
+    # transits in between use tgw-b, where only transit-1 keeps its hosts.
+    inputs = _inputs(5)
+    inputs.tgws["tgw-b"] = {"transit_gateway_cidr_blocks": ["172.16.1.0/24"]}
+    for key in ("transit-1", "transit-2", "transit-3"):
+        transit = inputs.transits[key]
+        transit["tgw_name"] = "tgw-b"
+        transit["inside_cidr_blocks"] = {
+            "tgw-b": transit["inside_cidr_blocks"]["tgw-a"]
+        }
+    plan = plan_ipam(inputs)
+    assert plan.moved == ["transit-2.tgw-b", "transit-3.tgw-b"]
+    assert _hosts(plan.connect_ips["transit-4.tgw-a"]) == list(range(17, 33))
+    assert _hosts(plan.connect_ips["transit-1.tgw-b"]) == list(range(5, 21))
+    assert _hosts(plan.connect_ips["transit-2.tgw-b"]) == list(range(21, 37))
+
+
+def test_adopted_overrides_recheck_clean(tmp_path):
+    tfvars = tmp_path / "aws.tfvars.json"
+    inputs = _inputs(2)
+    tfvars.write_text(json.dumps({"transits": inputs.transits, "tgws": inputs.tgws}))
+    out = tmp_path / "tgw_connect_ips.tfvars.json"
+    assert main([str(tfvars), "--out", str(out), "--check"]) == 1
+
+    adopted = TransitInputs.from_tfvars(tfvars, current=out)
+    assert find_collisions(adopted) == []
+    plan = plan_ipam(adopted)
+    assert plan.moved == [] and plan.collisions == []
+    assert plan.connect_ips == json.loads(out.read_text())["tgw_connect_ips"]
+    assert main([str(tfvars), "--current", str(out), "--check"]) == 0
+
+    # Merged into the module's own tfvars.
+    merged = json.loads(tfvars.read_text()) | json.loads(out.read_text())
+    tfvars.write_text(json.dumps(merged))
+    assert main([str(tfvars), "--check"]) == 0
+
+
+def test_overrides_survive_index_shift():
+    inputs = _inputs(2)
+    inputs.connect_ips = plan_ipam(inputs).connect_ips
+    # transit-00 sorts between the others and shifts transit-1's computed index.
+    inputs.transits["transit-00"] = {
+        "tgw_name": "tgw-a",
+        "inside_cidr_blocks": {"tgw-a": _inside(99)},
+    }
+    plan = plan_ipam(inputs)
+    assert plan.moved == ["transit-00.tgw-a"]
+    for key in ("transit-0.tgw-a", "transit-1.tgw-a"):
+        assert plan.connect_ips[key] == inputs.connect_ips[key]
+    assert _hosts(plan.connect_ips["transit-00.tgw-a"]) == list(range(33, 49))
+    # Colliding overrides: the later pair in module order moves.
+    inputs.connect_ips["transit-1.tgw-a"] = inputs.connect_ips["transit-0.tgw-a"]
+    assert plan_ipam(inputs).moved[0] == "transit-1.tgw-a"
+
+
+def test_fresh_allocation_and_exhaustion():
+    plan = plan_ipam(_inputs(17), keep_legacy=False)
+    assert _hosts(plan.connect_ips["transit-1.tgw-a"]) == list(range(17, 33))
+    # A /24 holds 15 pairs of 16 hosts after host 0.
+    assert len(plan.connect_ips) == 15
+    assert len(plan.errors) == 2 and "exhausted" in plan.errors[0]
+    addresses = [a for ips in plan.connect_ips.values() for a in ips.values()]
+    assert len(addresses) == len(set(addresses))
+
+
+def test_missing_tgw_cidr_is_an_error():
+    plan = plan_ipam(TransitInputs.from_tfvars(EXAMPLE_TFVARS))
+    assert len(plan.errors) == 2
+    assert all("no transit_gateway_cidr_blocks" in e for e in plan.errors)
+    assert plan.collisions == []
+
+
+def test_proposes_inside_and_tunnel_blocks():
+    inputs = _inputs(2)
+    inputs.transits["transit-1"]["inside_cidr_blocks"] = {}
+    inputs.external_devices = {
+        "dc": {
+            "transit_key": "transit-0",
+            "bgp_enabled": True,
+            "ha_enabled": True,
+            "local_tunnel_cidr": "169.254.6.1/30",
+            "remote_tunnel_cidr": "169.254.6.2/30",
+        }
+    }
+    plan = plan_ipam(inputs)
+    blocks = plan.inside_cidr_blocks["transit-1"]["tgw-a"]
+    assert list(blocks) == list(PEER_NAMES)
+    nets = [ipaddress.ip_network(c) for c in blocks.values()]
+    assert all(n.prefixlen == 29 for n in nets)
+    assert not any(n.overlaps(r) for n in nets for r in RESERVED_INSIDE_CIDRS)
+    # The first /29 after the reserved 169.254.0.0/29.
+    assert str(nets[0]) == "169.254.0.8/29"
+    assert plan.tunnel_cidrs == {
+        "dc": {
+            "backup_local_tunnel_cidr": "169.254.0.9/30",
+            "backup_remote_tunnel_cidr": "169.254.0.10/30",
+        }
+    }
+
+
+def test_tunnel_overlaps_inside_block():
+    inputs = _inputs(1)
+    inputs.external_devices = {
+        "dc": {
+            "transit_key": "transit-0",
+            "ha_enabled": False,
+            "local_tunnel_cidr": "169.254.100.0/30",
+            "remote_tunnel_cidr": "169.254.100.0/30",
+        }
+    }
+    (collision,) = find_collisions(inputs)
+    assert collision.scope == "transit:transit-0"
+    assert {collision.first.owner, collision.second.owner} == {
+        "dc.primary tunnel",
+        "transit-0.tgw-a.inside.connect_peer_1",
+    }
+
+
+def test_interval_index_reports_all_pairs():
+    index = IntervalIndex(
+        [Interval(0, 10, "a"), Interval(5, 6, "b"), Interval(6, 20, "c")]
+    )
+    pairs = {(c.first.owner, c.second.owner) for c in index.collisions()}
+    assert pairs == {("a", "b"), ("a", "c"), ("b", "c")}
+    assert IntervalIndex([Interval(0, 4, "a"), Interval(5, 9, "b")]).collisions() == []
+
+
+def test_pool_alignment():
+    pool = Pool(0, 63)
+    pool.reserve(3, 5)
+    assert pool.allocate(8, 8) == 8
+    assert pool.allocate(4, 4) == 16
+    assert pool.allocate(2) == 0
+    assert not pool.is_free(7, 8)
+    assert pool.is_free(6, 7)
+
+
+def test_scale():
+    # 1000 transits over 4 TGWs: 16,000 inside blocks, more /29s than
+    # 169.254.0.0/16 holds, so blocks are reused across TGWs.
+    inputs = _inputs(0)
+    inputs.tgws = {
+        f"tgw-{t}": {"transit_gateway_cidr_blocks": [f"172.{16 + t}.0.0/16"]}
+        for t in range(4)
+    }
+    inputs.transits = {
+        f"transit-{i:04d}": {
+            "cidr": f"10.{i // 128}.{i % 128 * 2}.0/23",
+            "tgw_name": f"tgw-{i % 4}",
+        }
+        for i in range(1000)
+    }
+    start = time.perf_counter()
+    plan = plan_ipam(inputs)
+    assert time.perf_counter() - start < 5
+    assert plan.errors == [] and len(plan.connect_ips) == 1000
+    # Round-robin over 4 TGWs puts a TGW's transits 4 indices (16 hosts) apart,
+    # so the computed addresses are all free.
+    assert plan.collisions == [] and plan.moved == []
+    for t in range(4):
+        inside = [
+            Interval.from_network(ipaddress.ip_network(cidr), key)
+            for key, tgws in plan.inside_cidr_blocks.items()
+            for cidr in tgws.get(f"tgw-{t}", {}).values()
+        ]
+        assert len(inside) == 4000 and IntervalIndex(inside).collisions() == []
+    addresses = [a for ips in plan.connect_ips.values() for a in ips.values()]
+    assert len(addresses) == len(set(addresses))
+
+
+def test_cli(tmp_path, capsys):
+    tfvars = tmp_path / "aws.tfvars.json"
+    inputs = _inputs(2)
+    tfvars.write_text(json.dumps({"transits": inputs.transits, "tgws": inputs.tgws}))
+    out = tmp_path / "tgw_connect_ips.tfvars.json"
+    assert main([str(tfvars), "--out", str(out), "--check"]) == 1
+    assert "Collisions:" in capsys.readouterr().out
+    written = json.loads(out.read_text())["tgw_connect_ips"]
+    assert written["transit-1.tgw-a"]["connect_peer_1"] == "172.16.0.17"
+
+    assert main([str(tfvars), "--json"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["moved"] == ["transit-1.tgw-a"]
@@ -0,0 +1 @@
+"""Command-line tools for analysing and tuning backbone deployments."""
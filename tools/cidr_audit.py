@@ -0,0 +1,541 @@
+"""Fleet-wide CIDR overlap and route conflict checks.
+
+The transit modules, the test site VPCs and the external device connections
+all carry CIDRs, and a conflict between them usually surfaces deep into an
+apply. This tool loads tfvars files and terraform state or output files and
+checks every prefix against every other before anything is applied.
+
+Each CIDR string is classified by the attribute that holds it:
+
+- ``space``: address space such as ``cidr``, ``vpc_cidr``, subnets and TGW CIDR
+  blocks
+- ``advertised``: ``manual_bgp_advertised_cidrs``, per-connection CIDRs and
+  other advertised routes
+- ``tunnel``: ``*_tunnel_cidr`` and ``inside_cidr_blocks``
+- ``approved``: learned CIDR approval lists (only checked for validity)
+- ``match``: match criteria such as DCF smart-group selectors (``smarties``),
+  which name traffic rather than own addresses (only checked for validity)
+
+Source ranges of security groups are ignored. Each prefix belongs to an
+entity: the map key or list item ``name`` under the top-level variable or
+output, e.g. ``us-east-1-transit`` or ``site-1``.
+
+Reported issues:
+
+- ``invalid``: not a CIDR, or host bits set (the controller rejects these)
+- ``overlap``: address spaces of different entities overlap, within a file or
+  across files. The same entity in two files (e.g. a tfvars entry and its own
+  state output) is taken as one network described twice.
+- ``tunnel``: tunnel blocks on the same transit overlap
+- ``conflict``: an advertised prefix is more specific than another entity's
+  address space, so it attracts part of that entity's traffic
+- ``shadowed``: an advertised prefix is entirely covered by more specific
+  prefixes of other entities, so longest-prefix match never selects it
+
+Prefixes are kept in a prefix tree: CIDRs either nest or are disjoint, so
+sorting them by start address and length and sweeping with a stack gives each
+prefix its parent. Overlap and conflict checks walk each prefix's ancestors
+(at most 32 for IPv4); the shadow check is one bottom-up pass over the tree.
+
+Usage:
+    python -m tools.cidr_audit examples/aws/aws.tfvars.example
+    python -m tools.cidr_audit aws.tfvars gcp.tfvars site/terraform.tfstate
+    python -m tools.cidr_audit aws.tfvars outputs.json --json
+    python -m tools.cidr_audit aws.tfvars --check
+"""
+
+import argparse
+import functools
+import ipaddress
+import json
+import re
+import sys
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import hcl2
+
+Network = ipaddress.IPv4Network | ipaddress.IPv6Network
+
+ROLES = ("space", "advertised", "tunnel", "approved", "match")
+
+_CIDR_RE = re.compile(r"^[0-9A-Fa-f:.]+/\d{1,3}$")
+_IPV4_CIDR_RE = re.compile(r"^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})/(\d{1,2})$")
+_ATTRIBUTE_RE = re.compile(r"^[a-z][a-z0-9_]*$")
+_ENTITY_NAME_KEYS = ("name", "gw_name", "connection_name")
+_SCOPE_KEYS = ("transit_key", "transit_gw_name")
+# Roles that hold for everything below the attribute, whatever the nested keys
+# are called (a smart group's ``cidr`` is a selector, not address space).
+_STICKY_ROLES = ("match",)
+
+
+@functools.cache
+def classify(attribute: str) -> str | None:
+    """Role of CIDRs held by an attribute, None if it says nothing or is ignored.
+
+    Returns:
+        One of ROLES, "ignore", or None.
+    """
+    if "source_ranges" in attribute or "ingress" in attribute:
+        return "ignore"
+    if "approved" in attribute:
+        return "approved"
+    if any(word in attribute for word in ("smarties", "smart_group", "selector")):
+        return "match"
+    if (
+        "advertis" in attribute
+        or attribute.endswith("connection_cidrs")
+        or attribute == "customized_spoke_vpc_routes"
+    ):
+        return "advertised"
+    if "tunnel_cidr" in attribute or attribute == "inside_cidr_blocks":
+        return "tunnel"
+    if any(word in attribute for word in ("cidr", "subnet", "address_space")):
+        return "space"
+    return None
+
+
+@dataclass(frozen=True, slots=True)
+class Prefix:
+    """One CIDR found in the inputs.
+
+    Attributes:
+        span: IP version and first and last address of the network, as
+            integers.
+        role: One of ROLES.
+        entity: Entity the prefix belongs to.
+        source: Input file label.
+        path: Location in the file, e.g. ``transits["a"].cidr``.
+        scope: Transit the prefix is attached to (tunnels), else the entity.
+    """
+
+    span: tuple[int, int, int]
+    role: str
+    entity: str
+    source: str
+    path: str
+    scope: str = ""
+
+    @property
+    def network(self) -> Network:
+        """The (normalized) network."""
+        return _span_network(self.span)
+
+    def __str__(self) -> str:
+        return f"{self.network} ({self.source}: {self.path})"
+
+
+@dataclass(frozen=True, slots=True)
+class Issue:
+    """A problem found by the audit."""
+
+    kind: str
+    message: str
+    prefixes: tuple[Prefix, ...] = ()
+
+    def to_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "message": self.message,
+            "prefixes": [str(p) for p in self.prefixes],
+        }
+
+
+# -----------------------------------------------------------------------------
+# Loading
+# -----------------------------------------------------------------------------
+@functools.cache
+def parse_cidr(token: str) -> tuple[tuple[int, int, int], bool]:
+    """Span of a CIDR string and whether the string is the network address.
+
+    Dotted IPv4 is parsed directly, without building address objects.
+
+    Raises:
+        ValueError: If the string is not a CIDR.
+    """
+    match = _IPV4_CIDR_RE.match(token)
+    if match:
+        *octets, length = map(int, match.groups())
+        if max(octets) <= 255 and length <= 32:
+            address = int.from_bytes(bytes(octets), "big")
+            mask = (0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF
+            first = address & mask
+            canonical = first == address and not any(
+                len(part) > 1 and part[0] == "0" for part in match.groups()[:4]
+            )
+            return (4, first, first | (~mask & 0xFFFFFFFF)), canonical
+    network = ipaddress.ip_network(token, strict=False)
+    span = (
+        network.version,
+        int(network.network_address),
+        int(network.broadcast_address),
+    )
+    return span, str(network) == token
+
+
+def _span_network(span: tuple[int, int, int]) -> Network:
+    version, first, last = span
+    if version == 4:
+        return ipaddress.IPv4Network((first, 32 - (last - first).bit_length()))
+    return ipaddress.IPv6Network((first, 128 - (last - first).bit_length()))
+
+
+@functools.cache
+def _key(key) -> tuple[str, str | None]:
+    """Path suffix and role of a map key."""
+    if isinstance(key, str) and _ATTRIBUTE_RE.match(key):
+        return f".{key}", classify(key)
+    return f'["{key}"]', None
+
+
+def extract(data: dict, source: str) -> tuple[list[Prefix], list[Issue]]:
+    """CIDRs of a parsed tfvars file or of terraform output values.
+
+    Args:
+        data: Top-level variables (or outputs) by name.
+        source: Label of the input, used in reports.
+
+    Returns:
+        The prefixes and the ``invalid`` issues.
+    """
+    prefixes: list[Prefix] = []
+    issues: list[Issue] = []
+
+    def walk(value, path: str, top: bool, entity: str, scope: str, role) -> None:
+        if isinstance(value, dict):
+            for key, item in value.items():
+                suffix, item_role = _key(key)
+                if role in _STICKY_ROLES or not item_role:
+                    item_role = role
+                if item_role == "ignore":
+                    continue
+                item_entity, item_scope = entity, scope
+                if top:
+                    item_entity = str(key)
+                    if isinstance(item, dict):
+                        item_scope = next(
+                            (item[k] for k in _SCOPE_KEYS if item.get(k)), scope
+                        )
+                walk(item, path + suffix, False, item_entity, item_scope, item_role)
+        elif isinstance(value, list):
+            for n, item in enumerate(value):
+                item_entity, item_scope = entity, scope
+                if top and isinstance(item, dict):
+                    name = next((item[k] for k in _ENTITY_NAME_KEYS if k in item), None)
+                    item_entity = str(name) if name else f"{path}[{n}]"
+                    item_scope = next(
+                        (item[k] for k in _SCOPE_KEYS if item.get(k)), item_entity
+                    )
+                walk(item, f"{path}[{n}]", False, item_entity, item_scope, role)
+        elif isinstance(value, str) and role in ROLES:
+            for token in value.split(","):
+                token = token.strip()
+                if not _CIDR_RE.match(token):
+                    continue
+                try:
+                    span, canonical = parse_cidr(token)
+                except ValueError:
+                    issues.append(
+                        Issue("invalid", f"{token} is not a CIDR ({source}: {path})")
+                    )
+                    continue
+                # Tunnel CIDRs are interface addresses; the others must be
+                # network addresses.
+                if role != "tunnel" and not canonical:
+                    issues.append(
+                        Issue(
+                            "invalid",
+                            f"{token} has host bits set, use {_span_network(span)} "
+                            f"({source}: {path})",
+                        )
+                    )
+                prefixes.append(
+                    Prefix(span, role, entity, source, path, scope or entity)
+                )
+
+    for name, value in data.items():
+        walk(value, str(name), True, str(name), "", _key(name)[1])
+    return prefixes, issues
+
+
+def load_file(path: Path | str) -> dict:
+    """Variables or output values of a tfvars, state or output JSON file.
+
+    ``.tfstate`` files and ``terraform output -json`` documents yield their
+    output values; other JSON and HCL files are taken as variables.
+    """
+    path = Path(path)
+    text = path.read_text()
+    if path.suffix in (".json", ".tfstate") or text.lstrip().startswith("{"):
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            data = None
+        if data is not None:
+            if "outputs" in data and "version" in data:
+                data = data["outputs"]
+            if data and all(
+                isinstance(v, dict) and "value" in v for v in data.values()
+            ):
+                return {k: v["value"] for k, v in data.items()}
+            return data
+    return hcl2.loads(text)
+
+
+# -----------------------------------------------------------------------------
+# Prefix tree
+# -----------------------------------------------------------------------------
+class PrefixTree:
+    """Prefixes grouped by network, with the containment tree between networks.
+
+    Building sorts once (O(n log n)); the parent links come from one stack
+    sweep, because two CIDRs are either nested or disjoint.
+    """
+
+    def __init__(self, prefixes: Iterable[Prefix]):
+        groups: dict[tuple[int, int, int], list[Prefix]] = defaultdict(list)
+        for prefix in prefixes:
+            groups[prefix.span].append(prefix)
+        # Same start: the larger network first.
+        self.spans = sorted(groups, key=lambda s: (s[0], s[1], -s[2]))
+        self.entries = [groups[s] for s in self.spans]
+        self.parent: list[int | None] = []
+        self.children: list[list[int]] = [[] for _ in self.spans]
+        stack: list[int] = []
+        for i, (version, first, _) in enumerate(self.spans):
+            while stack and self.spans[stack[-1]][::2] < (version, first):
+                stack.pop()
+            parent = stack[-1] if stack else None
+            self.parent.append(parent)
+            if parent is not None:
+                self.children[parent].append(i)
+            stack.append(i)
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def ancestors(self, i: int) -> Iterator[int]:
+        """Less specific networks containing network ``i``, nearest first."""
+        parent = self.parent[i]
+        while parent is not None:
+            yield parent
+            parent = self.parent[parent]
+
+    def tiled(self, i: int) -> bool:
+        """Whether the child networks of ``i`` cover all of it."""
+        children = self.children[i]
+        _, first, last = self.spans[i]
+        return bool(children) and sum(
+            self.spans[j][2] - self.spans[j][1] + 1 for j in children
+        ) == (last - first + 1)
+
+
+# -----------------------------------------------------------------------------
+# Checks
+# -----------------------------------------------------------------------------
+def _sort_key(prefix: Prefix) -> tuple:
+    version, first, last = prefix.span
+    return version, first, -last, prefix.path
+
+
+def _tunnel_link(prefix: Prefix) -> tuple[str, str]:
+    """Both ends of a tunnel share a block; only other tunnels may not."""
+    return prefix.source, re.sub(r"(local|remote)_tunnel", "tunnel", prefix.path)
+
+
+@dataclass(slots=True)
+class Audit:
+    """Prefixes found in the inputs and the issues among them."""
+
+    prefixes: list[Prefix] = field(default_factory=list)
+    issues: list[Issue] = field(default_factory=list)
+
+    def counts(self) -> dict[str, int]:
+        counts = dict.fromkeys(
+            ("invalid", "overlap", "tunnel", "conflict", "shadowed"), 0
+        )
+        for issue in self.issues:
+            counts[issue.kind] += 1
+        return counts
+
+    def to_dict(self) -> dict:
+        return {
+            "prefixes": len(self.prefixes),
+            "counts": self.counts(),
+            "issues": [issue.to_dict() for issue in self.issues],
+        }
+
+
+def audit(prefixes: list[Prefix], issues: Iterable[Issue] = ()) -> Audit:
+    """Check prefixes against each other.
+
+    Args:
+        prefixes: Prefixes from ``extract``.
+        issues: Issues found while extracting (kept first in the result).
+
+    Returns:
+        The audit, with issues ordered by kind and then by address.
+    """
+    tree = PrefixTree(prefixes)
+    found: dict[str, list[Issue]] = defaultdict(list)
+    tunnel_pairs: set[tuple[Prefix, Prefix]] = set()
+    by_role = [
+        {role: [p for p in entries if p.role == role] for role in ROLES}
+        for entries in tree.entries
+    ]
+
+    for i, roles in enumerate(by_role):
+        spaces, tunnels = roles["space"], roles["tunnel"]
+        advertised = roles["advertised"]
+        if not (spaces or tunnels or advertised):
+            continue
+
+        # Identical prefixes of different entities, in any files. The same
+        # entity in two files (a tfvars entry and its state output) is one
+        # network described twice.
+        for n, a in enumerate(spaces):
+            for b in spaces[n + 1 :]:
+                if a.entity != b.entity:
+                    found["overlap"].append(
+                        Issue(
+                            "overlap",
+                            f"{a.entity} and {b.entity} both use {a.network}",
+                            (a, b),
+                        )
+                    )
+        for n, a in enumerate(tunnels):
+            for b in tunnels[n + 1 :]:
+                if a.scope == b.scope and _tunnel_link(a) != _tunnel_link(b):
+                    tunnel_pairs.add((a, b))
+
+        seen = set()
+        for j in tree.ancestors(i):
+            for outer in by_role[j]["space"]:
+                for inner in spaces:
+                    key = (inner.entity, outer.entity, "space")
+                    if outer.entity != inner.entity and key not in seen:
+                        seen.add(key)
+                        found["overlap"].append(
+                            Issue(
+                                "overlap",
+                                f"{inner.entity} {inner.network} is inside "
+                                f"{outer.entity} {outer.network}",
+                                (inner, outer),
+                            )
+                        )
+                for inner in advertised:
+                    key = (inner.entity, outer.entity, "advertised")
+                    if outer.entity != inner.entity and key not in seen:
+                        seen.add(key)
+                        found["conflict"].append(
+                            Issue(
+                                "conflict",
+                                f"{inner.entity} advertises {inner.network}, more "
+                                f"specific than {outer.entity} {outer.network}",
+                                (inner, outer),
+                            )
+                        )
+            for outer in by_role[j]["tunnel"]:
+                for inner in tunnels:
+                    if outer.scope == inner.scope and _tunnel_link(
+                        outer
+                    ) != _tunnel_link(inner):
+                        tunnel_pairs.add((inner, outer))
+
+    # Shadowed routes, bottom-up in one pass. uncovered[j] holds the entities e
+    # for which network j is not fully covered by routes (space or advertised)
+    # of entities other than e, at j or below; None stands for all entities.
+    uncovered: list[frozenset[str] | None] = [None] * len(tree)
+    for i in reversed(range(len(tree))):
+        roles = by_role[i]
+        routes = {p.entity for p in roles["space"] + roles["advertised"]}
+        below: frozenset[str] | None = None
+        if tree.tiled(i):
+            below = frozenset()
+            for j in tree.children[i]:
+                if uncovered[j] is None:
+                    below = None
+                    break
+                below |= uncovered[j]
+        for a in roles["advertised"]:
+            if below is not None and a.entity not in below:
+                found["shadowed"].append(
+                    Issue(
+                        "shadowed",
+                        f"{a.entity} advertises {a.network}, but more specific "
+                        "prefixes of other entities cover all of it",
+                        (a,),
+                    )
+                )
+        if len(routes) > 1:
+            uncovered[i] = frozenset()
+        elif routes:
+            (entity,) = routes
+            covered = below is not None and entity not in below
+            uncovered[i] = frozenset() if covered else frozenset(routes)
+        else:
+            uncovered[i] = below
+    found["shadowed"].reverse()
+
+    # Both ends of a tunnel are one link: report each pair of links once.
+    links = set()
+    pairs = sorted(tunnel_pairs, key=lambda p: (_sort_key(p[0]), _sort_key(p[1])))
+    for a, b in pairs:
+        link = frozenset((_tunnel_link(a), _tunnel_link(b)))
+        if link not in links:
+            links.add(link)
+            found["tunnel"].append(
+                Issue("tunnel", f"tunnels on {a.scope} overlap", (a, b))
+            )
+
+    result = Audit(prefixes, list(issues))
+    for kind in ("overlap", "tunnel", "conflict", "shadowed"):
+        result.issues += found[kind]
+    return result
+
+
+def audit_files(paths: Iterable[Path | str]) -> Audit:
+    """Audit the prefixes of several tfvars, state or output files."""
+    prefixes, issues = [], []
+    for path in paths:
+        found, invalid = extract(load_file(path), str(path))
+        prefixes += found
+        issues += invalid
+    return audit(prefixes, issues)
+
+
+def format_report(result: Audit) -> str:
+    lines = []
+    for issue in result.issues:
+        lines.append(f"{issue.kind:<9} {issue.message}")
+        lines += [f"{'':<9}   {p}" for p in issue.prefixes]
+    counts = ", ".join(f"{n} {kind}" for kind, n in result.counts().items())
+    lines.append(f"{len(result.prefixes)} prefixes: {counts}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.cidr_audit",
+        description="Check CIDRs across tfvars and state outputs for conflicts.",
+    )
+    parser.add_argument(
+        "files", nargs="+", type=Path, help="tfvars, .tfstate or output JSON files"
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    parser.add_argument(
+        "--check", action="store_true", help="exit 1 when any issue is found"
+    )
+    args = parser.parse_args(argv)
+
+    result = audit_files(args.files)
+    print(
+        json.dumps(result.to_dict(), indent=2) if args.json else format_report(result)
+    )
+    return 1 if args.check and result.issues else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,424 @@
+"""Controller API client with a shared CID and an on-disk response cache.
+
+The ``segmentation`` and ``dcf`` modules each log in and download the full
+site2cloud list on every run, and nothing is reused between them or between
+scripts. This client keeps one pooled HTTPS session per process and reuses the
+CID across processes. When the controller reports the CID expired, it logs in
+again and retries. The heavy list calls (site2cloud, transit and spoke gateways)
+are cached on disk for a TTL, and the cache is shared by every process using
+the same cache directory:
+
+- a fresh entry is served without contacting the controller
+- a stale entry is revalidated with ``If-None-Match`` when the controller sent an
+  ``ETag``, so an unchanged list is not downloaded again
+- concurrent processes refreshing the same entry take a file lock; one fetches
+  and the others read its result
+- entries are parsed once per process and file version
+
+Credentials use the Aviatrix provider's environment variables
+(``AVIATRIX_CONTROLLER_IP``, ``AVIATRIX_USERNAME``, ``AVIATRIX_PASSWORD``); the
+cache lives in ``AVX_CONTROLLER_CACHE_DIR`` (default
+``~/.cache/aviatrix-controller``).
+
+Usage:
+    python -m tools.controller_client site2cloud --summary
+    python -m tools.controller_client transit-gateways --ttl 60
+    python -m tools.controller_client invalidate
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CACHE_DIR = Path("~/.cache/aviatrix-controller")
+DEFAULT_TTL = 300
+DEFAULT_CID_TTL = 1800
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class ControllerError(Exception):
+    """The controller rejected a request or could not be reached."""
+
+
+def default_cache_dir() -> Path:
+    """Cache directory from AVX_CONTROLLER_CACHE_DIR or the user cache."""
+    return Path(
+        os.environ.get("AVX_CONTROLLER_CACHE_DIR") or DEFAULT_CACHE_DIR
+    ).expanduser()
+
+
+def _write_atomic(path: Path, data: dict) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class ControllerClient:
+    """Client for the controller's ``/v2/api``.
+
+    Usage:
+        client = ControllerClient.from_env()
+        connections = client.list_site2cloud()
+        gateways = client.transit_gateways(ttl=60)
+        client.close()
+    """
+
+    def __init__(
+        self,
+        controller: str,
+        username: str,
+        password: str,
+        cache_dir: Path | str | None = None,
+        ttl: float = DEFAULT_TTL,
+        cid_ttl: float = DEFAULT_CID_TTL,
+        verify: bool = False,
+        timeout: float = 120,
+        max_retries: int = 5,
+        retry_delay: float = 1.0,
+        max_delay: float = 30.0,
+        pool_maxsize: int = 4,
+    ) -> None:
+        """Initialize a client.
+
+        Args:
+            controller: Controller address or URL; ``https://`` is assumed.
+            username: Controller username.
+            password: Controller password.
+            cache_dir: Directory for the CID and cached responses (default:
+                ``default_cache_dir()``).
+            ttl: Seconds a cached list is served without revalidation.
+            cid_ttl: Seconds a stored CID is reused before logging in again.
+            verify: Verify the controller's TLS certificate (the modules use
+                ``insecure = true``).
+            timeout: Seconds per HTTP request.
+            max_retries: Retries for rate-limited (429) and 5xx responses.
+            retry_delay: Base delay of the exponential backoff between retries.
+            max_delay: Cap on a single backoff delay.
+            pool_maxsize: Connections kept open to the controller.
+        """
+        if "://" not in controller:
+            controller = f"https://{controller}"
+        self.base_url = controller.rstrip("/")
+        self.url = f"{self.base_url}/v2/api"
+        self.username = username
+        self.password = password
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.ttl = ttl
+        self.cid_ttl = cid_ttl
+        self.verify = verify
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self.stats: Counter[str] = Counter()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
+        scope = f"{self.base_url}\0{username}".encode()
+        self._prefix = hashlib.sha256(scope).hexdigest()[:16]
+        self._cid: str | None = None
+        self._memo: dict[Path, tuple[int, dict]] = {}
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "ControllerClient":
+        """Create a client from the Aviatrix provider's environment variables.
+
+        Raises:
+            ControllerError: If a variable is not set.
+        """
+        names = ("AVIATRIX_CONTROLLER_IP", "AVIATRIX_USERNAME", "AVIATRIX_PASSWORD")
+        missing = [name for name in names if not os.environ.get(name)]
+        if missing:
+            raise ControllerError(f"Environment variables not set: {missing}")
+        return cls(*(os.environ[name] for name in names), **kwargs)
+
+    def close(self) -> None:
+        """Close the HTTP session."""
+        self.session.close()
+
+    def __enter__(self) -> "ControllerClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -- CID -------------------------------------------------------------------
+
+    @property
+    def _cid_path(self) -> Path:
+        return self.cache_dir / f"{self._prefix}.cid"
+
+    def login(self, force: bool = False) -> str:
+        """Return a CID, reusing one stored by any process unless ``force``.
+
+        Raises:
+            ControllerError: If the login is rejected.
+        """
+        if not force:
+            if self._cid:
+                return self._cid
+            try:
+                stored = json.loads(self._cid_path.read_text())
+                if time.time() - stored["issued_at"] < self.cid_ttl:
+                    self._cid = stored["cid"]
+                    return self._cid
+            except (OSError, ValueError, KeyError):
+                pass
+
+        body = self._send(
+            {"action": "login", "username": self.username, "password": self.password}
+        ).json()
+        if not body.get("return") or not body.get("CID"):
+            raise ControllerError(f"Controller login failed: {body.get('reason')}")
+        self.stats["login"] += 1
+        self._cid = body["CID"]
+        _write_atomic(self._cid_path, {"cid": self._cid, "issued_at": time.time()})
+        self._cid_path.chmod(0o600)
+        return self._cid
+
+    # -- requests --------------------------------------------------------------
+
+    def _backoff(self, attempt: int, retry_after: str | None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_delay)
+        delay = min(self.max_delay, self.retry_delay * 2**attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _send(self, payload: dict, headers: dict | None = None) -> requests.Response:
+        """POST a payload, retrying rate-limited and 5xx responses."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(
+                    self.url,
+                    json=payload,
+                    headers=headers,
+                    timeout=self.timeout,
+                    verify=self.verify,
+                )
+            except requests.RequestException as e:
+                if attempt == self.max_retries:
+                    raise ControllerError(f"Controller unreachable: {e}") from e
+                time.sleep(self._backoff(attempt, None))
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                self.stats[f"retry_{response.status_code}"] += 1
+                time.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+                continue
+            if response.status_code not in (200, 304):
+                raise ControllerError(
+                    f"{payload.get('action')}: HTTP {response.status_code}"
+                )
+            return response
+        raise AssertionError("unreachable")
+
+    def request(
+        self, action: str, params: dict | None = None, headers: dict | None = None
+    ) -> requests.Response:
+        """Call an action with the current CID, logging in again if it expired.
+
+        Returns:
+            The HTTP response (200, or 304 for a matching ``If-None-Match``).
+
+        Raises:
+            ControllerError: If the controller answers ``"return": false``.
+        """
+        for relogin in (False, True):
+            payload = {"action": action, "CID": self.login(force=relogin)}
+            response = self._send({**payload, **(params or {})}, headers)
+            self.stats[action] += 1
+            if response.status_code == 304:
+                return response
+            body = response.json()
+            if body.get("return"):
+                return response
+            reason = str(body.get("reason", ""))
+            if "CID" not in reason or relogin:
+                raise ControllerError(f"{action} failed: {reason}")
+            self.stats["cid_expired"] += 1
+        raise AssertionError("unreachable")
+
+    def call(self, action: str, **params):
+        """Call an action without caching and return its ``results``."""
+        return self.request(action, params).json().get("results")
+
+    # -- cache -----------------------------------------------------------------
+
+    def _cache_path(self, action: str, params: dict) -> Path:
+        key = json.dumps([action, params], sort_keys=True).encode()
+        digest = hashlib.sha256(key).hexdigest()[:16]
+        return self.cache_dir / f"{self._prefix}-{digest}.json"
+
+    def _read_entry(self, path: Path) -> dict | None:
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        memo = self._memo.get(path)
+        if memo and memo[0] == mtime:
+            return memo[1]
+        try:
+            entry = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        self._memo[path] = (mtime, entry)
+        return entry
+
+    def _fresh(self, entry: dict | None, ttl: float) -> bool:
+        return entry is not None and time.time() - entry["fetched_at"] < ttl
+
+    @contextmanager
+    def _locked(self, path: Path) -> Iterator[None]:
+        with open(path.with_suffix(".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def cached(
+        self, action: str, ttl: float | None = None, refresh: bool = False, **params
+    ):
+        """Call a list action through the shared on-disk cache.
+
+        Args:
+            action: API action, e.g. ``list_site2cloud``.
+            ttl: Seconds a cached result is served as is (default: ``self.ttl``).
+            refresh: Skip the cache and fetch (ETag revalidation still applies).
+            **params: Extra request parameters; part of the cache key.
+
+        Returns:
+            The action's ``results``.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        path = self._cache_path(action, params)
+        entry = self._read_entry(path)
+        if not refresh and self._fresh(entry, ttl):
+            self.stats["cache_hit"] += 1
+            return entry["results"]
+
+        with self._locked(path):
+            latest = self._read_entry(path)
+            if latest is not entry and self._fresh(latest, ttl):
+                # Another process refreshed the entry while we waited.
+                self.stats["cache_hit"] += 1
+                return latest["results"]
+            entry = latest
+            etag = entry.get("etag") if entry else None
+            headers = {"If-None-Match": etag} if etag else None
+            response = self.request(action, params, headers)
+            if response.status_code == 304 and entry is not None:
+                self.stats["cache_revalidated"] += 1
+                entry = {**entry, "fetched_at": time.time()}
+            else:
+                self.stats["cache_miss"] += 1
+                entry = {
+                    "fetched_at": time.time(),
+                    "etag": response.headers.get("ETag"),
+                    "results": response.json().get("results"),
+                }
+            _write_atomic(path, entry)
+        return entry["results"]
+
+    def invalidate(self) -> int:
+        """Drop the cached responses and stored CID of this controller and user.
+
+        Returns:
+            Number of files removed.
+        """
+        removed = 0
+        for path in self.cache_dir.glob(f"{self._prefix}*"):
+            path.unlink(missing_ok=True)
+            removed += 1
+        self._memo.clear()
+        self._cid = None
+        return removed
+
+    # -- list endpoints ----------------------------------------------------------
+
+    def list_site2cloud(self, ttl: float | None = None, refresh: bool = False):
+        """All site2cloud connections (``results.connections``)."""
+        results = self.cached("list_site2cloud", ttl, refresh)
+        return results.get("connections", []) if results else []
+
+    def transit_gateways(self, ttl: float | None = None, refresh: bool = False):
+        """Transit gateways, primary and HA."""
+        return self.cached(
+            "list_primary_and_ha_gateways", ttl, refresh, gateway_type="transit"
+        )
+
+    def spoke_gateways(self, ttl: float | None = None, refresh: bool = False):
+        """Spoke gateways, primary and HA."""
+        return self.cached(
+            "list_primary_and_ha_gateways", ttl, refresh, gateway_type="spoke"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.controller_client",
+        description="Query the controller through the shared CID and cache.",
+    )
+    parser.add_argument(
+        "command",
+        choices=("site2cloud", "transit-gateways", "spoke-gateways", "invalidate"),
+    )
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL, help="seconds")
+    parser.add_argument("--refresh", action="store_true", help="bypass the cache")
+    parser.add_argument("--cache-dir", type=Path, help="default: user cache")
+    parser.add_argument("--summary", action="store_true", help="print counts only")
+    parser.add_argument("--verify", action="store_true", help="verify TLS")
+    args = parser.parse_args(argv)
+
+    try:
+        client = ControllerClient.from_env(
+            cache_dir=args.cache_dir, ttl=args.ttl, verify=args.verify
+        )
+    except ControllerError as e:
+        parser.error(str(e))
+    with client:
+        if args.command == "invalidate":
+            print(f"removed {client.invalidate()} cache files")
+            return 0
+        fetch = {
+            "site2cloud": client.list_site2cloud,
+            "transit-gateways": client.transit_gateways,
+            "spoke-gateways": client.spoke_gateways,
+        }[args.command]
+        try:
+            results = fetch(refresh=args.refresh)
+        except ControllerError as e:
+            print(e, file=sys.stderr)
+            return 1
+        if args.summary:
+            print(f"{args.command}: {len(results)}")
+        else:
+            print(json.dumps(results, indent=2))
+        stats = ", ".join(f"{k}={v}" for k, v in sorted(client.stats.items()))
+        print(stats, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
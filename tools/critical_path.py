@@ -0,0 +1,476 @@
+"""Critical-path analysis of a terraform apply.
+
+Combines the per-resource timings from an ``terraform apply -json`` log with the
+dependency graph printed by ``terraform graph`` to find the chain of resources
+that bounded the wall-clock time of the run, and how much faster the run could
+be with unlimited parallelism.
+
+Usage:
+    terraform -chdir=modules/control/aws apply -json ... > apply.log
+    python -m tools.critical_path apply.log --chdir modules/control/aws
+    python -m tools.critical_path apply.log --graph graph.dot --top 20 --json
+"""
+
+import argparse
+import heapq
+import json
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+_FRACTION_RE = re.compile(r"\.(\d+)")
+_INDEX_RE = re.compile(r'\[(?:"(?:[^"\\]|\\.)*"|\d+)\]')
+_EDGE_RE = re.compile(r'^\s*"((?:[^"\\]|\\.)*)"\s*->\s*"((?:[^"\\]|\\.)*)"')
+_NODE_RE = re.compile(r'^\s*"((?:[^"\\]|\\.)*)"\s*\[')
+_NODE_SUFFIX_RE = re.compile(r" \((?:expand|close|destroy|prepare state)\)$")
+_MODULE_PATH_RE = re.compile(r"^(?:module\.[^.\[]+\.)*")
+_NON_RESOURCE_PREFIXES = (
+    "var.",
+    "local.",
+    "output.",
+    "provider[",
+    "meta.",
+    "module.",
+)
+
+
+@dataclass(slots=True)
+class ResourceSpan:
+    """Observed execution of one resource instance during an apply.
+
+    Attributes:
+        address: Resource instance address, e.g. ``aws_vpc.this["us-east-1"]``.
+        action: Hook action ("create", "update", "delete", "read", ...).
+        start: Epoch seconds the operation started.
+        end: Epoch seconds it completed, errored, or the log ended.
+        status: "complete", "errored" or "incomplete".
+    """
+
+    address: str
+    action: str | None
+    start: float
+    end: float
+    status: str = "complete"
+
+    @property
+    def duration(self) -> float:
+        return max(0.0, self.end - self.start)
+
+    @property
+    def config_address(self) -> str:
+        return config_address(self.address)
+
+
+@dataclass(slots=True)
+class Chain:
+    """A dependency chain and its summed resource durations."""
+
+    resources: list[str]
+    duration: float
+
+
+@dataclass(slots=True)
+class ConfigGroup:
+    """Instances of one resource block (``for_each``/``count`` expanded)."""
+
+    config_address: str
+    instances: int
+    total: float
+    longest: float
+
+
+@dataclass
+class CriticalPathReport:
+    """Outcome of a critical-path analysis.
+
+    Attributes:
+        resources: Number of resource operations in the apply log.
+        serial_time: Sum of all resource durations (time with -parallelism=1).
+        wall_time: First start to last end observed in the log.
+        critical_time: Summed durations along the critical path; the lower
+            bound on wall time with unlimited parallelism.
+        critical_path: Resource addresses on the critical path, first to last.
+        slowest: Slowest individual resource operations.
+        chains: Slowest dependency chains, one per terminal resource.
+        groups: Resource blocks ranked by total time across their instances.
+    """
+
+    resources: int
+    serial_time: float
+    wall_time: float
+    critical_time: float
+    critical_path: list[str]
+    slowest: list[ResourceSpan] = field(default_factory=list)
+    chains: list[Chain] = field(default_factory=list)
+    groups: list[ConfigGroup] = field(default_factory=list)
+
+    @property
+    def achievable_speedup(self) -> float:
+        """Serial time over critical-path time (unlimited parallelism)."""
+        return self.serial_time / self.critical_time if self.critical_time else 1.0
+
+    @property
+    def observed_speedup(self) -> float:
+        """Serial time over the wall time actually observed."""
+        return self.serial_time / self.wall_time if self.wall_time else 1.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        for span, entry in zip(self.slowest, data["slowest"]):
+            entry["duration"] = span.duration
+        data["achievable_speedup"] = self.achievable_speedup
+        data["observed_speedup"] = self.observed_speedup
+        return data
+
+
+def parse_timestamp(value: str) -> float:
+    """Parse an RFC 3339 timestamp (any fraction length) to epoch seconds.
+
+    Used for terraform ``@timestamp`` values here and by the test harness, which
+    also parses Gatus result timestamps (nanosecond fractions) with it.
+    """
+    value = value.replace("Z", "+00:00")
+    value = _FRACTION_RE.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), value, 1)
+    return datetime.fromisoformat(value).timestamp()
+
+
+def config_address(address: str) -> str:
+    """Strip instance keys from a resource address.
+
+    ``module.transit["aws"].aws_vpc.this[0]`` becomes ``module.transit.aws_vpc.this``.
+    """
+    return _INDEX_RE.sub("", address)
+
+
+def parse_apply_log(lines: Iterable[str]) -> dict[str, ResourceSpan]:
+    """Collect per-resource spans from ``terraform apply -json`` output.
+
+    Non-JSON lines and message types other than the apply hooks are ignored.
+    A resource that started but never completed or errored is closed at the
+    last timestamp in the log and marked "incomplete".
+
+    Args:
+        lines: Lines of the apply log.
+
+    Returns:
+        Spans keyed by resource instance address.
+    """
+    starts: dict[str, tuple[float, str | None]] = {}
+    spans: dict[str, ResourceSpan] = {}
+    last = 0.0
+    for line in lines:
+        try:
+            data = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(data, dict) or "@timestamp" not in data:
+            continue
+        timestamp = parse_timestamp(data["@timestamp"])
+        last = max(last, timestamp)
+        hook = data.get("hook") or {}
+        address = (hook.get("resource") or {}).get("addr")
+        if not address:
+            continue
+        kind = data.get("type")
+        if kind == "apply_start":
+            starts[address] = (timestamp, hook.get("action"))
+        elif kind in ("apply_complete", "apply_errored") and address in starts:
+            start, action = starts.pop(address)
+            status = "complete" if kind == "apply_complete" else "errored"
+            spans[address] = ResourceSpan(address, action, start, timestamp, status)
+    for address, (start, action) in starts.items():
+        spans[address] = ResourceSpan(address, action, start, last, "incomplete")
+    return spans
+
+
+def _graph_node(name: str) -> str:
+    name = name.replace('\\"', '"')
+    if name.startswith("[root] "):
+        name = name[len("[root] ") :]
+    return _NODE_SUFFIX_RE.sub("", name)
+
+
+def _is_resource(node: str) -> bool:
+    local = _MODULE_PATH_RE.sub("", node)
+    return "." in local and not local.startswith(_NON_RESOURCE_PREFIXES)
+
+
+def parse_graph(dot: str) -> dict[str, set[str]]:
+    """Parse ``terraform graph`` DOT output into resource dependencies.
+
+    Both the compact format of terraform >= 1.7 and the older verbose format
+    (``[root]`` prefixes, provider/variable/local nodes) are accepted. Edges
+    through non-resource nodes are collapsed so the result only relates
+    resource blocks.
+
+    Args:
+        dot: DOT text.
+
+    Returns:
+        Mapping of resource config address to the resource config addresses
+        it depends on.
+    """
+    edges: dict[str, set[str]] = defaultdict(set)
+    nodes: set[str] = set()
+    for line in dot.splitlines():
+        if match := _EDGE_RE.match(line):
+            src, dst = _graph_node(match.group(1)), _graph_node(match.group(2))
+            edges[src].add(dst)
+            nodes.update((src, dst))
+        elif match := _NODE_RE.match(line):
+            nodes.add(_graph_node(match.group(1)))
+
+    def resource_deps(node: str, seen: set[str]) -> set[str]:
+        deps: set[str] = set()
+        for dep in edges.get(node, ()):
+            if dep in seen:
+                continue
+            seen.add(dep)
+            if _is_resource(dep):
+                deps.add(dep)
+            else:
+                deps |= resource_deps(dep, seen)
+        return deps
+
+    graph: dict[str, set[str]] = {}
+    for node in sorted(nodes):
+        if _is_resource(node):
+            graph[node] = resource_deps(node, {node})
+    return graph
+
+
+def _instance_dependencies(
+    spans: dict[str, ResourceSpan], graph: dict[str, set[str]]
+) -> dict[str, set[str]]:
+    """Map each applied instance to the applied instances it waited for.
+
+    Terraform orders instances by their resource blocks, so an instance depends
+    on every instance of the blocks its block depends on. Blocks with nothing
+    to do in this apply are passed through to their own dependencies.
+    """
+    instances: dict[str, list[str]] = defaultdict(list)
+    for address, span in spans.items():
+        instances[span.config_address].append(address)
+
+    memo: dict[str, set[str]] = {}
+
+    def applied_deps(config: str, stack: frozenset[str]) -> set[str]:
+        if config in memo:
+            return memo[config]
+        result: set[str] = set()
+        for dep in graph.get(config, ()):
+            if dep in stack:
+                continue
+            if dep in instances:
+                result.update(instances[dep])
+            else:
+                result |= applied_deps(dep, stack | {dep})
+        memo[config] = result
+        return result
+
+    deps: dict[str, set[str]] = {}
+    for address, span in spans.items():
+        config = span.config_address
+        if span.action == "delete":
+            # Destroy runs in reverse dependency order.
+            dependents = {
+                other
+                for other, candidate in spans.items()
+                if candidate.action == "delete"
+                and config in graph.get(candidate.config_address, ())
+            }
+            deps[address] = dependents
+        else:
+            deps[address] = {
+                dep
+                for dep in applied_deps(config, frozenset({config}))
+                if spans[dep].action != "delete"
+            }
+    return deps
+
+
+def _longest_paths(
+    spans: dict[str, ResourceSpan], deps: dict[str, set[str]]
+) -> tuple[dict[str, float], dict[str, str | None]]:
+    """Longest duration-weighted path ending at each resource."""
+    finish: dict[str, float] = {}
+    parent: dict[str, str | None] = {}
+    indegree = {address: len(deps[address]) for address in spans}
+    dependents: dict[str, list[str]] = defaultdict(list)
+    for address, upstream in deps.items():
+        for dep in upstream:
+            dependents[dep].append(address)
+    ready = sorted(address for address, count in indegree.items() if count == 0)
+    while ready:
+        address = ready.pop()
+        best = max(deps[address], key=lambda d: finish[d], default=None)
+        parent[address] = best
+        base = finish[best] if best is not None else 0.0
+        finish[address] = base + spans[address].duration
+        for child in dependents[address]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(child)
+    if len(finish) != len(spans):
+        cyclic = sorted(set(spans) - set(finish))
+        raise ValueError(f"Dependency cycle between resources: {cyclic}")
+    return finish, parent
+
+
+def _walk(address: str, parent: dict[str, str | None]) -> list[str]:
+    path = []
+    node: str | None = address
+    while node is not None:
+        path.append(node)
+        node = parent[node]
+    return path[::-1]
+
+
+def analyze(
+    spans: dict[str, ResourceSpan], graph: dict[str, set[str]], top: int = 10
+) -> CriticalPathReport:
+    """Compute the critical path of an apply.
+
+    Args:
+        spans: Resource spans from :func:`parse_apply_log`.
+        graph: Resource dependencies from :func:`parse_graph`.
+        top: Number of entries in each ranked list.
+
+    Returns:
+        The analysis report.
+
+    Raises:
+        ValueError: If the dependencies contain a cycle.
+    """
+    if not spans:
+        return CriticalPathReport(0, 0.0, 0.0, 0.0, [])
+
+    deps = _instance_dependencies(spans, graph)
+    finish, parent = _longest_paths(spans, deps)
+    end = max(finish, key=lambda address: finish[address])
+
+    # A chain per terminal resource (nothing depends on it), slowest first.
+    upstream = set().union(*deps.values())
+    terminals = [address for address in spans if address not in upstream]
+    chains = [
+        Chain(_walk(address, parent), finish[address])
+        for address in heapq.nlargest(top, terminals, key=lambda a: finish[a])
+    ]
+
+    groups: dict[str, ConfigGroup] = {}
+    for span in spans.values():
+        group = groups.setdefault(
+            span.config_address, ConfigGroup(span.config_address, 0, 0.0, 0.0)
+        )
+        group.instances += 1
+        group.total += span.duration
+        group.longest = max(group.longest, span.duration)
+
+    return CriticalPathReport(
+        resources=len(spans),
+        serial_time=sum(span.duration for span in spans.values()),
+        wall_time=(
+            max(span.end for span in spans.values())
+            - min(span.start for span in spans.values())
+        ),
+        critical_time=finish[end],
+        critical_path=_walk(end, parent),
+        slowest=heapq.nlargest(top, spans.values(), key=lambda s: s.duration),
+        chains=chains,
+        groups=heapq.nlargest(top, groups.values(), key=lambda g: g.total),
+    )
+
+
+def _format_seconds(seconds: float) -> str:
+    minutes, secs = divmod(round(seconds), 60)
+    return f"{minutes}m{secs:02d}s" if minutes else f"{secs}s"
+
+
+def format_report(report: CriticalPathReport, spans: dict[str, ResourceSpan]) -> str:
+    """Render a report as plain text."""
+    lines = [
+        f"Resources:           {report.resources}",
+        f"Serial time:         {_format_seconds(report.serial_time)}",
+        f"Observed wall time:  {_format_seconds(report.wall_time)}"
+        f" (speedup {report.observed_speedup:.1f}x)",
+        f"Critical path:       {_format_seconds(report.critical_time)}"
+        f" (achievable speedup {report.achievable_speedup:.1f}x)",
+        "",
+        "Critical path:",
+    ]
+    for address in report.critical_path:
+        span = spans[address]
+        lines.append(f"  {_format_seconds(span.duration):>8}  {address}")
+
+    lines += ["", "Slowest resources:"]
+    for span in report.slowest:
+        status = "" if span.status == "complete" else f"  [{span.status}]"
+        lines.append(
+            f"  {_format_seconds(span.duration):>8}  {span.address}"
+            f" ({span.action}){status}"
+        )
+
+    lines += ["", "Slowest resource blocks:"]
+    for group in report.groups:
+        lines.append(
+            f"  {_format_seconds(group.total):>8}  {group.config_address}"
+            f" x{group.instances} (longest {_format_seconds(group.longest)})"
+        )
+
+    lines += ["", "Slowest dependency chains:"]
+    for chain in report.chains:
+        lines.append(
+            f"  {_format_seconds(chain.duration):>8}  {' -> '.join(chain.resources)}"
+        )
+    return "\n".join(lines)
+
+
+def terraform_graph(tf_dir: Path, timeout: int = 300) -> str:
+    """Run ``terraform graph`` in an initialized directory and return the DOT."""
+    result = subprocess.run(
+        ["terraform", "graph"],
+        cwd=tf_dir,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"terraform graph failed in {tf_dir}: {result.stderr}")
+    return result.stdout
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.critical_path",
+        description="Critical-path analysis of a terraform apply -json log.",
+    )
+    parser.add_argument("log", type=Path, help="terraform apply -json output")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--graph", type=Path, help="saved terraform graph output")
+    source.add_argument(
+        "--chdir", type=Path, help="module directory to run terraform graph in"
+    )
+    parser.add_argument("--top", type=int, default=10, help="entries per ranking")
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args(argv)
+
+    with args.log.open() as f:
+        spans = parse_apply_log(f)
+    dot = args.graph.read_text() if args.graph else terraform_graph(args.chdir)
+    report = analyze(spans, parse_graph(dot), top=args.top)
+
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        print(format_report(report, spans))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
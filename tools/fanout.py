@@ -0,0 +1,1091 @@
+"""Plan-time resource fan-out estimator for the cloud transit modules.
+
+One entry in ``transits`` expands into dozens of resources in
+``modules/control/{aws,gcp,azure}/modules/transit``: a TGW attachment, 4 Connect
+attachments, 16 Connect peers and 8 external connections per transit/TGW pair
+on AWS; NCC spokes, BGP-LAN routers, interfaces and peers per BGP-LAN subnet on
+GCP; Virtual WAN connections and BGP connections per hub connection on Azure;
+security groups, bootstrap buckets and VM-Series instances per firewall
+everywhere. This tool reads a tfvars file and reproduces each resource's
+``for_each`` keys in Python, without providers or network access, then:
+
+- counts instances per resource type and per input knob (``transits[*].tgw_name``,
+  ``transits[*].fw_amount``, ``external_devices``, ...)
+- weights them by typical creation latency (``LATENCY``, calibratable from an
+  apply log with ``--timings``)
+- estimates apply time at a given ``-parallelism``, in dependency waves
+- with ``--window``, splits the entities (transits, TGWs, hubs) into batches
+  whose applies fit the change window
+
+Child modules (``mc-transit``, ``mc-spoke``, VM-Series) count as one instance
+each, weighted by the time the whole module instance takes.
+
+Usage:
+    python -m tools.fanout examples/aws/aws.tfvars.example
+    python -m tools.fanout gcp.tfvars --module gcp --parallelism 20
+    python -m tools.fanout aws.tfvars --window 60 --timings apply.json
+    python -m tools.fanout azure.tfvars --json
+"""
+
+import argparse
+import heapq
+import json
+import math
+import re
+import statistics
+import sys
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import hcl2
+
+MODULES_DIR = Path(__file__).resolve().parents[1] / "modules/control"
+
+# Typical creation time in seconds by resource type; child modules by the
+# registry module they call. Types not listed take DEFAULT_LATENCY.
+LATENCY: dict[str, float] = {
+    # Child modules: one instance is a gateway pair or a firewall VM.
+    "mc-transit": 900.0,
+    "mc-spoke": 600.0,
+    "vmseries": 480.0,
+    "bootstrap": 30.0,
+    # Aviatrix controller operations
+    "aviatrix_firenet": 120.0,
+    "aviatrix_firewall_instance_association": 60.0,
+    "aviatrix_transit_external_device_conn": 90.0,
+    "aviatrix_spoke_external_device_conn": 90.0,
+    "aviatrix_transit_firenet_policy": 20.0,
+    # AWS
+    "aws_ec2_transit_gateway": 180.0,
+    "aws_ec2_transit_gateway_vpc_attachment": 60.0,
+    "aws_ec2_transit_gateway_connect": 30.0,
+    "aws_ec2_transit_gateway_connect_peer": 120.0,
+    "aws_key_pair": 2.0,
+    "aws_ram_principal_association": 5.0,
+    "aws_ram_resource_association": 5.0,
+    "aws_ram_resource_share": 5.0,
+    "aws_route": 2.0,
+    "aws_secretsmanager_secret": 3.0,
+    "aws_secretsmanager_secret_version": 2.0,
+    "aws_security_group": 5.0,
+    # GCP
+    "google_compute_address": 10.0,
+    "google_compute_backend_service": 60.0,
+    "google_compute_firewall": 15.0,
+    "google_compute_global_address": 10.0,
+    "google_compute_global_forwarding_rule": 30.0,
+    "google_compute_health_check": 15.0,
+    "google_compute_network": 40.0,
+    "google_compute_network_endpoint": 15.0,
+    "google_compute_network_endpoint_group": 20.0,
+    "google_compute_router": 20.0,
+    "google_compute_router_interface": 20.0,
+    "google_compute_router_peer": 30.0,
+    "google_compute_subnetwork": 30.0,
+    "google_compute_target_http_proxy": 15.0,
+    "google_compute_url_map": 15.0,
+    "google_network_connectivity_group": 30.0,
+    "google_network_connectivity_hub": 60.0,
+    "google_network_connectivity_spoke": 90.0,
+    "google_storage_bucket_object": 3.0,
+    # Azure
+    "azurerm_network_interface_security_group_association": 10.0,
+    "azurerm_network_security_group": 10.0,
+    "azurerm_resource_group": 15.0,
+    "azurerm_route": 5.0,
+    "azurerm_route_table": 10.0,
+    "azurerm_subnet": 10.0,
+    "azurerm_subnet_route_table_association": 10.0,
+    "azurerm_virtual_hub": 1800.0,
+    "azurerm_virtual_hub_bgp_connection": 120.0,
+    "azurerm_virtual_hub_connection": 300.0,
+    "azurerm_virtual_network": 15.0,
+    "azurerm_virtual_wan": 60.0,
+    # Utility resources
+    "random_id": 1.0,
+    "time_sleep": 600.0,
+    "tls_private_key": 1.0,
+}
+DEFAULT_LATENCY = 10.0
+
+
+@dataclass(frozen=True, slots=True)
+class Resource:
+    """One resource or module block of a transit module.
+
+    Attributes:
+        type: Resource type, or the registry module a module block calls.
+        collection: Name of the key set its ``for_each`` (or ``count``) uses.
+        wave: Dependency depth: 0 needs nothing from the module, 1 is the
+            gateways, higher waves wait for the lower ones.
+    """
+
+    type: str
+    collection: str
+    wave: int
+
+
+@dataclass(slots=True)
+class Collection:
+    """``for_each`` keys of a set of resources.
+
+    Attributes:
+        knob: Input that drives the keys, e.g. ``transits[*].fw_amount``.
+        keys: Instance key (an index for ``count``) to the entity it belongs
+            to (``transit:<key>``, ``tgw:<name>``, ...), which is the unit of
+            batching.
+    """
+
+    knob: str
+    keys: dict[str | int, str] = field(default_factory=dict)
+
+
+@dataclass(frozen=True, slots=True)
+class ModuleModel:
+    """Resources of one transit module and the keys they expand to.
+
+    Attributes:
+        name: Cloud (``aws``, ``gcp``, ``azure``).
+        path: Module directory.
+        resources: Block address (``aws_route.route``, ``module.pan_fw``) to
+            its resource.
+        collections: Computes every collection from the module's variables.
+    """
+
+    name: str
+    path: Path
+    resources: dict[str, Resource]
+    collections: Callable[[dict], dict[str, Collection]]
+
+
+def _stripped(key: str, suffix: str) -> str:
+    match = re.fullmatch(rf"(.+){suffix}", key)
+    return match.group(1) if match else key
+
+
+def _fw_keys(gw_name: str, fw_amount) -> list[str]:
+    """``fws`` keys of a transit: ``<gw>-pri-fwN`` then ``<gw>-ha-fwN``."""
+    count = math.floor(float(fw_amount or 0) / 2)
+    return [f"{gw_name}-{t}-fw{i + 1}" for t in ("pri", "ha") for i in range(count)]
+
+
+def _collections(*names_and_knobs: tuple[str, str]) -> dict[str, Collection]:
+    return {name: Collection(knob) for name, knob in names_and_knobs}
+
+
+# -----------------------------------------------------------------------------
+# AWS
+# -----------------------------------------------------------------------------
+def aws_collections(v: dict) -> dict[str, Collection]:
+    """Keys of modules/control/aws/modules/transit, from its variables."""
+    transits = v.get("transits") or {}
+    tgws = v.get("tgws") or {}
+    devices = v.get("external_devices") or {}
+    spokes = v.get("spokes") or {}
+    c = _collections(
+        ("transits", "transits"),
+        ("generated_keys", "transits[*].ssh_keys"),
+        ("fws", "transits[*].fw_amount"),
+        ("fw_associations", "transits[*].fw_amount"),
+        ("created_tgws", "tgws"),
+        ("shared_tgws", "tgws[*].account_ids"),
+        ("tgw_account_pairs", "tgws[*].account_ids"),
+        ("transit_tgw_map", "transits[*].tgw_name"),
+        ("inspection_policies", "transits[*].inspection_enabled"),
+        ("external_devices", "external_devices"),
+        ("spokes", "spokes"),
+    )
+
+    def tgw_names(key: str) -> list[str]:
+        name = transits[key].get("tgw_name") or ""
+        return name.split(",") if name else []
+
+    for key in sorted(transits):
+        t = transits[key]
+        owner = f"transit:{key}"
+        c["transits"].keys[key] = owner
+        if not t.get("ssh_keys"):
+            c["generated_keys"].keys[key] = owner
+        for fw in _fw_keys(key, t.get("fw_amount")):
+            c["fws"].keys[fw] = owner
+            if t.get("attach_firewall", True):
+                c["fw_associations"].keys[fw] = owner
+        for name in tgw_names(key):
+            c["transit_tgw_map"].keys[f"{key}.{name}"] = owner
+
+    for name in sorted(tgws):
+        tgw = tgws[name]
+        if not tgw.get("create_tgw"):
+            continue
+        c["created_tgws"].keys[name] = f"tgw:{name}"
+        accounts = tgw.get("account_ids") or []
+        if accounts:
+            c["shared_tgws"].keys[name] = f"tgw:{name}"
+        for account in accounts:
+            c["tgw_account_pairs"].keys[f"{name}.{account}"] = f"tgw:{name}"
+
+    # aviatrix_transit_firenet_policy looks inspection_enabled up by stripped
+    # gateway name but with the raw transit key, as the module does.
+    inspection = {
+        _stripped(k, "-vpc"): t.get("inspection_enabled", False)
+        for k, t in transits.items()
+    }
+    policies = [
+        (f"{key}.{name}.external-{n}", key)
+        for key in sorted(transits)
+        if (transits[key].get("fw_amount") or 0) > 0
+        for name in tgw_names(key)
+        for n in (1, 2)
+    ]
+    for key in sorted(devices):
+        device = devices[key]
+        c["external_devices"].keys[key] = f"transit:{device.get('transit_key')}"
+        transit = transits.get(device.get("transit_key"), {})
+        if device.get("inspected_by_firenet") and (transit.get("fw_amount") or 0) > 0:
+            pair_key = f"{device.get('transit_key')}.{device.get('connection_name')}"
+            policies.append((pair_key, device.get("transit_key")))
+    for pair_key, transit_key in policies:
+        if inspection.get(transit_key, False):
+            c["inspection_policies"].keys[pair_key] = f"transit:{transit_key}"
+
+    for key in sorted(spokes):
+        c["spokes"].keys[key] = f"transit:{spokes[key].get('transit_key')}"
+    return c
+
+
+AWS_RESOURCES: dict[str, Resource] = {
+    "module.mc-transit": Resource("mc-transit", "transits", 1),
+    "aviatrix_firenet.firenet": Resource("aviatrix_firenet", "transits", 2),
+    "tls_private_key.generated": Resource("tls_private_key", "generated_keys", 0),
+    "aws_key_pair.generated": Resource("aws_key_pair", "generated_keys", 0),
+    "random_id.suffix": Resource("random_id", "generated_keys", 0),
+    **{
+        f"aws_secretsmanager_secret.{name}_key": Resource(
+            "aws_secretsmanager_secret", "generated_keys", 0
+        )
+        for name in ("private", "public")
+    },
+    **{
+        f"aws_secretsmanager_secret_version.{name}_key_version": Resource(
+            "aws_secretsmanager_secret_version", "generated_keys", 0
+        )
+        for name in ("private", "public")
+    },
+    **{
+        f"aws_security_group.pan_{name}": Resource("aws_security_group", "fws", 2)
+        for name in ("mgmt", "egress", "lan")
+    },
+    "module.swfw-modules_bootstrap": Resource("bootstrap", "fws", 0),
+    "module.pan_fw": Resource("vmseries", "fws", 3),
+    "aviatrix_firewall_instance_association.fw_associations": Resource(
+        "aviatrix_firewall_instance_association", "fw_associations", 4
+    ),
+    "aws_ec2_transit_gateway.tgw": Resource(
+        "aws_ec2_transit_gateway", "created_tgws", 0
+    ),
+    "aws_route.route": Resource("aws_route", "transit_tgw_map", 2),
+    "aws_ec2_transit_gateway_vpc_attachment.attachment": Resource(
+        "aws_ec2_transit_gateway_vpc_attachment", "transit_tgw_map", 2
+    ),
+    **{
+        f"aws_ec2_transit_gateway_connect.connect-{n}": Resource(
+            "aws_ec2_transit_gateway_connect", "transit_tgw_map", 3
+        )
+        for n in range(1, 5)
+    },
+    **{
+        f"aws_ec2_transit_gateway_connect_peer.{prefix}connect_peer-{n}": Resource(
+            "aws_ec2_transit_gateway_connect_peer", "transit_tgw_map", 4
+        )
+        for n in range(1, 9)
+        for prefix in ("", "ha_")
+    },
+    **{
+        f"aviatrix_transit_external_device_conn.external-{n}": Resource(
+            "aviatrix_transit_external_device_conn", "transit_tgw_map", 5
+        )
+        for n in range(1, 9)
+    },
+    "aviatrix_transit_firenet_policy.inspection_policies": Resource(
+        "aviatrix_transit_firenet_policy", "inspection_policies", 6
+    ),
+    "aviatrix_transit_external_device_conn.external_device": Resource(
+        "aviatrix_transit_external_device_conn", "external_devices", 2
+    ),
+    "aws_ram_resource_share.tgw_share": Resource(
+        "aws_ram_resource_share", "shared_tgws", 0
+    ),
+    "aws_ram_resource_association.tgw_association": Resource(
+        "aws_ram_resource_association", "shared_tgws", 1
+    ),
+    "aws_ram_principal_association.tgw_principal_account": Resource(
+        "aws_ram_principal_association", "tgw_account_pairs", 1
+    ),
+    "module.mc-spoke": Resource("mc-spoke", "spokes", 2),
+}
+
+
+# -----------------------------------------------------------------------------
+# GCP
+# -----------------------------------------------------------------------------
+def gcp_collections(v: dict) -> dict[str, Collection]:
+    """Keys of modules/control/gcp/modules/transit, from its variables."""
+    transits = v.get("transits") or []
+    hubs = v.get("ncc_hubs") or []
+    c = _collections(
+        ("created_hubs", "ncc_hubs"),
+        ("star_hubs", "ncc_hubs[*].preset_topology"),
+        ("mesh_hubs", "ncc_hubs[*].preset_topology"),
+        ("avx_spokes_star", "transits[*].bgp_lan_subnets"),
+        ("avx_spokes_mesh", "transits[*].bgp_lan_subnets"),
+        ("ncc_spokes_star", "spokes"),
+        ("ncc_spokes_mesh", "spokes"),
+        ("bgp_lan_created", "transits[*].bgp_lan_subnets"),
+        ("bgp_lan_addresses", "transits[*].bgp_lan_subnets"),
+        ("bgp_lan", "transits[*].bgp_lan_subnets"),
+        ("transits", "transits"),
+        ("mgmt", "transits[*].mgmt_cidr"),
+        ("egress", "transits[*].egress_cidr"),
+        ("fws", "transits[*].fw_amount"),
+        ("bootstrap_xml", "transits[*].fw_amount"),
+        ("firenet", "transits[*].fw_amount"),
+        ("fw_associations", "transits[*].fw_amount"),
+        ("external_devices", "external_devices"),
+        ("inspection_policies", "transits[*].inspection_enabled"),
+        ("aviatrix_spokes", "aviatrix_spokes"),
+        ("lb_transits", "transits[*].external_lb_rules"),
+        ("lb_fws", "transits[*].external_lb_rules"),
+        ("lb_rules", "transits[*].external_lb_rules"),
+    )
+
+    hub_names = [h["name"] for h in hubs]
+    created = [h["name"] for h in hubs if h.get("create", True)]
+    topology = {h["name"]: h.get("preset_topology", "STAR") for h in hubs}
+    for name in created:
+        c["created_hubs"].keys[name] = f"hub:{name}"
+        group = "star_hubs" if topology[name] == "STAR" else "mesh_hubs"
+        c[group].keys[name] = f"hub:{name}"
+
+    fw_amounts = {t["gw_name"]: t.get("fw_amount") or 0 for t in transits}
+    inspection = {t["gw_name"]: t.get("inspection_enabled", False) for t in transits}
+    policies = []
+    for t in transits:
+        gw = t["gw_name"]
+        owner = f"transit:{gw}"
+        fw_amount = t.get("fw_amount") or 0
+        c["transits"].keys[gw] = owner
+        # Comparing a subnet object with "" is always true in the module.
+        for intf, subnet in (t.get("bgp_lan_subnets") or {}).items():
+            key = f"{gw}-bgp-lan-{intf}"
+            if intf in hub_names:
+                c["bgp_lan"].keys[key] = owner
+                star = topology[intf] == "STAR"
+                c["avx_spokes_star" if star else "avx_spokes_mesh"].keys[key] = owner
+            if intf in created:
+                c["bgp_lan_addresses"].keys[f"{key}-pri"] = owner
+                c["bgp_lan_addresses"].keys[f"{key}-ha"] = owner
+                if subnet.get("cidr"):
+                    c["bgp_lan_created"].keys[key] = owner
+            if subnet.get("cidr") and fw_amount > 0:
+                policies.append((key, gw))
+        if t.get("mgmt_cidr"):
+            c["mgmt"].keys[gw] = owner
+        if t.get("egress_cidr"):
+            c["egress"].keys[gw] = owner
+        if fw_amount > 0:
+            c["firenet"].keys[gw] = owner
+        # fw_ip_config defaults to a value whenever fw_amount > 0.
+        static_ips = t.get("fw_ip_config") is not None or fw_amount > 0
+        rules = t.get("external_lb_rules") or []
+        has_lb = bool(rules) and fw_amount > 0
+        if has_lb:
+            c["lb_transits"].keys[gw] = owner
+            for rule in rules:
+                c["lb_rules"].keys[f"{gw}-{rule['name']}"] = owner
+        for fw in _fw_keys(gw, fw_amount):
+            c["fws"].keys[fw] = owner
+            if static_ips:
+                c["bootstrap_xml"].keys[fw] = owner
+            if t.get("attach_firewall", True):
+                c["fw_associations"].keys[fw] = owner
+            if has_lb:
+                c["lb_fws"].keys[fw] = owner
+
+    for spoke in v.get("spokes") or []:
+        hub = spoke["ncc_hub"]
+        group = "ncc_spokes_star" if topology.get(hub) == "STAR" else "ncc_spokes_mesh"
+        c[group].keys[f"{spoke['vpc_name']}-{hub}"] = f"hub:{hub}"
+
+    devices = v.get("external_devices") or {}
+    for key in sorted(devices):
+        device = devices[key]
+        gw = device.get("transit_gw_name")
+        c["external_devices"].keys[key] = f"transit:{gw}"
+        if device.get("inspected_by_firenet") and fw_amounts.get(gw, 0) > 0:
+            policies.append((f"{gw}.{device.get('connection_name')}", gw))
+    for pair_key, gw in policies:
+        if inspection.get(gw, False):
+            c["inspection_policies"].keys[pair_key] = f"transit:{gw}"
+
+    spokes = v.get("aviatrix_spokes") or {}
+    for key in sorted(spokes):
+        owner = f"transit:{spokes[key].get('transit_gw_name')}"
+        c["aviatrix_spokes"].keys[key] = owner
+    return c
+
+
+GCP_RESOURCES: dict[str, Resource] = {
+    "google_network_connectivity_hub.ncc_hubs": Resource(
+        "google_network_connectivity_hub", "created_hubs", 0
+    ),
+    "google_network_connectivity_group.center_group": Resource(
+        "google_network_connectivity_group", "star_hubs", 1
+    ),
+    "google_network_connectivity_group.edge_group": Resource(
+        "google_network_connectivity_group", "star_hubs", 1
+    ),
+    "google_network_connectivity_group.default_group": Resource(
+        "google_network_connectivity_group", "mesh_hubs", 1
+    ),
+    "google_network_connectivity_spoke.avx_spokes_star": Resource(
+        "google_network_connectivity_spoke", "avx_spokes_star", 2
+    ),
+    "google_network_connectivity_spoke.avx_spokes_mesh": Resource(
+        "google_network_connectivity_spoke", "avx_spokes_mesh", 2
+    ),
+    "google_network_connectivity_spoke.ncc_spokes_star": Resource(
+        "google_network_connectivity_spoke", "ncc_spokes_star", 2
+    ),
+    "google_network_connectivity_spoke.ncc_spokes_mesh": Resource(
+        "google_network_connectivity_spoke", "ncc_spokes_mesh", 2
+    ),
+    "google_compute_network.bgp_lan_vpcs": Resource(
+        "google_compute_network", "created_hubs", 0
+    ),
+    "google_compute_subnetwork.bgp_lan_subnets": Resource(
+        "google_compute_subnetwork", "bgp_lan_created", 0
+    ),
+    "google_compute_router.bgp_lan_routers": Resource(
+        "google_compute_router", "bgp_lan_created", 0
+    ),
+    "google_compute_address.bgp_lan_addresses": Resource(
+        "google_compute_address", "bgp_lan_addresses", 0
+    ),
+    "google_compute_router_interface.bgp_lan_interfaces_pri": Resource(
+        "google_compute_router_interface", "bgp_lan", 1
+    ),
+    "google_compute_router_interface.bgp_lan_interfaces_ha": Resource(
+        "google_compute_router_interface", "bgp_lan", 1
+    ),
+    "google_compute_firewall.bgp_lan_bgp": Resource(
+        "google_compute_firewall", "created_hubs", 1
+    ),
+    "module.mc_transit": Resource("mc-transit", "transits", 1),
+    "google_compute_network.mgmt_vpcs": Resource("google_compute_network", "mgmt", 0),
+    "google_compute_subnetwork.mgmt_subnets": Resource(
+        "google_compute_subnetwork", "mgmt", 0
+    ),
+    "google_compute_network.egress_vpcs": Resource(
+        "google_compute_network", "egress", 0
+    ),
+    "google_compute_subnetwork.egress_subnets": Resource(
+        "google_compute_subnetwork", "egress", 0
+    ),
+    "google_compute_firewall.mgmt_firewall_rules": Resource(
+        "google_compute_firewall", "mgmt", 1
+    ),
+    "google_compute_firewall.egress_firewall_rules": Resource(
+        "google_compute_firewall", "egress", 1
+    ),
+    "module.swfw-modules_bootstrap": Resource("bootstrap", "fws", 0),
+    "google_storage_bucket_object.bootstrap_xml": Resource(
+        "google_storage_bucket_object", "bootstrap_xml", 1
+    ),
+    "module.pan_fw": Resource("vmseries", "fws", 3),
+    "aviatrix_firenet.firenet": Resource("aviatrix_firenet", "firenet", 2),
+    "aviatrix_firewall_instance_association.fw_associations": Resource(
+        "aviatrix_firewall_instance_association", "fw_associations", 4
+    ),
+    **{
+        f"google_compute_router_peer.bgp_lan_peers_{name}": Resource(
+            "google_compute_router_peer", "bgp_lan", 2
+        )
+        for name in ("pri", "ha", "pri_to_ha", "ha_to_pri")
+    },
+    "aviatrix_transit_external_device_conn.bgp_lan_connections": Resource(
+        "aviatrix_transit_external_device_conn", "bgp_lan", 3
+    ),
+    "aviatrix_transit_external_device_conn.external_device": Resource(
+        "aviatrix_transit_external_device_conn", "external_devices", 2
+    ),
+    "aviatrix_transit_firenet_policy.inspection_policies": Resource(
+        "aviatrix_transit_firenet_policy", "inspection_policies", 4
+    ),
+    "module.mc-spoke": Resource("mc-spoke", "aviatrix_spokes", 2),
+    "google_compute_health_check.ext_lb": Resource(
+        "google_compute_health_check", "lb_transits", 0
+    ),
+    "google_compute_network_endpoint_group.ext_lb": Resource(
+        "google_compute_network_endpoint_group", "lb_fws", 4
+    ),
+    "google_compute_network_endpoint.ext_lb": Resource(
+        "google_compute_network_endpoint", "lb_fws", 5
+    ),
+    "google_compute_backend_service.ext_lb": Resource(
+        "google_compute_backend_service", "lb_transits", 5
+    ),
+    "google_compute_url_map.ext_lb": Resource(
+        "google_compute_url_map", "lb_transits", 6
+    ),
+    "google_compute_target_http_proxy.ext_lb": Resource(
+        "google_compute_target_http_proxy", "lb_transits", 7
+    ),
+    "google_compute_global_address.ext_lb": Resource(
+        "google_compute_global_address", "lb_transits", 0
+    ),
+    "google_compute_global_forwarding_rule.ext_lb": Resource(
+        "google_compute_global_forwarding_rule", "lb_rules", 8
+    ),
+}
+
+
+# -----------------------------------------------------------------------------
+# Azure
+# -----------------------------------------------------------------------------
+def azure_collections(v: dict) -> dict[str, Collection]:
+    """Keys of modules/control/azure/modules/transit, from its variables."""
+    transits = v.get("transits") or {}
+    spokes = v.get("spokes") or {}
+    vnets = v.get("vnets") or {}
+    hubs = v.get("vwan_hubs") or {}
+    vwans = v.get("vwan_configs") or {}
+    c = _collections(
+        ("new_vwans", "vwan_configs"),
+        ("transits", "transits"),
+        ("vnet_rgs", "vnets"),
+        ("new_vnets", "vnets"),
+        ("private_subnets", "vnets[*].private_subnets"),
+        ("public_subnets", "vnets[*].public_subnets"),
+        ("private_route_tables", "vnets[*].private_subnets"),
+        ("public_route_tables", "vnets[*].public_subnets"),
+        ("private_associations", "vnets[*].private_subnets"),
+        ("public_associations", "vnets[*].public_subnets"),
+        ("vwan_hubs", "vwan_hubs"),
+        ("vwan_pairs", "transits[*].vwan_connections"),
+        ("transit_vwan_map", "transits[*].vwan_connections"),
+        ("spoke_vwan_map", "spokes[*].vwan_connections"),
+        ("bgp_spoke_vwan_map", "spokes[*].vwan_connections"),
+        ("vnets", "vnets"),
+        ("fws", "transits[*].fw_amount"),
+        ("file_share_fws", "transits[*].fw_amount"),
+        ("fw_associations", "transits[*].fw_amount"),
+        ("spokes", "spokes"),
+        ("hub_wait", "transits[*].vwan_connections"),
+        ("spoke_hub_wait", "spokes[*].vwan_connections"),
+        ("external_devices", "external_devices"),
+        ("inspection_policies", "transits[*].inspection_enabled"),
+    )
+
+    for key in sorted(vwans):
+        if not vwans[key].get("existing"):
+            c["new_vwans"].keys[key] = f"vwan:{key}"
+    for key in sorted(hubs):
+        c["vwan_hubs"].keys[key] = f"hub:{key}"
+
+    for key in sorted({**vnets, **spokes}):
+        if key in spokes:
+            c["vnet_rgs"].keys[key] = f"spoke:{key}"
+        elif not vnets[key].get("existing") and vnets[key].get("cidr") is not None:
+            c["vnet_rgs"].keys[key] = f"vnet:{key}"
+    for key in sorted(vnets):
+        vnet = vnets[key]
+        owner = f"vnet:{key}"
+        c["vnets"].keys[key] = owner
+        if vnet.get("existing") or vnet.get("cidr") is None:
+            continue
+        c["new_vnets"].keys[key] = owner
+        for kind in ("private", "public"):
+            subnets = vnet.get(f"{kind}_subnets") or []
+            for i in range(len(subnets)):
+                c[f"{kind}_subnets"].keys[f"{key}-{kind}-{i + 1}"] = owner
+            if subnets and not vnet.get("vwan_hub_name"):
+                c[f"{kind}_route_tables"].keys[key] = owner
+    # Associations look the vnet up by splitting the subnet key.
+    for kind in ("private", "public"):
+        for key, owner in c[f"{kind}_subnets"].keys.items():
+            vnet = vnets.get(key.split(f"-{kind}-")[0]) or {}
+            if not vnet.get("vwan_hub_name"):
+                c[f"{kind}_associations"].keys[key] = owner
+
+    def vwan_pairs(entries: dict, kind: str) -> dict[str, str]:
+        pairs = {}
+        for key in sorted(entries):
+            for idx, conn in enumerate(entries[key].get("vwan_connections") or []):
+                hub = conn.get("vwan_hub_name")
+                if hub and hub in hubs:
+                    pairs[f"{key}.{hub}.{idx}"] = f"{kind}:{key}"
+        return pairs
+
+    transit_pairs = vwan_pairs(transits, "transit")
+    spoke_pairs = vwan_pairs(spokes, "spoke")
+    c["transit_vwan_map"].keys.update(transit_pairs)
+    c["spoke_vwan_map"].keys.update(spoke_pairs)
+    c["vwan_pairs"].keys.update(transit_pairs)
+    c["vwan_pairs"].keys.update(spoke_pairs)
+    if c["vwan_pairs"].keys:
+        c["hub_wait"].keys[0] = "fleet"
+    if spoke_pairs:
+        c["spoke_hub_wait"].keys[0] = "fleet"
+    for pair_key, owner in spoke_pairs.items():
+        if spokes[owner.split(":", 1)[1]].get("enable_bgp"):
+            c["bgp_spoke_vwan_map"].keys[pair_key] = owner
+
+    policies = []
+    for key in sorted(transits):
+        t = transits[key]
+        owner = f"transit:{key}"
+        c["transits"].keys[key] = owner
+        for fw in _fw_keys(_stripped(key, "-vnet"), t.get("fw_amount")):
+            c["fws"].keys[fw] = owner
+            if t.get("bootstrap_type", "file_share") == "file_share":
+                c["file_share_fws"].keys[fw] = owner
+            if t.get("attach_firewall", True):
+                c["fw_associations"].keys[fw] = owner
+        if (t.get("fw_amount") or 0) > 0:
+            for conn in t.get("vwan_connections") or []:
+                hub = conn.get("vwan_hub_name")
+                if hub and hub in hubs:
+                    policies.append((f"{key}.{hub}", key))
+
+    devices = v.get("external_devices") or {}
+    for key in sorted(devices):
+        device = devices[key]
+        transit_key = device.get("transit_key")
+        c["external_devices"].keys[key] = f"transit:{transit_key}"
+        transit = transits.get(transit_key, {})
+        if device.get("inspected_by_firenet") and (transit.get("fw_amount") or 0) > 0:
+            pair_key = f"{transit_key}.{device.get('connection_name')}"
+            policies.append((pair_key, transit_key))
+    for pair_key, transit_key in policies:
+        if transits.get(transit_key, {}).get("inspection_enabled", False):
+            c["inspection_policies"].keys[pair_key] = f"transit:{transit_key}"
+
+    for key in sorted(spokes):
+        c["spokes"].keys[key] = f"spoke:{key}"
+    return c
+
+
+AZURE_RESOURCES: dict[str, Resource] = {
+    "azurerm_resource_group.vwan_rg": Resource(
+        "azurerm_resource_group", "new_vwans", 0
+    ),
+    "azurerm_resource_group.transit_rg": Resource(
+        "azurerm_resource_group", "transits", 0
+    ),
+    "azurerm_resource_group.vnet_rg": Resource("azurerm_resource_group", "vnet_rgs", 0),
+    "azurerm_virtual_wan.vwan": Resource("azurerm_virtual_wan", "new_vwans", 0),
+    "azurerm_virtual_network.vnet": Resource("azurerm_virtual_network", "new_vnets", 0),
+    "azurerm_subnet.private_subnet": Resource("azurerm_subnet", "private_subnets", 1),
+    "azurerm_subnet.public_subnet": Resource("azurerm_subnet", "public_subnets", 1),
+    "azurerm_route_table.private_route_table": Resource(
+        "azurerm_route_table", "private_route_tables", 0
+    ),
+    "azurerm_route.private_default_null": Resource(
+        "azurerm_route", "private_route_tables", 1
+    ),
+    "azurerm_subnet_route_table_association.private_subnet_association": Resource(
+        "azurerm_subnet_route_table_association", "private_associations", 2
+    ),
+    "azurerm_route_table.public_route_table": Resource(
+        "azurerm_route_table", "public_route_tables", 0
+    ),
+    "azurerm_subnet_route_table_association.public_subnet_association": Resource(
+        "azurerm_subnet_route_table_association", "public_associations", 2
+    ),
+    "azurerm_virtual_hub.hub": Resource("azurerm_virtual_hub", "vwan_hubs", 1),
+    "azurerm_virtual_hub_connection.transit_connection": Resource(
+        "azurerm_virtual_hub_connection", "vwan_pairs", 2
+    ),
+    "azurerm_virtual_hub_connection.vnet_connection": Resource(
+        "azurerm_virtual_hub_connection", "vnets", 2
+    ),
+    "module.mc-transit": Resource("mc-transit", "transits", 1),
+    "aviatrix_firenet.firenet": Resource("aviatrix_firenet", "transits", 2),
+    **{
+        f"azurerm_network_security_group.pan_{name}": Resource(
+            "azurerm_network_security_group", "fws", 0
+        )
+        for name in ("mgmt", "egress", "lan")
+    },
+    "module.bootstrap": Resource("bootstrap", "file_share_fws", 0),
+    "module.pan_fw": Resource("vmseries", "fws", 3),
+    **{
+        f"azurerm_network_interface_security_group_association.pan_{name}": Resource(
+            "azurerm_network_interface_security_group_association", "fws", 4
+        )
+        for name in ("mgmt", "egress", "lan")
+    },
+    "aviatrix_firewall_instance_association.fw_associations": Resource(
+        "aviatrix_firewall_instance_association", "fw_associations", 4
+    ),
+    "module.mc-spoke": Resource("mc-spoke", "spokes", 2),
+    "time_sleep.wait_for_hub_connection": Resource("time_sleep", "hub_wait", 3),
+    "time_sleep.wait_for_spoke_hub_connection": Resource(
+        "time_sleep", "spoke_hub_wait", 3
+    ),
+    "aviatrix_transit_external_device_conn.transit_external": Resource(
+        "aviatrix_transit_external_device_conn", "transit_vwan_map", 4
+    ),
+    "aviatrix_spoke_external_device_conn.spoke_external": Resource(
+        "aviatrix_spoke_external_device_conn", "bgp_spoke_vwan_map", 4
+    ),
+    "azurerm_virtual_hub_bgp_connection.peer_avx_prim": Resource(
+        "azurerm_virtual_hub_bgp_connection", "transit_vwan_map", 4
+    ),
+    "azurerm_virtual_hub_bgp_connection.peer_avx_ha": Resource(
+        "azurerm_virtual_hub_bgp_connection", "transit_vwan_map", 4
+    ),
+    "azurerm_virtual_hub_bgp_connection.spoke_peer_avx_prim": Resource(
+        "azurerm_virtual_hub_bgp_connection", "spoke_vwan_map", 4
+    ),
+    "azurerm_virtual_hub_bgp_connection.spoke_peer_avx_ha": Resource(
+        "azurerm_virtual_hub_bgp_connection", "spoke_vwan_map", 4
+    ),
+    "aviatrix_transit_external_device_conn.external_device": Resource(
+        "aviatrix_transit_external_device_conn", "external_devices", 2
+    ),
+    "aviatrix_transit_firenet_policy.inspection_policies": Resource(
+        "aviatrix_transit_firenet_policy", "inspection_policies", 5
+    ),
+}
+
+
+MODULES: dict[str, ModuleModel] = {
+    "aws": ModuleModel(
+        "aws", MODULES_DIR / "aws/modules/transit", AWS_RESOURCES, aws_collections
+    ),
+    "gcp": ModuleModel(
+        "gcp", MODULES_DIR / "gcp/modules/transit", GCP_RESOURCES, gcp_collections
+    ),
+    "azure": ModuleModel(
+        "azure",
+        MODULES_DIR / "azure/modules/transit",
+        AZURE_RESOURCES,
+        azure_collections,
+    ),
+}
+
+
+def module_blocks(path: Path | str) -> dict[str, str]:
+    """Resource and module blocks of a module directory: address to type."""
+    blocks = {}
+    for tf in sorted(Path(path).glob("*.tf")):
+        with open(tf) as f:
+            data = hcl2.load(f)
+        for block in data.get("resource", []):
+            for type_, named in block.items():
+                blocks.update({f"{type_}.{name}": type_ for name in named})
+        for block in data.get("module", []):
+            for name, body in block.items():
+                blocks[f"module.{name}"] = body.get("source", "")
+    return blocks
+
+
+def detect_module(variables: dict) -> str:
+    """Cloud of a tfvars file, from the variables only one module has.
+
+    Raises:
+        ValueError: If no module's variables are present.
+    """
+    if "ncc_hubs" in variables or "project_id" in variables:
+        return "gcp"
+    if any(k in variables for k in ("vwan_hubs", "vwan_configs", "subscription_id")):
+        return "azure"
+    if "tgws" in variables or "transits" in variables:
+        return "aws"
+    raise ValueError("Cannot tell the module from the variables; pass --module")
+
+
+# -----------------------------------------------------------------------------
+# Estimate
+# -----------------------------------------------------------------------------
+@dataclass(slots=True)
+class Instance:
+    """One resource (or child module) instance the apply will create."""
+
+    address: str
+    type: str
+    knob: str
+    owner: str
+    wave: int
+    seconds: float
+
+
+@dataclass(slots=True)
+class FanoutEstimate:
+    """Instances a tfvars file expands to, with their weighted cost."""
+
+    module: str
+    instances: list[Instance]
+    parallelism: int = 10
+
+    def by_type(self) -> list[dict]:
+        """Instances and seconds per type, heaviest first."""
+        return self._group(lambda i: i.type, "type")
+
+    def by_knob(self) -> list[dict]:
+        """Instances and seconds per input knob, heaviest first.
+
+        ``units`` counts the distinct keys the knob creates (pairs, firewalls,
+        ...) and ``per_unit`` is the seconds one more of them costs.
+        """
+        rows = self._group(lambda i: i.knob, "knob")
+        units: dict[str, set[str]] = defaultdict(set)
+        for i in self.instances:
+            units[i.knob].add(i.address.split("[", 1)[1])
+        for row in rows:
+            row["units"] = len(units[row["knob"]])
+            row["per_unit"] = row["seconds"] / row["units"]
+        return rows
+
+    def by_owner(self) -> dict[str, float]:
+        """Seconds per entity (transit, TGW, hub, ...)."""
+        seconds: dict[str, float] = defaultdict(float)
+        for i in self.instances:
+            seconds[i.owner] += i.seconds
+        return dict(seconds)
+
+    def _group(self, key: Callable[[Instance], str], name: str) -> list[dict]:
+        groups: dict[str, list[Instance]] = defaultdict(list)
+        for i in self.instances:
+            groups[key(i)].append(i)
+        rows = [
+            {
+                name: k,
+                "instances": len(items),
+                "seconds": sum(i.seconds for i in items),
+            }
+            for k, items in groups.items()
+        ]
+        return sorted(rows, key=lambda r: (-r["seconds"], r[name]))
+
+    def apply_seconds(self, instances: list[Instance] | None = None) -> float:
+        """Wall time of a fresh apply.
+
+        Waves run one after the other; within a wave, instances are scheduled
+        longest first over ``parallelism`` slots.
+        """
+        waves: dict[int, list[float]] = defaultdict(list)
+        for i in self.instances if instances is None else instances:
+            waves[i.wave].append(i.seconds)
+        total = 0.0
+        for wave in sorted(waves):
+            slots = [0.0] * max(1, self.parallelism)
+            for seconds in sorted(waves[wave], reverse=True):
+                heapq.heapreplace(slots, slots[0] + seconds)
+            total += max(slots)
+        return total
+
+    def batches(self, window_seconds: float) -> list[list[str]]:
+        """Entities grouped into applies that each fit the window.
+
+        Entities are spread longest first over the fewest batches whose
+        estimated applies fit; fleet-wide instances go in the first batch. An
+        entity that alone exceeds the window gets a batch of its own.
+        """
+        owners: dict[str, list[Instance]] = defaultdict(list)
+        for i in self.instances:
+            owners[i.owner].append(i)
+        ordered = sorted(
+            owners, key=lambda o: (-self.apply_seconds(owners[o]), o != "fleet", o)
+        )
+        for count in range(1, len(ordered) + 1):
+            groups: list[list[str]] = [[] for _ in range(count)]
+            loads = [(0.0, n) for n in range(count)]
+            for owner in ordered:
+                load, n = heapq.heappop(loads)
+                groups[n].append(owner)
+                seconds = self.apply_seconds([i for o in groups[n] for i in owners[o]])
+                heapq.heappush(loads, (seconds, n))
+            if all(load <= window_seconds for load, _ in loads):
+                break
+        return [sorted(g) for g in groups if g]
+
+    def to_dict(self) -> dict:
+        return {
+            "module": self.module,
+            "instances": len(self.instances),
+            "seconds": sum(i.seconds for i in self.instances),
+            "apply_seconds": self.apply_seconds(),
+            "parallelism": self.parallelism,
+            "by_type": self.by_type(),
+            "by_knob": self.by_knob(),
+        }
+
+
+def estimate(
+    variables: dict,
+    module: str | None = None,
+    latency: dict[str, float] | None = None,
+    parallelism: int = 10,
+) -> FanoutEstimate:
+    """Instances a module creates from the given variables.
+
+    Args:
+        variables: Parsed tfvars of the root module.
+        module: ``aws``, ``gcp`` or ``azure``; detected when None.
+        latency: Seconds per type, overriding ``LATENCY``.
+        parallelism: terraform ``-parallelism`` for the apply estimate.
+    """
+    model = MODULES[module or detect_module(variables)]
+    latency = {**LATENCY, **(latency or {})}
+    collections = model.collections(variables)
+    instances = []
+    for address, resource in model.resources.items():
+        collection = collections[resource.collection]
+        seconds = latency.get(resource.type, DEFAULT_LATENCY)
+        instances += [
+            Instance(
+                f"{address}[{json.dumps(key)}]",
+                resource.type,
+                collection.knob,
+                owner,
+                resource.wave,
+                seconds,
+            )
+            for key, owner in collection.keys.items()
+        ]
+    return FanoutEstimate(model.name, instances, parallelism)
+
+
+def load_tfvars(path: Path | str) -> dict:
+    """Variables of a ``.tfvars`` or ``.tfvars.json`` file."""
+    path = Path(path)
+    with open(path) as f:
+        return json.load(f) if path.suffix == ".json" else hcl2.load(f)
+
+
+MODULE_TYPES = {
+    address.split(".", 1)[1]: resource.type
+    for model in MODULES.values()
+    for address, resource in model.resources.items()
+    if address.startswith("module.")
+}
+
+
+def calibrate(spans: dict, latency: dict[str, float] | None = None) -> dict:
+    """Median observed creation time per type from an apply log.
+
+    Resources are keyed by their type. A child module instance (``mc-transit``
+    and the like) takes the time from its first resource's start to its last
+    resource's end, and is keyed by the module's name in ``MODULE_TYPES``.
+
+    Args:
+        spans: ``tools.critical_path.parse_apply_log`` output.
+        latency: Values to start from; types without observations keep them.
+    """
+    durations: dict[str, list[float]] = defaultdict(list)
+    modules: dict[str, list[float]] = {}
+    for address, span in spans.items():
+        if span.action != "create" or span.status != "complete":
+            continue
+        # Drop the root module's call to the transit module.
+        parts = re.sub(r"^module\.transit(\[[^\]]*\])?\.", "", address)
+        match = re.match(r"^module\.([^.\[]+)(\[[^\]]*\])?\.", parts)
+        if match:
+            bounds = modules.setdefault(match.group(0), [span.start, span.end])
+            bounds[0] = min(bounds[0], span.start)
+            bounds[1] = max(bounds[1], span.end)
+        else:
+            durations[parts.split(".", 1)[0]].append(span.duration)
+    for prefix, (start, end) in modules.items():
+        name = prefix.split(".")[1].split("[")[0]
+        type_ = MODULE_TYPES.get(name)
+        if type_:
+            durations[type_].append(end - start)
+    result = dict(latency or LATENCY)
+    result.update({t: statistics.median(d) for t, d in durations.items()})
+    return result
+
+
+def _format_duration(seconds: float) -> str:
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+def format_report(result: FanoutEstimate, top: int = 10) -> str:
+    total = sum(i.seconds for i in result.instances)
+    lines = [
+        f"{result.module}: {len(result.instances)} instances, "
+        f"{_format_duration(total)} of work, "
+        f"~{_format_duration(result.apply_seconds())} at "
+        f"-parallelism={result.parallelism}",
+        "",
+        f"{'type':<54} {'count':>6} {'work':>7}",
+    ]
+    for row in result.by_type()[:top]:
+        lines.append(
+            f"{row['type']:<54} {row['instances']:>6} "
+            f"{_format_duration(row['seconds']):>7}"
+        )
+    lines += ["", f"{'knob':<34} {'units':>6} {'count':>6} {'work':>7} {'per unit':>9}"]
+    for row in result.by_knob()[:top]:
+        lines.append(
+            f"{row['knob']:<34} {row['units']:>6} {row['instances']:>6} "
+            f"{_format_duration(row['seconds']):>7} "
+            f"{_format_duration(row['per_unit']):>9}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.fanout",
+        description="Estimate the resources a transit module tfvars file creates.",
+    )
+    parser.add_argument("tfvars", type=Path, help=".tfvars or .tfvars.json file")
+    parser.add_argument("--module", choices=sorted(MODULES), help="default: detect")
+    parser.add_argument("--parallelism", type=int, default=10)
+    parser.add_argument("--timings", type=Path, help="apply -json log to calibrate")
+    parser.add_argument(
+        "--window", type=float, help="change window in minutes: propose batches"
+    )
+    parser.add_argument("--top", type=int, default=10, help="rows per table")
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args(argv)
+
+    latency = None
+    if args.timings:
+        from tools.critical_path import parse_apply_log
+
+        with open(args.timings) as f:
+            latency = calibrate(parse_apply_log(f))
+
+    try:
+        result = estimate(
+            load_tfvars(args.tfvars), args.module, latency, args.parallelism
+        )
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    batches = result.batches(args.window * 60) if args.window else None
+
+    if args.json:
+        out = result.to_dict()
+        if batches is not None:
+            out["batches"] = batches
+        print(json.dumps(out, indent=2))
+        return 0
+    print(format_report(result, args.top))
+    if batches is not None:
+        print(f"\n{len(batches)} batch(es) of at most {args.window:.0f}m:")
+        for n, batch in enumerate(batches, 1):
+            print(f"  {n}: {', '.join(batch)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
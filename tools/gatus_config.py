@@ -0,0 +1,405 @@
+"""Generate sharded Gatus dashboard configs from site state outputs.
+
+The ``monitoring/`` stage of the AWS/GCP test deployment renders a single
+Gatus config in which one dashboard probes the health, ICMP and SSH endpoints
+of every other site at a 1 s interval. That is fine for a handful of sites but
+puts every probe of the fleet on one VM. This tool splits the sites into
+shards (by cloud, by region, and/or by a maximum shard size); one site per shard
+runs the dashboard for its members. Dashboards also check each other's
+health, so a dead dashboard is still noticed. Probe intervals grow with the
+number of endpoints a dashboard carries. Probes that would hit the same target
+twice (for example two sites sharing an address) are emitted only once.
+
+The configs are written as ``gatus-<shard>.yaml`` next to a ``shards.json``
+manifest. Pointing the monitoring stage's ``gatus_shards_dir`` variable at that
+directory uploads each config to its dashboard.
+
+Usage:
+    python -m tools.gatus_config tests/test_aws_gcp/site/terraform.tfstate \\
+        --shard-by region --out tests/test_aws_gcp/monitoring/shards
+    python -m tools.gatus_config --sites fleet.json --shard-by cloud \\
+        --max-sites 50 --out shards/
+"""
+
+import argparse
+import json
+import math
+import re
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+MANIFEST = "shards.json"
+GATUS_PORT = 8080
+
+# Gatus interval steps, in seconds, that probes are rounded up to.
+INTERVAL_STEPS = (1, 2, 5, 10, 15, 30, 60, 120, 300)
+
+SHARD_KEYS = ("none", "cloud", "region")
+
+
+@dataclass(frozen=True, slots=True)
+class Site:
+    """A monitored site: one public (Gatus) VM and one private VM."""
+
+    name: str
+    cloud: str
+    region: str
+    public_ip: str
+    private_ip: str
+
+    @property
+    def label(self) -> str:
+        """Endpoint name prefix, e.g. ``aws-site-2-us-west-2``."""
+        return f"{self.cloud}-{self.name}-{self.region}"
+
+
+@dataclass(frozen=True, slots=True)
+class Probe:
+    """One Gatus endpoint."""
+
+    name: str
+    group: str
+    url: str
+    conditions: tuple[str, ...]
+    comment: str = ""
+
+
+@dataclass(slots=True)
+class Shard:
+    """A dashboard site and the sites it monitors."""
+
+    id: str
+    dashboard: Site
+    members: list[Site]
+    peers: list[Site] = field(default_factory=list)
+    probes: list[Probe] = field(default_factory=list)
+    interval: int = 1
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.dashboard.public_ip}:{GATUS_PORT}"
+
+
+def _value(outputs: dict, name: str):
+    output = outputs.get(name)
+    if isinstance(output, dict) and "value" in output:
+        return output["value"]
+    return output
+
+
+def sites_from_outputs(outputs: dict) -> list[Site]:
+    """Build the site list from the site stage's outputs.
+
+    Args:
+        outputs: Output map of the ``site`` stage, either the ``outputs`` of a
+            state file or ``terraform output -json`` (``{name: {"value": ...}}``).
+
+    Returns:
+        All AWS sites, then the GCP site, each with its public and private VM.
+    """
+    sites = []
+    aws_sites = _value(outputs, "aws_sites") or {}
+    aws_config = _value(outputs, "aws_site_config") or {}
+    for name, site in sorted(aws_sites.items()):
+        sites.append(
+            Site(
+                name=name,
+                cloud="aws",
+                region=aws_config.get(name, {}).get("region", ""),
+                public_ip=site["vm"]["public_vm_public_ip"],
+                private_ip=site["vm"]["private_vm_private_ip"],
+            )
+        )
+    gcp_vm = _value(outputs, "gcp_vm")
+    if gcp_vm:
+        sites.append(
+            Site(
+                name=_value(outputs, "gcp_vm_vpc_name"),
+                cloud="gcp",
+                region=(_value(outputs, "gcp_vpc_info") or {}).get("region", ""),
+                public_ip=gcp_vm["public_vm_public_ip"],
+                private_ip=gcp_vm["private_vm_private_ip"],
+            )
+        )
+    return sites
+
+
+def load_sites(path: Path) -> list[Site]:
+    """Load sites from a state file, an output map or a plain site list.
+
+    A plain site list is a JSON array of objects with the ``Site`` fields, for
+    fleets whose sites do not come from the ``site`` stage.
+    """
+    data = json.loads(Path(path).read_text())
+    if isinstance(data, list):
+        return [Site(**site) for site in data]
+    if "outputs" in data and "resources" in data:
+        data = data["outputs"]
+    return sites_from_outputs(data)
+
+
+def scaled_interval(endpoints: int, max_rate: float, base: int = 1) -> int:
+    """Probe interval keeping a dashboard under ``max_rate`` probes per second.
+
+    Args:
+        endpoints: Endpoints probed by the dashboard.
+        max_rate: Probes per second one dashboard VM should sustain.
+        base: Shortest interval in seconds.
+
+    Returns:
+        The smallest step of INTERVAL_STEPS that is at least ``base`` and
+        ``endpoints / max_rate`` seconds (the largest step if none is).
+    """
+    needed = max(base, math.ceil(endpoints / max_rate))
+    return next((step for step in INTERVAL_STEPS if step >= needed), needed)
+
+
+def _shard_id(key: str) -> str:
+    return re.sub(r"[^a-z0-9-]+", "-", key.lower()).strip("-") or "all"
+
+
+def _group_sites(sites: list[Site], shard_by: str) -> dict[str, list[Site]]:
+    groups: dict[str, list[Site]] = defaultdict(list)
+    for site in sites:
+        if shard_by == "cloud":
+            key = site.cloud
+        elif shard_by == "region":
+            key = f"{site.cloud}-{site.region}"
+        else:
+            key = "all"
+        groups[_shard_id(key)].append(site)
+    return dict(sorted(groups.items()))
+
+
+def _site_probes(site: Site, group: str) -> list[Probe]:
+    return [
+        Probe(
+            f"{site.label}-gatus",
+            group,
+            f"http://{site.public_ip}:{GATUS_PORT}/health",
+            ("[STATUS] == 200", "[RESPONSE_TIME] < 5000"),
+            comment=f"{site.cloud.upper()} {site.name} monitoring",
+        ),
+        Probe(
+            f"{site.label}-icmp",
+            group,
+            f"icmp://{site.private_ip}",
+            ("[CONNECTED] == true",),
+        ),
+        Probe(
+            f"{site.label}-ssh",
+            group,
+            f"tcp://{site.private_ip}:22",
+            ("[CONNECTED] == true",),
+        ),
+    ]
+
+
+def _dashboard_probes(shard: Shard) -> list[Probe]:
+    dashboard = shard.dashboard
+    probes = [
+        Probe(
+            dashboard.label,
+            "local",
+            f"http://localhost:{GATUS_PORT}/health",
+            ("[STATUS] == 200",),
+            comment="Self health check",
+        ),
+        Probe(
+            f"{dashboard.label}-icmp",
+            "local",
+            f"icmp://{dashboard.private_ip}",
+            ("[CONNECTED] == true",),
+            comment="Dashboard site private VM ICMP",
+        ),
+    ]
+    for site in shard.members:
+        if site != dashboard:
+            probes += _site_probes(site, site.cloud)
+    for peer in shard.peers:
+        probes.append(
+            Probe(
+                f"{peer.label}-dashboard",
+                "dashboards",
+                f"http://{peer.public_ip}:{GATUS_PORT}/health",
+                ("[STATUS] == 200", "[RESPONSE_TIME] < 5000"),
+                comment=f"Peer dashboard {peer.name}",
+            )
+        )
+    return probes
+
+
+def dedupe_probes(probes: list[Probe]) -> list[Probe]:
+    """Drop probes that repeat the URL and conditions of an earlier probe."""
+    seen = set()
+    unique = []
+    for probe in probes:
+        key = (probe.url, probe.conditions)
+        if key not in seen:
+            seen.add(key)
+            unique.append(probe)
+    return unique
+
+
+def plan_shards(
+    sites: list[Site],
+    shard_by: str = "none",
+    max_sites: int | None = None,
+    dashboards: dict[str, str] | None = None,
+    max_rate: float = 10.0,
+    base_interval: int = 1,
+) -> list[Shard]:
+    """Split sites into dashboard shards and build each shard's probes.
+
+    Args:
+        sites: Sites to monitor.
+        shard_by: ``none`` (one dashboard), ``cloud`` or ``region``.
+        max_sites: Split groups larger than this into several shards.
+        dashboards: Preferred dashboard site name per shard id. Otherwise the
+            first site of a shard (in ``sites`` order) runs its dashboard.
+        max_rate: Probes per second one dashboard VM should sustain.
+        base_interval: Shortest probe interval in seconds.
+
+    Returns:
+        Shards ordered by id, with probes and interval filled in.
+
+    Raises:
+        ValueError: If ``shard_by`` is unknown or ``max_sites`` is below 1.
+    """
+    if shard_by not in SHARD_KEYS:
+        raise ValueError(f"shard_by must be one of {SHARD_KEYS}, got {shard_by!r}")
+    if max_sites is not None and max_sites < 1:
+        raise ValueError("max_sites must be at least 1")
+    dashboards = dashboards or {}
+
+    shards = []
+    for key, members in _group_sites(sites, shard_by).items():
+        size = max_sites or len(members)
+        chunks = [members[i : i + size] for i in range(0, len(members), size)]
+        for index, chunk in enumerate(chunks):
+            shard_id = key if len(chunks) == 1 else f"{key}-{index + 1}"
+            preferred = dashboards.get(shard_id)
+            dashboard = next((s for s in chunk if s.name == preferred), chunk[0])
+            shards.append(Shard(shard_id, dashboard, chunk))
+
+    for shard in shards:
+        shard.peers = [s.dashboard for s in shards if s is not shard]
+        shard.probes = dedupe_probes(_dashboard_probes(shard))
+        shard.interval = scaled_interval(len(shard.probes), max_rate, base_interval)
+    return shards
+
+
+def _quote(value: str) -> str:
+    # JSON strings are valid double-quoted YAML scalars.
+    return json.dumps(value)
+
+
+def render_config(shard: Shard) -> str:
+    """Render a shard's Gatus config as YAML."""
+    lines = [
+        "# Gatus Dashboard Configuration",
+        f"# Auto-generated by tools.gatus_config (shard {shard.id}, "
+        f"dashboard {shard.dashboard.name}, {len(shard.members)} sites)",
+        "",
+        "endpoints:",
+    ]
+    interval = f"{shard.interval}s"
+    for probe in shard.probes:
+        if probe.comment:
+            lines.append(f"  # {probe.comment}")
+        lines += [
+            f"  - name: {_quote(probe.name)}",
+            f"    group: {probe.group}",
+            f"    url: {_quote(probe.url)}",
+            f"    interval: {interval}",
+            "    conditions:",
+            *(f"      - {_quote(condition)}" for condition in probe.conditions),
+            "",
+        ]
+    return "\n".join(lines)
+
+
+def write_shards(shards: list[Shard], out_dir: Path) -> Path:
+    """Write one config per shard and the ``shards.json`` manifest.
+
+    Configs of shards that no longer exist are removed.
+
+    Returns:
+        Path of the manifest.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    for shard in shards:
+        config = f"gatus-{shard.id}.yaml"
+        (out_dir / config).write_text(render_config(shard))
+        manifest[shard.id] = {
+            "dashboard": shard.dashboard.name,
+            "cloud": shard.dashboard.cloud,
+            "host": shard.dashboard.public_ip,
+            "url": shard.url,
+            "config": config,
+            "sites": [site.name for site in shard.members],
+            "endpoints": [probe.name for probe in shard.probes],
+            "interval": shard.interval,
+        }
+    for stale in out_dir.glob("gatus-*.yaml"):
+        if stale.name not in {entry["config"] for entry in manifest.values()}:
+            stale.unlink()
+    path = out_dir / MANIFEST
+    path.write_text(json.dumps({"shards": manifest}, indent=2) + "\n")
+    return path
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.gatus_config",
+        description="Generate sharded Gatus dashboard configs from site outputs.",
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "state", nargs="?", type=Path, help="site state file or output -json file"
+    )
+    source.add_argument("--sites", type=Path, help="JSON list of sites")
+    parser.add_argument("--shard-by", choices=SHARD_KEYS, default="none")
+    parser.add_argument("--max-sites", type=int, help="most sites per dashboard")
+    parser.add_argument(
+        "--dashboard",
+        action="append",
+        default=[],
+        metavar="SHARD=SITE",
+        help="dashboard site of a shard (repeatable)",
+    )
+    parser.add_argument(
+        "--max-rate", type=float, default=10.0, help="probes/s per dashboard"
+    )
+    parser.add_argument("--interval", type=int, default=1, help="shortest interval")
+    parser.add_argument("--out", type=Path, required=True, help="output directory")
+    args = parser.parse_args(argv)
+
+    sites = load_sites(args.sites or args.state)
+    if not sites:
+        parser.error("no sites found")
+    shards = plan_shards(
+        sites,
+        shard_by=args.shard_by,
+        max_sites=args.max_sites,
+        dashboards=dict(item.split("=", 1) for item in args.dashboard),
+        max_rate=args.max_rate,
+        base_interval=args.interval,
+    )
+    manifest = write_shards(shards, args.out)
+    for shard in shards:
+        print(
+            f"{shard.id}: {shard.dashboard.name} ({shard.url}) "
+            f"{len(shard.members)} sites, {len(shard.probes)} endpoints "
+            f"every {shard.interval}s"
+        )
+    print(f"wrote {manifest}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
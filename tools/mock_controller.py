@@ -0,0 +1,629 @@
+"""Local stand-in for the Aviatrix controller API, for offline testing.
+
+Serves the controller calls the ``segmentation`` and ``dcf`` modules and the
+Python tooling make against ``/v2/api`` (``/v1/api`` is accepted as well):
+
+- ``login``: checks the username and password, returns a CID
+- ``list_site2cloud``: ``results.connections`` from the fixtures
+- ``list_primary_and_ha_gateways``: transit and spoke gateways, filtered by
+  ``gateway_type`` (``transit`` or ``spoke``) when given; ``list_transit_gateways``
+  and ``list_spoke_gateways`` are shorthands
+
+Requests may be JSON, form-encoded or query-string encoded, like the real API.
+Every action other than ``login`` requires a valid CID. Responses follow the
+controller's ``{"return": ..., "results": ... | "reason": ...}`` envelope, with
+only the fields the modules read. List responses carry an ``ETag`` and honour
+``If-None-Match``, for exercising conditional requests.
+
+Latency, rate limits, errors and CID expiry can be injected to see how callers
+behave against a slow or overloaded controller. By default the fixtures hold
+5,000 site2cloud connections spread over a few network domains.
+
+Usage:
+    python -m tools.mock_controller --port 8443 --latency 0.2 --rate-limit 20
+    python -m tools.mock_controller --site2cloud 5000 --dump-fixtures s2c.json
+    python -m tools.mock_controller --fixtures s2c.json --certfile cert.pem \\
+        --keyfile key.pem --port 443
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import secrets
+import ssl
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+API_PATHS = ("/v2/api", "/v1/api")
+CID_EXPIRED = "CID is invalid or expired."
+
+DEFAULT_DOMAINS = ("prod", "non-prod", "dev", "shared-services")
+
+# Aviatrix cloud_type values used in generated gateways.
+CLOUD_TYPES = {"aws": 1, "gcp": 4, "azure": 8}
+
+_REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+}
+
+
+@dataclass(slots=True)
+class Fixtures:
+    """Controller data served by the mock."""
+
+    transit_gateways: list[dict] = field(default_factory=list)
+    spoke_gateways: list[dict] = field(default_factory=list)
+    site2cloud: list[dict] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: Path | str) -> "Fixtures":
+        """Load fixtures from a JSON file written by ``dump``."""
+        data = json.loads(Path(path).read_text())
+        return cls(
+            transit_gateways=data.get("transit_gateways", []),
+            spoke_gateways=data.get("spoke_gateways", []),
+            site2cloud=data.get("site2cloud", []),
+        )
+
+    def dump(self, path: Path | str) -> None:
+        """Write the fixtures to a JSON file."""
+        Path(path).write_text(json.dumps(asdict(self), indent=1) + "\n")
+
+
+def _gateway(name: str, cloud: str, region: str, asn: int, **extra) -> dict:
+    return {
+        "gw_name": name,
+        "cloud_type": CLOUD_TYPES[cloud],
+        "vpc_reg": region,
+        "vpc_id": f"vpc-{name}",
+        "local_as_number": str(asn),
+        "is_hagw": name.endswith("-hagw"),
+        **extra,
+    }
+
+
+def generate_fixtures(
+    site2cloud: int = 5000,
+    transits_per_cloud: int = 2,
+    spokes_per_transit: int = 4,
+    domains: tuple[str, ...] = DEFAULT_DOMAINS,
+    seed: int = 0,
+) -> Fixtures:
+    """Generate a deterministic fleet of gateways and site2cloud connections.
+
+    Every transit gateway has an HA peer (``<name>-hagw``). Spokes are named
+    ``<cloud>-<domain>-spoke-<n>`` and attached to one transit. Most site2cloud
+    connections are named ``external-<domain>-<n>`` and are BGP connections on
+    a transit pair; the rest exercise the filters of the segmentation module
+    (non-external names, static tunnels, BGP disabled).
+
+    Args:
+        site2cloud: Number of site2cloud connections.
+        transits_per_cloud: Primary transit gateways per cloud.
+        spokes_per_transit: Spoke gateways attached to each primary transit.
+        domains: Network domain names embedded in connection and spoke names.
+        seed: Random seed; the same arguments always give the same fixtures.
+
+    Returns:
+        The generated fixtures.
+    """
+    rng = random.Random(seed)
+    regions = {"aws": "us-east-1", "gcp": "us-central1", "azure": "East US"}
+    fixtures = Fixtures()
+    primaries = []
+    asn = 65000
+    for cloud, region in regions.items():
+        for t in range(1, transits_per_cloud + 1):
+            name = f"{cloud}-transit-{t}"
+            asn += 1
+            primaries.append(name)
+            fixtures.transit_gateways += [
+                _gateway(name, cloud, region, asn),
+                _gateway(f"{name}-hagw", cloud, region, asn),
+            ]
+            for s in range(1, spokes_per_transit + 1):
+                domain = domains[(t + s) % len(domains)]
+                fixtures.spoke_gateways.append(
+                    _gateway(
+                        f"{cloud}-{domain}-spoke-{t}{s}",
+                        cloud,
+                        region,
+                        asn + 1000 * s,
+                        transit_gw=f"{name}~{name}-hagw",
+                    )
+                )
+
+    for i in range(site2cloud):
+        transit = rng.choice(primaries)
+        kind = rng.random()
+        domain = rng.choice(domains)
+        name = f"external-{domain}-{i:05d}" if kind < 0.9 else f"partner-{i:05d}"
+        bgp = kind < 0.95
+        fixtures.site2cloud.append(
+            {
+                "name": name,
+                "vpc_id": f"vpc-{transit}",
+                "gw_name": f"{transit},{transit}-hagw",
+                "gateway_list": [transit, f"{transit}-hagw"],
+                "tunnel_type": "Transit_BGP" if bgp else "policy",
+                "bgp_status": "enabled" if bgp else "disabled",
+                "bgp_transit": bgp,
+                "remote_gateway_ip": f"203.0.{i // 250 % 256}.{i % 250 + 1}",
+                "status": "Up" if rng.random() < 0.98 else "Down",
+            }
+        )
+    return fixtures
+
+
+@dataclass(slots=True)
+class Faults:
+    """Faults injected into responses.
+
+    Attributes:
+        latency: Seconds added to every response.
+        jitter: Extra uniformly random seconds, up to this value.
+        action_latency: Seconds added per action (e.g. ``list_site2cloud``),
+            on top of ``latency``.
+        rate_limit: Sustained requests per second; more get HTTP 429.
+        burst: Requests allowed at once before ``rate_limit`` applies.
+        error_rate: Fraction of requests answered with ``error_status``.
+        error_status: HTTP status of injected errors.
+        error_actions: Actions that may fail (empty: all).
+        cid_ttl: Seconds a CID stays valid (None: until the server stops).
+        seed: Random seed for jitter and errors.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    action_latency: dict[str, float] = field(default_factory=dict)
+    rate_limit: float | None = None
+    burst: int = 10
+    error_rate: float = 0.0
+    error_status: int = 500
+    error_actions: tuple[str, ...] = ()
+    cid_ttl: float | None = None
+    seed: int | None = None
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token; return 0, or the seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+def parse_request_body(body: bytes, content_type: str) -> dict:
+    """Decode a JSON or form-encoded request body into a parameter dict."""
+    if not body:
+        return {}
+    text = body.decode("utf-8", "replace")
+    if "json" in content_type or text.lstrip().startswith("{"):
+        data = json.loads(text)
+        if not isinstance(data, dict):
+            raise ValueError("request body must be a JSON object")
+        return data
+    return dict(parse_qsl(text, keep_blank_values=True))
+
+
+class MockController:
+    """Asyncio HTTP server answering a subset of the controller API.
+
+    Use ``start``/``aclose`` from a running event loop, or ``start_in_thread``
+    (or the ``with`` statement) to serve from a background thread while
+    synchronous code such as terraform or ``requests`` talks to it.
+
+    Usage:
+        with MockController(faults=Faults(latency=0.5)) as controller:
+            session.post(f"{controller.base_url}/v2/api", json={...})
+        print(controller.stats)
+    """
+
+    def __init__(
+        self,
+        fixtures: Fixtures | None = None,
+        faults: Faults | None = None,
+        username: str = "admin",
+        password: str = "password",
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ssl_context: ssl.SSLContext | None = None,
+    ) -> None:
+        """Initialize the mock.
+
+        Args:
+            fixtures: Data to serve (default: ``generate_fixtures()``).
+            faults: Faults to inject (default: none).
+            username: Username accepted by ``login``.
+            password: Password accepted by ``login``.
+            host: Address to listen on.
+            port: Port to listen on (0 picks a free port).
+            ssl_context: Serve HTTPS with this context.
+        """
+        self.fixtures = fixtures if fixtures is not None else generate_fixtures()
+        self.faults = faults or Faults()
+        self.username = username
+        self.password = password
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.stats: Counter[str] = Counter()
+        self._cids: dict[str, float] = {}
+        self._rng = random.Random(self.faults.seed)
+        self._bucket = (
+            _TokenBucket(self.faults.rate_limit, self.faults.burst)
+            if self.faults.rate_limit
+            else None
+        )
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: set[asyncio.Task] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        scheme = "https" if self.ssl_context else "http"
+        return f"{scheme}://{self.host}:{self.port}"
+
+    # -- lifecycle -----------------------------------------------------------
+
+    async def start(self) -> None:
+        """Start listening on the current event loop."""
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, ssl=self.ssl_context
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def aclose(self) -> None:
+        """Stop listening, drop open connections and wait for the server to close."""
+        if self._server is None:
+            return
+        self._server.close()
+        for task in list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    def start_in_thread(self, timeout: float = 10) -> str:
+        """Serve from a daemon thread running its own event loop.
+
+        Returns:
+            The base URL of the server.
+        """
+        started = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def run() -> None:
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True, name="mock-ctrl")
+        self._thread.start()
+        if not started.wait(timeout):
+            raise RuntimeError("mock controller did not start")
+        return self.base_url
+
+    def stop(self) -> None:
+        """Stop a server started with ``start_in_thread``."""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.aclose(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self._loop.close()
+        self._loop = self._thread = None
+
+    def __enter__(self) -> "MockController":
+        self.start_in_thread()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # -- HTTP ------------------------------------------------------------------
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                method, target, version = request_line.split(" ", 2)
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                body = await reader.readexactly(length) if length else b""
+
+                status, data, extra = await self.respond(method, target, headers, body)
+                keep_alive = headers.get("connection", "").lower() != "close" and (
+                    version == "HTTP/1.1"
+                    or headers.get("connection", "").lower() == "keep-alive"
+                )
+                response_headers = {
+                    "Content-Type": "application/json",
+                    "Content-Length": str(len(data)),
+                    "Connection": "keep-alive" if keep_alive else "close",
+                    **extra,
+                }
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n".encode()
+                    + "".join(
+                        f"{k}: {v}\r\n" for k, v in response_headers.items()
+                    ).encode()
+                    + b"\r\n"
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ValueError, ConnectionError, asyncio.LimitOverrunError):
+            return
+        except asyncio.CancelledError:
+            return  # closed by aclose()
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def respond(
+        self, method: str, target: str, headers: dict[str, str], body: bytes
+    ) -> tuple[int, bytes, dict[str, str]]:
+        """Answer one request.
+
+        Successful list responses carry an ``ETag``; a request whose
+        ``If-None-Match`` matches it gets an empty 304 instead of the list.
+
+        Args:
+            method: HTTP method.
+            target: Request target (path and query string).
+            headers: Request headers with lower-cased names.
+            body: Request body.
+
+        Returns:
+            HTTP status, JSON body and extra response headers.
+        """
+        status, payload, extra = await self._respond(target, headers, body)
+        data = json.dumps(payload).encode()
+        if status == 200 and payload.get("return") and "CID" not in payload:
+            etag = f'"{hashlib.sha1(data).hexdigest()}"'
+            extra["ETag"] = etag
+            if headers.get("if-none-match") == etag:
+                self.stats["not_modified"] += 1
+                return 304, b"", extra
+        return status, data, extra
+
+    async def _respond(
+        self, target: str, headers: dict[str, str], body: bytes
+    ) -> tuple[int, dict, dict[str, str]]:
+        url = urlsplit(target)
+        if url.path.rstrip("/") not in API_PATHS:
+            self.stats["not_found"] += 1
+            return 404, {"return": False, "reason": "Not found"}, {}
+        try:
+            params = dict(parse_qsl(url.query))
+            params.update(parse_request_body(body, headers.get("content-type", "")))
+        except ValueError as e:
+            self.stats["bad_request"] += 1
+            return 400, {"return": False, "reason": f"Invalid request: {e}"}, {}
+
+        action = str(params.get("action", ""))
+        self.stats[action or "no_action"] += 1
+        faults = self.faults
+
+        if self._bucket is not None:
+            wait = self._bucket.take()
+            if wait:
+                self.stats["rate_limited"] += 1
+                payload = {"return": False, "reason": "Rate limit exceeded"}
+                return 429, payload, {"Retry-After": str(max(1, round(wait)))}
+
+        delay = faults.latency + faults.action_latency.get(action, 0.0)
+        if faults.jitter:
+            delay += self._rng.uniform(0, faults.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if (
+            faults.error_rate
+            and (not faults.error_actions or action in faults.error_actions)
+            and self._rng.random() < faults.error_rate
+        ):
+            self.stats["errors"] += 1
+            reason = f"Injected error for action {action}"
+            return faults.error_status, {"return": False, "reason": reason}, {}
+
+        return 200, self.dispatch(action, params), {}
+
+    # -- API -------------------------------------------------------------------
+
+    def _cid_valid(self, cid) -> bool:
+        expires = self._cids.get(str(cid))
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            del self._cids[str(cid)]
+            return False
+        return True
+
+    def dispatch(self, action: str, params: dict) -> dict:
+        """Answer an API action with the controller's response envelope."""
+        if action == "login":
+            if (
+                params.get("username") != self.username
+                or params.get("password") != self.password
+            ):
+                return {"return": False, "reason": "Invalid username or password."}
+            cid = secrets.token_hex(16)
+            ttl = self.faults.cid_ttl
+            self._cids[cid] = time.monotonic() + ttl if ttl else float("inf")
+            return {
+                "return": True,
+                "results": f"User login:{self.username} has been authorized.",
+                "CID": cid,
+            }
+
+        if not self._cid_valid(params.get("CID")):
+            self.stats["invalid_cid"] += 1
+            return {"return": False, "reason": CID_EXPIRED}
+
+        if action == "list_site2cloud":
+            return {
+                "return": True,
+                "results": {"connections": self.fixtures.site2cloud},
+            }
+        if action in (
+            "list_primary_and_ha_gateways",
+            "list_transit_gateways",
+            "list_spoke_gateways",
+        ):
+            gateway_type = params.get("gateway_type") or action.split("_")[1]
+            gateways = {
+                "transit": self.fixtures.transit_gateways,
+                "spoke": self.fixtures.spoke_gateways,
+            }.get(
+                gateway_type,
+                self.fixtures.transit_gateways + self.fixtures.spoke_gateways,
+            )
+            return {"return": True, "results": gateways}
+        return {"return": False, "reason": f"Unsupported action: {action!r}"}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.mock_controller",
+        description="Serve a local mock of the Aviatrix controller API.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--fixtures", type=Path, help="fixtures JSON to serve")
+    parser.add_argument("--site2cloud", type=int, default=5000, help="generated")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dump-fixtures", type=Path, help="write fixtures and exit")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--certfile", type=Path, help="serve HTTPS")
+    parser.add_argument("--keyfile", type=Path)
+    faults = parser.add_argument_group("fault injection")
+    faults.add_argument("--latency", type=float, default=0.0, help="seconds")
+    faults.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    faults.add_argument(
+        "--action-latency",
+        action="append",
+        default=[],
+        metavar="ACTION=SECONDS",
+        help="extra latency of one action (repeatable)",
+    )
+    faults.add_argument("--rate-limit", type=float, help="requests per second")
+    faults.add_argument("--burst", type=int, default=10)
+    faults.add_argument("--error-rate", type=float, default=0.0, help="0-1")
+    faults.add_argument("--error-status", type=int, default=500)
+    faults.add_argument(
+        "--error-action",
+        action="append",
+        default=[],
+        metavar="ACTION",
+        help="only inject errors into this action (repeatable)",
+    )
+    faults.add_argument("--cid-ttl", type=float, help="seconds a CID stays valid")
+    args = parser.parse_args(argv)
+
+    fixtures = (
+        Fixtures.load(args.fixtures)
+        if args.fixtures
+        else generate_fixtures(site2cloud=args.site2cloud, seed=args.seed)
+    )
+    if args.dump_fixtures:
+        fixtures.dump(args.dump_fixtures)
+        print(f"wrote {args.dump_fixtures}")
+        return 0
+
+    context = None
+    if args.certfile:
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(args.certfile, args.keyfile)
+    controller = MockController(
+        fixtures,
+        Faults(
+            latency=args.latency,
+            jitter=args.jitter,
+            action_latency={
+                action: float(seconds)
+                for action, seconds in (
+                    item.split("=", 1) for item in args.action_latency
+                )
+            },
+            rate_limit=args.rate_limit,
+            burst=args.burst,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+            error_actions=tuple(args.error_action),
+            cid_ttl=args.cid_ttl,
+            seed=args.seed,
+        ),
+        username=args.username,
+        password=args.password,
+        host=args.host,
+        port=args.port,
+        ssl_context=context,
+    )
+
+    async def serve() -> None:
+        await controller.start()
+        print(
+            f"mock controller on {controller.base_url}/v2/api "
+            f"({len(fixtures.site2cloud)} site2cloud, "
+            f"{len(fixtures.transit_gateways)} transit, "
+            f"{len(fixtures.spoke_gateways)} spoke gateways)",
+            flush=True,
+        )
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await controller.aclose()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(dict(controller.stats), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,648 @@
+"""Offline planner for transit gateway peering topologies.
+
+``modules/control/peering`` peers every pair of primary transit gateways: all
+pairs within a cloud type (``same_cloud``) and all pairs across cloud types
+(``cross_cloud``), with 15 HPE tunnels per cross-cloud pair among AWS, GCP
+and Azure. The resource count grows quadratically with the fleet. This tool
+reproduces the module's pairs and peering arguments from a gateway inventory
+and estimates what a topology costs:
+
+- tunnels built on the gateways
+- controller API calls to create the peerings and to refresh them on every plan
+- apply time at a given ``-parallelism``
+
+It does the same for cheaper topologies:
+
+- ``hub-spoke``: ``--hubs`` gateways per cloud form a full mesh, and every
+  other gateway peers only with its cloud's hubs
+- ``regional``: full mesh within each region, plus one gateway per region
+  meshed with the other regions' ones
+- ``k-nearest``: each gateway peers with its ``k`` nearest gateways, plus
+  the shortest links needed to keep the graph connected
+
+Partial meshes rely on multi-tier transit to route between gateways that are
+not peered directly. The report gives the resulting worst-case hop count.
+
+The tunnel and timing figures are estimates; their assumptions live in
+``CostModel`` and can be calibrated from an apply log (``--timings``).
+
+Usage:
+    python -m tools.peering_plan gateways.json
+    python -m tools.peering_plan gateways.json --topology hub-spoke --hubs 2
+    python -m tools.peering_plan --controller --tfvars peering.tfvars --compare
+    python -m tools.peering_plan bench --sizes 10 50 100 250 500
+"""
+
+import argparse
+import heapq
+import json
+import sys
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable, Iterable
+from dataclasses import asdict, dataclass, field, fields
+from itertools import combinations
+from pathlib import Path
+
+import hcl2
+
+HA_SUFFIX = "-hagw"
+
+# Cloud types for which the module enables HPE over internet (AWS, GCP, Azure).
+HPE_OVER_INTERNET_CLOUD_TYPES = (1, 4, 8)
+MODULE_HPE_TUNNEL_COUNT = 15
+
+CLOUD_NAMES = {1: "aws", 4: "gcp", 8: "azure", 16: "oci", 32: "azure-gov"}
+
+TOPOLOGIES = ("full-mesh", "hub-spoke", "regional", "k-nearest")
+
+RESOURCE = "aviatrix_transit_gateway_peering"
+
+
+@dataclass(frozen=True, slots=True)
+class Gateway:
+    """A primary transit gateway."""
+
+    name: str
+    cloud_type: int
+    region: str = ""
+    ha: bool = False
+
+
+@dataclass(slots=True)
+class PeeringOptions:
+    """Variables of the peering module that set peering arguments."""
+
+    same_cloud_enable_peering_over_private_network: bool = False
+    same_cloud_enable_max_performance: bool = True
+    same_cloud_enable_single_tunnel_mode: bool = False
+    cross_cloud_enable_peering_over_private_network: bool = False
+    cross_cloud_enable_insane_mode_encryption_over_internet: bool | None = None
+    cross_cloud_enable_single_tunnel_mode: bool = False
+    cross_cloud_tunnel_count: int | None = None
+
+    @classmethod
+    def from_tfvars(cls, path: Path | str) -> "PeeringOptions":
+        """Read the variables from a ``.tfvars`` or ``.tfvars.json`` file."""
+        path = Path(path)
+        with open(path) as f:
+            data = json.load(f) if path.suffix == ".json" else hcl2.load(f)
+        return cls(**{v.name: data[v.name] for v in fields(cls) if v.name in data})
+
+
+@dataclass(slots=True)
+class CostModel:
+    """Assumptions behind the tunnel, API call and apply time estimates.
+
+    Attributes:
+        max_performance_tunnels: Tunnels of a same-cloud peering with
+            ``enable_max_performance`` (depends on instance sizes).
+        api_calls_per_create: Controller calls to create one peering.
+        api_calls_per_refresh: Controller calls to read one peering per plan.
+        same_cloud_seconds: Apply time of a same-cloud peering.
+        cross_cloud_seconds: Apply time of a cross-cloud peering without HPE.
+        hpe_seconds: Apply time of a cross-cloud HPE peering (the module notes
+            5-10 minutes for 15 tunnels).
+        parallelism: terraform ``-parallelism``.
+    """
+
+    max_performance_tunnels: int = 4
+    api_calls_per_create: int = 4
+    api_calls_per_refresh: int = 1
+    same_cloud_seconds: float = 120.0
+    cross_cloud_seconds: float = 180.0
+    hpe_seconds: float = 450.0
+    parallelism: int = 10
+
+
+@dataclass(slots=True)
+class Peering:
+    """One ``aviatrix_transit_gateway_peering`` instance and its arguments."""
+
+    key: str
+    gateway_1: str
+    gateway_2: str
+    cloud_type_1: int
+    cloud_type_2: int
+    enable_peering_over_private_network: bool
+    enable_single_tunnel_mode: bool
+    enable_max_performance: bool | None = None
+    enable_insane_mode_encryption_over_internet: bool | None = None
+    tunnel_count: int | None = None
+    hpe_over_internet_supported: bool = False
+
+    @property
+    def same_cloud(self) -> bool:
+        return self.cloud_type_1 == self.cloud_type_2
+
+    @property
+    def address(self) -> str:
+        block = "same_cloud" if self.same_cloud else "cross_cloud"
+        return f'{RESOURCE}.{block}["{self.key}"]'
+
+    def tunnels(self, model: CostModel, ha: bool) -> int:
+        """Estimated tunnels, doubled when both ends have an HA gateway."""
+        if self.enable_single_tunnel_mode:
+            count = 1
+        elif self.same_cloud:
+            count = model.max_performance_tunnels if self.enable_max_performance else 1
+        elif self.enable_insane_mode_encryption_over_internet:
+            count = self.tunnel_count or model.max_performance_tunnels
+        else:
+            count = 1
+        return count * (2 if ha else 1)
+
+    def apply_seconds(self, model: CostModel) -> float:
+        if self.same_cloud:
+            return model.same_cloud_seconds
+        if self.enable_insane_mode_encryption_over_internet:
+            return model.hpe_seconds
+        return model.cross_cloud_seconds
+
+
+def load_gateways(records: Iterable[dict]) -> list[Gateway]:
+    """Primary gateways from a ``gateway_list`` (as the data source returns it).
+
+    Names are sanitized like the module (``,`` becomes ``-``); ``-hagw``
+    entries mark their primary as HA. Inventory order is kept.
+
+    Raises:
+        ValueError: If two gateways share a (sanitized) name.
+    """
+    records = list(records)
+    names = set()
+    for record in records:
+        name = record["gw_name"].replace(",", "-")
+        if name in names:
+            raise ValueError(f"Duplicate transit gateway name {name!r}")
+        names.add(name)
+    gateways = []
+    for record in records:
+        name = record["gw_name"].replace(",", "-")
+        if not name.endswith(HA_SUFFIX):
+            gateways.append(
+                Gateway(
+                    name,
+                    int(record["cloud_type"]),
+                    record.get("vpc_reg") or record.get("region") or "",
+                    f"{name}{HA_SUFFIX}" in names,
+                )
+            )
+    return gateways
+
+
+def _peering(gw1: Gateway, gw2: Gateway, options: PeeringOptions) -> Peering:
+    """Peering arguments as the module's two resource blocks set them."""
+    key = f"{gw1.name}:{gw2.name}"
+    if gw1.cloud_type == gw2.cloud_type:
+        # The module's max_performance_supported local is not used by the
+        # resource; enable_max_performance comes straight from the variable.
+        return Peering(
+            key,
+            gw1.name,
+            gw2.name,
+            gw1.cloud_type,
+            gw2.cloud_type,
+            options.same_cloud_enable_peering_over_private_network,
+            options.same_cloud_enable_single_tunnel_mode,
+            enable_max_performance=options.same_cloud_enable_max_performance,
+        )
+    hpe = (
+        gw1.cloud_type in HPE_OVER_INTERNET_CLOUD_TYPES
+        and gw2.cloud_type in HPE_OVER_INTERNET_CLOUD_TYPES
+    )
+    insane = options.cross_cloud_enable_insane_mode_encryption_over_internet
+    insane = hpe if insane is None else insane
+    tunnel_count = options.cross_cloud_tunnel_count
+    if tunnel_count is None and hpe:
+        tunnel_count = MODULE_HPE_TUNNEL_COUNT
+    return Peering(
+        key,
+        gw1.name,
+        gw2.name,
+        gw1.cloud_type,
+        gw2.cloud_type,
+        options.cross_cloud_enable_peering_over_private_network,
+        options.cross_cloud_enable_single_tunnel_mode,
+        enable_insane_mode_encryption_over_internet=insane,
+        tunnel_count=tunnel_count,
+        hpe_over_internet_supported=hpe,
+    )
+
+
+def module_order(gateways: list[Gateway]) -> list[Gateway]:
+    """Gateways in the order the module enumerates them.
+
+    The module groups gateways into an object keyed by cloud type, so groups
+    follow the string order of the cloud type ("1" < "16" < "4" < "8") and keep
+    inventory order inside a group.
+    """
+    groups: dict[str, list[Gateway]] = defaultdict(list)
+    for gw in gateways:
+        groups[str(gw.cloud_type)].append(gw)
+    return [gw for key in sorted(groups) for gw in groups[key]]
+
+
+# -----------------------------------------------------------------------------
+# Topologies
+# -----------------------------------------------------------------------------
+def full_mesh_pairs(gateways: list[Gateway]) -> list[tuple[Gateway, Gateway]]:
+    """The module's pairs: same-cloud pairs, then cross-cloud pairs."""
+    ordered = module_order(gateways)
+    same = [(a, b) for a, b in combinations(ordered, 2) if a.cloud_type == b.cloud_type]
+    cross = [
+        (a, b) for a, b in combinations(ordered, 2) if a.cloud_type != b.cloud_type
+    ]
+    return same + cross
+
+
+def _mesh(members: list[Gateway]) -> list[tuple[Gateway, Gateway]]:
+    return list(combinations(members, 2))
+
+
+def hub_spoke_pairs(
+    gateways: list[Gateway], hubs: int = 1
+) -> list[tuple[Gateway, Gateway]]:
+    """The first ``hubs`` gateways of each cloud mesh; the rest peer with them."""
+    by_cloud: dict[int, list[Gateway]] = defaultdict(list)
+    for gw in module_order(gateways):
+        by_cloud[gw.cloud_type].append(gw)
+    hub_list = [gw for members in by_cloud.values() for gw in members[:hubs]]
+    pairs = _mesh(hub_list)
+    for members in by_cloud.values():
+        pairs += [(hub, gw) for gw in members[hubs:] for hub in members[:hubs]]
+    return pairs
+
+
+def regional_pairs(gateways: list[Gateway]) -> list[tuple[Gateway, Gateway]]:
+    """Full mesh per region plus a mesh of the first gateway of each region."""
+    by_region: dict[str, list[Gateway]] = defaultdict(list)
+    for gw in module_order(gateways):
+        by_region[gw.region].append(gw)
+    pairs = [pair for members in by_region.values() for pair in _mesh(members)]
+    return pairs + _mesh([members[0] for members in by_region.values()])
+
+
+def default_distance(a: Gateway, b: Gateway) -> float:
+    """0 within a region, 1 within a cloud, 2 across clouds."""
+    if a.cloud_type != b.cloud_type:
+        return 2.0
+    return 0.0 if a.region == b.region else 1.0
+
+
+def k_nearest_pairs(
+    gateways: list[Gateway],
+    k: int = 3,
+    distance: Callable[[Gateway, Gateway], float] = default_distance,
+) -> list[tuple[Gateway, Gateway]]:
+    """Each gateway's ``k`` nearest neighbours, connected by shortest links.
+
+    Ties are broken by inventory order. Components left disconnected are joined
+    by the shortest links between them (Kruskal), so every gateway is reachable.
+    """
+    ordered = module_order(gateways)
+    index = {gw.name: i for i, gw in enumerate(ordered)}
+    chosen: set[tuple[int, int]] = set()
+    for i, gw in enumerate(ordered):
+        nearest = heapq.nsmallest(
+            k,
+            (j for j in range(len(ordered)) if j != i),
+            key=lambda j: (distance(gw, ordered[j]), j),
+        )
+        chosen.update((min(i, j), max(i, j)) for j in nearest)
+
+    parent = list(range(len(ordered)))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in chosen:
+        parent[find(i)] = find(j)
+    if len({find(i) for i in range(len(ordered))}) > 1:
+        edges = sorted(
+            (distance(a, b), index[a.name], index[b.name])
+            for a, b in combinations(ordered, 2)
+        )
+        for _, i, j in edges:
+            if find(i) != find(j):
+                parent[find(i)] = find(j)
+                chosen.add((i, j))
+    return [(ordered[i], ordered[j]) for i, j in sorted(chosen)]
+
+
+# -----------------------------------------------------------------------------
+# Plans
+# -----------------------------------------------------------------------------
+@dataclass(slots=True)
+class TopologyPlan:
+    """Peerings of one topology over a gateway inventory."""
+
+    topology: str
+    gateways: list[Gateway]
+    peerings: list[Peering]
+    model: CostModel = field(default_factory=CostModel)
+
+    @property
+    def same_cloud(self) -> dict[str, Peering]:
+        """The module's ``same_cloud_peering_map``."""
+        return {p.key: p for p in self.peerings if p.same_cloud}
+
+    @property
+    def cross_cloud(self) -> dict[str, Peering]:
+        """The module's ``cross_cloud_peering_map``."""
+        return {p.key: p for p in self.peerings if not p.same_cloud}
+
+    def tunnels(self) -> int:
+        ha = {gw.name for gw in self.gateways if gw.ha}
+        return sum(
+            p.tunnels(self.model, p.gateway_1 in ha and p.gateway_2 in ha)
+            for p in self.peerings
+        )
+
+    def api_calls(self) -> tuple[int, int]:
+        """(calls to create every peering, calls per plan/refresh)."""
+        count = len(self.peerings)
+        return (
+            count * self.model.api_calls_per_create,
+            count * self.model.api_calls_per_refresh + 1,  # + the gateway list
+        )
+
+    def apply_seconds(self) -> float:
+        """Wall time of a fresh apply, scheduling longest peerings first."""
+        slots = [0.0] * max(1, self.model.parallelism)
+        for seconds in sorted(
+            (p.apply_seconds(self.model) for p in self.peerings), reverse=True
+        ):
+            heapq.heapreplace(slots, slots[0] + seconds)
+        return max(slots)
+
+    def max_hops(self) -> int | None:
+        """Longest shortest path in peerings between gateways (None: disconnected)."""
+        names = [gw.name for gw in self.gateways]
+        if len(names) < 2:
+            return 0
+        if len(self.peerings) == len(names) * (len(names) - 1) // 2:
+            return 1
+        graph: dict[str, list[str]] = defaultdict(list)
+        for p in self.peerings:
+            graph[p.gateway_1].append(p.gateway_2)
+            graph[p.gateway_2].append(p.gateway_1)
+        longest = 0
+        for source in names:
+            depth = {source: 0}
+            queue = deque([source])
+            while queue:
+                node = queue.popleft()
+                for peer in graph[node]:
+                    if peer not in depth:
+                        depth[peer] = depth[node] + 1
+                        queue.append(peer)
+            if len(depth) < len(names):
+                return None
+            longest = max(longest, max(depth.values()))
+        return longest
+
+    def summary(self) -> dict:
+        create, refresh = self.api_calls()
+        return {
+            "topology": self.topology,
+            "gateways": len(self.gateways),
+            "peerings": len(self.peerings),
+            "same_cloud": len(self.same_cloud),
+            "cross_cloud": len(self.cross_cloud),
+            "hpe_peerings": sum(
+                bool(p.enable_insane_mode_encryption_over_internet)
+                for p in self.peerings
+            ),
+            "tunnels": self.tunnels(),
+            "api_calls_create": create,
+            "api_calls_refresh": refresh,
+            "apply_seconds": round(self.apply_seconds(), 1),
+            "max_hops": self.max_hops(),
+        }
+
+
+def plan_topology(
+    gateways: list[Gateway],
+    topology: str = "full-mesh",
+    options: PeeringOptions | None = None,
+    model: CostModel | None = None,
+    hubs: int = 1,
+    k: int = 3,
+    distance: Callable[[Gateway, Gateway], float] = default_distance,
+) -> TopologyPlan:
+    """Plan the peerings of a topology.
+
+    Args:
+        gateways: Primary transit gateways (see ``load_gateways``).
+        topology: One of TOPOLOGIES; ``full-mesh`` is what the module deploys.
+        options: Module variables (default: the module defaults).
+        model: Estimate assumptions.
+        hubs: Hubs per cloud for ``hub-spoke``.
+        k: Neighbours per gateway for ``k-nearest``.
+        distance: Gateway distance for ``k-nearest``.
+
+    Returns:
+        The plan. Peerings keep the module's ``gw1:gw2`` keys and arguments.
+
+    Raises:
+        ValueError: If the topology is unknown.
+    """
+    options = options or PeeringOptions()
+    if topology == "full-mesh":
+        pairs = full_mesh_pairs(gateways)
+    elif topology == "hub-spoke":
+        pairs = hub_spoke_pairs(gateways, hubs)
+    elif topology == "regional":
+        pairs = regional_pairs(gateways)
+    elif topology == "k-nearest":
+        pairs = k_nearest_pairs(gateways, k, distance)
+    else:
+        raise ValueError(f"topology must be one of {TOPOLOGIES}, got {topology!r}")
+    return TopologyPlan(
+        topology,
+        gateways,
+        [_peering(a, b, options) for a, b in pairs],
+        model or CostModel(),
+    )
+
+
+def calibrate(spans: dict, plan: TopologyPlan, model: CostModel) -> CostModel:
+    """Set the model's per-peering apply times from an observed apply.
+
+    Args:
+        spans: ``tools.critical_path.parse_apply_log`` output of a peering apply.
+        plan: The full-mesh plan of the same inventory, to classify peerings.
+        model: Model to start from; categories without observations keep its
+            values.
+
+    Returns:
+        A new model with mean observed durations per category.
+    """
+    observed: dict[str, list[float]] = defaultdict(list)
+    for p in plan.peerings:
+        span = spans.get(p.address)
+        if span is None or span.action != "create" or span.status != "complete":
+            continue
+        if p.same_cloud:
+            category = "same_cloud_seconds"
+        elif p.enable_insane_mode_encryption_over_internet:
+            category = "hpe_seconds"
+        else:
+            category = "cross_cloud_seconds"
+        observed[category].append(span.duration)
+    values = asdict(model)
+    values.update({k: sum(v) / len(v) for k, v in observed.items()})
+    return CostModel(**values)
+
+
+# -----------------------------------------------------------------------------
+# Benchmark
+# -----------------------------------------------------------------------------
+def synthetic_gateways(count: int, regions_per_cloud: int = 4) -> list[Gateway]:
+    """A fleet spread over AWS, GCP and Azure regions, every gateway with HA."""
+    clouds = HPE_OVER_INTERNET_CLOUD_TYPES
+    return [
+        Gateway(
+            f"{CLOUD_NAMES[clouds[i % 3]]}-transit-{i:03d}",
+            clouds[i % 3],
+            f"{CLOUD_NAMES[clouds[i % 3]]}-region-{i // 3 % regions_per_cloud}",
+            ha=True,
+        )
+        for i in range(count)
+    ]
+
+
+def benchmark(
+    sizes: Iterable[int] = (10, 25, 50, 100, 250, 500),
+    topologies: Iterable[str] = TOPOLOGIES,
+    model: CostModel | None = None,
+    hubs: int = 1,
+    k: int = 3,
+) -> list[dict]:
+    """Plan every topology over synthetic fleets of the given sizes.
+
+    Returns:
+        One summary per size and topology, with ``plan_ms`` (planning time).
+    """
+    rows = []
+    for size in sizes:
+        gateways = synthetic_gateways(size)
+        for topology in topologies:
+            start = time.perf_counter()
+            plan = plan_topology(gateways, topology, model=model, hubs=hubs, k=k)
+            elapsed = time.perf_counter() - start
+            rows.append({**plan.summary(), "plan_ms": round(elapsed * 1000, 1)})
+    return rows
+
+
+def _format_duration(seconds: float) -> str:
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+def format_table(rows: list[dict]) -> str:
+    header = (
+        f"{'gateways':>8} {'topology':<10} {'peerings':>9} {'hpe':>7} "
+        f"{'tunnels':>9} {'api create':>10} {'api plan':>9} {'apply':>7} "
+        f"{'hops':>4} {'plan ms':>8}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in rows:
+        hops = "-" if r["max_hops"] is None else r["max_hops"]
+        lines.append(
+            f"{r['gateways']:>8} {r['topology']:<10} {r['peerings']:>9} "
+            f"{r['hpe_peerings']:>7} {r['tunnels']:>9} {r['api_calls_create']:>10} "
+            f"{r['api_calls_refresh']:>9} "
+            f"{_format_duration(r['apply_seconds']):>7} {hops:>4} "
+            f"{r.get('plan_ms', ''):>8}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.peering_plan",
+        description="Plan transit peering topologies and estimate their cost.",
+    )
+    parser.add_argument(
+        "inventory",
+        nargs="?",
+        help="gateway_list JSON, or 'bench' to benchmark synthetic fleets",
+    )
+    parser.add_argument(
+        "--controller", action="store_true", help="fetch transit gateways"
+    )
+    parser.add_argument("--tfvars", type=Path, help="peering module tfvars")
+    parser.add_argument("--topology", choices=TOPOLOGIES, default="full-mesh")
+    parser.add_argument("--compare", action="store_true", help="all topologies")
+    parser.add_argument("--hubs", type=int, default=1, help="hubs per cloud")
+    parser.add_argument("-k", type=int, default=3, help="neighbours for k-nearest")
+    parser.add_argument("--parallelism", type=int, default=10)
+    parser.add_argument("--timings", type=Path, help="apply -json log to calibrate")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None)
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args(argv)
+
+    model = CostModel(parallelism=args.parallelism)
+    if args.inventory == "bench":
+        rows = benchmark(
+            args.sizes or (10, 25, 50, 100, 250, 500),
+            model=model,
+            hubs=args.hubs,
+            k=args.k,
+        )
+        print(json.dumps(rows, indent=2) if args.json else format_table(rows))
+        return 0
+
+    if args.controller:
+        from tools.controller_client import ControllerClient
+
+        with ControllerClient.from_env() as client:
+            records = client.transit_gateways()
+    elif args.inventory:
+        data = json.loads(Path(args.inventory).read_text())
+        if isinstance(data, dict):
+            data = data.get("results", data.get("transit_gateways", data))
+        records = data
+    else:
+        parser.error("give an inventory file, --controller or 'bench'")
+
+    gateways = load_gateways(records)
+    options = PeeringOptions.from_tfvars(args.tfvars) if args.tfvars else None
+    if args.timings:
+        from tools.critical_path import parse_apply_log
+
+        with open(args.timings) as f:
+            spans = parse_apply_log(f)
+        model = calibrate(spans, plan_topology(gateways, options=options), model)
+
+    topologies = TOPOLOGIES if args.compare else (args.topology,)
+    plans = [
+        plan_topology(gateways, t, options, model, hubs=args.hubs, k=args.k)
+        for t in topologies
+    ]
+    if args.json:
+        print(
+            json.dumps(
+                {
+                    "model": asdict(model),
+                    "plans": [
+                        {**p.summary(), "peerings": [asdict(x) for x in p.peerings]}
+                        for p in plans
+                    ],
+                },
+                indent=2,
+            )
+        )
+    else:
+        print(format_table([p.summary() for p in plans]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,428 @@
+"""Offline planner for the segmentation module's domain associations.
+
+Reproduces the ``association_map`` and ``spoke_association_map`` locals of
+``modules/control/segmentation/main.tf`` from site2cloud connections, spoke
+gateways and the module's variables, without a terraform plan:
+
+- a site2cloud connection named ``external-...`` belongs to the longest domain
+  contained in the rest of its name (ties: reverse alphabetical), and is
+  associated with each of its non ``-hagw`` gateways that is in its
+  ``gateway_list``. Only BGP transit tunnels count, and ``exclude_connections``
+  are skipped.
+- a spoke gateway of one of ``spoke_cloud_types`` belongs to the longest domain
+  whose dash-separated tokens appear consecutively in its name, and is
+  associated with each non ``-hagw`` transit in ``transit_gw``. HA spokes and
+  ``exclude_spoke_gateways`` are skipped.
+- manual associations for defined domains replace inferred ones with the same
+  ``name~gateway`` key.
+
+The HCL tests every domain against every name (and every token window); here
+domain matching is one pass over each name through an Aho-Corasick automaton,
+over characters for connections and over tokens for spokes.
+
+Usage:
+    python -m tools.segmentation_plan --tfvars segmentation.tfvars \\
+        --site2cloud s2c.json --spokes spokes.json
+    python -m tools.segmentation_plan --tfvars segmentation.tfvars --controller \\
+        --state modules/control/segmentation/terraform.tfstate
+    python -m tools.segmentation_plan ... --json > plan.json
+    python -m tools.segmentation_plan ... --diff plan.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter, deque
+from collections.abc import Hashable, Iterable, Sequence
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+
+import hcl2
+
+EXTERNAL_PREFIX = "external-"
+HA_SUFFIX = "-hagw"
+DEFAULT_SPOKE_CLOUD_TYPES = (8,)
+
+# for_each resources whose instance keys are the planned maps.
+TRANSIT_RESOURCE = "transit_domain_associations"
+SPOKE_RESOURCE = "spoke_domain_associations"
+
+
+class AhoCorasick:
+    """Multi-pattern matcher over sequences of hashable symbols.
+
+    Patterns are matched as contiguous subsequences: characters of a string, or
+    items of a token list.
+    """
+
+    def __init__(self, patterns: Iterable[Sequence[Hashable]]) -> None:
+        """Build the automaton.
+
+        Args:
+            patterns: Patterns to find; a pattern's id is its position.
+        """
+        self._goto: list[dict] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        for pattern_id, pattern in enumerate(patterns):
+            node = 0
+            for symbol in pattern:
+                nxt = self._goto[node].get(symbol)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][symbol] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(pattern_id)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for symbol, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and symbol not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(symbol, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def matches(self, sequence: Iterable[Hashable]) -> set[int]:
+        """Ids of all patterns occurring in ``sequence``."""
+        found = set(self._out[0])
+        node = 0
+        for symbol in sequence:
+            while node and symbol not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(symbol, 0)
+            found.update(self._out[node])
+        return found
+
+
+def sorted_domain_names(domains: Iterable[str]) -> list[str]:
+    """Domains in the module's match order: longest first, ties reversed.
+
+    Mirrors ``reverse(sort(["%03d<len><domain>"...]))`` over the sorted keys of
+    the domain resources.
+    """
+    return sorted(set(domains), key=lambda d: (f"{len(d):03d}", d), reverse=True)
+
+
+@dataclass(slots=True)
+class SegmentationInputs:
+    """Variables of the segmentation module that drive associations."""
+
+    domains: list[str] = field(default_factory=list)
+    manual_transit_associations: dict[str, str] = field(default_factory=dict)
+    manual_spoke_associations: dict[str, str] = field(default_factory=dict)
+    exclude_connections: list[str] = field(default_factory=list)
+    exclude_spoke_gateways: list[str] = field(default_factory=list)
+    spoke_cloud_types: list[int] = field(
+        default_factory=lambda: list(DEFAULT_SPOKE_CLOUD_TYPES)
+    )
+
+    @classmethod
+    def from_tfvars(cls, path: Path | str) -> "SegmentationInputs":
+        """Read the variables from a ``.tfvars`` or ``.tfvars.json`` file."""
+        path = Path(path)
+        with open(path) as f:
+            data = json.load(f) if path.suffix == ".json" else hcl2.load(f)
+        inputs = cls()
+        for var in fields(cls):
+            if data.get(var.name) is not None:
+                setattr(inputs, var.name, data[var.name])
+        inputs.spoke_cloud_types = [int(t) for t in inputs.spoke_cloud_types]
+        return inputs
+
+
+@dataclass(slots=True)
+class SegmentationPlan:
+    """Planned associations, keyed like the module's for_each maps."""
+
+    association_map: dict[str, dict]
+    spoke_association_map: dict[str, dict]
+    inferred_domains: dict[str, str]
+    spoke_inferred_domains: dict[str, str]
+
+    def to_dict(self) -> dict:
+        return {
+            "association_map": self.association_map,
+            "spoke_association_map": self.spoke_association_map,
+        }
+
+    def domain_counts(self) -> dict[str, tuple[int, int]]:
+        """(transit, spoke) association counts per domain."""
+        transit = Counter(a["network_domain"] for a in self.association_map.values())
+        spoke = Counter(
+            a["network_domain"] for a in self.spoke_association_map.values()
+        )
+        return {d: (transit[d], spoke[d]) for d in sorted(transit | spoke)}
+
+
+class DomainMatcher:
+    """Finds the best domain for connection and spoke gateway names."""
+
+    def __init__(self, domains: Iterable[str]) -> None:
+        self.order = sorted_domain_names(domains)
+        lowered = [d.lower() for d in self.order]
+        self._chars = AhoCorasick(lowered)
+        self._tokens = AhoCorasick([d.split("-") for d in lowered])
+        self._max_tokens = max((len(d.split("-")) for d in lowered), default=0)
+
+    def connection_domain(self, name: str) -> str:
+        """Domain of a site2cloud connection, or "" if none applies."""
+        if not name.lower().startswith(EXTERNAL_PREFIX):
+            return ""
+        found = self._chars.matches(name[len(EXTERNAL_PREFIX) :].lower())
+        return self.order[min(found)] if found else ""
+
+    def spoke_domain(self, gw_name: str) -> str:
+        """Domain of a spoke gateway, or "" if none applies."""
+        tokens = gw_name.lower().split("-")
+        if self._max_tokens >= len(tokens) + 2:
+            # The HCL slices past the end of the name for such a domain; the
+            # error is swallowed by try() and no domain is inferred.
+            return ""
+        found = self._tokens.matches(tokens)
+        return self.order[min(found)] if found else ""
+
+
+def _unique_map(items: Iterable[tuple[str, dict]], what: str) -> dict[str, dict]:
+    result = {}
+    for key, value in items:
+        if key in result:
+            raise ValueError(f"Duplicate {what} key {key!r}")
+        result[key] = value
+    return result
+
+
+def plan_associations(
+    connections: list[dict],
+    spoke_gateways: list[dict],
+    inputs: SegmentationInputs,
+) -> SegmentationPlan:
+    """Compute the module's association maps.
+
+    Args:
+        connections: ``list_site2cloud`` connections (``name``, ``gw_name``,
+            ``gateway_list``, ``tunnel_type``, ``bgp_status``, ``bgp_transit``).
+        spoke_gateways: Spoke gateways (``gw_name``, ``cloud_type``,
+            ``transit_gw``).
+        inputs: Module variables.
+
+    Returns:
+        The planned ``association_map`` and ``spoke_association_map``.
+
+    Raises:
+        ValueError: On duplicate connection or spoke names, or a spoke listing
+            the same transit twice (terraform fails with a duplicate key too).
+    """
+    defined = set(inputs.domains)
+    matcher = DomainMatcher(defined)
+
+    inferred: dict[str, str] = {}
+    for conn in connections:
+        if conn["name"] in inferred:
+            raise ValueError(f"Duplicate connection name {conn['name']!r}")
+        inferred[conn["name"]] = matcher.connection_domain(conn["name"])
+
+    excluded_connections = set(inputs.exclude_connections)
+    auto_transit: dict[str, dict] = {}
+    for conn in connections:
+        domain = inferred[conn["name"]]
+        if (
+            conn.get("tunnel_type") != "Transit_BGP"
+            or conn.get("bgp_status") != "enabled"
+            or conn.get("bgp_transit") is not True
+            or not domain
+            or domain not in defined
+            or conn["name"] in excluded_connections
+        ):
+            continue
+        gateway_list = conn.get("gateway_list") or []
+        for gw_name in conn.get("gw_name", "").replace(" ", "").split(","):
+            if gw_name.endswith(HA_SUFFIX) or gw_name not in gateway_list:
+                continue
+            auto_transit[f"{conn['name']}~{gw_name}"] = {
+                "key": f"{domain}~{conn['name']}~{gw_name}",
+                "network_domain": domain,
+                "attachment_name": conn["name"],
+                "transit_gateway": gw_name,
+            }
+
+    manual_transit = {}
+    for key, domain in inputs.manual_transit_associations.items():
+        parts = key.split("~")
+        if domain in defined and len(parts) == 2:
+            manual_transit[key] = {
+                "key": f"{domain}~{key}",
+                "network_domain": domain,
+                "attachment_name": parts[0],
+                "transit_gateway": parts[1],
+            }
+    association_map = {
+        f"{a['network_domain']}~{a['attachment_name']}~{a['transit_gateway']}": a
+        for a in {**auto_transit, **manual_transit}.values()
+    }
+
+    cloud_types = set(inputs.spoke_cloud_types)
+    excluded_spokes = set(inputs.exclude_spoke_gateways)
+    spoke_inferred: dict[str, str] = {}
+    for gw in spoke_gateways:
+        name = gw["gw_name"]
+        if (
+            gw.get("cloud_type") in cloud_types
+            and not name.endswith(HA_SUFFIX)
+            and name not in excluded_spokes
+        ):
+            if name in spoke_inferred:
+                raise ValueError(f"Duplicate spoke gateway name {name!r}")
+            spoke_inferred[name] = matcher.spoke_domain(name)
+
+    auto_spoke = _unique_map(
+        (
+            (
+                f"{gw['gw_name']}~{transit}",
+                {
+                    "spoke_gateway": gw["gw_name"],
+                    "transit_gateway": transit,
+                    "network_domain": spoke_inferred[gw["gw_name"]],
+                },
+            )
+            for gw in spoke_gateways
+            if spoke_inferred.get(gw["gw_name"], "")
+            for transit in (gw.get("transit_gw") or "").split("~")
+            if gw.get("transit_gw") and not transit.endswith(HA_SUFFIX)
+        ),
+        "spoke association",
+    )
+    manual_spoke = {}
+    for key, domain in inputs.manual_spoke_associations.items():
+        parts = key.split("~")
+        if domain in defined and len(parts) == 2:
+            manual_spoke[key] = {
+                "spoke_gateway": parts[0],
+                "transit_gateway": parts[1],
+                "network_domain": domain,
+            }
+    spoke_association_map = {
+        f"{a['network_domain']}~{a['spoke_gateway']}~{a['transit_gateway']}": a
+        for a in {**auto_spoke, **manual_spoke}.values()
+    }
+
+    return SegmentationPlan(
+        association_map, spoke_association_map, inferred, spoke_inferred
+    )
+
+
+def deployed_keys(state_file: Path | str) -> dict[str, set[str]]:
+    """Association keys in a segmentation state, per planned map."""
+    state = json.loads(Path(state_file).read_text())
+    keys: dict[str, set[str]] = {
+        "association_map": set(),
+        "spoke_association_map": set(),
+    }
+    names = {
+        TRANSIT_RESOURCE: "association_map",
+        SPOKE_RESOURCE: "spoke_association_map",
+    }
+    for resource in state.get("resources", []):
+        if (
+            resource.get("mode") == "managed"
+            and not resource.get("module")
+            and resource.get("name") in names
+        ):
+            for instance in resource.get("instances", []):
+                keys[names[resource["name"]]].add(instance.get("index_key"))
+    return keys
+
+
+def diff_keys(
+    planned: dict[str, dict], current: Iterable[str]
+) -> tuple[list[str], list[str]]:
+    """(added, removed) association keys of a plan against current keys."""
+    current = set(current)
+    return sorted(set(planned) - current), sorted(current - set(planned))
+
+
+def _load_list(path: Path, key: str) -> list[dict]:
+    data = json.loads(Path(path).read_text())
+    if isinstance(data, dict):
+        # An API response ({"results": ...}) or mock controller fixtures.
+        data = data.get("results", data)
+        if isinstance(data, dict):
+            data = data.get(key, data.get("connections", []))
+    return data
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.segmentation_plan",
+        description="Preview the segmentation module's domain associations.",
+    )
+    parser.add_argument("--tfvars", type=Path, required=True, help="module tfvars")
+    parser.add_argument("--site2cloud", type=Path, help="list_site2cloud JSON")
+    parser.add_argument("--spokes", type=Path, help="spoke gateway list JSON")
+    parser.add_argument(
+        "--controller",
+        action="store_true",
+        help="fetch missing inputs with tools.controller_client",
+    )
+    compare = parser.add_mutually_exclusive_group()
+    compare.add_argument("--state", type=Path, help="diff against a module state")
+    compare.add_argument("--diff", type=Path, help="diff against a --json plan")
+    parser.add_argument("--json", action="store_true", help="print the plan as JSON")
+    args = parser.parse_args(argv)
+
+    connections = _load_list(args.site2cloud, "site2cloud") if args.site2cloud else None
+    spokes = _load_list(args.spokes, "spoke_gateways") if args.spokes else None
+    if args.controller and (connections is None or spokes is None):
+        from tools.controller_client import ControllerClient
+
+        with ControllerClient.from_env() as client:
+            if connections is None:
+                connections = client.list_site2cloud()
+            if spokes is None:
+                spokes = client.spoke_gateways()
+    if connections is None and spokes is None:
+        parser.error("give --site2cloud and/or --spokes, or --controller")
+
+    start = time.perf_counter()
+    plan = plan_associations(
+        connections or [], spokes or [], SegmentationInputs.from_tfvars(args.tfvars)
+    )
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(plan.to_dict(), indent=2, sort_keys=True))
+        return 0
+
+    print(
+        f"{len(connections or [])} connections, {len(spokes or [])} spokes "
+        f"planned in {elapsed * 1000:.1f} ms"
+    )
+    for domain, (transit, spoke) in plan.domain_counts().items():
+        print(f"  {domain}: {transit} transit, {spoke} spoke associations")
+
+    current = None
+    if args.state:
+        current = deployed_keys(args.state)
+    elif args.diff:
+        previous = json.loads(args.diff.read_text())
+        current = {name: set(previous.get(name, {})) for name in plan.to_dict()}
+    if current is not None:
+        for name, planned in plan.to_dict().items():
+            added, removed = diff_keys(planned, current[name])
+            print(f"{name}: +{len(added)} -{len(removed)}")
+            for key in added:
+                print(f"  + {key}")
+            for key in removed:
+                print(f"  - {key}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
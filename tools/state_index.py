@@ -0,0 +1,500 @@
+"""SQLite index of resources, attributes and outputs across terraform states.
+
+Ingests the state files of every stage (the test stages and the
+``modules/control/*`` deployments) into one database, re-reading a state only
+when its mtime or size changed and dropping states that are gone or no longer
+listed. Read-only queries then hit indexed tables instead of walking nested
+state documents.
+
+Usage:
+    python -m tools.state_index refresh tests/test_aws_gcp/*/terraform.tfstate
+    python -m tools.state_index transit-gateways
+    python -m tools.state_index vm-ips
+    python -m tools.state_index peerings aws-transit
+    python -m tools.state_index sql "SELECT type, count(*) FROM resources GROUP BY 1"
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+
+DEFAULT_DB = Path(".state-index.sqlite")
+
+# Aviatrix cloud_type bitmask values.
+CLOUD_TYPES = {
+    1: "aws",
+    4: "gcp",
+    8: "azure",
+    16: "oci",
+    32: "azure-gov",
+    256: "aws-gov",
+    1024: "aws-china",
+    2048: "azure-china",
+    8192: "aws-top-secret",
+    16384: "aws-secret",
+    65536: "alibaba",
+}
+
+# Resource types holding a VM, and the attribute paths of its addresses.
+VM_TYPES = {
+    "aws_instance": ("private_ip", "public_ip"),
+    "google_compute_instance": (
+        "network_interface.0.network_ip",
+        "network_interface.0.access_config.0.nat_ip",
+    ),
+    "azurerm_linux_virtual_machine": ("private_ip_address", "public_ip_address"),
+}
+
+PEERING_TYPES = (
+    "aviatrix_transit_gateway_peering",
+    "aviatrix_spoke_transit_attachment",
+    "aviatrix_transit_external_device_conn",
+    "aviatrix_segmentation_network_domain_connection_policy",
+)
+
+# Authorizer actions allowed in query(): everything else is a write or a
+# PRAGMA/ATTACH that could make one.
+_READ_ACTIONS = {
+    sqlite3.SQLITE_SELECT,
+    sqlite3.SQLITE_READ,
+    sqlite3.SQLITE_FUNCTION,
+    sqlite3.SQLITE_RECURSIVE,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS states (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    stage TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    serial INTEGER,
+    lineage TEXT
+);
+CREATE TABLE IF NOT EXISTS resources (
+    id INTEGER PRIMARY KEY,
+    state_id INTEGER NOT NULL REFERENCES states(id) ON DELETE CASCADE,
+    address TEXT NOT NULL,
+    module TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    index_key TEXT
+);
+CREATE INDEX IF NOT EXISTS resources_type ON resources(type);
+CREATE INDEX IF NOT EXISTS resources_address ON resources(address);
+CREATE INDEX IF NOT EXISTS resources_state ON resources(state_id);
+CREATE TABLE IF NOT EXISTS attributes (
+    resource_id INTEGER NOT NULL REFERENCES resources(id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    value
+);
+CREATE INDEX IF NOT EXISTS attributes_resource ON attributes(resource_id, path);
+CREATE INDEX IF NOT EXISTS attributes_path_value ON attributes(path, value);
+CREATE INDEX IF NOT EXISTS attributes_value ON attributes(value);
+CREATE TABLE IF NOT EXISTS outputs (
+    state_id INTEGER NOT NULL REFERENCES states(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value TEXT,
+    sensitive INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (state_id, name)
+);
+"""
+
+
+@dataclass(slots=True)
+class VMAddress:
+    """Addresses of one VM found in state."""
+
+    site: str
+    address: str
+    name: str
+    private_ip: str
+    public_ip: str | None
+
+
+@dataclass(slots=True)
+class Reference:
+    """A resource attribute whose value names something else."""
+
+    stage: str
+    address: str
+    type: str
+    attribute: str
+
+
+def _index_key(key) -> str:
+    return json.dumps(key) if isinstance(key, str) else str(key)
+
+
+def _instance_address(resource: dict, index_key) -> str:
+    parts = [resource["module"]] if resource.get("module") else []
+    if resource.get("mode") == "data":
+        parts.append("data")
+    parts += [resource["type"], resource["name"]]
+    address = ".".join(parts)
+    if index_key is not None:
+        address += f"[{_index_key(index_key)}]"
+    return address
+
+
+def _sensitive_paths(instance: dict) -> set[str]:
+    """Dotted attribute paths listed under ``sensitive_attributes``."""
+    paths = set()
+    for steps in instance.get("sensitive_attributes") or []:
+        if isinstance(steps, list):
+            paths.add(".".join(str(step.get("value")) for step in steps))
+    return paths
+
+
+def flatten(value, prefix: str = ""):
+    """Yield (dotted path, leaf value) pairs of a nested attribute value.
+
+    List elements are addressed by position (``network_interface.0.network_ip``).
+    Empty containers are skipped.
+    """
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, list):
+        for position, item in enumerate(value):
+            yield from flatten(
+                item, f"{prefix}.{position}" if prefix else str(position)
+            )
+    else:
+        yield prefix, int(value) if isinstance(value, bool) else value
+
+
+def _site_of(module: str, stage: str) -> str:
+    """Site of a resource: its innermost string module key, else its top module."""
+    keys = module.split('["')[1:]
+    if keys:
+        return keys[-1].split('"]')[0]
+    if module:
+        return module.split(".")[1].split("[")[0]
+    return stage
+
+
+def _is_sensitive(path: str, sensitive: set[str]) -> bool:
+    return any(path == p or path.startswith(f"{p}.") for p in sensitive)
+
+
+class StateIndex:
+    """SQLite index of terraform states.
+
+    Usage:
+        with StateIndex(".state-index.sqlite") as index:
+            index.refresh(Path("tests/test_aws_gcp").glob("*/terraform.tfstate"))
+            index.transit_gateways_by_cloud_type()
+    """
+
+    def __init__(self, db_path: Path | str = ":memory:") -> None:
+        """Open (and create if needed) an index database.
+
+        Args:
+            db_path: SQLite file, or ":memory:" for a throwaway index.
+        """
+        self.db = sqlite3.connect(str(db_path))
+        self._read_only = False
+        self.db.set_authorizer(self._authorize)
+        self.db.execute("PRAGMA foreign_keys = ON")
+        if str(db_path) != ":memory:":
+            self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "StateIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def _authorize(self, action: int, *args) -> int:
+        if not self._read_only or action in _READ_ACTIONS:
+            return sqlite3.SQLITE_OK
+        return sqlite3.SQLITE_DENY
+
+    def refresh(self, state_files) -> dict[str, bool]:
+        """Ingest state files that changed since they were last indexed.
+
+        ``state_files`` is the full set of states to index: a state is re-read
+        only if its mtime or size changed, and indexed states that are not in
+        the set or no longer exist are dropped.
+
+        Args:
+            state_files: Paths to terraform.tfstate files.
+
+        Returns:
+            Mapping of resolved path -> whether it was (re)indexed or dropped.
+        """
+        changed = {}
+        for state_file in state_files:
+            path = Path(state_file).resolve()
+            changed[str(path)] = self._refresh_one(path)
+        stale = [
+            (state_id, path)
+            for state_id, path in self.db.execute("SELECT id, path FROM states")
+            if path not in changed
+        ]
+        with self.db:
+            self.db.executemany(
+                "DELETE FROM states WHERE id = ?", [(i,) for i, _ in stale]
+            )
+        changed.update((path, True) for _, path in stale)
+        return changed
+
+    def _refresh_one(self, path: Path) -> bool:
+        row = self.db.execute(
+            "SELECT id, mtime_ns, size FROM states WHERE path = ?", (str(path),)
+        ).fetchone()
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            if row:
+                with self.db:
+                    self.db.execute("DELETE FROM states WHERE id = ?", (row[0],))
+            return row is not None
+        if row and (row[1], row[2]) == (stat.st_mtime_ns, stat.st_size):
+            return False
+
+        with open(path) as f:
+            state = json.load(f)
+        with self.db:
+            if row:
+                self.db.execute("DELETE FROM states WHERE id = ?", (row[0],))
+            state_id = self.db.execute(
+                "INSERT INTO states (path, stage, mtime_ns, size, serial, lineage)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    str(path),
+                    path.parent.name,
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                    state.get("serial"),
+                    state.get("lineage"),
+                ),
+            ).lastrowid
+            self._ingest(state_id, state)
+        return True
+
+    def _ingest(self, state_id: int, state: dict) -> None:
+        self.db.executemany(
+            "INSERT INTO outputs (state_id, name, value, sensitive)"
+            " VALUES (?, ?, ?, ?)",
+            [
+                (
+                    state_id,
+                    name,
+                    None if output.get("sensitive") else json.dumps(output["value"]),
+                    int(bool(output.get("sensitive"))),
+                )
+                for name, output in (state.get("outputs") or {}).items()
+            ],
+        )
+        for resource in state.get("resources") or []:
+            for instance in resource.get("instances") or []:
+                index_key = instance.get("index_key")
+                resource_id = self.db.execute(
+                    "INSERT INTO resources"
+                    " (state_id, address, module, mode, type, name, index_key)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        state_id,
+                        _instance_address(resource, index_key),
+                        resource.get("module", ""),
+                        resource.get("mode", "managed"),
+                        resource["type"],
+                        resource["name"],
+                        None if index_key is None else _index_key(index_key),
+                    ),
+                ).lastrowid
+                sensitive = _sensitive_paths(instance)
+                self.db.executemany(
+                    "INSERT INTO attributes (resource_id, path, value)"
+                    " VALUES (?, ?, ?)",
+                    [
+                        (resource_id, path, value)
+                        for path, value in flatten(instance.get("attributes") or {})
+                        if not _is_sensitive(path, sensitive)
+                    ],
+                )
+
+    def query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        """Run a read-only SQL query against the index.
+
+        Raises:
+            sqlite3.DatabaseError: If the statement would do anything but read
+                (writes, schema changes, PRAGMA, ATTACH).
+        """
+        self._read_only = True
+        try:
+            return self.db.execute(sql, params).fetchall()
+        finally:
+            self._read_only = False
+
+    def outputs(self, stage: str) -> dict:
+        """Outputs of a stage, in terraform_output()'s {"key": {"value": v}} form."""
+        rows = self.query(
+            "SELECT o.name, o.value FROM outputs o JOIN states s ON s.id = o.state_id"
+            " WHERE s.stage = ?",
+            (stage,),
+        )
+        return {
+            name: {"value": None if value is None else json.loads(value)}
+            for name, value in rows
+        }
+
+    def attribute(self, address: str, path: str, stage: str | None = None):
+        """Value of one attribute of a resource instance (None if absent)."""
+        sql = (
+            "SELECT a.value FROM attributes a JOIN resources r ON r.id = a.resource_id"
+            " JOIN states s ON s.id = r.state_id WHERE r.address = ? AND a.path = ?"
+        )
+        params: tuple = (address, path)
+        if stage:
+            sql += " AND s.stage = ?"
+            params += (stage,)
+        row = self.db.execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    def transit_gateways_by_cloud_type(self) -> dict[str, list[str]]:
+        """Transit gateway names grouped by cloud (from ``cloud_type``)."""
+        rows = self.query(
+            "SELECT ct.value, gw.value FROM resources r"
+            " JOIN attributes ct ON ct.resource_id = r.id AND ct.path = 'cloud_type'"
+            " JOIN attributes gw ON gw.resource_id = r.id AND gw.path = 'gw_name'"
+            " WHERE r.type = 'aviatrix_transit_gateway' AND r.mode = 'managed'"
+            " ORDER BY gw.value"
+        )
+        grouped: dict[str, list[str]] = defaultdict(list)
+        for cloud_type, gw_name in rows:
+            grouped[CLOUD_TYPES.get(int(cloud_type), str(cloud_type))].append(gw_name)
+        return dict(grouped)
+
+    def vm_addresses_by_site(self) -> dict[str, list[VMAddress]]:
+        """VM private (and public) IPs grouped by site.
+
+        The site is the innermost string module key of the VM's address
+        (``module.vpc_us_west_2["site-1"]...``), else its top-level module.
+        """
+        grouped: dict[str, list[VMAddress]] = defaultdict(list)
+        for vm_type, (private_path, public_path) in VM_TYPES.items():
+            rows = self.query(
+                "SELECT s.stage, r.module, r.address, r.name, priv.value, pub.value,"
+                " coalesce(tag.value, nm.value)"
+                " FROM resources r JOIN states s ON s.id = r.state_id"
+                " JOIN attributes priv ON priv.resource_id = r.id AND priv.path = ?"
+                " LEFT JOIN attributes pub ON pub.resource_id = r.id AND pub.path = ?"
+                " LEFT JOIN attributes tag"
+                "   ON tag.resource_id = r.id AND tag.path = 'tags.Name'"
+                " LEFT JOIN attributes nm ON nm.resource_id = r.id AND nm.path = 'name'"
+                " WHERE r.type = ? AND r.mode = 'managed' ORDER BY r.address",
+                (private_path, public_path, vm_type),
+            )
+            for stage, module, address, name, private_ip, public_ip, label in rows:
+                site = _site_of(module, stage)
+                grouped[site].append(
+                    VMAddress(
+                        site, address, label or name, private_ip, public_ip or None
+                    )
+                )
+        return dict(grouped)
+
+    def references(
+        self, value: str, types: tuple[str, ...] | None = None
+    ) -> list[Reference]:
+        """Resources with any attribute equal to ``value``.
+
+        Args:
+            value: Attribute value to look for (e.g. a gateway name).
+            types: Restrict to these resource types.
+
+        Returns:
+            Matching (resource, attribute) pairs.
+        """
+        sql = (
+            "SELECT s.stage, r.address, r.type, a.path FROM attributes a"
+            " JOIN resources r ON r.id = a.resource_id"
+            " JOIN states s ON s.id = r.state_id WHERE a.value = ?"
+        )
+        params: tuple = (value,)
+        if types:
+            sql += f" AND r.type IN ({', '.join('?' for _ in types)})"
+            params += tuple(types)
+        sql += " ORDER BY s.stage, r.address, a.path"
+        return [Reference(*row) for row in self.query(sql, params)]
+
+    def peerings_referencing(self, gateway: str) -> list[Reference]:
+        """Peering and attachment resources that reference a gateway name."""
+        return self.references(gateway, PEERING_TYPES)
+
+
+def default_state_files(root: Path = Path(".")) -> list[Path]:
+    """State files of the test stages and the control module deployments."""
+    patterns = (
+        "tests/test_*/terraform.tfstate",
+        "tests/test_*/*/terraform.tfstate",
+        "modules/control/*/terraform.tfstate",
+        "examples/*/terraform.tfstate",
+    )
+    return sorted(path for pattern in patterns for path in root.glob(pattern))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.state_index",
+        description="Index terraform states into SQLite and query them.",
+    )
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB, help="index file")
+    commands = parser.add_subparsers(dest="command", required=True)
+    refresh = commands.add_parser("refresh", help="index changed state files")
+    refresh.add_argument(
+        "states", nargs="*", type=Path, help="state files (default: repo stages)"
+    )
+    commands.add_parser("transit-gateways", help="transit gateways by cloud")
+    commands.add_parser("vm-ips", help="VM IPs per site")
+    peerings = commands.add_parser("peerings", help="peerings referencing a gateway")
+    peerings.add_argument("gateway")
+    outputs = commands.add_parser("outputs", help="outputs of a stage")
+    outputs.add_argument("stage")
+    sql = commands.add_parser("sql", help="run a SQL query")
+    sql.add_argument("query")
+    args = parser.parse_args(argv)
+
+    with StateIndex(args.db) as index:
+        if args.command == "refresh":
+            changed = index.refresh(args.states or default_state_files())
+            for path, updated in changed.items():
+                print(f"{'indexed' if updated else 'unchanged':>9}  {path}")
+        elif args.command == "transit-gateways":
+            for cloud, gateways in index.transit_gateways_by_cloud_type().items():
+                print(f"{cloud}: {', '.join(gateways)}")
+        elif args.command == "vm-ips":
+            for site, vms in index.vm_addresses_by_site().items():
+                for vm in vms:
+                    public = f" (public {vm.public_ip})" if vm.public_ip else ""
+                    print(f"{site}: {vm.name} {vm.private_ip}{public}")
+        elif args.command == "peerings":
+            for ref in index.peerings_referencing(args.gateway):
+                print(f"{ref.stage}: {ref.address} ({ref.attribute})")
+        elif args.command == "outputs":
+            print(json.dumps(index.outputs(args.stage), indent=2))
+        elif args.command == "sql":
+            try:
+                rows = index.query(args.query)
+            except sqlite3.DatabaseError as e:
+                print(f"error: {e}", file=sys.stderr)
+                return 2
+            for row in rows:
+                print("\t".join("" if v is None else str(v) for v in row))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
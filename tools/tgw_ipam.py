@@ -0,0 +1,644 @@
+"""Address allocation for the TGW Connect peers of the AWS transit module.
+
+``modules/control/aws/modules/transit`` connects every transit to each of its
+TGWs with 16 GRE peers, and addresses them in two ways:
+
+- The TGW side uses hosts ``1..16`` of the TGW's first CIDR block, offset by
+  ``4 * <transit index>``. The stride is smaller than the 16 hosts a pair uses,
+  so consecutive transits on one TGW get the same addresses.
+- The transit side uses the ``/29`` link-local blocks in
+  ``transits[*].inside_cidr_blocks``, which must be unique per TGW.
+
+This tool reads the module's tfvars and does the following:
+
+- It reproduces the module's effective addresses (the ``tgw_connect_ips``
+  override where a pair has one, else the computed ones) and reports every
+  collision between them, the ``inside_cidr_blocks``, the transit VPC CIDRs,
+  the TGW CIDR blocks and the external device tunnel ``/30`` blocks.
+- It allocates non-overlapping TGW addresses and writes them as
+  ``tgw_connect_ips``, a variable of the module that overrides the computed
+  addresses. By default, pairs keep their effective addresses where they are
+  free, existing overrides first, so deployed Connect peers are not replaced.
+- It proposes ``/29`` and ``/30`` blocks for missing ``inside_cidr_blocks`` and
+  external device tunnel CIDRs.
+
+Allocation is deterministic: pairs are handled in the module's order (transits
+by key, then TGWs in ``tgw_name`` order), and each takes the lowest free block.
+
+Usage:
+    python -m tools.tgw_ipam aws.tfvars
+    python -m tools.tgw_ipam aws.tfvars --out tgw_connect_ips.tfvars.json
+    python -m tools.tgw_ipam aws.tfvars --current tgw_connect_ips.tfvars.json --check
+    python -m tools.tgw_ipam aws.tfvars --fresh --json
+    python -m tools.tgw_ipam aws.tfvars --check
+"""
+
+import argparse
+import bisect
+import heapq
+import ipaddress
+import json
+import sys
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import hcl2
+
+PEERS_PER_PAIR = 8
+PEER_NAMES = tuple(
+    name
+    for n in range(1, PEERS_PER_PAIR + 1)
+    for name in (f"connect_peer_{n}", f"ha_connect_peer_{n}")
+)
+LEGACY_STRIDE = 4
+
+LINK_LOCAL = ipaddress.ip_network("169.254.0.0/16")
+# Inside CIDR blocks AWS rejects for Connect peers.
+RESERVED_INSIDE_CIDRS = tuple(
+    ipaddress.ip_network(cidr)
+    for cidr in (
+        "169.254.0.0/29",
+        "169.254.1.0/29",
+        "169.254.2.0/29",
+        "169.254.3.0/29",
+        "169.254.4.0/29",
+        "169.254.5.0/29",
+        "169.254.169.248/29",
+    )
+)
+INSIDE_PREFIXLEN = 29
+TUNNEL_PREFIXLEN = 30
+
+
+# -----------------------------------------------------------------------------
+# Interval index
+# -----------------------------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class Interval:
+    """Closed integer range ``[start, end]`` with the thing that uses it."""
+
+    start: int
+    end: int
+    owner: str
+    label: str = ""
+
+    @classmethod
+    def from_network(
+        cls, network: ipaddress.IPv4Network | ipaddress.IPv6Network, owner: str
+    ) -> "Interval":
+        return cls(
+            int(network.network_address),
+            int(network.broadcast_address),
+            owner,
+            str(network),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Collision:
+    """Two intervals of one scope that overlap."""
+
+    scope: str
+    first: Interval
+    second: Interval
+
+    def __str__(self) -> str:
+        return (
+            f"{self.scope}: {self.first.owner} ({self.first.label}) overlaps "
+            f"{self.second.owner} ({self.second.label})"
+        )
+
+
+class IntervalIndex:
+    """Intervals sorted by start, for overlap queries and reports.
+
+    Building is O(n log n); ``collisions`` is a sweep in O(n log n + k) for
+    ``k`` overlapping pairs.
+    """
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self._intervals = sorted(intervals, key=lambda i: (i.start, i.end))
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def collisions(self, scope: str = "") -> list[Collision]:
+        """Every overlapping pair, ordered by start."""
+        found = []
+        active: list[tuple[int, int, Interval]] = []
+        for n, interval in enumerate(self._intervals):
+            while active and active[0][0] < interval.start:
+                heapq.heappop(active)
+            found += [Collision(scope, other, interval) for _, _, other in active]
+            heapq.heappush(active, (interval.end, n, interval))
+        return found
+
+
+class Pool:
+    """Lowest-first allocator of aligned ranges inside ``[low, high]``.
+
+    Used ranges are kept merged and sorted; allocation is a bisect plus a scan
+    from the lowest address the same size could still fit, which only moves up
+    as space is consumed.
+    """
+
+    def __init__(self, low: int, high: int):
+        self.low = low
+        self.high = high
+        self._used: list[tuple[int, int]] = []
+        self._cursor: dict[tuple[int, int], int] = {}
+
+    def is_free(self, start: int, end: int) -> bool:
+        if start < self.low or end > self.high:
+            return False
+        pos = bisect.bisect_right(self._used, (end, float("inf")))
+        return pos == 0 or self._used[pos - 1][1] < start
+
+    def reserve(self, start: int, end: int) -> None:
+        """Mark ``[start, end]`` as used (overlaps are merged)."""
+        pos = bisect.bisect_left(self._used, (start,))
+        if pos and self._used[pos - 1][1] >= start - 1:
+            pos -= 1
+        stop = pos
+        while stop < len(self._used) and self._used[stop][0] <= end + 1:
+            start = min(start, self._used[stop][0])
+            end = max(end, self._used[stop][1])
+            stop += 1
+        self._used[pos:stop] = [(start, end)]
+
+    def next_free(self, size: int, align: int = 1, start: int | None = None):
+        """Lowest free start of ``size`` addresses on a multiple of ``align``,
+        at or above ``start``; None when nothing fits. Reserves nothing."""
+        key = (size, align)
+        cursor = self._cursor.get(key, self.low)
+        begin = cursor if start is None else max(cursor, start)
+        found = begin + -begin % align
+        pos = max(bisect.bisect_right(self._used, (found, float("inf"))) - 1, 0)
+        while found + size - 1 <= self.high:
+            while pos < len(self._used) and self._used[pos][1] < found:
+                pos += 1
+            if pos == len(self._used) or self._used[pos][0] > found + size - 1:
+                break
+            found = self._used[pos][1] + 1
+            found += -found % align
+        else:
+            found = None
+        if begin == cursor:
+            self._cursor[key] = self.high + 1 if found is None else found
+        return found
+
+    def allocate(self, size: int, align: int = 1) -> int | None:
+        """Reserve the lowest free ``size`` addresses starting on a multiple of
+        ``align``; returns the start, or None when the pool is exhausted."""
+        start = self.next_free(size, align)
+        if start is not None:
+            self.reserve(start, start + size - 1)
+        return start
+
+
+def allocate_common(pools: list[Pool], size: int, align: int = 1) -> int | None:
+    """Reserve the lowest range that is free in every pool."""
+    start = max(pool.low for pool in pools)
+    while True:
+        found = [pool.next_free(size, align, start) for pool in pools]
+        if None in found:
+            return None
+        if min(found) == max(found):
+            for pool in pools:
+                pool.reserve(found[0], found[0] + size - 1)
+            return found[0]
+        start = max(found)
+
+
+# -----------------------------------------------------------------------------
+# Module inputs
+# -----------------------------------------------------------------------------
+@dataclass(frozen=True, slots=True)
+class ConnectPair:
+    """One transit/TGW pair (``local.transit_tgw_pairs``)."""
+
+    transit_key: str
+    tgw_name: str
+    transit_index: int
+
+    @property
+    def pair_key(self) -> str:
+        return f"{self.transit_key}.{self.tgw_name}"
+
+
+def _load_tfvars(path: Path | str) -> dict:
+    path = Path(path)
+    with open(path) as f:
+        return json.load(f) if path.suffix == ".json" else hcl2.load(f)
+
+
+@dataclass(slots=True)
+class TransitInputs:
+    """The ``transits``, ``tgws``, ``external_devices`` and ``tgw_connect_ips``
+    variables."""
+
+    transits: dict[str, dict] = field(default_factory=dict)
+    tgws: dict[str, dict] = field(default_factory=dict)
+    external_devices: dict[str, dict] = field(default_factory=dict)
+    connect_ips: dict[str, dict[str, str]] = field(default_factory=dict)
+
+    @classmethod
+    def from_tfvars(
+        cls, path: Path | str, current: Path | str | None = None
+    ) -> "TransitInputs":
+        """Read a ``.tfvars`` or ``.tfvars.json`` file of the AWS module.
+
+        Args:
+            path: The module's tfvars.
+            current: Another var file whose ``tgw_connect_ips`` is applied on
+                top, such as an earlier ``--out`` file.
+        """
+        data = _load_tfvars(path)
+        connect_ips = dict(data.get("tgw_connect_ips") or {})
+        if current is not None:
+            connect_ips.update(_load_tfvars(current).get("tgw_connect_ips") or {})
+        return cls(
+            data.get("transits") or {},
+            data.get("tgws") or {},
+            data.get("external_devices") or {},
+            connect_ips,
+        )
+
+    def pairs(self) -> list[ConnectPair]:
+        """Pairs in the module's order.
+
+        Map variables iterate by key, ``transit_keys`` counts only transits with
+        a ``tgw_name``, and ``tgw_name`` is split on commas.
+
+        Raises:
+            ValueError: If a transit names a TGW missing from ``tgws``.
+        """
+        pairs = []
+        index = 0
+        for key in sorted(self.transits):
+            tgw_name = self.transits[key].get("tgw_name") or ""
+            if not tgw_name:
+                continue
+            for name in tgw_name.split(","):
+                if name not in self.tgws:
+                    raise ValueError(f"Transit {key!r} names unknown TGW {name!r}")
+                pairs.append(ConnectPair(key, name, index))
+            index += 1
+        return pairs
+
+    def tgw_cidr(self, name: str) -> ipaddress.IPv4Network | None:
+        blocks = self.tgws[name].get("transit_gateway_cidr_blocks") or []
+        return ipaddress.ip_network(blocks[0]) if blocks else None
+
+    def effective_connect_ips(self, pair: ConnectPair) -> dict[str, str] | None:
+        """The addresses the module uses: the override, else the computed ones."""
+        if pair.pair_key in self.connect_ips:
+            return self.connect_ips[pair.pair_key]
+        return legacy_connect_ips(pair, self.tgw_cidr(pair.tgw_name))
+
+    def inside_cidrs(self, pair: ConnectPair) -> dict[str, str] | None:
+        blocks = self.transits[pair.transit_key].get("inside_cidr_blocks") or {}
+        return blocks.get(pair.tgw_name)
+
+    def tunnel_cidrs(self) -> Iterator[tuple[str, str, str]]:
+        """(transit key, owner, CIDR) of every external device tunnel CIDR."""
+        for key in sorted(self.external_devices):
+            device = self.external_devices[key]
+            tunnels = ["local_tunnel_cidr", "remote_tunnel_cidr"]
+            if device.get("ha_enabled"):
+                tunnels += ["backup_local_tunnel_cidr", "backup_remote_tunnel_cidr"]
+            for attr in tunnels:
+                for cidr in (device.get(attr) or "").split(","):
+                    if cidr.strip():
+                        yield device["transit_key"], f"{key}.{attr}", cidr.strip()
+
+
+def legacy_connect_ips(
+    pair: ConnectPair, tgw_cidr: ipaddress.IPv4Network | None
+) -> dict[str, str] | None:
+    """The module's computed addresses, or None where it would fail."""
+    if tgw_cidr is None:
+        return None
+    base = pair.transit_index * LEGACY_STRIDE + 1
+    if base + len(PEER_NAMES) - 1 >= tgw_cidr.num_addresses:
+        return None
+    return {
+        name: str(tgw_cidr.network_address + base + n)
+        for n, name in enumerate(PEER_NAMES)
+    }
+
+
+# -----------------------------------------------------------------------------
+# Allocation
+# -----------------------------------------------------------------------------
+@dataclass(slots=True)
+class IpamPlan:
+    """Collisions found in the inputs and the resulting allocation.
+
+    Attributes:
+        collisions: Overlaps among the configured and computed addresses.
+        errors: Pairs the module cannot address (no TGW CIDR, pool exhausted).
+        connect_ips: ``tgw_connect_ips`` value for every addressable pair.
+        moved: Pairs whose TGW addresses differ from their effective ones (the
+            ``tgw_connect_ips`` override, else the computed addresses).
+        inside_cidr_blocks: Proposed blocks for pairs without any, keyed by
+            transit then TGW.
+        tunnel_cidrs: Proposed ``/30`` blocks for external devices, keyed by
+            device then attribute.
+    """
+
+    collisions: list[Collision] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+    connect_ips: dict[str, dict[str, str]] = field(default_factory=dict)
+    moved: list[str] = field(default_factory=list)
+    inside_cidr_blocks: dict[str, dict[str, dict[str, str]]] = field(
+        default_factory=dict
+    )
+    tunnel_cidrs: dict[str, dict[str, str]] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "collisions": [str(c) for c in self.collisions],
+            "errors": self.errors,
+            "moved": self.moved,
+            "tgw_connect_ips": self.connect_ips,
+            "inside_cidr_blocks": self.inside_cidr_blocks,
+            "tunnel_cidrs": self.tunnel_cidrs,
+        }
+
+
+def address_scopes(inputs: TransitInputs) -> dict[str, list[Interval]]:
+    """Configured and computed address blocks, grouped by where they must be
+    unique.
+
+    Scopes:
+        ``fleet``: transit VPC CIDRs and TGW CIDR blocks.
+        ``tgw:<name>``: effective Connect peer addresses and inside blocks of
+            every transit attached to the TGW.
+        ``transit:<key>``: inside blocks and external device tunnel CIDRs on
+            the transit gateway.
+    """
+    scopes: dict[str, list[Interval]] = defaultdict(list)
+    for key in sorted(inputs.transits):
+        if cidr := inputs.transits[key].get("cidr"):
+            net = ipaddress.ip_network(cidr, strict=False)
+            scopes["fleet"].append(Interval.from_network(net, f"transit {key}"))
+    for name in sorted(inputs.tgws):
+        for cidr in inputs.tgws[name].get("transit_gateway_cidr_blocks") or []:
+            net = ipaddress.ip_network(cidr, strict=False)
+            scopes["fleet"].append(Interval.from_network(net, f"tgw {name}"))
+
+    for pair in inputs.pairs():
+        addresses = inputs.effective_connect_ips(pair) or {}
+        for peer, address in addresses.items():
+            value = int(ipaddress.ip_address(address))
+            scopes[f"tgw:{pair.tgw_name}"].append(
+                Interval(value, value, f"{pair.pair_key}.{peer}", address)
+            )
+        for peer, cidr in sorted((inputs.inside_cidrs(pair) or {}).items()):
+            net = ipaddress.ip_network(cidr, strict=False)
+            owner = f"{pair.pair_key}.inside.{peer}"
+            scopes[f"tgw:{pair.tgw_name}"].append(Interval.from_network(net, owner))
+            scopes[f"transit:{pair.transit_key}"].append(
+                Interval.from_network(net, owner)
+            )
+
+    # Both ends of a tunnel sit in the same block; only other tunnels collide.
+    seen = set()
+    for transit_key, owner, cidr in inputs.tunnel_cidrs():
+        net = ipaddress.ip_network(cidr, strict=False)
+        device, attr = owner.split(".", 1)
+        tunnel = f"{device}.{'backup' if attr.startswith('backup') else 'primary'}"
+        if (tunnel, net) not in seen:
+            seen.add((tunnel, net))
+            scopes[f"transit:{transit_key}"].append(
+                Interval.from_network(net, f"{tunnel} tunnel")
+            )
+    return scopes
+
+
+def find_collisions(inputs: TransitInputs) -> list[Collision]:
+    """Overlaps within each scope of ``address_scopes``."""
+    return _collisions(address_scopes(inputs))
+
+
+def _collisions(scopes: dict[str, list[Interval]]) -> list[Collision]:
+    return [
+        c
+        for scope in sorted(scopes)
+        for c in IntervalIndex(scopes[scope]).collisions(scope)
+    ]
+
+
+class _LinkLocalPools(dict):
+    """Per-scope pools of 169.254.0.0/16 without reserved and used blocks."""
+
+    def __init__(self, scopes: dict[str, list[Interval]]):
+        super().__init__()
+        self._scopes = scopes
+
+    def __missing__(self, scope: str) -> Pool:
+        low = int(LINK_LOCAL.network_address)
+        high = int(LINK_LOCAL.broadcast_address)
+        pool = self[scope] = Pool(low, high)
+        for net in RESERVED_INSIDE_CIDRS:
+            pool.reserve(int(net.network_address), int(net.broadcast_address))
+        for interval in self._scopes.get(scope, ()):
+            if low <= interval.start and interval.end <= high:
+                pool.reserve(interval.start, interval.end)
+        return pool
+
+
+def plan_ipam(inputs: TransitInputs, keep_legacy: bool = True) -> IpamPlan:
+    """Allocate Connect peer addresses and missing link-local blocks.
+
+    Pairs keep their effective addresses where those are free: pairs with a
+    ``tgw_connect_ips`` override are placed first, then pairs on the module's
+    computed addresses, so a new transit that shifts the computed indices
+    cannot displace a pair that is already pinned.
+
+    Args:
+        inputs: Module variables.
+        keep_legacy: Keep each pair's effective addresses where they are free,
+            so existing Connect peers stay in place. When False, every pair
+            gets the next 16 free hosts of its TGW block.
+
+    Returns:
+        The plan.
+
+    Raises:
+        ValueError: If a transit names an unknown TGW.
+    """
+    scopes = address_scopes(inputs)
+    plan = IpamPlan(collisions=_collisions(scopes))
+    pairs = inputs.pairs()
+    size = len(PEER_NAMES)
+
+    pools: dict[str, Pool] = {}
+    for name in sorted({p.tgw_name for p in pairs}):
+        if (cidr := inputs.tgw_cidr(name)) is not None:
+            base = int(cidr.network_address)
+            pools[name] = Pool(base + 1, base + cidr.num_addresses - 1)
+
+    pending = []
+    overridden = [p for p in pairs if p.pair_key in inputs.connect_ips]
+    computed = [p for p in pairs if p.pair_key not in inputs.connect_ips]
+    for pair in overridden + computed:
+        current = inputs.effective_connect_ips(pair)
+        pool = pools.get(pair.tgw_name)
+        if pool is None:
+            if keep_legacy and pair.pair_key in inputs.connect_ips:
+                plan.connect_ips[pair.pair_key] = current
+                continue
+            plan.errors.append(
+                f"{pair.pair_key}: TGW {pair.tgw_name!r} has no "
+                "transit_gateway_cidr_blocks"
+            )
+            continue
+        if keep_legacy and current:
+            hosts = [int(ipaddress.ip_address(a)) for a in current.values()]
+            distinct = len(set(hosts)) == len(hosts)
+            if distinct and all(pool.is_free(host, host) for host in hosts):
+                for host in hosts:
+                    pool.reserve(host, host)
+                plan.connect_ips[pair.pair_key] = current
+                continue
+        pending.append((pair, current))
+
+    for pair, current in pending:
+        start = pools[pair.tgw_name].allocate(size)
+        if start is None:
+            plan.errors.append(
+                f"{pair.pair_key}: TGW {pair.tgw_name!r} CIDR block is exhausted"
+            )
+            continue
+        addresses = {
+            name: str(ipaddress.ip_address(start + n))
+            for n, name in enumerate(PEER_NAMES)
+        }
+        plan.connect_ips[pair.pair_key] = addresses
+        if addresses != current:
+            plan.moved.append(pair.pair_key)
+    plan.connect_ips = {
+        p.pair_key: plan.connect_ips[p.pair_key]
+        for p in pairs
+        if p.pair_key in plan.connect_ips
+    }
+
+    # Inside blocks must be unique per TGW and per transit gateway; tunnel
+    # blocks per transit gateway.
+    link_local = _LinkLocalPools(scopes)
+    inside_size = 2 ** (32 - INSIDE_PREFIXLEN)
+    for pair in pairs:
+        if inputs.inside_cidrs(pair) is not None:
+            continue
+        blocks = {}
+        for name in PEER_NAMES:
+            start = allocate_common(
+                [
+                    link_local[f"tgw:{pair.tgw_name}"],
+                    link_local[f"transit:{pair.transit_key}"],
+                ],
+                inside_size,
+                inside_size,
+            )
+            if start is None:
+                plan.errors.append(f"{pair.pair_key}: link-local range exhausted")
+                break
+            blocks[name] = f"{ipaddress.ip_address(start)}/{INSIDE_PREFIXLEN}"
+        plan.inside_cidr_blocks.setdefault(pair.transit_key, {})[pair.tgw_name] = blocks
+
+    tunnel_size = 2 ** (32 - TUNNEL_PREFIXLEN)
+    for key in sorted(inputs.external_devices):
+        device = inputs.external_devices[key]
+        if not device.get("bgp_enabled"):
+            continue
+        tunnels = [("local_tunnel_cidr", "remote_tunnel_cidr")]
+        if device.get("ha_enabled"):
+            tunnels.append(("backup_local_tunnel_cidr", "backup_remote_tunnel_cidr"))
+        for local, remote in tunnels:
+            if device.get(local) or device.get(remote):
+                continue
+            start = link_local[f"transit:{device['transit_key']}"].allocate(
+                tunnel_size, tunnel_size
+            )
+            if start is None:
+                plan.errors.append(f"{key}: link-local range exhausted")
+                continue
+            proposed = plan.tunnel_cidrs.setdefault(key, {})
+            proposed[local] = f"{ipaddress.ip_address(start + 1)}/{TUNNEL_PREFIXLEN}"
+            proposed[remote] = f"{ipaddress.ip_address(start + 2)}/{TUNNEL_PREFIXLEN}"
+    return plan
+
+
+def write_tfvars(plan: IpamPlan, path: Path | str) -> None:
+    """Write ``tgw_connect_ips`` as a ``.tfvars.json`` file."""
+    Path(path).write_text(
+        json.dumps({"tgw_connect_ips": plan.connect_ips}, indent=2) + "\n"
+    )
+
+
+def format_report(plan: IpamPlan) -> str:
+    lines = []
+    for title, items in (
+        ("Collisions", [str(c) for c in plan.collisions]),
+        ("Errors", plan.errors),
+        ("Moved from the computed addresses", plan.moved),
+    ):
+        if items:
+            lines += [f"{title}:", *(f"  {item}" for item in items)]
+    lines.append(f"{len(plan.connect_ips)} transit/TGW pairs addressed")
+    if plan.inside_cidr_blocks:
+        lines.append("Proposed inside_cidr_blocks:")
+        lines.append(json.dumps(plan.inside_cidr_blocks, indent=2))
+    if plan.tunnel_cidrs:
+        lines.append("Proposed external device tunnel CIDRs:")
+        lines.append(json.dumps(plan.tunnel_cidrs, indent=2))
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.tgw_ipam",
+        description="Allocate TGW Connect peer addresses without overlaps.",
+    )
+    parser.add_argument("tfvars", type=Path, help="AWS transit module tfvars")
+    parser.add_argument(
+        "--out", type=Path, help="write tgw_connect_ips to this .tfvars.json"
+    )
+    parser.add_argument(
+        "--current",
+        type=Path,
+        help="var file with the deployed tgw_connect_ips (e.g. an earlier --out)",
+    )
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="reallocate every pair instead of keeping free effective addresses",
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="exit 1 on collisions or errors (for CI)",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        inputs = TransitInputs.from_tfvars(args.tfvars, args.current)
+        plan = plan_ipam(inputs, not args.fresh)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    if args.out:
+        write_tfvars(plan, args.out)
+    print(json.dumps(plan.to_dict(), indent=2) if args.json else format_report(plan))
+    if args.check and (plan.collisions or plan.errors):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())